@@ -91,11 +91,15 @@ fi
 _if_registry="${HOOK_DIR}/../config/flux-drive/model-registry.yaml"
 if [[ -f "$_if_registry" ]] && command -v python3 &>/dev/null; then
   export _FB_REGISTRY_PATH="$_if_registry"
+  export _FB_SCRIPTS="${HOOK_DIR}/../scripts"
   _if_awareness=$(python3 -c "
 import yaml, sys, os
 try:
-    with open(os.environ['_FB_REGISTRY_PATH']) as f:
-        d = yaml.safe_load(f)
+    # Snapshot + event-log replay: event-mode writes (requalification_needed,
+    # status) sit in the log until compaction.
+    sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+    from lib_registry import load_registry_cached
+    d = load_registry_cached(os.environ['_FB_REGISTRY_PATH'])
     models = d.get('models', {}) or {}
     msgs = []
 
@@ -129,7 +133,7 @@ try:
 except Exception:
     pass
 " 2>/dev/null) || _if_awareness=""
-  unset _FB_REGISTRY_PATH
+  unset _FB_REGISTRY_PATH _FB_SCRIPTS
   # Write to log file rather than stderr — stderr in SessionStart hooks becomes
   # a session-prefix attachment (~734b/session of envelope overhead). Curious
   # users can `tail ~/.interflux/fluxbench-awareness.log`.
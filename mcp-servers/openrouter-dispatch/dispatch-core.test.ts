@@ -8,11 +8,16 @@ import {
   DEFAULT_SYSTEM_PROMPT_MAX_CHARS,
   admitAndReserve,
   buildInputSchema,
+  estimateCallTokens,
   loadDispatchConfig,
+  loadRateLimits,
   mergeCommittedMonotonic,
   newLedger,
   reconcile,
+  settleRateTokens,
   totalExposureUsd,
+  tryTakeRate,
+  type RateBuckets,
 } from "./dispatch-core.js";
 import { z } from "zod";
 
@@ -281,3 +286,81 @@ test("monotonicity defends against a same-user reset-to-zero state file", () =>
   mergeCommittedMonotonic(ledger, 0);
   assert.equal(ledger.committedSpendUsd, 12.34);
 });
+
+// ---------------------------------------------------------------------------
+// Rate buckets (mirror of scripts/_rate_limit.py)
+// ---------------------------------------------------------------------------
+
+function freshBuckets(): RateBuckets {
+  return { requests: undefined, tokens: undefined, lastRefill: undefined };
+}
+
+test("loadRateLimits: defaults to 20 req/min and no tokens/min limit", () => {
+  assert.deepEqual(loadRateLimits({}), { requestsPerMin: 20, tokensPerMin: 0 });
+  assert.deepEqual(
+    loadRateLimits({
+      OPENROUTER_RATE_LIMIT: "5",
+      OPENROUTER_TOKENS_PER_MIN: "1000",
+    }),
+    { requestsPerMin: 5, tokensPerMin: 1000 },
+  );
+});
+
+test("estimateCallTokens: ~4 chars/token input plus completion allowance", () => {
+  assert.equal(estimateCallTokens("abcdefgh", "abcd", 100), 103);
+  assert.equal(estimateCallTokens("a", undefined, 0), 1);
+});
+
+test("tryTakeRate: fresh buckets start full and debit both", () => {
+  const b = freshBuckets();
+  const limits = { requestsPerMin: 2, tokensPerMin: 1000 };
+  assert.equal(tryTakeRate(b, limits, 400, 0), 0);
+  assert.equal(b.requests, 1);
+  assert.equal(b.tokens, 600);
+});
+
+test("tryTakeRate: requests bucket exhaustion returns wait and debits nothing", () => {
+  const b = freshBuckets();
+  const limits = { requestsPerMin: 1, tokensPerMin: 0 };
+  assert.equal(tryTakeRate(b, limits, 0, 0), 0);
+  const wait = tryTakeRate(b, limits, 0, 0);
+  assert.equal(wait, 60000);
+  assert.equal(b.requests, 0);
+  // Refills continuously: a full minute later one request is available again.
+  assert.equal(tryTakeRate(b, limits, 0, 60000), 0);
+});
+
+test("tryTakeRate: tokens bucket gates independently of requests", () => {
+  const b = freshBuckets();
+  const limits = { requestsPerMin: 100, tokensPerMin: 1000 };
+  assert.equal(tryTakeRate(b, limits, 900, 0), 0);
+  const wait = tryTakeRate(b, limits, 400, 0);
+  assert.equal(wait, 18000); // 300 tokens short at 1000/min
+  assert.equal(b.tokens, 100);
+  assert.equal(b.requests, 99);
+});
+
+test("tryTakeRate: oversized estimate is clamped to capacity", () => {
+  const b = freshBuckets();
+  const limits = { requestsPerMin: 0, tokensPerMin: 1000 };
+  assert.equal(tryTakeRate(b, limits, 50_000, 0), 0);
+  assert.equal(b.tokens, 0);
+});
+
+test("settleRateTokens: refunds over-estimates, records under-estimate debt", () => {
+  const limits = { requestsPerMin: 0, tokensPerMin: 1000 };
+  const b = freshBuckets();
+  tryTakeRate(b, limits, 500, 0);
+  settleRateTokens(b, limits, 500, 200);
+  assert.equal(b.tokens, 800);
+  settleRateTokens(b, limits, 0, 5000);
+  assert.equal(b.tokens, -1000); // debt floored at -capacity
+});
+
+test("settleRateTokens: refunds only the clamped debit for an oversized estimate", () => {
+  const limits = { requestsPerMin: 0, tokensPerMin: 30_000 };
+  const b = freshBuckets();
+  assert.equal(tryTakeRate(b, limits, 100_000, 0), 0);
+  settleRateTokens(b, limits, 100_000, 20_000);
+  assert.equal(b.tokens, 10_000);
+});
@@ -235,3 +235,122 @@ export function reconcile(
       : estimate;
   ledger.committedSpendUsd += debit;
 }
+
+// ---------------------------------------------------------------------------
+// Rate buckets: requests/min + tokens/min
+//
+// Mirrors scripts/_rate_limit.py exactly — flux-dispatch.sh acquire and this
+// server debit the SAME persisted buckets in openrouter-state.json, so the
+// arithmetic must agree on both sides:
+//   - both buckets refill continuously from one shared lastRefill timestamp;
+//   - a missing bucket starts full (fresh state never stalls the first call);
+//   - a call is admitted only when BOTH buckets can pay, else nothing is debited;
+//   - a token estimate above the per-minute capacity is clamped to capacity;
+//   - settling actual usage refunds over-estimates and turns under-estimates
+//     into debt (negative bucket, floored at -capacity).
+// A limit <= 0 disables that bucket.
+// ---------------------------------------------------------------------------
+
+export type RateLimits = {
+  requestsPerMin: number;
+  tokensPerMin: number;
+};
+
+export type RateBuckets = {
+  /** Requests bucket (persisted as `tokenBucket` for backward compatibility). */
+  requests: number | undefined;
+  /** Tokens bucket (persisted as `tpmBucket`). */
+  tokens: number | undefined;
+  lastRefill: number | undefined;
+};
+
+/** Read OPENROUTER_RATE_LIMIT / OPENROUTER_TOKENS_PER_MIN (tokens: 0 = disabled).
+ * scripts/launch-openrouter.sh resolves both with _rate_limit.load_limits, so
+ * model-registry.yaml providers.openrouter.{rate_limit,tokens_per_min} applies
+ * here exactly as it does to flux-dispatch.sh; 20 req/min is the fallback only
+ * when neither env nor registry sets a limit. */
+export function loadRateLimits(env: NodeJS.ProcessEnv = process.env): RateLimits {
+  return {
+    requestsPerMin: parsePositiveFloat(env.OPENROUTER_RATE_LIMIT, 20),
+    tokensPerMin: parsePositiveFloat(env.OPENROUTER_TOKENS_PER_MIN, 0),
+  };
+}
+
+/** Rough token estimate for admission: ~4 chars/token of input plus the full
+ * completion allowance. Settled against real usage after the call. */
+export function estimateCallTokens(
+  prompt: string,
+  systemPrompt: string | undefined,
+  maxTokens: number,
+): number {
+  const chars = prompt.length + (systemPrompt?.length ?? 0);
+  return Math.ceil(chars / 4) + maxTokens;
+}
+
+export function refillRateBuckets(
+  b: RateBuckets,
+  limits: RateLimits,
+  now: number,
+): void {
+  const elapsed =
+    typeof b.lastRefill === "number" ? Math.max(0, now - b.lastRefill) : 0;
+  if (limits.requestsPerMin > 0) {
+    const cap = limits.requestsPerMin;
+    const cur = typeof b.requests === "number" ? Math.min(cap, b.requests) : cap;
+    b.requests = Math.min(cap, cur + (elapsed * cap) / 60000);
+  }
+  if (limits.tokensPerMin > 0) {
+    const cap = limits.tokensPerMin;
+    const cur = typeof b.tokens === "number" ? Math.min(cap, b.tokens) : cap;
+    b.tokens = Math.min(cap, cur + (elapsed * cap) / 60000);
+  }
+  b.lastRefill = now;
+}
+
+/** Refill, then debit one request and `tokens` tokens if both buckets can pay.
+ * Returns 0 when admitted, otherwise the ms until both buckets could pay
+ * (buckets untouched). MUST be called inside the state lock. */
+export function tryTakeRate(
+  b: RateBuckets,
+  limits: RateLimits,
+  tokens: number,
+  now: number,
+): number {
+  refillRateBuckets(b, limits, now);
+  let waitMs = 0;
+  if (limits.requestsPerMin > 0) {
+    const deficit = 1 - (b.requests as number);
+    if (deficit > 0)
+      waitMs = Math.max(waitMs, (deficit * 60000) / limits.requestsPerMin);
+  }
+  let need = 0;
+  if (limits.tokensPerMin > 0) {
+    need = Math.min(Math.max(0, tokens), limits.tokensPerMin);
+    const deficit = need - (b.tokens as number);
+    if (deficit > 0)
+      waitMs = Math.max(waitMs, (deficit * 60000) / limits.tokensPerMin);
+  }
+  if (waitMs > 0) return waitMs;
+  if (limits.requestsPerMin > 0) b.requests = (b.requests as number) - 1;
+  if (limits.tokensPerMin > 0) b.tokens = (b.tokens as number) - need;
+  return 0;
+}
+
+/** Correct the tokens bucket once real usage is known. MUST be called inside
+ * the state lock, with the SAME estimate passed to tryTakeRate. */
+export function settleRateTokens(
+  b: RateBuckets,
+  limits: RateLimits,
+  estimated: number,
+  actual: number,
+): void {
+  if (limits.tokensPerMin <= 0) return;
+  const cap = limits.tokensPerMin;
+  const cur = typeof b.tokens === "number" ? b.tokens : cap;
+  // tryTakeRate debited at most `cap`; refund against that, not the raw estimate.
+  const debited = Math.min(Math.max(0, estimated), cap);
+  b.tokens = Math.max(
+    -cap,
+    Math.min(cap, cur + debited - Math.max(0, actual)),
+  );
+}
@@ -6,11 +6,16 @@ import * as os from "node:os";
 import {
   admitAndReserve,
   buildInputSchema,
+  estimateCallTokens,
   loadDispatchConfig,
+  loadRateLimits,
   mergeCommittedMonotonic,
   newLedger,
   reconcile,
+  settleRateTokens,
+  tryTakeRate,
   type DispatchInput,
+  type RateBuckets,
 } from "./dispatch-core.js";
 
 const API_KEY = process.env.OPENROUTER_API_KEY;
@@ -27,7 +32,7 @@ if (!API_KEY) {
   process.exit(78);
 }
 
-const RATE_LIMIT = parseInt(process.env.OPENROUTER_RATE_LIMIT || "20", 10);
+const RATE_LIMITS = loadRateLimits();
 const SPEND_CEILING = parseFloat(
   process.env.OPENROUTER_SPEND_CEILING_USD || "0",
 );
@@ -39,7 +44,13 @@ const config = loadDispatchConfig();
 // budget. Without persistence each session saw the full RATE_LIMIT and
 // SPEND_CEILING independently — at scale the ceiling became effectively
 // unbounded (blueprint §8 risk 4, phase2.3 A-P1-5).
-const STATE_DIR = path.join(os.homedir(), ".config", "interflux");
+//
+// The rate buckets in this file are ALSO debited by scripts/_rate_limit.py
+// (flux-dispatch.sh acquire with FLUX_DISPATCH_PROVIDER=openrouter), which
+// speaks the same lock protocol below — keep the constants in sync.
+const STATE_DIR =
+  process.env.INTERFLUX_STATE_DIR ||
+  path.join(os.homedir(), ".config", "interflux");
 const STATE_FILE = path.join(STATE_DIR, "openrouter-state.json");
 const LOCK_FILE = `${STATE_FILE}.lock`;
 const LOCK_WAIT_MS = 30_000;
@@ -47,15 +58,25 @@ const LOCK_POLL_MS = 25;
 const LOCK_STALE_MS = 60_000;
 
 type PersistedState = {
-  tokenBucket: number;
-  lastRefill: number;
+  tokenBucket?: number;
+  tpmBucket?: number;
+  lastRefill?: number;
   cumulativeSpendUsd: number;
   updatedAt: string;
 };
 
-const refillRate = RATE_LIMIT / 60000; // tokens per ms
-let tokenBucket = RATE_LIMIT;
-let lastRefill = Date.now();
+// Requests/min + tokens/min buckets (see dispatch-core.ts § Rate buckets).
+// Reloaded from disk inside every state lock, so they reflect debits made by
+// other MCP instances and by flux-dispatch.sh.
+const rate: RateBuckets = {
+  requests: undefined,
+  tokens: undefined,
+  lastRefill: undefined,
+};
+
+// Keys written by other state-file writers that this server does not model;
+// carried through saveState so a write here never drops them.
+let foreignState: Record<string, unknown> = {};
 
 // Spend is tracked as a committed/reserved ledger (see dispatch-core.ts). Only
 // committedSpendUsd is persisted; reservations are process-local, in-flight holds
@@ -107,9 +128,10 @@ async function loadState(): Promise<void> {
   try {
     const raw = await fs.readFile(STATE_FILE, "utf8");
     const parsed = JSON.parse(raw) as Partial<PersistedState>;
-    if (typeof parsed.tokenBucket === "number")
-      tokenBucket = Math.min(RATE_LIMIT, parsed.tokenBucket);
-    if (typeof parsed.lastRefill === "number") lastRefill = parsed.lastRefill;
+    foreignState = parsed as Record<string, unknown>;
+    if (typeof parsed.tokenBucket === "number") rate.requests = parsed.tokenBucket;
+    if (typeof parsed.tpmBucket === "number") rate.tokens = parsed.tpmBucket;
+    if (typeof parsed.lastRefill === "number") rate.lastRefill = parsed.lastRefill;
     if (typeof parsed.cumulativeSpendUsd === "number")
       // Monotonic merge: a same-user local process (or a rolled-back state file)
       // cannot lower the committed ledger to reclaim budget.
@@ -128,8 +150,10 @@ async function loadState(): Promise<void> {
 
 async function saveState(): Promise<void> {
   const payload: PersistedState = {
-    tokenBucket,
-    lastRefill,
+    ...foreignState,
+    tokenBucket: rate.requests,
+    tpmBucket: rate.tokens,
+    lastRefill: rate.lastRefill,
     // Persist only committed spend. Outstanding reservations are process-local
     // and would be double-counted if shared; they reconcile to committed on
     // call completion.
@@ -154,18 +178,6 @@ async function withStateLock<T>(fn: () => Promise<T> | T): Promise<T> {
   }
 }
 
-function tryAcquireInMemory(): boolean {
-  const now = Date.now();
-  const elapsed = now - lastRefill;
-  tokenBucket = Math.min(RATE_LIMIT, tokenBucket + elapsed * refillRate);
-  lastRefill = now;
-  if (tokenBucket >= 1) {
-    tokenBucket -= 1;
-    return true;
-  }
-  return false;
-}
-
 // Prime from disk on startup so a restart inherits the ongoing budget.
 await withStateLock(async () => {});
 
@@ -184,12 +196,13 @@ server.tool(
     // check/act window: concurrent admissions each see prior reservations, so
     // they cannot collectively overshoot the ceiling by in-flight concurrency.
     const estimate = config.estimatedCallCostUsd;
+    const tokenEstimate = estimateCallTokens(prompt, system_prompt, max_tokens);
     const acquired = await withStateLock(() => {
       const admit = admitAndReserve(ledger, SPEND_CEILING, estimate);
       if (!admit.ok) {
         return { ok: false as const, kind: "spend" as const };
       }
-      if (!tryAcquireInMemory()) {
+      if (tryTakeRate(rate, RATE_LIMITS, tokenEstimate, Date.now()) > 0) {
         // Roll back the reservation we just took — the call won't proceed.
         // Debiting 0 actual releases the held reservation and leaves committed
         // spend unchanged, so a rate-limited call costs no budget.
@@ -206,7 +219,7 @@ server.tool(
             type: "text" as const,
             text: JSON.stringify({
               error: "rate_limited",
-              message: `Rate limit exceeded (${RATE_LIMIT}/min). Try again shortly.`,
+              message: `Rate limit exceeded (${RATE_LIMITS.requestsPerMin} req/min, ${RATE_LIMITS.tokensPerMin || "unlimited"} tokens/min). Try again shortly.`,
             }),
           },
         ],
@@ -232,6 +245,7 @@ server.tool(
     // From here the reservation is held; it MUST be reconciled on every exit
     // path below so a thrown error or HTTP failure never leaks a reservation.
     let actualCost: number | undefined;
+    let actualTokens: number | undefined;
     try {
       const startMs = Date.now();
       const messages: Array<{ role: string; content: string }> = [];
@@ -288,6 +302,7 @@ server.tool(
       const tokensUsed =
         (data.usage?.prompt_tokens ?? 0) +
         (data.usage?.completion_tokens ?? 0);
+      if (data.usage) actualTokens = tokensUsed;
       // A response WITHOUT a usable total_cost is still billed — leave
       // actualCost undefined so reconcile() debits the conservative estimate,
       // never zero (which would drift the ceiling upward over time).
@@ -312,8 +327,12 @@ server.tool(
     } finally {
       // Always release the reservation and debit the actual (or conservative)
       // cost, regardless of how the call exited.
+      // Token usage is settled the same way: an unknown count keeps the
+      // estimate debited.
       await withStateLock(() => {
         reconcile(ledger, estimate, actualCost, CEILING_ENABLED);
+        if (actualTokens !== undefined)
+          settleRateTokens(rate, RATE_LIMITS, tokenEstimate, actualTokens);
       });
     }
   },
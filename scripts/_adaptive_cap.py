@@ -0,0 +1,398 @@
+"""Adaptive concurrency controller for agent dispatch (gradient2-style).
+
+flux-backoff.sh only moves `.dispatch-cap` on explicit signals: `decrease` on a
+classified 429, and an `increase` the orchestrator must remember to invoke after
+a clean wave. Between those events the cap is frozen, even when agent latency
+is telling us the provider is saturating (latency climbs well before 429s
+start) or has headroom again (latency back at baseline).
+
+This module closes that loop with a latency-gradient controller modelled on
+Netflix concurrency-limits' Gradient2 (itself a TCP Vegas descendant):
+
+    short_rtt  — EMA of recent agent completion latencies (short window)
+    long_rtt   — EMA over the run (long window); the "uncongested" baseline
+    gradient   = clamp(tolerance * long_rtt / short_rtt, 0.5, 1.0)
+    target     = limit * gradient + queue_size
+    limit      = (1 - smoothing) * limit + smoothing * target
+
+Latency at or under `tolerance` x baseline gives gradient 1.0 and the limit
+grows by ~queue_size per sample; latency above it shrinks the limit in
+proportion. A timed-out agent (`--dropped`) is treated as maximal congestion
+(gradient 0.5). Growth is suppressed while fewer than half the slots are in
+use (app-limited: the cap is not what bounds throughput, so raising it proves
+nothing). When long_rtt exceeds 2x short_rtt the baseline decays 5% per sample
+so it can follow a genuine latency improvement down.
+
+Samples come from `flux-dispatch.sh wait`, which already blocks on each
+agent's terminal `.md` — the elapsed time from dispatch to `.md` appearance is
+the per-agent completion latency. The controller writes floor(limit) to the
+same `{OUTPUT_DIR}/.dispatch-cap` flux-backoff.sh uses, under the same fd-204
+dispatch-slots lock, and the cap stays bounded by the base cap
+(`flux-dispatch.sh maxcap`): the file is removed once the limit recovers to
+it. A lower cap written by `flux-backoff.sh decrease` is adopted as the
+controller's limit on the next sample, so the two compose.
+
+Every change of the integer cap is appended to `{OUTPUT_DIR}/decisions.log`
+(decision_type `concurrency`) with the gradient, RTTs and in-flight count.
+
+Controller state lives in `{OUTPUT_DIR}/.dispatch-adaptive.json` and is reset
+by `flux-dispatch.sh reset`.
+
+Tunables (budget.yaml `dispatch.adaptive.*`; env FLUX_ADAPTIVE_CAP=0|1
+overrides `enabled`):
+    enabled       true
+    smoothing     0.5   — per-sample blend; high because a run yields tens of
+                          samples, not the thousands gradient2 assumes
+    tolerance     1.5   — latency inflation tolerated before shrinking
+    short_window  3     — samples in the short EMA
+    long_window   20    — samples in the long EMA
+    queue_size    1     — additive headroom per sample
+The floor is `dispatch.backoff.min_effective_cap` (default 1).
+
+CLI (used by flux-dispatch.sh wait):
+    python3 _adaptive_cap.py sample <output_dir> <agent> <latency_secs>
+        [--base-max N] [--dropped]
+    python3 _adaptive_cap.py show <output_dir>
+
+`sample` prints the resulting effective cap. Exit codes: 0 ok (including the
+disabled no-op), 4 invalid invocation, 99 dispatch lock timeout.
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from _decisions_log import log_decision  # noqa: E402
+
+_PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = str(_PLUGIN_ROOT / "config" / "flux-drive" / "budget.yaml")
+
+STATE_FILENAME = ".dispatch-adaptive.json"
+CAP_FILENAME = ".dispatch-cap"
+SLOTS_FILENAME = ".dispatch-slots"
+LOCK_FILENAME = ".dispatch-slots.lock"  # shared fd-204 domain
+
+DEFAULT_BASE_MAX = 6
+LOCK_FALLBACK_TIMEOUT = float(os.environ.get("FLUX_LOCK_FALLBACK_TIMEOUT", "30"))
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_adaptive_cap] {msg % args}", file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class AdaptiveConfig:
+    enabled: bool = True
+    smoothing: float = 0.5
+    tolerance: float = 1.5
+    short_window: int = 3
+    long_window: int = 20
+    queue_size: float = 1.0
+    min_cap: int = 1
+
+
+@dataclass
+class ControllerState:
+    limit: float
+    short_rtt: float = 0.0
+    long_rtt: float = 0.0
+    samples: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], default_limit: float) -> "ControllerState":
+        try:
+            return cls(
+                limit=float(data.get("limit", default_limit)),
+                short_rtt=float(data.get("short_rtt", 0.0)),
+                long_rtt=float(data.get("long_rtt", 0.0)),
+                samples=int(data.get("samples", 0)),
+            )
+        except (TypeError, ValueError) as exc:
+            _debug("state: malformed, restarting: %s", exc)
+            return cls(limit=default_limit)
+
+
+def load_config(budget_path: str | None = None) -> AdaptiveConfig:
+    """Read dispatch.adaptive (+ backoff.min_effective_cap) from budget.yaml."""
+    path = budget_path or os.environ.get("BUDGET_CONFIG") or DEFAULT_BUDGET
+    dispatch: dict[str, Any] = {}
+    try:
+        with open(path) as fh:
+            data = yaml.safe_load(fh) or {}
+        dispatch = data.get("dispatch") or {}
+    except (OSError, yaml.YAMLError) as exc:
+        _debug("config: %s unreadable, using defaults: %s", path, exc)
+    node = dispatch.get("adaptive") or {}
+    backoff = dispatch.get("backoff") or {}
+    base = AdaptiveConfig()
+
+    def pick(key: str, default: float, lo: float, hi: float = math.inf) -> float:
+        val = node.get(key)
+        if isinstance(val, (int, float)) and not isinstance(val, bool) and lo <= val <= hi:
+            return val
+        return default
+
+    enabled = node.get("enabled", base.enabled)
+    env = os.environ.get("FLUX_ADAPTIVE_CAP")
+    if env in ("0", "1"):
+        enabled = env == "1"
+    min_cap = backoff.get("min_effective_cap", base.min_cap)
+    return AdaptiveConfig(
+        enabled=bool(enabled),
+        smoothing=pick("smoothing", base.smoothing, 0.01, 1.0),
+        tolerance=pick("tolerance", base.tolerance, 1.0),
+        short_window=int(pick("short_window", base.short_window, 1)),
+        long_window=int(pick("long_window", base.long_window, 1)),
+        queue_size=pick("queue_size", base.queue_size, 0.0),
+        min_cap=int(min_cap) if isinstance(min_cap, int) and min_cap > 0 else base.min_cap,
+    )
+
+
+def update(
+    state: ControllerState,
+    cfg: AdaptiveConfig,
+    latency: float,
+    *,
+    inflight: int,
+    base_max: int,
+    dropped: bool = False,
+) -> float:
+    """Fold one latency sample into `state` and return the gradient applied.
+
+    Pure apart from mutating `state`; the caller decides what to persist.
+    """
+    latency = max(latency, 1e-3)
+    if state.samples == 0:
+        state.short_rtt = state.long_rtt = latency
+    else:
+        a_short = 2.0 / (cfg.short_window + 1)
+        a_long = 2.0 / (cfg.long_window + 1)
+        state.short_rtt += a_short * (latency - state.short_rtt)
+        state.long_rtt += a_long * (latency - state.long_rtt)
+        if state.long_rtt > 2.0 * state.short_rtt:
+            state.long_rtt *= 0.95
+    state.samples += 1
+
+    if dropped:
+        gradient = 0.5
+    else:
+        gradient = max(0.5, min(1.0, cfg.tolerance * state.long_rtt / state.short_rtt))
+
+    limit = state.limit
+    if gradient >= 1.0 and inflight < limit / 2:
+        # App-limited: the cap isn't what's bounding throughput right now.
+        return gradient
+    target = limit * gradient + cfg.queue_size
+    limit = (1.0 - cfg.smoothing) * limit + cfg.smoothing * target
+    state.limit = max(float(cfg.min_cap), min(float(base_max), limit))
+    return gradient
+
+
+def effective_cap(limit: float, cfg: AdaptiveConfig, base_max: int) -> int:
+    """Integer cap for a continuous limit (floor — never round a slot up)."""
+    return max(cfg.min_cap, min(base_max, int(math.floor(limit + 1e-9))))
+
+
+# --- fd-204 lock (mirrors lib-lock.sh) ------------------------------------
+
+
+@contextmanager
+def _dispatch_lock(lock_path: str) -> Iterator[None]:
+    """Exclusive lock on the dispatch-slots domain.
+
+    Same hybrid as lib-lock.sh: flock(2) where flock(1) exists (the shell side
+    locks the same file), otherwise the `<lock>.d` mkdir spin-lock with
+    dead-holder stealing, so Python and shell serialize on both platforms.
+    """
+    if shutil.which("flock"):
+        with open(lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+        return
+
+    lock_d = f"{lock_path}.d"
+    deadline = time.monotonic() + LOCK_FALLBACK_TIMEOUT
+    while True:
+        try:
+            os.mkdir(lock_d)
+            break
+        except FileExistsError:
+            try:
+                holder = int(Path(lock_d, "pid").read_text().strip())
+                os.kill(holder, 0)
+            except ProcessLookupError:
+                shutil.rmtree(lock_d, ignore_errors=True)
+                continue
+            except (OSError, ValueError):
+                pass
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{lock_d}: lock wait exceeded {LOCK_FALLBACK_TIMEOUT:.0f}s")
+            time.sleep(0.1)
+    try:
+        Path(lock_d, "pid").write_text(f"{os.getpid()}\n")
+        yield
+    finally:
+        shutil.rmtree(lock_d, ignore_errors=True)
+
+
+def _read_int(path: str) -> int | None:
+    try:
+        text = Path(path).read_text().strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def sample(
+    output_dir: str,
+    agent: str,
+    latency: float,
+    *,
+    base_max: int = DEFAULT_BASE_MAX,
+    dropped: bool = False,
+    cfg: AdaptiveConfig | None = None,
+) -> int:
+    """Record one completion latency and move `.dispatch-cap` accordingly.
+
+    Returns the effective cap after the update. No-op (returns the current
+    effective cap) when the controller is disabled.
+    """
+    cfg = cfg or load_config()
+    out = Path(output_dir)
+    cap_path = str(out / CAP_FILENAME)
+    if not cfg.enabled:
+        cur = _read_int(cap_path)
+        return min(base_max, cur) if cur else base_max
+
+    out.mkdir(parents=True, exist_ok=True)
+    state_path = out / STATE_FILENAME
+    with _dispatch_lock(str(out / LOCK_FILENAME)):
+        try:
+            raw = json.loads(state_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            raw = {}
+        state = ControllerState.from_dict(raw if isinstance(raw, dict) else {}, float(base_max))
+
+        file_cap = _read_int(cap_path)
+        old_cap = min(base_max, file_cap) if file_cap else base_max
+        # A flux-backoff.sh decrease since our last sample wins.
+        if effective_cap(state.limit, cfg, base_max) > old_cap:
+            state.limit = float(old_cap)
+
+        inflight = _read_int(str(out / SLOTS_FILENAME)) or 0
+        gradient = update(state, cfg, latency, inflight=inflight,
+                          base_max=base_max, dropped=dropped)
+        new_cap = effective_cap(state.limit, cfg, base_max)
+        if new_cap >= base_max:
+            Path(cap_path).unlink(missing_ok=True)
+        else:
+            Path(cap_path).write_text(f"{new_cap}\n")
+        state_path.write_text(json.dumps(asdict(state), sort_keys=True) + "\n")
+
+    if new_cap != old_cap:
+        direction = "raised" if new_cap > old_cap else "lowered"
+        log_decision(
+            "adaptive-cap",
+            f"cap {direction} {old_cap} -> {new_cap} after {agent} "
+            f"({'timed out' if dropped else f'{latency:.1f}s'}, gradient {gradient:.2f})",
+            decision_type="concurrency",
+            output_dir=output_dir,
+            old_cap=old_cap,
+            new_cap=new_cap,
+            base_max=base_max,
+            agent=agent,
+            latency_s=round(latency, 3),
+            dropped=dropped,
+            gradient=round(gradient, 4),
+            short_rtt_s=round(state.short_rtt, 3),
+            long_rtt_s=round(state.long_rtt, 3),
+            limit=round(state.limit, 4),
+            inflight=inflight,
+        )
+    return new_cap
+
+
+# --- CLI ------------------------------------------------------------------
+
+
+def _cli_sample(args: argparse.Namespace) -> int:
+    cap = sample(args.output_dir, args.agent, args.latency,
+                 base_max=args.base_max, dropped=args.dropped)
+    print(cap)
+    return 0
+
+
+def _cli_show(args: argparse.Namespace) -> int:
+    path = Path(args.output_dir) / STATE_FILENAME
+    try:
+        print(path.read_text().strip())
+    except OSError:
+        print("{}")
+    return 0
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return n
+
+
+def _non_negative(value: str) -> float:
+    n = float(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return n
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="_adaptive_cap",
+        description="Latency-gradient concurrency controller for .dispatch-cap.",
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("sample", help="Record one agent completion latency")
+    sp.add_argument("output_dir")
+    sp.add_argument("agent")
+    sp.add_argument("latency", type=_non_negative, help="seconds from dispatch to .md")
+    sp.add_argument("--base-max", type=_positive_int, default=DEFAULT_BASE_MAX)
+    sp.add_argument("--dropped", action="store_true",
+                    help="agent timed out; treat as maximal congestion")
+    sp.set_defaults(func=_cli_sample)
+
+    sh = sub.add_parser("show", help="Print controller state JSON")
+    sh.add_argument("output_dir")
+    sh.set_defaults(func=_cli_show)
+
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as exc:
+        return 4 if exc.code else 0
+    try:
+        return args.func(args)
+    except TimeoutError as exc:
+        print(f"_adaptive_cap: {exc}", file=sys.stderr)
+        return 99
+
+
+if __name__ == "__main__":
+    sys.exit(main())
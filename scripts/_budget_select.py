@@ -0,0 +1,330 @@
+"""Budget-optimal agent selection (SKILL.md Step 1.2c) as a 0/1 knapsack.
+
+references/budget.md used to describe a greedy cut: Stage 1 is protected,
+then Stage 2 agents are added in score order until the next one no longer
+fits. Greedy-by-score strands budget — one expensive 5-score agent can
+block two cheap 4-score agents that together cover more. This module
+solves the cut exactly and deterministically:
+
+* **Forced** (always selected, even over budget): Stage 1 agents, agents
+  listed in budget.yaml `exempt_agents`, and fd-safety on ship-class inputs
+  (promoted to Stage 1, as SKILL.md's mandatory rung requires).
+* **Optional**: the remaining Stage 2 agents with score > 0 (score 0 means
+  excluded by triage; bonuses can't override it). Among every subset whose
+  cost fits `budget − forced cost`, pick the one with the largest summed
+  triage score (0–8 scale); ties go to the cheaper subset.
+* **min_agents**: if the forced set is smaller than `min_agents`, the
+  optimum is taken over subsets large enough to make up the difference. If
+  no such subset fits, the highest-scoring agents are added over budget —
+  the greedy rule's behaviour, kept so small budgets still get a review.
+
+The DP runs over integer score units (SCORE_STEPS per point) rather than
+token capacity, so costs are exact and the table stays small (≤ 8 ×
+SCORE_STEPS × candidates).
+
+For each agent left out by the budget the result reports its marginal
+value: `score_delta`, the change in total score if it were forced in under
+the same budget (≤ 0), and `extra_tokens`, the budget increase at which a
+set containing it would score at least as well as the current optimum.
+
+Costs come from each candidate's `est_tokens` when present, otherwise from
+`_cost_predictor` p50 (which itself falls back to budget.yaml defaults).
+
+CLI:
+    python3 _budget_select.py select --input-type plan [--candidates FILE|-]
+        [--budget N] [--budget-file P] [--project-root DIR] [--ship-class]
+        [--model M] [--input-lines N] [--slicing] [--roots DIR ...]
+
+Candidates are a JSON list (or {"agents": [...]}) of
+    {"name": "fd-perf", "score": 4.5, "stage": 2, "est_tokens": 38000}
+
+Exit codes:
+    0  selection printed
+    2  unreadable / malformed candidates or unknown input type
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import _cost_predictor  # noqa: E402
+
+_PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = str(_PLUGIN_ROOT / "config" / "flux-drive" / "budget.yaml")
+PROJECT_OVERRIDE = os.path.join(".claude", "flux-drive-budget.yaml")
+
+SCORE_STEPS = 10
+DEFAULT_MIN_AGENTS = 2
+SHIP_CLASS_AGENT = "fd-safety"
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_budget_select] {msg % args}", file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class BudgetConfig:
+    budgets: dict[str, int] = field(default_factory=dict)
+    min_agents: int = DEFAULT_MIN_AGENTS
+    exempt_agents: frozenset[str] = frozenset()
+
+
+def load_config(budget_path: str | None = None, project_root: str | None = None) -> BudgetConfig:
+    """budget.yaml, or the project-level override when one exists."""
+    path = budget_path or DEFAULT_BUDGET
+    if project_root and os.path.isfile(os.path.join(project_root, PROJECT_OVERRIDE)):
+        path = os.path.join(project_root, PROJECT_OVERRIDE)
+    try:
+        with open(path) as fh:
+            data = yaml.safe_load(fh) or {}
+    except (OSError, yaml.YAMLError) as exc:
+        _debug("config: %s unreadable, using defaults: %s", path, exc)
+        data = {}
+    budgets = {str(k): int(v) for k, v in (data.get("budgets") or {}).items()
+               if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    min_agents = data.get("min_agents", DEFAULT_MIN_AGENTS)
+    return BudgetConfig(
+        budgets=budgets,
+        min_agents=min_agents if isinstance(min_agents, int) and min_agents >= 0 else DEFAULT_MIN_AGENTS,
+        exempt_agents=frozenset(str(a) for a in data.get("exempt_agents") or []),
+    )
+
+
+def effective_budget(config: BudgetConfig, input_type: str) -> int:
+    """budgets.<type>, capped by FLUX_BUDGET_REMAINING (sprint budget). Raises KeyError."""
+    budget = config.budgets[input_type]
+    try:
+        remaining = int(os.environ.get("FLUX_BUDGET_REMAINING", "0"))
+    except ValueError:
+        remaining = 0
+    return min(budget, remaining) if remaining > 0 else budget
+
+
+@dataclass(frozen=True)
+class Candidate:
+    name: str
+    score: float
+    stage: int
+    cost: int
+
+    @property
+    def units(self) -> int:
+        return max(0, round(self.score * SCORE_STEPS))
+
+    def as_dict(self, **extra: Any) -> dict[str, Any]:
+        return {"name": self.name, "score": self.score, "stage": self.stage,
+                "est_tokens": self.cost, **extra}
+
+
+# --- knapsack ----------------------------------------------------------------
+
+# State key: (score units, count capped at `need`); value: (cost, chosen indices).
+Frontier = dict[tuple[int, int], tuple[int, tuple[int, ...]]]
+
+
+def _frontier(items: list[Candidate], need: int) -> Frontier:
+    """Cheapest subset per (score, capped count). Deterministic in item order."""
+    best: Frontier = {(0, 0): (0, ())}
+    for idx, item in enumerate(items):
+        for (units, count), (cost, chosen) in list(best.items()):
+            key = (units + item.units, min(need, count + 1))
+            cand = (cost + item.cost, chosen + (idx,))
+            if key not in best or cand[0] < best[key][0]:
+                best[key] = cand
+    return best
+
+
+def _best(front: Frontier, need: int, capacity: float) -> tuple[int, int, tuple[int, ...]] | None:
+    """(score units, cost, chosen) of the best feasible state, or None."""
+    feasible = [(units, -cost, chosen) for (units, count), (cost, chosen) in front.items()
+                if count >= need and cost <= capacity]
+    if not feasible:
+        return None
+    units, neg_cost, chosen = max(feasible, key=lambda s: (s[0], s[1]))
+    return units, -neg_cost, chosen
+
+
+def _cheapest_reaching(front: Frontier, need: int, min_units: int) -> int | None:
+    costs = [cost for (units, count), (cost, _) in front.items()
+             if count >= need and units >= min_units]
+    return min(costs) if costs else None
+
+
+def _order(items: Iterable[Candidate]) -> list[Candidate]:
+    return sorted(items, key=lambda c: (-c.score, c.cost, c.name))
+
+
+def solve(optional: list[Candidate], capacity: float, need: int) -> tuple[list[Candidate], list[Candidate]]:
+    """(knapsack picks, min_agents top-ups) for the optional pool."""
+    items = _order(optional)
+    hit = _best(_frontier(items, need), need, capacity)
+    if hit is not None:
+        return [items[i] for i in hit[2]], []
+    # No subset of `need` agents fits: top up by score over budget, then fill.
+    topup = items[:need]
+    rest = items[need:]
+    hit = _best(_frontier(rest, 0), 0, capacity - sum(c.cost for c in topup))
+    return [rest[i] for i in hit[2]] if hit else [], topup
+
+
+def marginal(excluded: Candidate, pool: list[Candidate], capacity: float, need: int,
+             optimum_units: int) -> dict[str, Any]:
+    """Score change if `excluded` were forced in, and budget needed to not lose score."""
+    others = _order(c for c in pool if c is not excluded)
+    front = _frontier(others, max(0, need - 1))
+    sub_need = max(0, need - 1)
+    hit = _best(front, sub_need, capacity - excluded.cost)
+    with_units = excluded.units + (hit[0] if hit else 0)
+    cheapest = _cheapest_reaching(front, sub_need, optimum_units - excluded.units)
+    extra = None if cheapest is None else max(0, math.ceil(cheapest + excluded.cost - capacity))
+    return {"score_delta": round((with_units - optimum_units) / SCORE_STEPS, 3)
+            if hit is not None else None,
+            "extra_tokens": extra}
+
+
+def select(candidates: list[Candidate], budget: int, config: BudgetConfig,
+           ship_class: bool = False) -> dict[str, Any]:
+    selected: list[dict[str, Any]] = []
+    excluded: list[dict[str, Any]] = []
+    forced: list[Candidate] = []
+    optional: list[Candidate] = []
+    for cand in sorted(candidates, key=lambda c: c.name):
+        if ship_class and cand.name == SHIP_CLASS_AGENT:
+            cand = Candidate(cand.name, cand.score, 1, cand.cost)
+            forced.append(cand)
+            selected.append(cand.as_dict(reason="ship-class"))
+        elif cand.score <= 0:
+            excluded.append(cand.as_dict(reason="score"))
+        elif cand.stage == 1:
+            forced.append(cand)
+            selected.append(cand.as_dict(reason="stage-1"))
+        elif cand.name in config.exempt_agents:
+            forced.append(cand)
+            selected.append(cand.as_dict(reason="exempt"))
+        else:
+            optional.append(cand)
+
+    forced_cost = sum(c.cost for c in forced)
+    capacity = max(0, budget - forced_cost)
+    need = max(0, config.min_agents - len(forced))
+    picks, topup = solve(optional, capacity, need)
+    selected += [c.as_dict(reason="knapsack") for c in picks]
+    selected += [c.as_dict(reason="min_agents") for c in topup]
+
+    chosen = set(map(id, picks + topup))
+    optimum_units = sum(c.units for c in picks + topup)
+    for cand in _order(optional):
+        if id(cand) not in chosen:
+            excluded.append(cand.as_dict(reason="budget",
+                                         marginal=marginal(cand, optional, capacity, need, optimum_units)))
+
+    total_cost = forced_cost + sum(c.cost for c in picks + topup)
+    return {
+        "budget": budget,
+        "min_agents": config.min_agents,
+        "capacity": capacity,
+        "selected": selected,
+        "excluded": excluded,
+        "expected_score": round(sum(c["score"] for c in selected), 3),
+        "greedy_score": round(sum(c.score for c in forced + greedy(optional, capacity, need)), 3),
+        "selected_tokens": total_cost,
+        "over_budget": total_cost > budget,
+    }
+
+
+def greedy(optional: list[Candidate], capacity: float, need: int) -> list[Candidate]:
+    """The previous prose algorithm (budget.md Step 1.2c.3), for comparison."""
+    picked: list[Candidate] = []
+    spent = 0
+    for cand in _order(optional):
+        if spent + cand.cost > capacity and len(picked) >= need:
+            continue
+        picked.append(cand)
+        spent += cand.cost
+    return picked
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def parse_candidates(doc: Any, cost_of: Any) -> list[Candidate]:
+    """Raises ValueError on malformed input."""
+    rows = doc.get("agents") if isinstance(doc, dict) else doc
+    if not isinstance(rows, list):
+        raise ValueError("candidates must be a list or {\"agents\": [...]}")
+    out = []
+    for row in rows:
+        if not isinstance(row, dict) or not row.get("name"):
+            raise ValueError(f"candidate without a name: {row!r}")
+        try:
+            score = float(row.get("score", 0))
+            stage = int(row.get("stage", 2))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"{row['name']}: {exc}") from None
+        cost = row.get("est_tokens")
+        if not isinstance(cost, (int, float)) or isinstance(cost, bool) or cost < 0:
+            cost = cost_of(str(row["name"]))
+        out.append(Candidate(str(row["name"]), score, 1 if stage == 1 else 2, int(round(cost))))
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_budget_select",
+                                     description="Budget-optimal agent selection (knapsack).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("select")
+    p.add_argument("--input-type", required=True, help="budgets.<type> key (plan, diff-small, repo, ...)")
+    p.add_argument("--candidates", default="-", help="JSON file, or - for stdin")
+    p.add_argument("--budget", type=int, default=None, help="override budgets.<type>")
+    p.add_argument("--budget-file", default=None)
+    p.add_argument("--project-root", default=None)
+    p.add_argument("--ship-class", action="store_true", help="fd-safety is mandatory")
+    p.add_argument("--model", default="")
+    p.add_argument("--input-lines", type=int, default=None)
+    p.add_argument("--slicing", action="store_true")
+    p.add_argument("--roots", nargs="*", default=[],
+                   help="cost_report history for predicting missing est_tokens")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.budget_file, args.project_root)
+    try:
+        budget = args.budget if args.budget is not None else effective_budget(config, args.input_type)
+    except KeyError:
+        print(f"Error: no budgets.{args.input_type} in budget config", file=sys.stderr)
+        return 2
+
+    predictor = None
+
+    def cost_of(name: str) -> float:
+        nonlocal predictor
+        if predictor is None:
+            predictor = _cost_predictor.load_predictor(args.roots, budget_path=args.budget_file or DEFAULT_BUDGET)
+        return predictor.predict(name, args.model, args.input_type, args.input_lines, args.slicing).p50
+
+    try:
+        fh = sys.stdin if args.candidates == "-" else open(args.candidates)
+        with fh:
+            candidates = parse_candidates(json.load(fh), cost_of)
+    except (OSError, ValueError) as exc:
+        print(f"Error: candidates: {exc}", file=sys.stderr)
+        return 2
+
+    result = select(candidates, budget, config, ship_class=args.ship_class)
+    result["budget_type"] = args.input_type
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Convergence engine — fuzzy clustering of P0/P1 findings across agents.
+
+`findings-helper.sh convergence` keyed findings on the exact normalized
+`section:title` string, so two agents reporting the same issue in different
+words never counted as overlapping, and every call re-parsed every agent
+file. This module:
+
+* reads findings from the live Findings Index (`_findings_index.open_index`),
+  so agents parsed by flux-watch are not re-read;
+* blocks by normalized section — findings in different sections are never
+  compared, which keeps the work at O(sum of block_size x clusters_in_block)
+  instead of O(n^2) across the whole run;
+* clusters within a block with the character-trigram cosine from
+  `cluster_specs` (greedy leader clustering against each cluster's summed
+  trigram centroid, in agent/line order so the result is deterministic). An
+  identical normalized title always joins, so threshold 1.0 reproduces the
+  legacy exact-match numbers.
+
+Output (TSV, default — the contract reaction.md Step 2.5.0a parses):
+    overlap_ratio<TAB>total_findings<TAB>overlapping_findings<TAB>agent_count
+where total_findings = clusters, overlapping_findings = clusters reported by
+two or more agents. `--json` adds cluster membership and per-agent
+contribution for the convergence gate and synthesis dedup.
+
+Threshold and severity filter come from `config/flux-drive/reaction.yaml`
+`convergence:` (similarity_threshold, severities); CLI flags override.
+
+CLI:
+    _convergence.py <output_dir> [--json] [--threshold X] [--severities P0,P1]
+                    [--run-uuid UUID] [--config PATH]
+
+Exit codes: 0 ok | 1 output_dir not found (matches findings-helper.sh).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import yaml
+
+import _findings_index
+from cluster_specs import _cosine, _trigrams
+
+DEFAULT_CONFIG = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "config", "flux-drive", "reaction.yaml"
+)
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_SEVERITIES = ("P0", "P1")
+_SEV_RANK = {"P0": 0, "P1": 1, "P2": 2, "P3": 3}
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_convergence] {msg % args}", file=sys.stderr)
+
+
+def normalize_section(section: str | None) -> str:
+    """Same normalization as the legacy awk: lowercase, alnum + spaces, collapsed."""
+    s = re.sub(r"[^a-z0-9 ]", "", (section or "").lower())
+    return " ".join(s.split())
+
+
+def normalize_title(title: str | None) -> str:
+    """Hyphens become spaces (RXN-04: don't collide unrelated titles), then as sections."""
+    return normalize_section((title or "").replace("-", " "))
+
+
+@dataclass
+class Member:
+    agent: str
+    id: str | None
+    severity: str
+    title: str
+    line_no: int
+
+
+@dataclass
+class Cluster:
+    section: str
+    members: list[Member] = field(default_factory=list)
+    titles: set[str] = field(default_factory=set)
+    centroid: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def agents(self) -> list[str]:
+        return sorted({m.agent for m in self.members})
+
+    @property
+    def severity(self) -> str:
+        return min((m.severity for m in self.members), key=lambda s: _SEV_RANK.get(s, 9))
+
+
+@dataclass
+class ConvergenceConfig:
+    threshold: float = DEFAULT_THRESHOLD
+    severities: tuple[str, ...] = DEFAULT_SEVERITIES
+
+
+def load_config(path: str = DEFAULT_CONFIG) -> ConvergenceConfig:
+    """Read `convergence:` from reaction.yaml; bad or missing values keep defaults."""
+    cfg = ConvergenceConfig()
+    try:
+        with open(path) as fh:
+            data = yaml.safe_load(fh) or {}
+    except FileNotFoundError:
+        return cfg
+    except yaml.YAMLError as exc:
+        _debug("unparseable %s: %s", path, exc)
+        return cfg
+    section = data.get("convergence") if isinstance(data, dict) else None
+    if not isinstance(section, dict):
+        return cfg
+    t = section.get("similarity_threshold")
+    if isinstance(t, (int, float)) and 0 < t <= 1:
+        cfg.threshold = float(t)
+    sev = section.get("severities")
+    if isinstance(sev, list) and sev and all(isinstance(s, str) for s in sev):
+        cfg.severities = tuple(s.strip().upper() for s in sev)
+    return cfg
+
+
+def cluster_findings(
+    findings: list[tuple[str, _findings_index.IndexLine]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Cluster]:
+    """Cluster `(agent, line)` findings. Input order fixes tie-breaking."""
+    blocks: dict[str, list[Cluster]] = {}
+    for agent, ln in findings:
+        section = normalize_section(ln.section)
+        title = normalize_title(ln.title)
+        vec = _trigrams(title)
+        member = Member(agent, ln.id, ln.severity or "", ln.title or "", ln.line_no)
+        candidates = blocks.setdefault(section, [])
+        best: Cluster | None = None
+        best_sim = threshold
+        for c in candidates:
+            if title in c.titles:
+                best, best_sim = c, 2.0  # exact match always wins
+                break
+            sim = _cosine(vec, c.centroid)
+            if sim >= best_sim:
+                best, best_sim = c, sim
+        if best is None:
+            best = Cluster(section)
+            candidates.append(best)
+        best.members.append(member)
+        best.titles.add(title)
+        best.centroid.update(vec)
+    return [c for block in blocks.values() for c in block]
+
+
+def convergence(
+    idx: _findings_index.FindingsIndex,
+    cfg: ConvergenceConfig | None = None,
+    run_uuid: str | None = None,
+) -> dict[str, Any]:
+    """Compute convergence stats, clusters and per-agent contribution."""
+    cfg = cfg or ConvergenceConfig()
+    findings: list[tuple[str, _findings_index.IndexLine]] = []
+    agents: list[str] = []
+    for a in idx.completed():
+        if run_uuid and a.run_uuid != run_uuid:
+            continue
+        kept = [ln for ln in a.findings if ln.severity in cfg.severities]
+        if kept:
+            agents.append(a.agent)
+            findings.extend((a.agent, ln) for ln in kept)
+    clusters = cluster_findings(findings, cfg.threshold)
+    overlapping = sum(1 for c in clusters if len(c.agents) >= 2)
+    total = len(clusters)
+
+    per_agent: dict[str, dict[str, Any]] = {
+        agent: {"findings": 0, "clusters": 0, "shared": 0, "unique": 0, "contribution": 0.0}
+        for agent in agents
+    }
+    out_clusters = []
+    for i, c in enumerate(clusters, start=1):
+        cagents = c.agents
+        for m in c.members:
+            per_agent[m.agent]["findings"] += 1
+        for agent in cagents:
+            pa = per_agent[agent]
+            pa["clusters"] += 1
+            pa["shared" if len(cagents) >= 2 else "unique"] += 1
+            # Fractional credit: a cluster found by k agents gives each 1/k.
+            pa["contribution"] += 1.0 / len(cagents)
+        out_clusters.append({
+            "cluster": i,
+            "section": c.section,
+            "title": c.members[0].title,
+            "severity": c.severity,
+            "agents": cagents,
+            "members": [vars(m) for m in c.members],
+        })
+    for pa in per_agent.values():
+        pa["contribution"] = round(pa["contribution"] / total, 4) if total else 0.0
+
+    return {
+        "overlap_ratio": round(overlapping / total, 4) if total else 0.0,
+        "total_findings": total,
+        "overlapping_findings": overlapping,
+        "agent_count": len(agents),
+        "threshold": cfg.threshold,
+        "severities": list(cfg.severities),
+        "clusters": out_clusters,
+        "per_agent": per_agent,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_convergence.py", description=__doc__.split("\n")[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--json", action="store_true", help="full report instead of the TSV line")
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--severities", default=None, help="comma-separated, e.g. P0,P1,P2")
+    parser.add_argument("--run-uuid", default=None, help="only count files with this quire-mark")
+    parser.add_argument("--config", default=DEFAULT_CONFIG)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.output_dir):
+        print(f"Error: directory '{args.output_dir}' not found", file=sys.stderr)
+        return 1
+    cfg = load_config(args.config)
+    threshold = args.threshold
+    if threshold is None:
+        try:
+            threshold = float(os.environ.get("FLUX_CONVERGENCE_THRESHOLD") or cfg.threshold)
+        except ValueError:
+            threshold = -1.0
+    if not 0 < threshold <= 1:
+        print(f"Error: threshold must be in (0, 1], got {threshold}", file=sys.stderr)
+        return 1
+    cfg.threshold = threshold
+    if args.severities:
+        cfg.severities = tuple(s.strip().upper() for s in args.severities.split(",") if s.strip())
+
+    report = convergence(_findings_index.open_index(args.output_dir), cfg, args.run_uuid)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['overlap_ratio']:.4f}\t{report['total_findings']}\t"
+              f"{report['overlapping_findings']}\t{report['agent_count']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
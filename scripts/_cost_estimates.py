@@ -0,0 +1,304 @@
+"""Per-agent token cost estimates from interstat, with a result cache.
+
+estimate-costs.sh used to shell out to `sqlite3 -json` on every triage and
+re-aggregate all of `~/.claude/interstat/metrics.db`'s agent_runs, then
+reshape the rows with jq. This module runs the same aggregation in-process:
+
+* The DB is opened **read-only** (`mode=ro` URI) so a triage can never
+  contend with interstat's writer for a write lock, and the model name is a
+  bound parameter rather than interpolated SQL.
+* The per-agent result is cached in `${INTERFLUX_STATE_DIR:-~/.config/
+  interflux}/cost-estimates.json`, keyed by DB path + model and stamped with
+  the DB's signature (mtime_ns and size of the DB and its `-wal` file —
+  interstat writes land in the WAL until a checkpoint). A cached entry is
+  served while the signature matches and it is younger than the TTL
+  (`FLUX_COST_CACHE_TTL` seconds, default 3600), so a warm triage does no
+  SQL at all.
+
+Output is the estimate-costs.sh JSON shape, unchanged:
+
+    {"estimates": {agent: {est_tokens, est_billing, sample_size, source}},
+     "defaults": {review, cognitive, research, oracle, generated},
+     "slicing_multiplier": float}
+
+Defaults and the slicing multiplier are read from budget.yaml with the same
+line-oriented lookup the shell script used (no YAML dependency).
+
+The fleet-registry fallback (lib-fleet.sh) stays in estimate-costs.sh; it
+asks this module for the interstat half only (`interstat` subcommand).
+
+CLI:
+    python3 _cost_estimates.py estimate  [--model M] [--slicing] [--db P] [--budget P] [--no-cache]
+    python3 _cost_estimates.py interstat [--model M] [--db P] [--no-cache]
+
+Exit codes:
+    0  estimates printed (interstat errors degrade to empty estimates + a warning)
+    1  invalid model name
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import quote
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_BUDGET = str(SCRIPT_DIR.parent / "config" / "flux-drive" / "budget.yaml")
+DEFAULT_MODEL = "claude-opus-4-6"
+DEFAULT_TTL_S = 3600
+CACHE_FILENAME = "cost-estimates.json"
+CACHE_MAX_ENTRIES = 32
+AGENT_TYPES = ("review", "cognitive", "research", "oracle", "generated")
+_MODEL_RE = re.compile(r"^[a-zA-Z0-9_.:-]+$")
+
+# Agents with >= 3 runs. Billing tokens (input+output) drive the budget;
+# total tokens are kept for context/reporting.
+INTERSTAT_SQL = """
+    SELECT REPLACE(agent_name, 'interflux:', '') as agent_name,
+           CAST(ROUND(AVG(COALESCE(input_tokens,0) + COALESCE(output_tokens,0))) AS INTEGER) as est_billing,
+           CAST(ROUND(AVG(total_tokens)) AS INTEGER) as est_tokens,
+           COUNT(*) as sample_size
+    FROM agent_runs
+    WHERE (model = ? OR model IS NULL)
+      AND total_tokens IS NOT NULL
+    GROUP BY REPLACE(agent_name, 'interflux:', '')
+    HAVING COUNT(*) >= 3
+    ORDER BY agent_name
+"""
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_cost_estimates] {msg % args}", file=sys.stderr)
+
+
+def default_db_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".claude", "interstat", "metrics.db")
+
+
+def cache_path(state_dir: str | None = None) -> str:
+    base = (state_dir or os.environ.get("INTERFLUX_STATE_DIR")
+            or os.path.join(os.path.expanduser("~"), ".config", "interflux"))
+    return os.path.join(base, CACHE_FILENAME)
+
+
+def valid_model(model: str) -> bool:
+    """Same allow-list the shell script enforced before interpolating (SEC-001)."""
+    return bool(_MODEL_RE.match(model))
+
+
+# --- interstat ---------------------------------------------------------------
+
+
+def db_signature(db_path: str) -> list[int] | None:
+    """[mtime_ns, size, wal_mtime_ns, wal_size], or None when the DB is missing."""
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    try:
+        wal = os.stat(f"{db_path}-wal")
+        wal_sig = [wal.st_mtime_ns, wal.st_size]
+    except FileNotFoundError:
+        wal_sig = [0, 0]
+    return [st.st_mtime_ns, st.st_size, *wal_sig]
+
+
+def query_interstat(db_path: str, model: str) -> dict[str, dict[str, Any]]:
+    """Run the aggregation against a read-only connection. Raises sqlite3.Error."""
+    conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True, timeout=5)
+    try:
+        rows = conn.execute(INTERSTAT_SQL, (model,)).fetchall()
+    finally:
+        conn.close()
+    return {
+        agent: {"est_tokens": est_tokens, "est_billing": est_billing,
+                "sample_size": sample_size, "source": "interstat"}
+        for agent, est_billing, est_tokens, sample_size in rows
+    }
+
+
+def _load_cache(path: str) -> dict[str, Any]:
+    try:
+        with open(path) as fh:
+            doc = json.load(fh)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return doc if isinstance(doc, dict) else {}
+
+
+def _store_cache(path: str, doc: dict[str, Any]) -> None:
+    if len(doc) > CACHE_MAX_ENTRIES:
+        newest = sorted(doc.items(), key=lambda kv: kv[1].get("stored_at", 0))[-CACHE_MAX_ENTRIES:]
+        doc = dict(newest)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w") as fh:
+            json.dump(doc, fh)
+        os.replace(tmp, path)
+    except OSError as exc:
+        # A read-only state dir only costs the next call a query.
+        _debug("cache write failed: %s", exc)
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def interstat_estimates(
+    db_path: str,
+    model: str,
+    *,
+    use_cache: bool = True,
+    cache_file: str | None = None,
+    ttl: float | None = None,
+    now: float | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Per-agent estimates, served from cache while the DB is unchanged.
+
+    A missing DB yields {}. A failing query warns on stderr (schema drift
+    should be visible, not read as "no data") and yields {} without caching.
+    """
+    return cached_query(db_path, model, lambda: query_interstat(db_path, model),
+                        use_cache=use_cache, cache_file=cache_file, ttl=ttl, now=now)
+
+
+def cached_query(
+    db_path: str,
+    tag: str,
+    compute: Callable[[], Any],
+    *,
+    use_cache: bool = True,
+    cache_file: str | None = None,
+    ttl: float | None = None,
+    now: float | None = None,
+) -> Any:
+    """Serve `compute()`'s result from the cache while the DB signature holds.
+
+    Entries are keyed by DB path + `tag` (the model, or a caller-chosen
+    label such as the predictor's "quantiles|billing"). Returns {} for a
+    missing DB, and {} without caching when the query raises sqlite3.Error.
+    """
+    sig = db_signature(db_path)
+    if sig is None:
+        return {}
+    cache_file = cache_file or cache_path()
+    ttl = float(os.environ.get("FLUX_COST_CACHE_TTL", DEFAULT_TTL_S)) if ttl is None else ttl
+    now = time.time() if now is None else now
+    key = f"{os.path.abspath(db_path)}|{tag}"
+    if use_cache:
+        hit = _load_cache(cache_file).get(key)
+        if (isinstance(hit, dict) and hit.get("sig") == sig
+                and now - hit.get("stored_at", 0) < ttl):
+            _debug("cache hit %s", key)
+            return hit.get("estimates", {})
+    try:
+        result = compute()
+    except sqlite3.Error as exc:
+        print(f"estimate-costs: sqlite query failed against {db_path}:", file=sys.stderr)
+        print(str(exc), file=sys.stderr)
+        return {}
+    if use_cache:
+        doc = _load_cache(cache_file)
+        doc[key] = {"sig": sig, "stored_at": now, "estimates": result}
+        _store_cache(cache_file, doc)
+    return result
+
+
+# --- budget.yaml -------------------------------------------------------------
+
+
+def _number(text: str, fallback: float) -> float:
+    try:
+        value = float(text)
+    except ValueError:
+        return fallback
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def _read_lines(budget_path: str) -> list[str]:
+    try:
+        with open(budget_path) as fh:
+            return fh.read().splitlines()
+    except OSError:
+        return []
+
+
+def load_defaults(budget_path: str = DEFAULT_BUDGET) -> dict[str, Any]:
+    """First `  <type>: N` line per agent type (40000 when absent)."""
+    lines = _read_lines(budget_path)
+    out: dict[str, Any] = {}
+    for agent_type in AGENT_TYPES:
+        prefix = f"  {agent_type}:"
+        value = "40000"
+        for line in lines:
+            if line.startswith(prefix):
+                value = line.split(":", 1)[1].split("#", 1)[0].strip()
+                break
+        out[agent_type] = _number(value, 40000)
+    return out
+
+
+def load_slicing_multiplier(budget_path: str = DEFAULT_BUDGET) -> float:
+    for line in _read_lines(budget_path):
+        if line.startswith("slicing_multiplier:"):
+            return float(_number(line.split(":", 1)[1].split("#", 1)[0].strip(), 0.5))
+    return 0.5
+
+
+def estimate(
+    model: str = DEFAULT_MODEL,
+    *,
+    slicing: bool = False,
+    db_path: str | None = None,
+    budget_path: str = DEFAULT_BUDGET,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    """The full estimate-costs.sh document."""
+    return {
+        "estimates": interstat_estimates(db_path or default_db_path(), model, use_cache=use_cache),
+        "defaults": load_defaults(budget_path),
+        "slicing_multiplier": load_slicing_multiplier(budget_path) if slicing else 1.0,
+    }
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_cost_estimates",
+                                     description="Per-agent token cost estimates from interstat.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("estimate", "interstat"):
+        p = sub.add_parser(name)
+        p.add_argument("--model", default="")
+        p.add_argument("--db", default=None)
+        p.add_argument("--no-cache", action="store_true")
+        if name == "estimate":
+            p.add_argument("--slicing", action="store_true")
+            p.add_argument("--budget", default=DEFAULT_BUDGET)
+    args = parser.parse_args(argv)
+
+    model = args.model or DEFAULT_MODEL
+    if not valid_model(model):
+        print(f"Error: invalid model name '{model}'", file=sys.stderr)
+        return 1
+    db_path = args.db or default_db_path()
+    if args.cmd == "interstat":
+        doc: Any = interstat_estimates(db_path, model, use_cache=not args.no_cache)
+    else:
+        doc = estimate(model, slicing=args.slicing, db_path=db_path,
+                       budget_path=args.budget, use_cache=not args.no_cache)
+    print(json.dumps(doc, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""Quantile token-cost predictor: p50/p90 per agent from input features.
+
+estimate-costs.sh gives one mean per agent, falls back to budget.yaml
+`agent_defaults`, and scales sliced agents by a flat `slicing_multiplier`.
+Budget selection (SKILL.md Step 1.2c) then packs agents against `budgets.*`
+with numbers that ignore how big the input is, so it over- or
+under-dispatches. This module predicts each agent's cost as a distribution.
+
+Training data (both read-only):
+
+* **cost_report observations** — every `findings.json` under the given
+  roots whose `cost_report` (synthesize.md Step 3.4b) lists per-agent
+  actuals. These carry the features: `budget_type` (input type: plan,
+  diff-small, repo, …), `input_lines`, `model`, and per-agent
+  `slicing_applied`.
+* **interstat history** — `agent_runs` in `~/.claude/interstat/metrics.db`,
+  summarized to per-(agent, model) quantiles and cached through
+  `_cost_estimates.cached_query` (so a warm call runs no SQL). No input
+  features, but the full history.
+
+Model. Token cost is size-elastic: tokens ∝ (input_lines / 500)^beta, with
+beta fitted by within-agent least squares on log-log cost_report data
+(clamped to [0, 1.5]; 0 until MIN_FIT observations exist). Each observation
+is normalized to 500 lines, and an agent's p50/p90 come from empirical
+quantiles of the normalized costs in the most specific cell with at least
+`min_samples` observations, then rescaled to the requested size:
+
+    1. agent + model + input type + slicing     (cost_report)
+    2. agent + input type + slicing             (cost_report)
+    3. agent + model                            (interstat; model NULL rows count)
+    4. agent                                    (interstat, any model)
+    5. budget.yaml default for the agent class  (p90 = p50 × PRIOR_P90_RATIO)
+
+Levels 3–5 carry no slicing signal, so a sliced agent gets the learned
+slicing ratio (median sliced / median unsliced across cost_report agents)
+or budget.yaml's `slicing_multiplier` until there is data to learn it.
+fd-architecture and fd-quality always review full content and are never
+scaled.
+
+Set-level bound. Summing p90s overstates a set's p90, so packing on them
+under-dispatches. `total()` treats agents as independent with a
+normal-approximation spread (σᵢ = (p90ᵢ − p50ᵢ) / 1.2816) and
+`overrun_probability(budget)` gives P(total > budget) — selection can add
+agents until that probability reaches its bound.
+
+CLI:
+    python3 _cost_predictor.py predict --agents a,b,... [--model M] [--input-type T]
+        [--input-lines N] [--slicing] [--roots DIR ...] [--db P] [--budget N]
+        [--cost-basis billing|total] [--min-samples K]
+    python3 _cost_predictor.py fit [--roots DIR ...] [--db P]   # diagnostics
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _cost_estimates  # noqa: E402
+
+REF_LINES = 500
+MIN_SAMPLES = 5
+MIN_FIT = 8
+BETA_MAX = 1.5
+PRIOR_P90_RATIO = 1.5
+Z90 = 1.2815515655446004
+FULL_CONTENT_AGENTS = frozenset({"fd-architecture", "fd-quality"})
+
+QUANTILE_SQL = """
+    SELECT REPLACE(agent_name, 'interflux:', ''), COALESCE(model, ''),
+           COALESCE(input_tokens,0) + COALESCE(output_tokens,0), total_tokens
+    FROM agent_runs
+    WHERE total_tokens IS NOT NULL
+"""
+
+
+def _quantile(sorted_vals: list[float], q: float) -> float:
+    """Nearest-rank quantile (same convention as discourse_health)."""
+    idx = min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))
+    return sorted_vals[idx]
+
+
+def _median(vals: list[float]) -> float:
+    return _quantile(sorted(vals), 0.5)
+
+
+def classify_agent(name: str) -> str:
+    """Agent class for budget.yaml defaults — mirrors estimate-costs.sh."""
+    if name in ("fd-systems", "fd-decisions", "fd-people", "fd-resilience", "fd-perception"):
+        return "cognitive"
+    if name.endswith(("-researcher", "-analyzer", "-analyst")):
+        return "research"
+    if name.startswith("oracle"):
+        return "oracle"
+    if name.startswith("fd-"):
+        return "review"
+    return "generated"
+
+
+# --- training data -----------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Observation:
+    agent: str
+    tokens: float
+    model: str = ""
+    input_type: str = ""
+    input_lines: int | None = None
+    slicing: bool = False
+
+
+def _find_findings(roots: Iterable[str]) -> Iterator[str]:
+    seen = set()
+    for root in roots:
+        for dirpath, _dirnames, filenames in os.walk(root):
+            if "findings.json" in filenames:
+                path = os.path.abspath(os.path.join(dirpath, "findings.json"))
+                if path not in seen:
+                    seen.add(path)
+                    yield path
+
+
+def cost_report_observations(roots: Iterable[str], cost_basis: str = "billing") -> list[Observation]:
+    """Per-agent actuals from findings.json `cost_report` blocks under `roots`."""
+    key = "actual_billing" if cost_basis == "billing" else "actual_total"
+    out: list[Observation] = []
+    for path in _find_findings(roots):
+        try:
+            with open(path) as fh:
+                report = (json.load(fh) or {}).get("cost_report")
+        except (OSError, ValueError, AttributeError):
+            continue
+        if not isinstance(report, dict):
+            continue
+        lines = report.get("input_lines")
+        lines = int(lines) if isinstance(lines, (int, float)) and lines > 0 else None
+        for agent in report.get("agents") or []:
+            if not isinstance(agent, dict):
+                continue
+            tokens = agent.get(key)
+            if not agent.get("name") or not isinstance(tokens, (int, float)) or tokens <= 0:
+                continue
+            out.append(Observation(
+                agent=str(agent["name"]), tokens=float(tokens),
+                model=str(report.get("model") or ""),
+                input_type=str(report.get("budget_type") or ""),
+                input_lines=lines, slicing=bool(agent.get("slicing_applied")),
+            ))
+    return out
+
+
+def _summarize(vals: list[float]) -> dict[str, float]:
+    s = sorted(vals)
+    return {"n": len(s), "p50": _quantile(s, 0.5), "p90": _quantile(s, 0.9)}
+
+
+def query_quantiles(db_path: str, cost_basis: str = "billing") -> dict[str, Any]:
+    """Per-(agent, model) and per-agent quantile summaries. Raises sqlite3.Error.
+
+    Rows without a model count toward every model of their agent, as in
+    estimate-costs.sh's `(model = ? OR model IS NULL)`.
+    """
+    conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True, timeout=5)
+    try:
+        rows = conn.execute(QUANTILE_SQL).fetchall()
+    finally:
+        conn.close()
+    by_model: dict[str, dict[str, list[float]]] = {}
+    for agent, model, billing, total in rows:
+        tokens = billing if cost_basis == "billing" else total
+        if tokens is None or tokens <= 0:
+            continue
+        by_model.setdefault(agent, {}).setdefault(model, []).append(float(tokens))
+    out: dict[str, Any] = {"agent_model": {}, "agent": {}}
+    for agent, models in by_model.items():
+        unknown = models.get("", [])
+        out["agent"][agent] = _summarize([v for vals in models.values() for v in vals])
+        out["agent_model"][agent] = {m: _summarize(vals + unknown)
+                                     for m, vals in models.items() if m}
+    return out
+
+
+def interstat_quantiles(db_path: str | None, cost_basis: str = "billing",
+                        use_cache: bool = True) -> dict[str, Any]:
+    db_path = db_path or _cost_estimates.default_db_path()
+    return _cost_estimates.cached_query(
+        db_path, f"quantiles|{cost_basis}", lambda: query_quantiles(db_path, cost_basis),
+        use_cache=use_cache) or {"agent_model": {}, "agent": {}}
+
+
+# --- model -------------------------------------------------------------------
+
+
+def fit_elasticity(obs: list[Observation]) -> float:
+    """Within-agent OLS slope of log(tokens) on log(input_lines), clamped."""
+    groups: dict[str, list[tuple[float, float]]] = {}
+    for o in obs:
+        if o.input_lines:
+            groups.setdefault(o.agent, []).append((math.log(o.input_lines), math.log(o.tokens)))
+    sxx = sxy = 0.0
+    n = 0
+    for pts in groups.values():
+        if len(pts) < 2:
+            continue
+        mx = sum(x for x, _ in pts) / len(pts)
+        my = sum(y for _, y in pts) / len(pts)
+        sxx += sum((x - mx) ** 2 for x, _ in pts)
+        sxy += sum((x - mx) * (y - my) for x, y in pts)
+        n += len(pts)
+    if n < MIN_FIT or sxx <= 0:
+        return 0.0
+    return min(BETA_MAX, max(0.0, sxy / sxx))
+
+
+def fit_slicing_ratio(obs: list[Observation], fallback: float) -> float:
+    """Median sliced / median unsliced cost, per agent, then the median ratio."""
+    per_agent: dict[str, tuple[list[float], list[float]]] = {}
+    for o in obs:
+        if o.agent in FULL_CONTENT_AGENTS:
+            continue
+        sliced, full = per_agent.setdefault(o.agent, ([], []))
+        (sliced if o.slicing else full).append(o.tokens)
+    ratios = [_median(s) / _median(f) for s, f in per_agent.values() if s and f]
+    if sum(len(s) for s, f in per_agent.values() if s and f) < MIN_SAMPLES:
+        return fallback
+    return min(1.0, max(0.05, _median(ratios)))
+
+
+@dataclass
+class Prediction:
+    agent: str
+    p50: float
+    p90: float
+    n: int
+    basis: str
+
+    @property
+    def sigma(self) -> float:
+        return max(0.0, self.p90 - self.p50) / Z90
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"p50": round(self.p50), "p90": round(self.p90), "n": self.n, "basis": self.basis}
+
+
+@dataclass
+class Predictor:
+    observations: list[Observation] = field(default_factory=list)
+    interstat: dict[str, Any] = field(default_factory=lambda: {"agent_model": {}, "agent": {}})
+    defaults: dict[str, Any] = field(default_factory=dict)
+    slicing_fallback: float = 0.5
+    min_samples: int = MIN_SAMPLES
+
+    def __post_init__(self) -> None:
+        self.beta = fit_elasticity(self.observations)
+        self.slicing_ratio = fit_slicing_ratio(self.observations, self.slicing_fallback)
+
+    def _size(self, lines: int | None) -> float:
+        return (lines / REF_LINES) ** self.beta if lines else 1.0
+
+    def _cell(self, agent: str, model: str, input_type: str, slicing: bool,
+              with_model: bool) -> list[float]:
+        return [o.tokens / self._size(o.input_lines) for o in self.observations
+                if o.agent == agent and o.input_type == input_type and o.slicing == slicing
+                and (not with_model or o.model == model)]
+
+    def predict(self, agent: str, model: str = "", input_type: str = "",
+                input_lines: int | None = None, slicing: bool = False) -> Prediction:
+        slicing = slicing and agent not in FULL_CONTENT_AGENTS
+        size = self._size(input_lines)
+        if input_type:
+            for with_model, basis in ((True, "agent+model+type"), (False, "agent+type")):
+                if with_model and not model:
+                    continue
+                vals = self._cell(agent, model, input_type, slicing, with_model)
+                if len(vals) >= self.min_samples:
+                    s = _summarize(vals)
+                    return Prediction(agent, s["p50"] * size, s["p90"] * size, len(vals),
+                                      basis + ("+sliced" if slicing else ""))
+        scale = self.slicing_ratio if slicing else 1.0
+        suffix = "+slicing-ratio" if slicing else ""
+        hist = (self.interstat.get("agent_model", {}).get(agent, {}).get(model) if model else None)
+        if hist and hist["n"] >= self.min_samples:
+            return Prediction(agent, hist["p50"] * scale, hist["p90"] * scale, hist["n"],
+                              "interstat:agent+model" + suffix)
+        hist = self.interstat.get("agent", {}).get(agent)
+        if hist and hist["n"] >= self.min_samples:
+            return Prediction(agent, hist["p50"] * scale, hist["p90"] * scale, hist["n"],
+                              "interstat:agent" + suffix)
+        base = float(self.defaults.get(classify_agent(agent), 40000)) * scale
+        return Prediction(agent, base, base * PRIOR_P90_RATIO, 0, "default" + suffix)
+
+
+def total(preds: Iterable[Prediction]) -> dict[str, float]:
+    """Set-level p50/p90 under independence (normal approximation)."""
+    preds = list(preds)
+    p50 = sum(p.p50 for p in preds)
+    sigma = math.sqrt(sum(p.sigma ** 2 for p in preds))
+    return {"p50": p50, "p90": p50 + Z90 * sigma, "sigma": sigma}
+
+
+def overrun_probability(preds: Iterable[Prediction], budget: float) -> float:
+    """P(sum of agent costs > budget), normal approximation."""
+    t = total(preds)
+    if t["sigma"] == 0:
+        return 1.0 if t["p50"] > budget else 0.0
+    z = (budget - t["p50"]) / t["sigma"]
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def load_predictor(roots: Iterable[str] = (), db_path: str | None = None,
+                   budget_path: str = _cost_estimates.DEFAULT_BUDGET,
+                   cost_basis: str = "billing", min_samples: int = MIN_SAMPLES,
+                   use_cache: bool = True) -> Predictor:
+    return Predictor(
+        observations=cost_report_observations(roots, cost_basis),
+        interstat=interstat_quantiles(db_path, cost_basis, use_cache),
+        defaults=_cost_estimates.load_defaults(budget_path),
+        slicing_fallback=_cost_estimates.load_slicing_multiplier(budget_path),
+        min_samples=min_samples,
+    )
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_cost_predictor",
+                                     description="Quantile token-cost predictions per agent.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("predict", "fit"):
+        p = sub.add_parser(name)
+        p.add_argument("--roots", nargs="*", default=[],
+                       help="directories searched for findings.json cost_report history")
+        p.add_argument("--db", default=None)
+        p.add_argument("--budget-file", default=_cost_estimates.DEFAULT_BUDGET)
+        p.add_argument("--cost-basis", choices=("billing", "total"), default="billing")
+        p.add_argument("--min-samples", type=int, default=MIN_SAMPLES)
+        p.add_argument("--no-cache", action="store_true")
+        if name == "predict":
+            p.add_argument("--agents", required=True, help="comma-separated agent names")
+            p.add_argument("--model", default="")
+            p.add_argument("--input-type", default="")
+            p.add_argument("--input-lines", type=int, default=None)
+            p.add_argument("--slicing", action="store_true")
+            p.add_argument("--budget", type=float, default=None,
+                           help="report P(total > budget) for the whole set")
+    args = parser.parse_args(argv)
+
+    if getattr(args, "model", "") and not _cost_estimates.valid_model(args.model):
+        print(f"Error: invalid model name '{args.model}'", file=sys.stderr)
+        return 1
+    predictor = load_predictor(args.roots, args.db, args.budget_file, args.cost_basis,
+                               args.min_samples, use_cache=not args.no_cache)
+    if args.cmd == "fit":
+        print(json.dumps({
+            "beta": round(predictor.beta, 4),
+            "slicing_ratio": round(predictor.slicing_ratio, 4),
+            "observations": {"cost_report": len(predictor.observations),
+                             "interstat_agents": len(predictor.interstat.get("agent", {}))},
+        }, indent=2))
+        return 0
+
+    agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+    preds = [predictor.predict(a, args.model, args.input_type, args.input_lines, args.slicing)
+             for a in agents]
+    t = total(preds)
+    doc: dict[str, Any] = {
+        "model": args.model, "input_type": args.input_type, "input_lines": args.input_lines,
+        "slicing": args.slicing, "cost_basis": args.cost_basis,
+        "agents": {p.agent: p.as_dict() for p in preds},
+        "total": {"p50": round(t["p50"]), "p90": round(t["p90"])},
+    }
+    if args.budget is not None:
+        doc["overrun_probability"] = round(overrun_probability(preds, args.budget), 4)
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
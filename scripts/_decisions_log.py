@@ -22,7 +22,8 @@ Public API:
         Returns the canonical decisions.log path for an output dir.
 
     read_log(output_dir) -> list[dict]
-        Parses decisions.log for inspection (testing + post-mortem).
+        Parses decisions.log for inspection (testing + post-mortem),
+        including segments rotated out by `_log_segments.py rotate`.
 
 CLI (used from shell phase files):
     python3 -m _decisions_log log <name> <evidence>
@@ -56,6 +57,7 @@ from typing import Any
 # from the plugin root or 'python3 scripts/_decisions_log.py' invocation.
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
+import _log_segments  # noqa: E402
 from _verification import VerificationState, VerificationStep, append_to_log  # noqa: E402
 
 
@@ -105,22 +107,12 @@ def log_decision(
 
 
 def read_log(output_dir: str) -> list[dict[str, Any]]:
-    """Parse decisions.log into a list of dict records. Returns [] if missing."""
-    path = get_log_path(output_dir)
-    if not os.path.isfile(path):
-        return []
-    records: list[dict[str, Any]] = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                records.append(json.loads(line))
-            except json.JSONDecodeError:
-                # Skip malformed lines — robust to partial writes during dev.
-                continue
-    return records
+    """Parse decisions.log (rotated segments first) into dict records.
+
+    Returns [] if missing. Malformed lines are skipped — robust to partial
+    writes during dev.
+    """
+    return list(_log_segments.iter_records(get_log_path(output_dir)))
 
 
 # --- CLI ------------------------------------------------------------------
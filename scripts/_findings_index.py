@@ -0,0 +1,404 @@
+"""Incremental Findings Index extraction for flux-drive agent outputs.
+
+`findings-helper.sh read-indexes` runs awk over every finished `*.md` after
+the last agent completes, and `convergence` re-invokes it as a subprocess, so
+index parsing sits on the critical path between "last agent done" and
+synthesis. This module parses the `### Findings Index` block *while agents
+are still writing*:
+
+* `FindingsIndex.update(path)` reads only the bytes appended since the last
+  call (byte offset per agent, inode-checked so the `.partial → .md` rename
+  continues where it left off and a rewrite starts over). Only
+  newline-terminated lines are parsed; a trailing fragment waits for the next
+  append. Once the block's closing heading is seen the rest of the file is
+  skipped without reading.
+* Every parsed line is appended to `{OUTPUT_DIR}/findings-index.jsonl` as it
+  lands (the live on-disk index) and kept in an in-memory map.
+* `_flux_watch.py` feeds each wake-up's `.partial`/`.md` files through
+  `update()`, so by the time flux-watch returns the index is complete.
+
+Record schema (one JSON object per line):
+    {"event": "line",     "agent", "file", "line_no", "text",
+                          "severity", "id", "section", "title"}   # last four null for non-bullets
+    {"event": "reset",    "agent"}                                 # discard earlier lines
+    {"event": "complete", "agent", "file", "size", "mtime_ns", "inode", "run_uuid"}
+
+`complete` is written once a terminal `.md` has been fully parsed; its
+size/mtime/inode let a later reader reuse the pre-parsed lines without
+touching the agent file. `reset` is written before re-parsing an agent whose
+file was replaced, so replaying the log in order always yields current state.
+
+Block grammar mirrors findings-helper.sh read-indexes exactly: the block
+opens at `^#{2,4}\\s+[Ff]indings\\s+[Ii]ndex`, closes at the next
+`^#{2,4}\\s` heading, and every non-empty line in between is kept (so the
+`Verdict:` line is included). Bullets of the form
+`- SEVERITY | ID | "Section" | Title` are additionally split into fields.
+
+CLI:
+    _findings_index.py read-indexes <output_dir>   # same TSV as findings-helper.sh
+    _findings_index.py build <output_dir>          # refresh the on-disk index
+    _findings_index.py show <output_dir>           # JSON map agent -> entries
+    _findings_index.py follow <output_dir> [--timeout S]
+
+Exit codes: 0 ok | 1 output_dir not found (matches findings-helper.sh).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+INDEX_FILENAME = "findings-index.jsonl"
+
+_SKIP_BASES = frozenset({"summary", "synthesis", "findings"})
+_OPEN_RE = re.compile(r"^#{2,4}[ \t]+[Ff]indings[ \t]+[Ii]ndex")
+_CLOSE_RE = re.compile(r"^#{2,4}[ \t]")
+_BULLET_RE = re.compile(r"^-\s*([Pp][0-9]+)\s*\|(.*)$")
+_RUN_UUID_RE = re.compile(r"^<!--\s*run-uuid:\s*(\S+)\s*-->")
+
+SEEKING, IN_INDEX, DONE = "seeking", "in_index", "done"
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_findings_index] {msg % args}", file=sys.stderr)
+
+
+def agent_base(name: str) -> str | None:
+    """Agent key for an indexable file name, or None if it is not one.
+
+    Same exclusions as `findings-helper.sh read-indexes`: synthesis outputs
+    and reaction files are not agent findings.
+    """
+    if name.endswith(".md.partial"):
+        base = name[: -len(".md.partial")]
+    elif name.endswith(".md"):
+        base = name[: -len(".md")]
+    else:
+        return None
+    if base in _SKIP_BASES or base.endswith((".reactions", ".reactions.error")):
+        return None
+    return base
+
+
+def parse_bullet(text: str) -> dict[str, str | None]:
+    """Split `- SEVERITY | ID | "Section" | Title` into fields (all None if not a bullet)."""
+    m = _BULLET_RE.match(text)
+    if not m:
+        return {"severity": None, "id": None, "section": None, "title": None}
+    parts = [p.strip() for p in m.group(2).split("|", 2)]
+    parts += [""] * (3 - len(parts))
+    return {
+        "severity": m.group(1).upper(),
+        "id": parts[0] or None,
+        "section": parts[1].strip('"') or None,
+        "title": parts[2] or None,
+    }
+
+
+@dataclass
+class IndexLine:
+    line_no: int
+    text: str
+    severity: str | None = None
+    id: str | None = None
+    section: str | None = None
+    title: str | None = None
+
+    @property
+    def is_finding(self) -> bool:
+        return self.severity is not None
+
+
+@dataclass
+class AgentIndex:
+    agent: str
+    file: str = ""
+    inode: int = -1
+    offset: int = 0
+    tail: bytes = b""
+    line_no: int = 0
+    state: str = SEEKING
+    run_uuid: str | None = None
+    uuid_checked: bool = False
+    lines: list[IndexLine] = field(default_factory=list)
+    complete: dict[str, Any] | None = None
+
+    @property
+    def findings(self) -> list[IndexLine]:
+        return [ln for ln in self.lines if ln.is_finding]
+
+
+class FindingsIndex:
+    """Live Findings Index for one OUTPUT_DIR.
+
+    `sink` is the JSONL path records are appended to; None keeps the index
+    in memory only (read-only consumers).
+    """
+
+    def __init__(self, output_dir: str, sink: str | None = None) -> None:
+        self.output_dir = output_dir
+        self.sink = sink
+        self.agents: dict[str, AgentIndex] = {}
+
+    # -- persistence ---------------------------------------------------------
+
+    @classmethod
+    def load(cls, output_dir: str, sink: str | None = None) -> "FindingsIndex":
+        """Replay `{output_dir}/findings-index.jsonl` into memory.
+
+        Torn or malformed lines (a concurrent writer mid-append) are skipped.
+        Agents without a `complete` record are dropped — their offsets are not
+        persisted, so `update()` re-parses them from the start.
+        """
+        idx = cls(output_dir, sink)
+        path = os.path.join(output_dir, INDEX_FILENAME)
+        try:
+            fh = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return idx
+        with fh:
+            for raw in fh:
+                try:
+                    rec = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(rec, dict) or "agent" not in rec:
+                    continue
+                agent = rec["agent"]
+                event = rec.get("event")
+                if event == "reset":
+                    idx.agents[agent] = AgentIndex(agent)
+                elif event == "line":
+                    a = idx.agents.setdefault(agent, AgentIndex(agent))
+                    a.lines.append(IndexLine(
+                        rec.get("line_no", 0), rec.get("text", ""),
+                        rec.get("severity"), rec.get("id"), rec.get("section"), rec.get("title"),
+                    ))
+                elif event == "complete":
+                    a = idx.agents.setdefault(agent, AgentIndex(agent))
+                    a.complete = rec
+                    a.file = rec.get("file", "")
+                    a.inode = rec.get("inode", -1)
+                    a.offset = rec.get("size", 0)
+                    a.run_uuid = rec.get("run_uuid")
+                    a.uuid_checked = True
+                    a.state = DONE
+        idx.agents = {k: v for k, v in idx.agents.items() if v.complete is not None}
+        return idx
+
+    def _emit(self, record: dict[str, Any]) -> None:
+        if self.sink is None:
+            return
+        data = (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        try:
+            fd = os.open(self.sink, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)  # single write(): O_APPEND keeps records whole
+            finally:
+                os.close(fd)
+        except OSError as exc:
+            _debug("append to %s failed: %s", self.sink, exc)
+
+    # -- incremental parsing -------------------------------------------------
+
+    def _reset(self, agent: str) -> AgentIndex:
+        # Always logged: the replayed log may hold lines for an agent that
+        # `load()` dropped as incomplete, and those must not be concatenated
+        # with the re-parse.
+        a = self.agents[agent] = AgentIndex(agent)
+        self._emit({"event": "reset", "agent": agent})
+        return a
+
+    def _feed_line(self, a: AgentIndex, text: str) -> None:
+        a.line_no += 1
+        if not a.uuid_checked and text.strip():
+            a.uuid_checked = True
+            m = _RUN_UUID_RE.match(text.strip())
+            a.run_uuid = m.group(1) if m else None
+        if a.state == SEEKING:
+            if _OPEN_RE.match(text):
+                a.state = IN_INDEX
+            return
+        if a.state != IN_INDEX:
+            return
+        if _CLOSE_RE.match(text):
+            a.state = DONE
+            return
+        if not text:
+            return
+        ln = IndexLine(a.line_no, text, **parse_bullet(text))
+        a.lines.append(ln)
+        self._emit({"event": "line", "agent": a.agent, "file": a.file, "line_no": ln.line_no,
+                    "text": ln.text, "severity": ln.severity, "id": ln.id,
+                    "section": ln.section, "title": ln.title})
+
+    def update(self, path: str) -> AgentIndex | None:
+        """Consume whatever `path` gained since the last call. Returns the agent entry."""
+        name = os.path.basename(path)
+        agent = agent_base(name)
+        if agent is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return self.agents.get(agent)
+        terminal = not name.endswith(".partial")
+        a = self.agents.get(agent)
+        if a is not None and a.complete is not None:
+            c = a.complete
+            if terminal and (c.get("size"), c.get("mtime_ns"), c.get("inode")) == (
+                    st.st_size, st.st_mtime_ns, st.st_ino):
+                return a
+            if not terminal:
+                return a  # a stale partial next to a completed .md adds nothing
+        if a is None or a.inode != st.st_ino or st.st_size < a.offset or a.complete is not None:
+            a = self._reset(agent)
+            a.inode = st.st_ino
+        a.file = name
+        if st.st_size > a.offset:
+            if a.state == DONE and a.uuid_checked:
+                a.offset = st.st_size  # block closed: skip the prose
+            else:
+                with open(path, "rb") as fh:
+                    fh.seek(a.offset)
+                    chunk = fh.read(st.st_size - a.offset)
+                a.offset += len(chunk)
+                data = a.tail + chunk
+                *complete_lines, a.tail = data.split(b"\n")
+                for raw in complete_lines:
+                    self._feed_line(a, raw.rstrip(b"\r").decode("utf-8", errors="replace"))
+        if terminal:
+            if a.tail:
+                self._feed_line(a, a.tail.rstrip(b"\r").decode("utf-8", errors="replace"))
+                a.tail = b""
+            a.complete = {"event": "complete", "agent": agent, "file": name,
+                          "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                          "inode": st.st_ino, "run_uuid": a.run_uuid}
+            self._emit(a.complete)
+        return a
+
+    def refresh(self) -> None:
+        """Bring the index up to date with every agent file in the directory."""
+        for name in sorted(os.listdir(self.output_dir)):
+            if agent_base(name) is not None:
+                self.update(os.path.join(self.output_dir, name))
+
+    def prune(self) -> None:
+        """Drop completed agents whose `.md` is gone or no longer matches its `complete` record.
+
+        Replayed agents are only revalidated by `update()` when their file is
+        still listed; a deleted or renamed `.md` must not keep being served.
+        """
+        for agent, a in list(self.agents.items()):
+            c = a.complete
+            if c is None:
+                continue
+            try:
+                st = os.stat(os.path.join(self.output_dir, c.get("file", "")))
+            except OSError:
+                st = None
+            if st is None or (c.get("size"), c.get("mtime_ns"), c.get("inode")) != (
+                    st.st_size, st.st_mtime_ns, st.st_ino):
+                del self.agents[agent]
+                self._emit({"event": "reset", "agent": agent})
+
+    # -- consumers -----------------------------------------------------------
+
+    def completed(self) -> list[AgentIndex]:
+        """Agents whose terminal `.md` has been parsed, in file-name order."""
+        return sorted((a for a in self.agents.values() if a.complete is not None),
+                      key=lambda a: a.file)
+
+    def read_indexes(self) -> Iterable[tuple[str, str]]:
+        """`(agent, line)` pairs — the findings-helper.sh read-indexes stream."""
+        for a in self.completed():
+            for ln in a.lines:
+                yield a.agent, ln.text
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            a.agent: {
+                "file": a.file,
+                "complete": a.complete is not None,
+                "run_uuid": a.run_uuid,
+                "lines": [vars(ln) for ln in a.lines],
+            }
+            for a in sorted(self.agents.values(), key=lambda a: a.agent)
+        }
+
+
+def open_index(output_dir: str, persist: bool = False) -> FindingsIndex:
+    """Replay the on-disk index and refresh it against the directory.
+
+    Completed agents whose `.md` is unchanged are served from the log without
+    reading the agent file; anything else is parsed, and agents whose `.md`
+    has since been deleted or renamed are dropped. With `persist`, newly
+    parsed records are appended to the log.
+    """
+    sink = os.path.join(output_dir, INDEX_FILENAME) if persist else None
+    idx = FindingsIndex.load(output_dir, sink)
+    # Terminal files only: read-indexes never reported in-flight partials.
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith(".md") and agent_base(name) is not None:
+            idx.update(os.path.join(output_dir, name))
+    idx.prune()
+    return idx
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_findings_index.py", description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for cmd in ("read-indexes", "build", "show", "follow"):
+        p = sub.add_parser(cmd)
+        p.add_argument("output_dir")
+        if cmd == "follow":
+            p.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.output_dir):
+        print(f"Error: directory '{args.output_dir}' not found", file=sys.stderr)
+        return 1
+
+    if args.cmd == "read-indexes":
+        idx = open_index(args.output_dir)
+        out = sys.stdout
+        for agent, text in idx.read_indexes():
+            out.write(f"{agent}\t{text}\n")
+        return 0
+    if args.cmd == "build":
+        idx = open_index(args.output_dir, persist=True)
+        done = idx.completed()
+        print(json.dumps({"agents": len(done),
+                          "lines": sum(len(a.lines) for a in done),
+                          "findings": sum(len(a.findings) for a in done)}))
+        return 0
+    if args.cmd == "show":
+        print(json.dumps(open_index(args.output_dir).as_dict(), indent=2))
+        return 0
+
+    # follow: tail partials until timeout, using flux-watch's wake-up sources.
+    import _flux_watch  # local: _flux_watch imports this module
+
+    sink = os.path.join(args.output_dir, INDEX_FILENAME)
+    idx = FindingsIndex.load(args.output_dir, sink)
+    source = _flux_watch.open_source(args.output_dir, _flux_watch.DEFAULT_POLL_MS / 1000.0)
+    deadline = time.monotonic() + args.timeout
+    try:
+        while True:
+            idx.refresh()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 0
+            source.wait(remaining)
+    finally:
+        source.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""Event-driven completion watcher for OUTPUT_DIR (Python backend of flux-watch.sh).
+
+flux-watch.sh waits on inotifywait when inotify-tools is installed and
+otherwise polls every 5 seconds. On hosts without inotify-tools that adds up
+to 5s of latency to every agent completion, and it compounds across stages.
+The stall rescue also keys only on file *appearance*, so a slow agent that is
+steadily writing its `.partial` looks the same as one that is hung.
+
+This watcher keeps flux-watch.sh's contract and fixes both problems:
+
+* Wake-ups come from the inotify syscalls, called directly through ctypes
+  (no inotify-tools dependency). Where inotify is unavailable (macOS, exotic
+  filesystems) it polls with `os.scandir` every FLUX_WATCH_POLL_MS (default
+  250ms). Either backend only signals "something changed"; every wake-up
+  rescans the directory, so a coalesced or dropped event cannot lose a
+  completion.
+* Each agent's `.md.partial` is tracked by size. Growth counts as progress:
+  the stall window (STALL_TIMEOUT) only elapses when no agent has completed
+  AND no partial has grown. Rescue stubs are still written only for expected
+  agents with neither `.md` nor `.partial` — a partial that stopped growing is
+  the Retry Race Protocol's job, and is only flagged in the metrics.
+* Each wake-up also feeds the changed files to `_findings_index`, which
+  parses Findings Index bullets as they are written and keeps
+  `{OUTPUT_DIR}/findings-index.jsonl` live (FLUX_FINDINGS_INDEX=0 disables).
+* Per-agent metrics are appended to `{OUTPUT_DIR}/watch-metrics.jsonl`
+  (override with FLUX_WATCH_METRICS): time-to-first-byte (first non-empty
+  `.partial`), time-to-complete (`.md` appearance), final size, status.
+
+Contract (identical to flux-watch.sh):
+    _flux_watch.py <output_dir> [expected_count] [timeout_secs]
+    stdout: "[<seen>/<expected> | <elapsed>] <agent>" per completion
+            ("[<seen> | <elapsed>] <agent>" when expected_count is 0)
+    exit:   0 = all expected files seen, 1 = timeout (some missing)
+    env:    STALL_RESCUE, STALL_TIMEOUT, EXPECTED_AGENTS as in flux-watch.sh
+
+Agent keys are filenames minus `.md` / `.md.partial`, so run-scoped outputs
+(`{agent}.{RUN_UUID}.md`) report as `{agent}.{RUN_UUID}` exactly like the bash
+watcher. EXPECTED_AGENTS entries may be bare agent names; when FLUX_RUN_UUID is
+set, `{agent}.{FLUX_RUN_UUID}.md(.partial)` also satisfies them.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import _findings_index
+
+IGNORED = frozenset({"triage-table.md", "triage.md", "synthesis.md"})
+METRICS_FILENAME = "watch-metrics.jsonl"
+DEFAULT_POLL_MS = 250
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_flux_watch] {msg % args}", file=sys.stderr)
+
+
+# --- wake-up sources --------------------------------------------------------
+
+
+class InotifySource:
+    """Raw inotify(7) via ctypes. Raises OSError if unavailable."""
+
+    def __init__(self, directory: str) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is Linux-only")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+        self.fd = fd
+
+    def wait(self, timeout: float) -> None:
+        """Block until events arrive or `timeout` elapses; drain the queue."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return
+        try:
+            while True:
+                buf = os.read(self.fd, 64 * 1024)
+                if not buf:
+                    return
+                # Names are not needed — the caller rescans — but walk the
+                # records so a partial read is never mistaken for a full one.
+                off = 0
+                while off + _EVENT_HEADER.size <= len(buf):
+                    _, _, _, name_len = _EVENT_HEADER.unpack_from(buf, off)
+                    off += _EVENT_HEADER.size + name_len
+        except BlockingIOError:
+            return
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollSource:
+    """Fallback: sleep for the poll interval (or less, if the deadline is nearer)."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+
+    def wait(self, timeout: float) -> None:
+        time.sleep(max(0.0, min(self.interval, timeout)))
+
+    def close(self) -> None:
+        pass
+
+
+def open_source(directory: str, poll_interval: float) -> InotifySource | PollSource:
+    if os.environ.get("FLUX_WATCH_FORCE_POLL") != "1":
+        try:
+            return InotifySource(directory)
+        except (OSError, AttributeError) as exc:
+            _debug("inotify unavailable, polling every %.0fms: %s", poll_interval * 1000, exc)
+    return PollSource(poll_interval)
+
+
+# --- watcher state ----------------------------------------------------------
+
+
+@dataclass
+class AgentProgress:
+    first_byte_at: float | None = None
+    last_growth_at: float | None = None
+    completed_at: float | None = None
+    size: int = 0
+    status: str = "pending"
+
+
+def agent_key(name: str) -> str | None:
+    """Agent key for a terminal `.md` or in-flight `.md.partial`, else None."""
+    if name.endswith(".md.partial"):
+        return name[: -len(".md.partial")]
+    if name.endswith(".md") and name not in IGNORED:
+        return name[: -len(".md")]
+    return None
+
+
+class Watcher:
+    def __init__(
+        self,
+        output_dir: str,
+        expected: int,
+        timeout: float,
+        *,
+        stall_rescue: bool = False,
+        stall_timeout: float = 60.0,
+        expected_agents: list[str] | None = None,
+        run_uuid: str | None = None,
+        metrics_path: str | None = None,
+        indexer: _findings_index.FindingsIndex | None = None,
+        out=None,
+    ) -> None:
+        self.output_dir = output_dir
+        self.expected = expected
+        self.timeout = timeout
+        self.stall_rescue = stall_rescue
+        self.stall_timeout = stall_timeout
+        self.expected_agents = expected_agents or []
+        self.run_uuid = run_uuid
+        self.metrics_path = metrics_path or os.path.join(output_dir, METRICS_FILENAME)
+        self.indexer = indexer
+        self.out = out or sys.stdout
+        self.start = time.monotonic()
+        self.last_progress = self.start
+        self.seen = 0
+        self.reported: set[str] = set()
+        self.progress: dict[str, AgentProgress] = {}
+
+    # -- output --------------------------------------------------------------
+
+    def elapsed_str(self) -> str:
+        elapsed = int(time.monotonic() - self.start)
+        if elapsed < 60:
+            return f"{elapsed}s"
+        return f"{elapsed // 60}m{elapsed % 60}s"
+
+    def _report(self, key: str) -> None:
+        if self.expected > 0:
+            line = f"[{self.seen}/{self.expected} | {self.elapsed_str()}] {key}"
+        else:
+            line = f"[{self.seen} | {self.elapsed_str()}] {key}"
+        print(line, file=self.out, flush=True)
+
+    def _emit_metrics(self, key: str) -> None:
+        p = self.progress[key]
+
+        def rel(t: float | None) -> float | None:
+            return None if t is None else round(t - self.start, 3)
+
+        record = {
+            "agent": key,
+            "status": p.status,
+            "ttfb_s": rel(p.first_byte_at),
+            "ttc_s": rel(p.completed_at),
+            "bytes": p.size,
+            "run_uuid": self.run_uuid,
+        }
+        try:
+            with open(self.metrics_path, "a") as fh:
+                fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as exc:
+            _debug("metrics: append to %s failed: %s", self.metrics_path, exc)
+
+    # -- scanning ------------------------------------------------------------
+
+    def done(self) -> bool:
+        return self.expected > 0 and self.seen >= self.expected
+
+    def scan(self) -> None:
+        """Rescan OUTPUT_DIR: report new completions, track partial growth."""
+        now = time.monotonic()
+        try:
+            entries = list(os.scandir(self.output_dir))
+        except FileNotFoundError:
+            return
+        completions: list[tuple[str, int]] = []
+        for entry in entries:
+            name = entry.name
+            key = agent_key(name)
+            if key is None:
+                continue
+            try:
+                size = entry.stat().st_size
+            except FileNotFoundError:
+                continue  # renamed between scandir and stat
+            if self.indexer is not None:
+                try:
+                    self.indexer.update(entry.path)
+                except OSError as exc:
+                    _debug("findings index: %s: %s", name, exc)
+            p = self.progress.setdefault(key, AgentProgress())
+            if name.endswith(".md.partial"):
+                if p.completed_at is None and size > p.size:
+                    if p.first_byte_at is None:
+                        p.first_byte_at = now
+                    p.last_growth_at = now
+                    p.size = size
+                    p.status = "writing"
+                    self.last_progress = now
+            elif name not in self.reported:
+                completions.append((name, size))
+        # Deterministic report order when several land in one wake-up.
+        for name, size in sorted(completions):
+            key = agent_key(name)
+            assert key is not None
+            p = self.progress[key]
+            p.completed_at = now
+            p.size = max(p.size, size)
+            p.status = "completed"
+            self.reported.add(name)
+            self.seen += 1
+            self.last_progress = now
+            self._report(key)
+            self._emit_metrics(key)
+
+    # -- stall rescue --------------------------------------------------------
+
+    def _has_output(self, agent: str) -> bool:
+        names = [f"{agent}.md", f"{agent}.md.partial"]
+        if self.run_uuid:
+            names += [f"{agent}.{self.run_uuid}.md", f"{agent}.{self.run_uuid}.md.partial"]
+        return any(os.path.exists(os.path.join(self.output_dir, n)) for n in names)
+
+    def _write_stall_stub(self, agent: str) -> None:
+        stub = os.path.join(self.output_dir, f"{agent}.md")
+        base = f"{agent}.md"
+        self.reported.add(base)
+        self.seen += 1
+        stall = int(self.stall_timeout)
+        body = f"""# {agent} — stall rescue
+
+**Status: stalled** (no output for {stall}s; flux-watch wrote this stub)
+
+The agent dispatched but produced no .partial or .md within the stall window.
+Synthesis should treat this as a non-finding (zero issues) and note the stall.
+
+--- VERDICT ---
+STATUS: error
+FILES: 0
+FINDINGS: 0
+SUMMARY: Agent stalled — no output within {stall}s of stall window. Likely permission error, transport failure, or silent refusal.
+---
+"""
+        try:
+            with open(stub, "x") as fh:
+                fh.write(body)
+        except FileExistsError:
+            pass  # someone wrote it; don't clobber
+        ts = datetime.now().astimezone().isoformat(timespec="seconds")
+        peer = {
+            "ts": ts, "agent": agent, "kind": "stall", "severity": "warn",
+            "message": f"Agent stalled — no output within {stall}s; rescued by flux-watch",
+        }
+        with open(os.path.join(self.output_dir, "peer-findings.jsonl"), "a") as fh:
+            fh.write(json.dumps(peer, separators=(",", ":"), ensure_ascii=False) + "\n")
+        p = self.progress.setdefault(agent, AgentProgress())
+        p.status = "rescued"
+        self._report(base[: -len(".md")])
+        self._emit_metrics(agent)
+
+    def rescue_stalled(self) -> None:
+        if not self.stall_rescue or not self.expected_agents:
+            return
+        for agent in self.expected_agents:
+            if not agent or f"{agent}.md" in self.reported:
+                continue
+            if self._has_output(agent):
+                continue
+            self._write_stall_stub(agent)
+
+    def flag_stalled_partials(self) -> None:
+        """Metrics-only: partials that stopped growing for a full stall window."""
+        now = time.monotonic()
+        for key, p in self.progress.items():
+            if (p.status == "writing" and p.last_growth_at is not None
+                    and now - p.last_growth_at >= self.stall_timeout):
+                p.status = "stalled"
+                self._emit_metrics(key)
+
+    # -- main loop -----------------------------------------------------------
+
+    def run(self, source: InotifySource | PollSource) -> int:
+        deadline = self.start + self.timeout
+        self.scan()
+        if self.done():
+            return 0
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wake = deadline - now
+            if self.stall_rescue:
+                wake = min(wake, max(0.0, self.last_progress + self.stall_timeout - now))
+            source.wait(wake)
+            self.scan()
+            if self.done():
+                return 0
+            if self.stall_rescue and time.monotonic() - self.last_progress >= self.stall_timeout:
+                self.flag_stalled_partials()
+                self.rescue_stalled()
+                self.last_progress = time.monotonic()
+                if self.done():
+                    return 0
+        self.rescue_stalled()
+        self.scan()
+        for key, p in self.progress.items():
+            if p.status in ("pending", "writing"):
+                p.status = "timed-out"
+                self._emit_metrics(key)
+        return 0 if self.done() else 1
+
+
+def _int_arg(argv: list[str], idx: int, default: int) -> int:
+    if len(argv) <= idx or argv[idx] == "":
+        return default
+    try:
+        return int(argv[idx])
+    except ValueError:
+        print(f"_flux_watch: expected an integer, got {argv[idx]!r}", file=sys.stderr)
+        raise SystemExit(2)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: flux-watch.sh <output_dir> [expected_count] [timeout_secs]", file=sys.stderr)
+        return 2
+    output_dir = argv[1]
+    expected = _int_arg(argv, 2, 0)
+    timeout = _int_arg(argv, 3, 300)
+    try:
+        stall_timeout = float(os.environ.get("STALL_TIMEOUT", "60"))
+        poll_ms = float(os.environ.get("FLUX_WATCH_POLL_MS", DEFAULT_POLL_MS))
+    except ValueError as exc:
+        print(f"_flux_watch: bad numeric env: {exc}", file=sys.stderr)
+        return 2
+    agents = [a for a in os.environ.get("EXPECTED_AGENTS", "").split("\n") if a]
+    indexer = None
+    if os.environ.get("FLUX_FINDINGS_INDEX", "1") != "0" and os.path.isdir(output_dir):
+        indexer = _findings_index.FindingsIndex.load(
+            output_dir, os.path.join(output_dir, _findings_index.INDEX_FILENAME))
+    watcher = Watcher(
+        output_dir,
+        expected,
+        timeout,
+        stall_rescue=os.environ.get("STALL_RESCUE", "0") == "1",
+        stall_timeout=stall_timeout,
+        expected_agents=agents,
+        run_uuid=os.environ.get("FLUX_RUN_UUID") or None,
+        metrics_path=os.environ.get("FLUX_WATCH_METRICS") or None,
+        indexer=indexer,
+    )
+    source = open_source(output_dir, max(poll_ms, 10.0) / 1000.0)
+    try:
+        return watcher.run(source)
+    finally:
+        source.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
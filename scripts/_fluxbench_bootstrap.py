@@ -0,0 +1,350 @@
+"""Bootstrap confidence intervals for FluxBench metrics and gate verdicts.
+
+score_findings reports point estimates — recall 0.62 on five fixtures
+passes a 0.60 gate exactly as 0.62 on five hundred would — and
+fluxbench-calibrate.sh takes the p25 of a handful of fixtures as a
+threshold without saying how far that p25 could move.
+
+This module resamples the structure a qualification run already computed.
+The Hungarian match is done once per fixture (match_findings); each fixture
+then reduces to parallel tuples, one entry per ground-truth finding:
+
+    weight    severity weight
+    found     the weight if matched, else 0
+    matched   1 if matched
+    sev_ok    1 if matched with severity within ±1
+    p0        1 if a P0 was missed or reported below P0
+
+and `fp`, one entry per model finding: 1 if it matched nothing.
+
+A resample draws fixtures with replacement, then each drawn fixture's
+ground-truth and model findings with replacement (a two-stage bootstrap:
+fixture-to-fixture and finding-to-finding variance both show up). Per
+fixture it recomputes recall, false-positive rate and severity accuracy
+with score_findings' rules, then averages across fixtures the way the
+qualification summary does; fixtures that produced no valid response count
+against format compliance and are left out of the averages. Gates are
+checked on the averages (recall also fails on any P0 miss in the
+resample).
+
+The result, per core metric: the point estimate, the percentile interval at
+`confidence`, and per gate P(pass) — the share of resamples clearing the
+threshold — plus `lcb_pass`, whether the conservative bound (lower; upper
+for the false-positive rate) clears it. `fluxbench_pipeline run
+--bootstrap N --gate-on-lcb` qualifies only when every lcb_pass holds;
+`calibrate --bootstrap N` writes each threshold's interval and uses its
+lenient bound as the threshold (see percentile_interval).
+
+Resamples run in fixed chunks of CHUNK, each with its own seed derived
+from `seed` and the chunk index, so results depend on (seed, resamples)
+only — never on --jobs, which spreads the chunks over worker processes.
+Within a fixture, findings are drawn as random bytes through a
+bytes.translate table and tallied per finding type (see _Sampler), so the
+per-finding work stays in C: 10k resamples take under a second for the
+five qualification fixtures and ~6s for 50 fixtures of 20 findings each,
+in one process.
+
+CLI:
+    python3 _fluxbench_bootstrap.py ci [--fixtures-dir D] [--work-dir D]
+        [--resamples 10000] [--confidence 0.95] [--seed 0] [--jobs N]
+        prints the interval report; mock mode (no --work-dir) scores the
+        ground truth against itself, as qualify --mock does
+
+Exit codes:
+    0  ok
+    2  bad arguments or unreadable fixtures/work dir
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import mul
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _fluxbench_score  # noqa: E402
+
+CHUNK = 1000
+FORMAT = "fluxbench-format-compliance"
+RECALL = "fluxbench-finding-recall"
+FP_RATE = "fluxbench-false-positive-rate"
+SEVERITY = "fluxbench-severity-accuracy"
+METRICS = (FORMAT, RECALL, FP_RATE, SEVERITY)
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_fluxbench_bootstrap] {msg % args}", file=sys.stderr)
+
+
+# --- per-fixture match structure ---------------------------------------------
+
+
+@dataclass(frozen=True)
+class FixtureMatch:
+    """One fixture's matched findings as columns (see module docstring)."""
+    weight: tuple[float, ...] = ()
+    found: tuple[float, ...] = ()
+    matched: tuple[int, ...] = ()
+    sev_ok: tuple[int, ...] = ()
+    p0: tuple[int, ...] = ()
+    fp: tuple[int, ...] = ()
+    compliant: bool = True
+
+    @classmethod
+    def from_findings(cls, model: list[dict[str, Any]], baseline: list[dict[str, Any]]) -> "FixtureMatch":
+        pairs = {bi: mi for mi, bi in _fluxbench_score.match_findings(model, baseline)}
+        levels, weights, sev = _fluxbench_score.SEV_LEVELS, _fluxbench_score.WEIGHTS, _fluxbench_score._sev
+        rows = []
+        for bi, b in enumerate(baseline):
+            w = float(weights.get(b.get("severity", "P2"), 1))
+            mi = pairs.get(bi)
+            if mi is None:
+                rows.append((w, 0.0, 0, 0, int(sev(b) == "P0")))
+                continue
+            m = model[mi]
+            ok = abs(levels.get(m.get("severity", "P2"), 2) - levels.get(b.get("severity", "P2"), 2)) <= 1
+            rows.append((w, w, 1, int(ok), int(sev(b) == "P0" and sev(m) != "P0")))
+        matched = set(pairs.values())
+        columns = tuple(zip(*rows)) if rows else ((),) * 5
+        return cls(*columns, fp=tuple(0 if mi in matched else 1 for mi in range(len(model))))
+
+    @classmethod
+    def failed(cls) -> "FixtureMatch":
+        """A fixture with no valid response: counts against format compliance only."""
+        return cls(compliant=False)
+
+    def metrics(self) -> tuple[float, float, float, bool]:
+        """(recall, fp_rate, severity_accuracy, p0_fail) with score_findings' rules, unrounded."""
+        return _metrics(self.weight, self.found, self.matched, self.sev_ok, self.p0, self.fp)
+
+
+def _match_task(pair: tuple[list[dict[str, Any]], list[dict[str, Any]]]) -> FixtureMatch:
+    return FixtureMatch.from_findings(*pair)
+
+
+def build_matches(pairs: list[tuple[list[dict[str, Any]], list[dict[str, Any]]]],
+                  jobs: int = 1) -> list[FixtureMatch]:
+    """FixtureMatch per (model findings, ground truth) pair, in order; Hungarian in a pool when jobs > 1."""
+    if jobs <= 1 or len(pairs) <= 1:
+        return [_match_task(p) for p in pairs]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pairs))) as pool:
+        return list(pool.map(_match_task, pairs))
+
+
+def _metrics(weight: tuple, found: tuple, matched: tuple, sev_ok: tuple, p0: tuple,
+             fp: tuple) -> tuple[float, float, float, bool]:
+    total = sum(weight)
+    recall = 1.0 if total == 0 else sum(found) / total
+    fp_rate = sum(fp) / len(fp) if fp else 0.0
+    n_matched = sum(matched)
+    severity = sum(sev_ok) / n_matched if n_matched else (1.0 if not weight else 0.0)
+    return recall, fp_rate, severity, any(p0)
+
+
+class _Sampler:
+    """Within-fixture resampler for one FixtureMatch.
+
+    Findings collapse to their distinct (weight, found, matched, sev_ok,
+    p0) types. A draw of n findings is n random bytes run through a
+    bytes.translate table — byte b maps to the type of finding b % n, bytes
+    at or above the largest multiple of n are deleted so every finding is
+    equally likely — and the metrics come from bytes.count per type. The
+    per-finding work never leaves C. Fixtures with more than 255 findings
+    on a side fall back to random.choices.
+    """
+
+    def __init__(self, fx: FixtureMatch) -> None:
+        self.fx = fx
+        rows = list(zip(fx.weight, fx.found, fx.matched, fx.sev_ok, fx.p0))
+        types = sorted(set(rows))
+        self.base = self._table([types.index(r) for r in rows])
+        self.fp = self._table(list(fx.fp))
+        self.type_ids = range(len(types))
+        # Per-type columns, so each metric is one sum(map(mul, counts, column)).
+        self.weight, self.found, self.matched, self.sev_ok, self.p0 = (tuple(c) for c in zip(*types)) \
+            if types else ((),) * 5
+        self.any_p0 = any(self.p0)
+
+    @staticmethod
+    def _table(codes: list[int]) -> tuple[bytes, bytes, int] | None:
+        n = len(codes)
+        if not 0 < n < 256:
+            return None
+        limit = 256 - 256 % n
+        return bytes(codes[b % n] if b < limit else 0 for b in range(256)), bytes(range(limit, 256)), n
+
+    @staticmethod
+    def _codes(randbytes: Callable[[int], bytes], table: tuple[bytes, bytes, int]) -> bytes:
+        trans, delete, n = table
+        out = randbytes(2 * n).translate(trans, delete)
+        while len(out) < n:
+            out += randbytes(n).translate(trans, delete)
+        return out[:n]
+
+    def draw(self, rng: random.Random) -> tuple[float, float, float, bool]:
+        fx = self.fx
+        if (fx.weight and self.base is None) or (fx.fp and self.fp is None):
+            n, m = len(fx.weight), len(fx.fp)
+            idx = rng.choices(range(n), k=n)
+            cols = [tuple(col[i] for i in idx) for col in (fx.weight, fx.found, fx.matched, fx.sev_ok, fx.p0)]
+            return _metrics(*cols, tuple(rng.choices(fx.fp, k=m)))
+        total = found = matched = sev_ok = 0.0
+        p0 = False
+        if self.base is not None:
+            counts = list(map(self._codes(rng.randbytes, self.base).count, self.type_ids))
+            total = sum(map(mul, counts, self.weight))
+            found = sum(map(mul, counts, self.found))
+            matched = sum(map(mul, counts, self.matched))
+            sev_ok = sum(map(mul, counts, self.sev_ok))
+            p0 = self.any_p0 and any(map(mul, counts, self.p0))
+        recall = 1.0 if total == 0 else found / total
+        fp_rate = self._codes(rng.randbytes, self.fp).count(1) / len(fx.fp) if self.fp is not None else 0.0
+        severity = sev_ok / matched if matched else (1.0 if not fx.weight else 0.0)
+        return recall, fp_rate, severity, p0
+
+
+# --- resampling ------------------------------------------------------------------
+
+
+def _chunk(task: tuple[list[FixtureMatch], dict[str, float], int, str]) -> tuple[list[list[float]], list[int]]:
+    """`n` resamples: per-metric values (METRICS order) and per-gate pass counts."""
+    fixtures, t, n, seed = task
+    rng = random.Random(seed)
+    samplers = [_Sampler(fx) if fx.compliant else None for fx in fixtures]
+    k = len(fixtures)
+    values: list[list[float]] = [[], [], [], []]
+    passes = [0, 0, 0, 0]
+    for _ in range(n):
+        recall = fp_rate = severity = 0.0
+        scored, p0 = 0, False
+        for sampler in rng.choices(samplers, k=k):
+            if sampler is None:
+                continue
+            r, f, s, miss = sampler.draw(rng)
+            recall += r
+            fp_rate += f
+            severity += s
+            p0 = p0 or miss
+            scored += 1
+        fc = scored / k
+        values[0].append(fc)
+        passes[0] += fc >= t[FORMAT]
+        if not scored:
+            for i in (1, 2, 3):
+                values[i].append(float("nan"))
+            continue
+        recall, fp_rate, severity = recall / scored, fp_rate / scored, severity / scored
+        values[1].append(recall)
+        values[2].append(fp_rate)
+        values[3].append(severity)
+        passes[1] += recall >= t[RECALL] and not p0
+        passes[2] += fp_rate <= t[FP_RATE]
+        passes[3] += severity >= t[SEVERITY]
+    return values, passes
+
+
+def quantile(sorted_values: list[float], q: float) -> float:
+    """Linear-interpolated quantile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    idx = q * (len(sorted_values) - 1)
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (idx - lo) * (sorted_values[hi] - sorted_values[lo])
+
+
+def _tasks(resamples: int, seed: int) -> list[tuple[int, str]]:
+    return [(min(CHUNK, resamples - start), f"{seed}:{start // CHUNK}") for start in range(0, resamples, CHUNK)]
+
+
+def bootstrap(fixtures: list[FixtureMatch], thresholds: dict[str, float], resamples: int = 10_000,
+              confidence: float = 0.95, seed: int = 0, jobs: int = 1) -> dict[str, Any]:
+    """Interval report for one model's fixtures (see module docstring)."""
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+    if resamples < 1:
+        raise ValueError(f"resamples must be >= 1, got {resamples}")
+    if not fixtures:
+        raise ValueError("no fixtures to resample")
+    tasks = [(fixtures, thresholds, n, s) for n, s in _tasks(resamples, seed)]
+    if jobs <= 1 or len(tasks) <= 1:
+        chunks = [_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            chunks = list(pool.map(_chunk, tasks))
+
+    columns = [sorted(v for c in chunks for v in c[0][i] if v == v) for i in range(4)]
+    passes = [sum(c[1][i] for c in chunks) for i in range(4)]
+
+    scored = [fx.metrics() for fx in fixtures if fx.compliant]
+    estimate = [sum(fx.compliant for fx in fixtures) / len(fixtures)]
+    estimate += [sum(m[i] for m in scored) / len(scored) if scored else float("nan") for i in range(3)]
+    tail = (1 - confidence) / 2
+    metrics, gates = {}, {}
+    for i, name in enumerate(METRICS):
+        lower, upper = quantile(columns[i], tail), quantile(columns[i], 1 - tail)
+        metrics[name] = {"estimate": _round(estimate[i]), "lower": _round(lower), "upper": _round(upper)}
+        bound, threshold = (upper, thresholds[name]) if name == FP_RATE else (lower, thresholds[name])
+        lcb_pass = bound == bound and (bound <= threshold if name == FP_RATE else bound >= threshold)
+        if name == RECALL:
+            lcb_pass = lcb_pass and not any(m[3] for m in scored)
+        gates[name] = {"threshold": threshold, "p_pass": round(passes[i] / resamples, 4), "lcb_pass": lcb_pass}
+    _debug("%d resamples of %d fixtures in %d chunk(s)", resamples, len(fixtures), len(tasks))
+    return {"resamples": resamples, "confidence": confidence, "seed": seed, "fixtures": len(fixtures),
+            "metrics": metrics, "gates": gates}
+
+
+def percentile_interval(values: list[float], stat: Callable[[list[float]], float], resamples: int = 10_000,
+                        confidence: float = 0.95, seed: int = 0) -> tuple[float, float]:
+    """Percentile interval of `stat` over fixture-level resamples of `values` (e.g. calibrate's p25)."""
+    rng = random.Random(f"{seed}:percentile")
+    k = len(values)
+    dist = sorted(stat(rng.choices(values, k=k)) for _ in range(resamples)) if k else []
+    tail = (1 - confidence) / 2
+    return _round(quantile(dist, tail)), _round(quantile(dist, 1 - tail))
+
+
+def _round(v: float) -> float | None:
+    return None if v != v else round(v, 4)
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    import _fluxbench_pipeline  # the runner imports this module; import it lazily here
+
+    parser = argparse.ArgumentParser(prog="_fluxbench_bootstrap", description="FluxBench bootstrap intervals.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("ci")
+    c.add_argument("--fixtures-dir", default=_fluxbench_pipeline.DEFAULT_FIXTURES_DIR)
+    c.add_argument("--work-dir", default=None, help="score responses from a qualify --emit work dir")
+    c.add_argument("--resamples", type=int, default=10_000)
+    c.add_argument("--confidence", type=float, default=0.95)
+    c.add_argument("--seed", type=int, default=0)
+    c.add_argument("--jobs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    try:
+        pipeline = _fluxbench_pipeline.Pipeline(_fluxbench_pipeline.Paths.from_env(), jobs=args.jobs)
+        fixtures = pipeline.fixture_matches(args.fixtures_dir, args.work_dir)
+        doc = bootstrap(fixtures, pipeline.thresholds, args.resamples, args.confidence, args.seed, args.jobs)
+    except _fluxbench_pipeline.PipelineError as exc:
+        print(f"fluxbench_bootstrap: {exc}", file=sys.stderr)
+        return 2
+    except (OSError, ValueError) as exc:
+        print(f"fluxbench_bootstrap: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
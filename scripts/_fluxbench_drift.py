@@ -0,0 +1,359 @@
+"""Fleet-wide FluxBench drift analytics over the full results history.
+
+fluxbench-drift.sh answers one question — does this one shadow result sit
+more than drift_threshold below this one model's qualified_baseline — with
+a yq/jq round trip per metric, and fluxbench-drift-sample.sh asks it once
+per qualified model in a shell loop, re-reading the registry and the
+results log each time. A slow slide (say 0.04 a week) never trips the
+one-shot threshold until it has already slid 0.15.
+
+This module loads fluxbench-results.jsonl (rotated segments included) once
+into columns — one array('d') per metric, NaN where a record has no value,
+plus a model-index column — and answers every model at once:
+
+    regression  sign * (baseline - value) per row, sign from
+                higher_is_better in fluxbench-metrics.yaml, computed
+                column by column against a per-model baseline vector
+    verdict     the latest row per model through drift.sh's rules:
+                drift_detected / drift_cleared / drift_recovering /
+                no_drift, with the hysteresis band on drift_flagged models
+    fleet       the post-scan flagged share of status=qualified models
+                (drift.sh --fleet-check), plus the per-metric share of
+                baselined models regressing past the threshold; a share ≥
+                correlated_drift_threshold turns every detection into
+                baseline_shift_suspected
+    cusum       one-sided CUSUM per (model, metric): S = max(0, S + d - k),
+                alarm while S > h; `since` is the run after S last sat at 0
+    ewma        z = λ·d + (1 - λ)·z, alarm while z > limit
+
+CUSUM and EWMA alarms are advisory: they are reported as `early_warning`
+metrics and never change a verdict or a registry flag. Each statistic is
+one pass over its metric column with per-model running state, so the cost
+is O(rows × metrics) regardless of fleet size.
+
+A run that wrote a summary line (qualify.sh, the pipeline runner) counts
+once, as its summary; its per-fixture lines are dropped. Other lines
+(score.sh runs, shadow results) count individually. Rows are in log order.
+
+Config is read from the registry's root `fluxbench:` block, with drift.sh's
+defaults: drift_threshold 0.15, hysteresis_band 0.05,
+correlated_drift_threshold 0.50; cusum_slack (default hysteresis_band),
+cusum_limit (default drift_threshold), ewma_lambda 0.3, ewma_limit
+(default 2 × hysteresis_band).
+
+Paths follow the scripts' environment: MODEL_REGISTRY,
+FLUXBENCH_RESULTS_JSONL, METRICS_FILE.
+
+CLI:
+    python3 _fluxbench_drift.py scan [--slug S ...] [--no-fleet-check] [--apply]
+        prints the report as JSON; --apply sets/clears drift_flagged for
+        every detected/cleared model in one registry transaction, taken
+        under the registry lock (fd 201 domain) with the scan itself
+
+Exit codes:
+    0  ok (drift is reported in the JSON, not as an exit code)
+    1  registry lock timeout or write failure
+    2  unreadable registry, results log or metrics config
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Any
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _fluxbench_pipeline  # noqa: E402
+import _log_segments  # noqa: E402
+import lib_registry  # noqa: E402
+
+NAN = float("nan")
+BASELINED_STATUSES = ("qualified", "auto-qualified")
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_fluxbench_drift] {msg % args}", file=sys.stderr)
+
+
+def _num(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return NAN
+
+
+# --- columnar history --------------------------------------------------------
+
+
+@dataclass
+class History:
+    """Results rows as columns. Row i belongs to models[model[i]]."""
+    models: list[str] = field(default_factory=list)
+    model: array = field(default_factory=lambda: array("i"))
+    run_ids: list[str] = field(default_factory=list)
+    columns: dict[str, array] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.model)
+
+    def latest_rows(self) -> list[int]:
+        """Index of each model's last row (every model has at least one)."""
+        latest = [0] * len(self.models)
+        for i, mi in enumerate(self.model):
+            latest[mi] = i
+        return latest
+
+
+def load_history(results_path: str) -> History:
+    """Read the logical results log once; summaries stand in for their runs' fixture lines."""
+    rows: list[tuple[str, str, dict[str, Any]]] = []
+    summarized: set[str] = set()
+    for rec in _log_segments.iter_records(results_path):
+        slug, metrics = rec.get("model_slug"), rec.get("metrics")
+        if not isinstance(slug, str) or not isinstance(metrics, dict):
+            continue
+        run_id = str(rec.get("qualification_run_id") or "")
+        if rec.get("is_summary") and run_id.startswith("summary-"):
+            summarized.add(run_id[len("summary-"):])
+        rows.append((slug, run_id, metrics))
+
+    hist = History()
+    index: dict[str, int] = {}
+    kept = [r for r in rows if r[1] not in summarized]
+    names = sorted({m for _, _, metrics in kept for m in metrics})
+    hist.columns = {m: array("d") for m in names}
+    for slug, run_id, metrics in kept:
+        if slug not in index:
+            index[slug] = len(hist.models)
+            hist.models.append(slug)
+        hist.model.append(index[slug])
+        hist.run_ids.append(run_id)
+        for m, col in hist.columns.items():
+            col.append(_num(metrics.get(m)))
+    _debug("loaded %d rows (%d raw), %d models, %d metrics", len(hist), len(rows), len(hist.models), len(names))
+    return hist
+
+
+# --- config --------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class DriftConfig:
+    threshold: float = 0.15
+    band: float = 0.05
+    correlated: float = 0.50
+    cusum_slack: float = 0.05
+    cusum_limit: float = 0.15
+    ewma_lambda: float = 0.3
+    ewma_limit: float = 0.10
+
+    @classmethod
+    def from_registry(cls, reg: dict[str, Any]) -> "DriftConfig":
+        fb = reg.get("fluxbench") or {}
+
+        def get(key: str, default: float) -> float:
+            val = fb.get(key)
+            return default if val is None else float(val)
+        threshold, band = get("drift_threshold", 0.15), get("hysteresis_band", 0.05)
+        return cls(threshold=threshold, band=band,
+                   correlated=get("correlated_drift_threshold", 0.50),
+                   cusum_slack=get("cusum_slack", band), cusum_limit=get("cusum_limit", threshold),
+                   ewma_lambda=get("ewma_lambda", 0.3), ewma_limit=get("ewma_limit", 2 * band))
+
+
+# --- analytics -------------------------------------------------------------------
+
+
+def regression_columns(hist: History, baselines: dict[str, dict[str, Any]],
+                       higher_is_better: dict[str, bool]) -> dict[str, array]:
+    """Per metric, each row's regression against its model's baseline (NaN when either is missing).
+
+    Positive is worse in both directions. Metrics no model has a baseline
+    for are left out.
+    """
+    out = {}
+    for metric, col in hist.columns.items():
+        base = array("d", (_num((baselines.get(slug) or {}).get(metric)) for slug in hist.models))
+        if all(math.isnan(b) for b in base):
+            continue
+        sign = 1.0 if higher_is_better.get(metric, True) else -1.0
+        out[metric] = array("d", (sign * (base[mi] - v) for mi, v in zip(hist.model, col)))
+    return out
+
+
+def cusum(hist: History, reg_col: array, slack: float, limit: float) -> list[tuple[float, int]]:
+    """Final (S, first row of the current excursion) per model; S > limit is an alarm."""
+    s = [0.0] * len(hist.models)
+    since = [-1] * len(hist.models)
+    for i, (mi, d) in enumerate(zip(hist.model, reg_col)):
+        if math.isnan(d):
+            continue
+        if s[mi] == 0.0:
+            since[mi] = i
+        s[mi] = max(0.0, s[mi] + d - slack)
+    return list(zip(s, since))
+
+
+def ewma(hist: History, reg_col: array, lam: float) -> list[float]:
+    """Final exponentially weighted regression per model (NaN for models with no value)."""
+    z = [NAN] * len(hist.models)
+    for mi, d in zip(hist.model, reg_col):
+        if math.isnan(d):
+            continue
+        z[mi] = d if math.isnan(z[mi]) else lam * d + (1.0 - lam) * z[mi]
+    return z
+
+
+def scan(hist: History, reg: dict[str, Any], higher_is_better: dict[str, bool],
+         cfg: DriftConfig | None = None, slugs: list[str] | None = None,
+         fleet_check: bool = True) -> dict[str, Any]:
+    """Drift report for every baselined qualified/auto-qualified model with history."""
+    cfg = cfg or DriftConfig.from_registry(reg)
+    models = reg.get("models") or {}
+    baselines = {slug: m["qualified_baseline"] for slug, m in models.items()
+                 if isinstance(m, dict) and m.get("status") in BASELINED_STATUSES
+                 and isinstance(m.get("qualified_baseline"), dict)}
+    reg_cols = regression_columns(hist, baselines, higher_is_better)
+    latest = hist.latest_rows()
+    wanted = [mi for mi, slug in enumerate(hist.models)
+              if slug in baselines and (slugs is None or slug in slugs)]
+
+    cusum_by = {m: cusum(hist, col, cfg.cusum_slack, cfg.cusum_limit) for m, col in reg_cols.items()}
+    ewma_by = {m: ewma(hist, col, cfg.ewma_lambda) for m, col in reg_cols.items()}
+
+    report: dict[str, dict[str, Any]] = {}
+    for mi in wanted:
+        slug, row = hist.models[mi], latest[mi]
+        baseline = baselines[slug]
+        deltas = {m: col[row] for m, col in reg_cols.items()
+                  if not math.isnan(col[row]) and baseline.get(m) is not None}
+        drifted = [m for m in baseline if m in deltas and deltas[m] > cfg.threshold]
+        within_band = all(abs(d) <= cfg.band for d in deltas.values())
+        flagged = models[slug].get("drift_flagged") is True
+        if drifted:
+            verdict = "drift_detected"
+        elif flagged:
+            verdict = "drift_cleared" if within_band else "drift_recovering"
+        else:
+            verdict = "no_drift"
+
+        alarms: dict[str, dict[str, Any]] = {}
+        for m in reg_cols:
+            s, since = cusum_by[m][mi]
+            z = ewma_by[m][mi]
+            hit = {}
+            if s > cfg.cusum_limit:
+                hit["cusum"] = round(s, 4)
+                hit["since"] = hist.run_ids[since]
+            if not math.isnan(z) and z > cfg.ewma_limit:
+                hit["ewma"] = round(z, 4)
+            if hit:
+                alarms[m] = hit
+        report[slug] = {
+            "verdict": verdict,
+            "drifted_metrics": drifted,
+            "max_drift": round(max([0.0, *deltas.values()]), 4),
+            "deltas": {m: round(d, 4) + 0.0 for m, d in sorted(deltas.items())},
+            "latest_run": hist.run_ids[row],
+            "early_warning": sorted(m for m in alarms if m not in drifted),
+            "alarms": alarms,
+        }
+
+    fleet = _fleet(models, report, reg_cols, [mi for mi, slug in enumerate(hist.models) if slug in baselines],
+                   latest, hist, cfg)
+    if fleet_check and fleet["baseline_shift"]:
+        for entry in report.values():
+            if entry["verdict"] == "drift_detected":
+                entry["verdict"] = "baseline_shift_suspected"
+    return {"config": cfg.__dict__, "rows": len(hist), "models": report, "fleet": fleet}
+
+
+def _fleet(models: dict[str, Any], report: dict[str, dict[str, Any]], reg_cols: dict[str, array],
+           baselined: list[int], latest: list[int], hist: History, cfg: DriftConfig) -> dict[str, Any]:
+    """drift.sh --fleet-check's flagged/qualified ratio, as the registry would read after this scan."""
+    def flagged_after(slug: str) -> bool:
+        verdict = report.get(slug, {}).get("verdict")
+        if verdict == "drift_detected":
+            return True
+        if verdict == "drift_cleared":
+            return False
+        return models[slug].get("drift_flagged", False) is True
+    qualified = [s for s, m in models.items() if isinstance(m, dict) and m.get("status") == "qualified"]
+    flagged = sum(1 for s in qualified if flagged_after(s))
+    ratio = flagged / len(qualified) if qualified else 0.0
+
+    # Per metric: share of baselined models whose latest value regressed past the threshold.
+    rows = [latest[mi] for mi in baselined]
+    by_metric = {}
+    for m, col in reg_cols.items():
+        seen = [col[r] for r in rows if not math.isnan(col[r])]
+        if seen:
+            by_metric[m] = round(sum(1 for d in seen if d > cfg.threshold) / len(seen), 4)
+    return {"baseline_shift": ratio >= cfg.correlated and flagged > 0, "flagged": flagged,
+            "total": len(qualified), "ratio": round(ratio, 4),
+            "correlated_metrics": sorted(m for m, share in by_metric.items() if share >= cfg.correlated
+                                         and len(baselined) > 1),
+            "metric_share": by_metric}
+
+
+def flag_ops(doc: dict[str, Any]) -> list[dict[str, Any]]:
+    """lib_registry ops that record the scan's detections and clears."""
+    ops = []
+    for slug, entry in doc["models"].items():
+        value = {"drift_detected": True, "baseline_shift_suspected": True,
+                 "drift_cleared": False}.get(entry["verdict"])
+        if value is not None:
+            ops.append({"op": "set-field", "slug": slug, "key": "drift_flagged", "value": value})
+    return ops
+
+
+def run_scan(paths: _fluxbench_pipeline.Paths, slugs: list[str] | None = None, fleet_check: bool = True,
+             apply: bool = False) -> dict[str, Any]:
+    """Load history and registry once and scan; with apply, flag/unflag in one locked transaction."""
+    pipeline = _fluxbench_pipeline.Pipeline(paths)
+    hib = pipeline.higher_is_better
+    hist = load_history(paths.results)
+    if not apply:
+        return scan(hist, pipeline.registry(), hib, slugs=slugs, fleet_check=fleet_check)
+    with lib_registry.registry_lock(paths.registry):
+        doc = scan(hist, pipeline.registry(), hib, slugs=slugs, fleet_check=fleet_check)
+        ops = flag_ops(doc)
+        if ops:
+            lib_registry.commit_locked(paths.registry, ops)
+    doc["applied"] = len(ops)
+    return doc
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_fluxbench_drift", description="FluxBench drift analytics.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("scan")
+    s.add_argument("--slug", action="append", default=None, help="limit the report to these models")
+    s.add_argument("--no-fleet-check", action="store_true")
+    s.add_argument("--apply", action="store_true", help="write drift_flagged for detected/cleared models")
+    args = parser.parse_args(argv)
+
+    try:
+        doc = run_scan(_fluxbench_pipeline.Paths.from_env(), args.slug, not args.no_fleet_check, args.apply)
+    except TimeoutError as exc:
+        print(f"fluxbench_drift: {exc}", file=sys.stderr)
+        return 1
+    except lib_registry.BatchError as exc:
+        print(f"fluxbench_drift: registry update failed: {exc}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        print(f"fluxbench_drift: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1053 @@
+"""In-process FluxBench pipeline: qualify → score → sync → drift → challenger.
+
+The shell pipeline (fluxbench-qualify.sh → fluxbench-score.sh →
+fluxbench-sync.sh → fluxbench-drift.sh → fluxbench-challenger.sh) passes
+state through temp files and re-parses the same inputs in every process:
+each fixture costs a score.sh run with five yq threshold reads, a
+_fluxbench_score.py interpreter and a dozen jq calls, and sync.sh spawns jq
+per results line. Five mock fixtures take ~10s of qualify plus ~2s of sync
+on a warm machine, nearly all of it process startup.
+
+This module runs the same stages in one interpreter. The fixtures, registry,
+thresholds, metrics and budget config are parsed once per Pipeline and
+shared by every stage; scoring calls _fluxbench_score.score_findings
+directly. Everything it writes stays interoperable with the scripts:
+
+    qualification_run_id  qr-<slug>-<epoch> on every per-fixture result
+                          line, summary-qr-<slug>-<epoch> on the summary
+                          line — the keys sync.sh's .sync-state tracks
+    results JSONL         appended under flock on <results>.lock (fd 200
+                          domain), one write per run
+    registry              lib_registry.commit_batch under flock on
+                          <registry>.lock (fd 201 domain); event mode is
+                          honoured exactly as lib-registry.sh does
+    AgMoDB + .sync-state  written under flock on <results dir>/.sync.lock
+                          (fd 202 domain), tmp + rename
+
+so a runner and a concurrently running shell script serialize on the same
+locks, and either can pick up where the other left off (sync.sh syncs a
+runner's results; the runner's drift stage reads a baseline qualify.sh
+wrote). flock(1) and fcntl.flock share the flock(2) lock table.
+
+Stages mirror the scripts' verdicts and record shapes; when a script
+changes, change the matching stage here (test_fluxbench_pipeline.py holds
+the two side by side on the qualification fixtures):
+
+    qualify     mock (ground truth as model output) or scored from an
+                --emit work dir (--work-dir); per-fixture results +
+                summary line; registry status/fluxbench merge and the
+                if-absent qualified_baseline in one transaction
+    sync        pending results → AgMoDB documents (fluxbench-sync.sh)
+    drift       the run's summary metrics (or --shadow) against the
+                qualified baseline; skipped when the model has none
+    challenger  evaluate the current challenger (the SPRT early stop in
+                _fluxbench_sequential first, when enabled), else select one
+
+Fixture scoring is CPU-bound (Hungarian matching over SequenceMatcher
+ratios) and independent per fixture, so `--jobs N` fans it out to a pool of
+N processes. Results are merged back in fixture order before anything is
+aggregated or written, so the records, averages, verdict and the single
+locked results append are identical for any N. `calibrate` reuses the same
+pool for fluxbench-calibrate.sh's threshold derivation; both scripts hand
+off here when given --jobs > 1.
+
+`--bootstrap N` attaches _fluxbench_bootstrap intervals: qualify reports a
+CI and P(pass) per gate (and with --gate-on-lcb qualifies only when every
+confidence bound clears its threshold); calibrate writes each threshold's
+interval and uses its lenient bound. Results lines are unchanged.
+
+Paths follow the scripts' environment: MODEL_REGISTRY,
+FLUXBENCH_RESULTS_JSONL, AGMODB_REPO_PATH, METRICS_FILE, BUDGET_CONFIG.
+
+CLI:
+    python3 _fluxbench_pipeline.py run <slug> [--work-dir D] [--fixtures-dir D]
+        [--stages qualify,sync,drift,challenger] [--shadow RESULT.json]
+        [--fleet-check] [--dry-run-sync] [--jobs N]
+        [--bootstrap N [--confidence C] [--gate-on-lcb]]
+    python3 _fluxbench_pipeline.py calibrate (--fixtures-dir D | --work-dir D)
+        --output THRESHOLDS.yaml [--jobs N] [--bootstrap N [--confidence C]]
+    python3 _fluxbench_pipeline.py bench [--fixtures-dir D] [--repeat N]
+        times the shell chain (qualify.sh --mock, sync.sh, drift.sh) against
+        `run` on scratch copies of the registry
+
+Exit codes:
+    0  ok (the run report is printed as JSON; a NOT QUALIFIED verdict is not an error)
+    1  registry write failed or lock timeout
+    2  bad arguments, unreadable fixtures/work dir/config, nothing to calibrate
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _fluxbench_bootstrap  # noqa: E402
+import _fluxbench_score  # noqa: E402
+import _fluxbench_sequential  # noqa: E402
+import _log_segments  # noqa: E402
+import lib_registry  # noqa: E402
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(SCRIPT_DIR, "..", "config", "flux-drive")
+DEFAULT_FIXTURES_DIR = os.path.join(SCRIPT_DIR, "..", "tests", "fixtures", "qualification")
+STAGES = ("qualify", "sync", "drift", "challenger")
+VALID_SLUG = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9/_.-]{0,127}$")
+SYNC_LOCK_TIMEOUT_S = 30.0
+
+# Hardcoded fallback thresholds — fluxbench-score.sh's defaults when neither config file has one.
+DEFAULT_THRESHOLDS = {
+    "fluxbench-format-compliance": 0.95,
+    "fluxbench-finding-recall": 0.60,
+    "fluxbench-false-positive-rate": 0.20,
+    "fluxbench-severity-accuracy": 0.70,
+    "fluxbench-persona-adherence": 0.60,
+}
+AVG_METRICS = ("fluxbench-finding-recall", "fluxbench-false-positive-rate", "fluxbench-severity-accuracy")
+CORE_GATES = tuple(DEFAULT_THRESHOLDS)
+GATE_PASS_RATE = 0.70
+EARLY_EXIT_MIN_RUNS = 5
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_fluxbench_pipeline] {msg % args}", file=sys.stderr)
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+def _iso(epoch: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+def _compact(obj: Any) -> str:
+    """One JSONL line the way `jq -c` writes it."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _write_json_atomic(path: str, obj: Any) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(obj, fh, indent=2)
+        fh.write("\n")
+    os.replace(tmp, path)
+
+
+class PipelineError(Exception):
+    """A stage cannot run; `code` is the CLI exit code."""
+
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+
+
+@dataclass
+class Paths:
+    registry: str
+    results: str
+    agmodb: str
+    metrics: str
+    thresholds: str
+    budget: str
+
+    @classmethod
+    def from_env(cls, env: dict[str, str] | None = None) -> "Paths":
+        env = os.environ if env is None else env
+        return cls(
+            registry=env.get("MODEL_REGISTRY") or os.path.join(CONFIG_DIR, "model-registry.yaml"),
+            results=env.get("FLUXBENCH_RESULTS_JSONL")
+            or os.path.join(SCRIPT_DIR, "..", "data", "fluxbench-results.jsonl"),
+            agmodb=env.get("AGMODB_REPO_PATH") or os.path.join(SCRIPT_DIR, "..", "data", "agmodb"),
+            metrics=env.get("METRICS_FILE") or os.path.join(CONFIG_DIR, "fluxbench-metrics.yaml"),
+            thresholds=os.path.join(CONFIG_DIR, "fluxbench-thresholds.yaml"),
+            budget=env.get("BUDGET_CONFIG") or os.path.join(CONFIG_DIR, "budget.yaml"),
+        )
+
+
+@dataclass
+class Fixture:
+    fixture_id: str
+    ground_truth_path: str
+    ground_truth: dict[str, Any]
+
+    @property
+    def agent_type(self) -> str:
+        return self.ground_truth.get("agent_type") or "unknown"
+
+
+def load_fixtures(fixtures_dir: str) -> tuple[list[Fixture], int]:
+    """Parsed fixture-* ground truths, and the directory count (fixtures without a
+    ground truth are skipped but still count against format compliance, as in
+    qualify.sh --mock)."""
+    if not os.path.isdir(fixtures_dir):
+        raise PipelineError(2, f"fixtures directory not found: {fixtures_dir}")
+    dirs = sorted(d for d in os.listdir(fixtures_dir)
+                  if d.startswith("fixture-") and os.path.isdir(os.path.join(fixtures_dir, d)))
+    if not dirs:
+        raise PipelineError(2, f"no fixture-* directories found in {fixtures_dir}")
+    fixtures = []
+    for name in dirs:
+        gt_path = os.path.join(fixtures_dir, name, "ground-truth.json")
+        if not os.path.isfile(gt_path):
+            _log(f"Warning: no ground-truth.json in {os.path.join(fixtures_dir, name)} — skipping")
+            continue
+        with open(gt_path) as fh:
+            fixtures.append(Fixture(name, gt_path, json.load(fh)))
+    return fixtures, len(dirs)
+
+
+@dataclass
+class FixtureOutcome:
+    fixture_id: str
+    result: dict[str, Any] | None = None
+    failure: str | None = None
+
+    @property
+    def passed(self) -> bool:
+        return self.failure is None and bool(self.result and self.result["overall_pass"])
+
+
+@dataclass
+class QualifyReport:
+    qualification_run_id: str
+    mode: str
+    status: str
+    format_compliance_rate: float
+    avg_metrics: dict[str, Any]
+    summary: dict[str, Any]
+    fixtures: list[FixtureOutcome] = field(default_factory=list)
+    registry: list[dict[str, Any]] | None = None
+    bootstrap: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        doc = {
+            "qualification_run_id": self.qualification_run_id,
+            "mode": self.mode,
+            "status": self.status,
+            "format_compliance_rate": self.format_compliance_rate,
+            "metrics": self.avg_metrics,
+            "fixtures": [{"fixture_id": o.fixture_id, "passed": o.passed, "failure": o.failure}
+                         for o in self.fixtures],
+            "registry": self.registry,
+        }
+        if self.bootstrap is not None:
+            doc["bootstrap"] = self.bootstrap
+        return doc
+
+
+def _score_task(task: tuple[list[dict[str, Any]], list[dict[str, Any]], float, dict[str, float]]) -> dict[str, Any]:
+    findings, baseline, fc, t = task
+    return _fluxbench_score.score_findings(
+        findings, baseline, fc,
+        t_format=t["fluxbench-format-compliance"], t_recall=t["fluxbench-finding-recall"],
+        t_fp=t["fluxbench-false-positive-rate"], t_severity=t["fluxbench-severity-accuracy"])
+
+
+def score_all(tasks: list[tuple[Any, ...]], jobs: int = 1) -> list[dict[str, Any]]:
+    """score_findings for each (findings, baseline, format_compliance, thresholds) task,
+    in task order. jobs > 1 fans the tasks out to a process pool; Executor.map yields
+    in submission order, so the merge is the same whichever worker finishes first."""
+    if jobs <= 1 or len(tasks) <= 1:
+        return [_score_task(t) for t in tasks]
+    workers = min(jobs, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_score_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+class Pipeline:
+    """One FluxBench run's shared state: config parsed once, reused by every stage."""
+
+    def __init__(self, paths: Paths, now: float | None = None, jobs: int = 1, resamples: int = 0,
+                 confidence: float = 0.95, gate_on_lcb: bool = False):
+        self.paths = paths
+        self.now = time.time() if now is None else now
+        self.jobs = max(1, jobs)
+        self.resamples = resamples  # > 0: bootstrap intervals in qualify and calibrate
+        self.confidence = confidence
+        self.gate_on_lcb = gate_on_lcb
+
+    # --- shared config ----------------------------------------------------
+
+    @functools.cached_property
+    def metrics_config(self) -> dict[str, Any]:
+        if not os.path.isfile(self.paths.metrics):
+            return {}
+        with open(self.paths.metrics) as fh:
+            return yaml.safe_load(fh) or {}
+
+    @functools.cached_property
+    def thresholds(self) -> dict[str, float]:
+        """Calibrated thresholds, else metric defaults, else score.sh's hardcoded values."""
+        calibrated: dict[str, Any] = {}
+        if os.path.isfile(self.paths.thresholds):
+            with open(self.paths.thresholds) as fh:
+                calibrated = (yaml.safe_load(fh) or {}).get("thresholds") or {}
+        out = {}
+        for metric, fallback in DEFAULT_THRESHOLDS.items():
+            val = calibrated.get(metric)
+            if val is None:
+                val = self._metric_def(metric).get("threshold_default")
+            out[metric] = float(fallback if val is None else val)
+        return out
+
+    @functools.cached_property
+    def higher_is_better(self) -> dict[str, bool]:
+        """Direction per metric. A listed metric without the key reads as lower-is-better,
+        as drift.sh's `tostring` map does; unlisted metrics default to higher-is-better."""
+        cfg = self.metrics_config
+        out = {}
+        for section in ("core_gates", "extended"):
+            for metric, spec in (cfg.get(section) or {}).items():
+                out[metric] = isinstance(spec, dict) and spec.get("higher_is_better") is True
+        return out
+
+    @functools.cached_property
+    def challenger_config(self) -> dict[str, Any]:
+        if not os.path.isfile(self.paths.budget):
+            raise PipelineError(2, f"budget config not found: {self.paths.budget}")
+        with open(self.paths.budget) as fh:
+            return (yaml.safe_load(fh) or {}).get("challenger") or {}
+
+    def _metric_def(self, metric: str) -> dict[str, Any]:
+        cfg = self.metrics_config
+        for section in ("core_gates", "extended"):
+            spec = (cfg.get(section) or {}).get(metric)
+            if isinstance(spec, dict):
+                return spec
+        return {}
+
+    def registry(self) -> dict[str, Any]:
+        """The materialized registry (stat-keyed snapshot, so cheap between writes)."""
+        return lib_registry.load_registry_cached(self.paths.registry)
+
+    # --- score (fluxbench-score.sh) ---------------------------------------
+
+    def score(self, slug: str, run_id: str, findings: list[dict[str, Any]],
+              baseline_findings: list[dict[str, Any]], format_compliance: float = 1.0) -> dict[str, Any]:
+        """One result record, field for field what fluxbench-score.sh writes."""
+        s = _score_task((findings, baseline_findings, format_compliance, self.thresholds))
+        return self.record(slug, run_id, s, format_compliance)
+
+    def score_many(self, slug: str, run_id: str,
+                   pairs: list[tuple[list[dict[str, Any]], list[dict[str, Any]], float]]) -> list[dict[str, Any]]:
+        """score() over (findings, baseline, format_compliance) pairs, in input order,
+        fanned out to self.jobs worker processes."""
+        tasks = [(f, b, fc, self.thresholds) for f, b, fc in pairs]
+        return [self.record(slug, run_id, s, fc)
+                for s, (_, _, fc) in zip(score_all(tasks, self.jobs), pairs)]
+
+    def record(self, slug: str, run_id: str, s: dict[str, Any], format_compliance: float) -> dict[str, Any]:
+        t = self.thresholds
+        fc = _fluxbench_score._clean_num(float(format_compliance))
+        tc = {k: _fluxbench_score._clean_num(v) for k, v in t.items()}
+        overall = (s["gate_format"] and s["gate_recall"] and s["gate_fp"] and s["gate_severity"]
+                   and not s["p0_auto_fail"])
+        return {
+            "model_slug": slug,
+            "qualification_run_id": run_id,
+            "timestamp": _iso(self.now),
+            "metrics": {
+                "fluxbench-format-compliance": fc,
+                "fluxbench-finding-recall": s["recall"],
+                "fluxbench-false-positive-rate": s["fp_rate"],
+                "fluxbench-severity-accuracy": s["severity_accuracy"],
+                "fluxbench-persona-adherence": None,
+                "fluxbench-instruction-compliance": None,
+                "fluxbench-disagreement-rate": s["disagreement_rate"],
+                "fluxbench-latency-p50": None,
+                "fluxbench-token-efficiency": None,
+            },
+            "gate_results": {
+                "fluxbench-format-compliance": {
+                    "value": fc, "threshold": tc["fluxbench-format-compliance"], "passed": s["gate_format"]},
+                "fluxbench-finding-recall": {
+                    "value": s["recall"], "threshold": tc["fluxbench-finding-recall"],
+                    "passed": s["gate_recall"], "p0_auto_fail": s["p0_auto_fail"]},
+                "fluxbench-false-positive-rate": {
+                    "value": s["fp_rate"], "threshold": tc["fluxbench-false-positive-rate"], "passed": s["gate_fp"]},
+                "fluxbench-severity-accuracy": {
+                    "value": s["severity_accuracy"], "threshold": tc["fluxbench-severity-accuracy"],
+                    "passed": s["gate_severity"]},
+                "fluxbench-persona-adherence": {
+                    "value": None, "threshold": tc["fluxbench-persona-adherence"], "passed": None},
+            },
+            "overall_pass": overall,
+            "finding_match_detail": {
+                "matched": s["matched"], "model_only": s["model_only"], "baseline_only": s["baseline_only"]},
+        }
+
+    def append_results(self, records: list[dict[str, Any]]) -> None:
+        """Append records under the results flock — one locked write for the whole run."""
+        if not records:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.paths.results)), exist_ok=True)
+        payload = "".join(_compact(r) + "\n" for r in records)
+        with _log_segments.locked(self.paths.results):
+            with open(self.paths.results, "a") as fh:
+                fh.write(payload)
+
+    # --- qualify (fluxbench-qualify.sh --mock / --score) -------------------
+
+    def qualify(self, slug: str, fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+                work_dir: str | None = None) -> QualifyReport:
+        if not VALID_SLUG.match(slug):
+            raise PipelineError(2, f"invalid model slug format: {slug}")
+        run_id = f"qr-{slug}-{int(self.now)}"
+        mode = "real" if work_dir else "mock"
+        _log(f"Starting qualification run: {run_id} ({mode})")
+        entries, total = self._entries(fixtures_dir, work_dir)
+        # Score every valid fixture (in parallel with jobs > 1), then merge back in
+        # fixture order so the records, aggregates and verdict never depend on scheduling.
+        pending = [pair for _, failure, pair in entries if failure is None]
+        records = iter(self.score_many(slug, run_id, pending))
+        outcomes = [FixtureOutcome(fid, failure=failure) if failure else self._outcome(fid, next(records))
+                    for fid, failure, _ in entries]
+        valid = len(pending)
+
+        fc_rate = round(valid / total, 4) if total else 0.0
+        scored = [o.result for o in outcomes if o.result is not None]
+        avg: dict[str, Any] = {}
+        for key in AVG_METRICS:
+            vals = [r["metrics"][key] for r in scored if r["metrics"].get(key) is not None]
+            if vals:
+                avg[key] = round(sum(vals) / len(vals), 4)
+        avg["fluxbench-format-compliance"] = fc_rate
+        summary = {
+            "model_slug": slug,
+            "qualification_run_id": f"summary-{run_id}",
+            "timestamp": _iso(self.now),
+            "format_compliance_rate": _fluxbench_score._clean_num(fc_rate),
+            "metrics": {k: _fluxbench_score._clean_num(v) for k, v in avg.items()},  # as jq prints them
+            "is_summary": True,
+            "fixture_count": len(avg),  # qualify.sh writes ($avg_metrics | length); kept for parity
+        }
+        self.append_results(scored + [summary])
+
+        failures = [o for o in outcomes if not o.passed]
+        status = "auto-qualified" if outcomes and not failures else "candidate"
+        _log(f"  Fixtures passed: {len(outcomes) - len(failures)}/{total}")
+        for o in failures:
+            _log(f"    - {o.fixture_id}: {o.failure}")
+        intervals = None
+        if self.resamples and entries:
+            intervals = self._bootstrap(entries)
+            weak = [g for g, v in intervals["gates"].items() if not v["lcb_pass"]]
+            _log(f"  Bootstrap ({self.resamples} resamples, {self.confidence:.0%}): "
+                 + ", ".join(f"{g} P(pass)={v['p_pass']}" for g, v in intervals["gates"].items()))
+            if weak and self.gate_on_lcb and status == "auto-qualified":
+                _log(f"  Confidence bound misses threshold: {', '.join(weak)} — not qualifying")
+                status = "candidate"
+        report = QualifyReport(run_id, mode, status, fc_rate, avg, summary, outcomes, bootstrap=intervals)
+        if os.path.isfile(self.paths.registry):
+            report.registry = self._update_registry(slug, status, mode, avg)
+        else:
+            _log("  Warning: could not update registry (registry file missing)")
+        return report
+
+    def _entries(self, fixtures_dir: str, work_dir: str | None) -> tuple[list[tuple[str, str | None, Any]], int]:
+        """(fixture_id, failure, (findings, baseline, fc)) per fixture, and the fixture count."""
+        if work_dir:
+            return self._read_work_dir(fixtures_dir, work_dir)
+        fixtures, total = load_fixtures(fixtures_dir)
+        entries: list[tuple[str, str | None, Any]] = []
+        for fx in fixtures:
+            truth = fx.ground_truth.get("findings") or []
+            entries.append((fx.fixture_id, None, (truth, truth, 1.0)))  # ground truth as model output
+        return entries, total
+
+    def fixture_matches(self, fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+                        work_dir: str | None = None) -> list[_fluxbench_bootstrap.FixtureMatch]:
+        """The fixtures qualify would score, as bootstrap match structures."""
+        return self._matches(self._entries(fixtures_dir, work_dir)[0])
+
+    def _matches(self, entries: list[tuple[str, str | None, Any]]) -> list[_fluxbench_bootstrap.FixtureMatch]:
+        pairs = [(pair[0], pair[1]) for _, failure, pair in entries if failure is None]
+        built = iter(_fluxbench_bootstrap.build_matches(pairs, self.jobs))
+        return [_fluxbench_bootstrap.FixtureMatch.failed() if failure else next(built)
+                for _, failure, _ in entries]
+
+    def _bootstrap(self, entries: list[tuple[str, str | None, Any]]) -> dict[str, Any]:
+        return _fluxbench_bootstrap.bootstrap(self._matches(entries), self.thresholds, self.resamples,
+                                              self.confidence, jobs=self.jobs)
+
+    def _outcome(self, fixture_id: str, result: dict[str, Any]) -> FixtureOutcome:
+        if result["overall_pass"]:
+            return FixtureOutcome(fixture_id, result)
+        failed = "; ".join(f"{k}={g['value']} (threshold: {g['threshold']})"
+                           for k, g in result["gate_results"].items() if g["passed"] is False)
+        return FixtureOutcome(fixture_id, result, failed)
+
+    def _read_work_dir(self, fixtures_dir: str, work_dir: str) -> tuple[list[tuple[str, str | None, Any]], int]:
+        """Manifest fixtures as (fixture_id, failure, (findings, baseline, 1.0)) in manifest
+        order — qualify.sh --score's per-fixture checks, without the scoring."""
+        manifest_path = os.path.join(work_dir, "manifest.json")
+        try:
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+        except (OSError, json.JSONDecodeError) as exc:
+            raise PipelineError(2, f"manifest.json unreadable in work directory {work_dir}: {exc}") from exc
+        detail = {d.get("fixture_id"): d.get("ground_truth_path") or ""
+                  for d in manifest.get("fixtures_detail", []) if isinstance(d, dict)}
+        real_fixtures = os.path.realpath(fixtures_dir)
+        entries: list[tuple[str, str | None, Any]] = []
+        for fid in manifest.get("fixtures", []):
+            if not fid:
+                continue
+            gt_path = os.path.join(fixtures_dir, fid, "ground-truth.json")
+            manifest_gt = detail.get(fid, "")
+            if manifest_gt and os.path.isfile(manifest_gt):
+                # A tampered manifest must not redirect scoring outside the fixtures dir.
+                if os.path.realpath(manifest_gt).startswith(real_fixtures + os.sep):
+                    gt_path = manifest_gt
+                else:
+                    _log("  Warning: manifest ground_truth_path outside fixtures dir, using default")
+            response_path = os.path.join(work_dir, fid, "response.json")
+            if not os.path.isfile(gt_path):
+                entries.append((fid, "ground-truth missing", None))
+                continue
+            if not os.path.isfile(response_path):
+                entries.append((fid, "response file missing", None))
+                continue
+            try:
+                with open(response_path) as fh:
+                    findings = json.load(fh).get("findings")
+            except (json.JSONDecodeError, AttributeError):
+                findings = None
+            if findings is None or findings is False:
+                entries.append((fid, "response missing findings array", None))
+                continue
+            with open(gt_path) as fh:
+                ground_truth = json.load(fh)
+            entries.append((fid, None, (findings or [], ground_truth.get("findings") or [], 1.0)))
+        return entries, len(entries)
+
+    def _update_registry(self, slug: str, status: str, mode: str,
+                         avg: dict[str, Any]) -> list[dict[str, Any]]:
+        """qualify.sh's _update_registry: status merge + if-absent baseline, one transaction."""
+        merge: dict[str, Any] = {"status": status, "qualified_via": mode}
+        if avg:
+            merge["fluxbench"] = {
+                "format_compliance": avg.get("fluxbench-format-compliance"),
+                "finding_recall": avg.get("fluxbench-finding-recall"),
+                "false_positive_rate": avg.get("fluxbench-false-positive-rate"),
+                "severity_accuracy": avg.get("fluxbench-severity-accuracy"),
+            }
+        ops = [{"op": "merge-fields", "slug": slug, "fields": merge}]
+        if status in ("auto-qualified", "qualified") and avg:
+            baseline = {k: avg.get(k) for k in ("fluxbench-format-compliance", "fluxbench-finding-recall",
+                                                "fluxbench-false-positive-rate", "fluxbench-severity-accuracy")}
+            ops.append({"op": "set-field-if-absent", "slug": slug, "key": "qualified_baseline",
+                        "value": baseline})
+        results = self._commit(ops)
+        if any(r["result"] == "preserved" for r in results):
+            _log("  qualified_baseline already set — preserving existing baseline")
+        return results
+
+    def _commit(self, ops: list[dict[str, Any]], locked: bool = False) -> list[dict[str, Any]]:
+        try:
+            if locked:
+                return lib_registry.commit_locked(self.paths.registry, ops)
+            return lib_registry.commit_batch(self.paths.registry, ops)
+        except lib_registry.BatchError as exc:
+            raise PipelineError(1, f"registry update failed (rc={exc.code}): {exc}") from exc
+        except TimeoutError as exc:
+            raise PipelineError(1, str(exc)) from exc
+
+    # --- calibrate (fluxbench-calibrate.sh --mock / --score) ---------------
+
+    def calibrate(self, output: str, fixtures_dir: str | None = None,
+                  work_dir: str | None = None) -> dict[str, Any]:
+        """Score every fixture, write p25 thresholds (p75 for the false-positive rate)."""
+        epoch = int(self.now)
+        scored: list[tuple[str, str, str, tuple[Any, ...]]] = []  # (fixture_id, slug, run_id, task)
+        if work_dir:
+            source = "claude-baseline"
+            try:
+                with open(os.path.join(work_dir, "manifest.json")) as fh:
+                    manifest = json.load(fh)
+            except (OSError, json.JSONDecodeError) as exc:
+                raise PipelineError(2, f"manifest.json unreadable in {work_dir}: {exc}") from exc
+            for entry in manifest:
+                fid = entry["fixture_id"]
+                if not os.path.isfile(entry["response_path"]):
+                    _log(f"Warning: response not found for {fid} at {entry['response_path']}, skipping")
+                    continue
+                with open(entry["response_path"]) as fh:
+                    response = json.load(fh)
+                with open(entry["ground_truth_path"]) as fh:
+                    truth = json.load(fh).get("findings") or []
+                fc = response.get("format_compliance_rate", 1.0)
+                scored.append((fid, response.get("model_slug", "calibration-score"), f"calibrate-{fid}-{epoch}",
+                               (response.get("findings", []), truth, fc, self.thresholds)))
+        else:
+            source = "calibrated"
+            for fx in load_fixtures(fixtures_dir or DEFAULT_FIXTURES_DIR)[0]:
+                truth = fx.ground_truth.get("findings") or []
+                scored.append((fx.fixture_id, "calibration-mock", f"calibrate-{fx.fixture_id}-{epoch}",
+                               (truth, truth, 1.0, self.thresholds)))
+        if not scored:
+            raise PipelineError(2, "no fixtures scored (check that response files exist)")
+
+        results = score_all([task for *_, task in scored], self.jobs)
+        records = [self.record(slug, run_id, s, task[2])
+                   for (_, slug, run_id, task), s in zip(scored, results)]
+        self.append_results(records)
+
+        def column(metric: str) -> list[float]:
+            # persona-adherence is never computed yet; calibrate.sh counts it as 1.0
+            return [float(1.0 if r["metrics"][metric] is None else r["metrics"][metric]) for r in records]
+        thresholds = {metric: percentile(column(metric), 75 if metric == "fluxbench-false-positive-rate" else 25)
+                      for metric in CORE_GATES}
+        intervals = None
+        if self.resamples:
+            # Each threshold's percentile, bootstrapped over fixtures; the threshold becomes
+            # the bound on the lenient side so too few fixtures cannot set an unmeetable bar.
+            intervals = {}
+            for metric in CORE_GATES:
+                pct = 75 if metric == "fluxbench-false-positive-rate" else 25
+                lower, upper = _fluxbench_bootstrap.percentile_interval(
+                    column(metric), functools.partial(percentile, pct=pct), self.resamples, self.confidence)
+                intervals[metric] = {"point": thresholds[metric], "lower": lower, "upper": upper}
+                thresholds[metric] = upper if pct == 75 else lower
+        if work_dir and os.path.isfile(output):
+            with open(output) as fh:
+                if (yaml.safe_load(fh) or {}).get("source") == "claude-baseline":
+                    _log("Warning: overwriting existing claude-baseline thresholds — check for regression")
+        write_thresholds(output, source, len(records), thresholds, self.now,
+                         intervals and {"level": self.confidence, "resamples": self.resamples, **intervals})
+        _log(f"Thresholds written to {output} (source: {source}, fixtures: {len(records)})")
+        doc = {"output": output, "source": source, "fixture_count": len(records), "thresholds": thresholds}
+        if intervals:
+            doc["confidence"] = intervals
+        return doc
+
+    # --- sync (fluxbench-sync.sh) -----------------------------------------
+
+    def sync(self, dry_run: bool = False) -> dict[str, Any]:
+        results = self.paths.results
+        results_dir = os.path.dirname(os.path.abspath(results))
+        if not _log_segments.has_segments(results) and (
+                not os.path.isfile(results) or os.path.getsize(results) == 0):
+            return {"synced": 0, "written": [], "reason": "no results"}
+        state_file = os.path.join(results_dir, ".sync-state")
+        try:
+            # <dir>/.sync.lock — the lock sync.sh holds on fd 202.
+            with _log_segments.locked(os.path.join(results_dir, ".sync"), SYNC_LOCK_TIMEOUT_S):
+                return self._sync_locked(state_file, dry_run)
+        except TimeoutError as exc:
+            raise PipelineError(1, f"fluxbench-sync: {exc}") from exc
+
+    def _sync_locked(self, state_file: str, dry_run: bool) -> dict[str, Any]:
+        state: dict[str, Any] = {}
+        if os.path.isfile(state_file):
+            try:
+                with open(state_file) as fh:
+                    loaded = json.load(fh)
+                state = loaded if isinstance(loaded, dict) else {}
+            except json.JSONDecodeError:
+                _log("Warning: sync-state corrupted, resetting (entries will be re-synced)")
+        pending = [rec for rec in _log_segments.iter_records(self.paths.results)
+                   if rec.get("qualification_run_id") and state.get(rec["qualification_run_id"]) != "committed"]
+        if not pending or dry_run:
+            return {"synced": 0, "pending": [r["qualification_run_id"] for r in pending], "written": []}
+
+        for rec in pending:
+            state[rec["qualification_run_id"]] = "pending"
+        _write_json_atomic(state_file, state)
+
+        os.makedirs(self.paths.agmodb, exist_ok=True)
+        real_repo = os.path.realpath(self.paths.agmodb)
+        written: list[str] = []
+        for rec in pending:
+            slug = rec.get("model_slug") or "unknown"
+            safe = slug.replace("/", "--").replace("..", "_")
+            target = os.path.join(self.paths.agmodb, f"{safe}.json")
+            if not os.path.realpath(target).startswith(real_repo + os.sep):
+                _log(f"Error: path traversal detected for model slug '{slug}'")
+                continue
+            scores = {k: v for k, v in (rec.get("metrics") or {}).items() if v is not None}
+            _write_json_atomic(target, {
+                "model_slug": slug,
+                "externalBenchmarkScores": {"fluxbench": scores},
+                "last_sync": rec.get("timestamp") or _iso(self.now),
+                "qualification_run_id": rec["qualification_run_id"],
+            })
+            if target not in written:
+                written.append(target)
+
+        for rec in pending:
+            state[rec["qualification_run_id"]] = "committed"
+        _write_json_atomic(state_file, state)
+        return {"synced": len(pending), "written": written}
+
+    # --- drift (fluxbench-drift.sh) ---------------------------------------
+
+    def drift(self, slug: str, current: dict[str, Any], fleet_check: bool = False) -> dict[str, Any]:
+        """Compare current metrics with the qualified baseline; flag/unflag under the registry lock."""
+        cfg = self.registry()
+        threshold = float(lib_registry.query(cfg, ".fluxbench.drift_threshold // 0.15"))
+        band = float(lib_registry.query(cfg, ".fluxbench.hysteresis_band // 0.05"))
+        correlated = float(lib_registry.query(cfg, ".fluxbench.correlated_drift_threshold // 0.50"))
+        try:
+            with lib_registry.registry_lock(self.paths.registry):
+                model = lib_registry.get_model(self.registry(), slug) or {}
+                baseline = model.get("qualified_baseline")
+                if not baseline:
+                    raise PipelineError(1, f"no qualified_baseline for model '{slug}'")
+                result = drift_verdict(slug, baseline, current, threshold, band,
+                                       model.get("drift_flagged") is True, self.higher_is_better)
+                flag = {"drift_detected": True, "drift_cleared": False}.get(result["verdict"])
+                if flag is not None:
+                    self._commit([{"op": "set-field", "slug": slug, "key": "drift_flagged", "value": flag}],
+                                 locked=True)
+        except TimeoutError:
+            _log(f"fluxbench-drift: lock timeout on {self.paths.registry}.lock — emitting skip verdict")
+            return {"model": slug, "verdict": "skipped_timeout", "drifted_metrics": [], "max_drift": 0}
+
+        if fleet_check and result["verdict"] == "drift_detected":
+            models = self.registry().get("models") or {}
+            qualified = [m for m in models.values() if isinstance(m, dict) and m.get("status") == "qualified"]
+            flagged = sum(1 for m in qualified if m.get("drift_flagged", False))
+            if qualified and flagged / len(qualified) >= correlated:
+                result["verdict"] = "baseline_shift_suspected"
+        return result
+
+    # --- challenger (fluxbench-challenger.sh) ------------------------------
+
+    def run_count(self, slug: str) -> int:
+        if not (os.path.isfile(self.paths.results) or _log_segments.has_segments(self.paths.results)):
+            return 0
+        return _log_segments.count(self.paths.results, slug)
+
+    def challenger_select(self) -> dict[str, Any]:
+        pre_inclusion = int(self.challenger_config.get("pre_inclusion_runs", 2))
+        candidates = []
+        for slug, model in (self.registry().get("models") or {}).items():
+            if not isinstance(model, dict) or model.get("status") not in ("qualifying", "auto-qualified"):
+                continue
+            fb = model.get("fluxbench")
+            if model.get("qualified_via") != "real" or not isinstance(fb, dict) or not fb:
+                continue
+            scores = []
+            for k in ("format_compliance", "finding_recall", "false_positive_rate",
+                      "severity_accuracy", "persona_adherence"):
+                v = fb.get(k)
+                if v is not None:
+                    scores.append(1.0 - float(v) if k == "false_positive_rate" else float(v))
+            if scores:
+                candidates.append((round(sum(scores) / len(scores), 4), slug, model))
+        if not candidates:
+            return {"selected": None, "reason": "no qualifying candidates"}
+        # Stable sort on score only: ties keep registry order, as challenger.sh does.
+        candidates.sort(key=lambda c: -c[0])
+        avg_score, slug, model = candidates[0]
+        runs = self.run_count(slug)
+        if runs < pre_inclusion:
+            return {"selected": None, "reason": "insufficient pre-inclusion runs", "model": slug,
+                    "runs": runs, "required": pre_inclusion}
+        self._commit([{"op": "set-field", "slug": slug, "key": "status", "value": "challenger"}])
+        return {"selected": slug, "avg_score": avg_score, "runs": runs,
+                "candidates_evaluated": len(candidates), "provider": model.get("provider", "unknown"),
+                "prompt_content_policy": model.get("prompt_content_policy", "fixtures_only"),
+                "eligible_tiers": model.get("eligible_tiers", [])}
+
+    def challenger_evaluate(self, slug: str) -> dict[str, Any]:
+        cfg = self.challenger_config
+        promotion = int(cfg.get("promotion_threshold", 10))
+        margin = float(cfg.get("early_exit_margin", 0.20))
+        stale = int(cfg.get("stale_threshold", 20))
+        runs = self.run_count(slug)
+        sequential = _fluxbench_sequential.SequentialConfig.from_challenger(cfg)
+        if sequential.enabled and runs:
+            doc = _fluxbench_sequential.evaluate(self.paths.results, slug, sequential)
+            if doc["verdict"] == "promoted":
+                self._commit([{"op": "promote", "slug": slug}])
+                return doc
+            if doc["verdict"] == "rejected":
+                self._commit([{"op": "set-field", "slug": slug, "key": "status", "value": "rejected"}])
+                return doc
+        window = _log_segments.latest(self.paths.results, slug, promotion) if runs else []
+
+        if runs < promotion:
+            if runs >= EARLY_EXIT_MIN_RUNS and window and passes_by_margin(window, margin):
+                self._commit([{"op": "promote", "slug": slug}])
+                return {"verdict": "promoted", "reason": "early_exit", "model": slug, "runs": runs}
+            return {"verdict": "insufficient_runs", "model": slug, "runs": runs, "required": promotion}
+        if not window:
+            return {"verdict": "failing", "model": slug, "runs": 0, "failed_gates": []}
+
+        rates = gate_pass_rates(window)
+        failed = [g for g, r in rates.items() if r < GATE_PASS_RATE]
+        if rates and not failed:
+            self._commit([{"op": "promote", "slug": slug}])
+            return {"verdict": "promoted", "model": slug, "runs": runs}
+        if runs > stale:
+            self._commit([{"op": "set-field", "slug": slug, "key": "status", "value": "rejected"}])
+            return {"verdict": "rejected", "model": slug, "runs": runs, "failed_gates": failed}
+        return {"verdict": "failing", "model": slug, "runs": runs, "failed_gates": failed}
+
+    def challenger(self) -> dict[str, Any]:
+        """One lifecycle tick: evaluate the current challenger, or select one."""
+        for slug, model in (self.registry().get("models") or {}).items():
+            if isinstance(model, dict) and model.get("status") == "challenger":
+                return {"action": "evaluate", **self.challenger_evaluate(slug)}
+        return {"action": "select", **self.challenger_select()}
+
+    # --- whole run ---------------------------------------------------------
+
+    def run(self, slug: str, stages: tuple[str, ...] = STAGES, fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+            work_dir: str | None = None, shadow: dict[str, Any] | None = None,
+            fleet_check: bool = False, dry_run_sync: bool = False) -> dict[str, Any]:
+        doc: dict[str, Any] = {"model": slug, "stages": {}, "timings_ms": {}}
+        current = shadow.get("metrics") if shadow else None
+        for stage in stages:
+            start = time.perf_counter()
+            if stage == "qualify":
+                report = self.qualify(slug, fixtures_dir, work_dir)
+                doc["qualification_run_id"] = report.qualification_run_id
+                doc["stages"]["qualify"] = report.to_dict()
+                current = current if current is not None else report.avg_metrics
+            elif stage == "sync":
+                doc["stages"]["sync"] = self.sync(dry_run_sync)
+            elif stage == "drift":
+                model = lib_registry.get_model(self.registry(), slug) or {}
+                if current is None:
+                    doc["stages"]["drift"] = {"verdict": "skipped", "reason": "no current metrics"}
+                elif not model.get("qualified_baseline"):
+                    doc["stages"]["drift"] = {"verdict": "skipped", "reason": "no qualified_baseline"}
+                else:
+                    doc["stages"]["drift"] = self.drift(slug, current, fleet_check)
+            elif stage == "challenger":
+                doc["stages"]["challenger"] = self.challenger()
+            doc["timings_ms"][stage] = round((time.perf_counter() - start) * 1000, 2)
+            _debug("%s took %.1fms", stage, doc["timings_ms"][stage])
+        return doc
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile, as fluxbench-calibrate.sh computes it."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    idx = pct / 100.0 * (len(values) - 1)
+    lo = int(idx)
+    hi = min(lo + 1, len(values) - 1)
+    return round(values[lo] + (idx - lo) * (values[hi] - values[lo]), 4)
+
+
+def write_thresholds(path: str, source: str, fixture_count: int, thresholds: dict[str, float],
+                     now: float, confidence: dict[str, Any] | None = None) -> None:
+    """calibrate.sh's thresholds file; `confidence` (bootstrap intervals) is appended as its own block."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    stamp = _iso(now)
+    lines = [f"# FluxBench Thresholds — {source} from {fixture_count} fixtures",
+             "# Generated by: fluxbench-calibrate.sh",
+             f"# Calibration date: {stamp}",
+             "version: 1",
+             f"source: {source}",
+             f'calibrated_at: "{stamp}"',
+             f"fixture_count: {fixture_count}",
+             "",
+             "thresholds:"]
+    lines += [f"  {metric}: {value}" for metric, value in thresholds.items()]
+    if confidence:
+        lines += ["", "confidence:"]
+        lines += [f"  {key}: {json.dumps(value)}" for key, value in confidence.items()]  # JSON is flow YAML
+    with open(path, "w") as fh:
+        fh.write("\n".join(lines) + "\n")
+
+
+def drift_verdict(slug: str, baseline: dict[str, Any], current: dict[str, Any], threshold: float,
+                  band: float, drift_flagged: bool, higher_is_better: dict[str, bool]) -> dict[str, Any]:
+    """fluxbench-drift.sh's verdict: drift_detected | drift_cleared | drift_recovering | no_drift."""
+    drifted, max_drift, within_band = [], 0.0, True
+    for metric, base in baseline.items():
+        cur = current.get(metric)
+        if base is None or cur is None:
+            continue
+        drift = base - cur if higher_is_better.get(metric, True) else cur - base
+        max_drift = max(max_drift, drift)
+        if drift > threshold:
+            drifted.append(metric)
+        if abs(base - cur) > band:
+            within_band = False
+    if drifted:
+        verdict = "drift_detected"
+    elif drift_flagged:
+        verdict = "drift_cleared" if within_band else "drift_recovering"
+    else:
+        verdict = "no_drift"
+    return {"model": slug, "verdict": verdict, "drifted_metrics": drifted, "max_drift": round(max_drift, 4)}
+
+
+def gate_pass_rates(window: list[dict[str, Any]]) -> dict[str, float]:
+    """Per core gate, the share of runs in the window that passed it (uncomputed gates skipped)."""
+    rates = {}
+    for gate in CORE_GATES:
+        verdicts = [r.get("gate_results", {}).get(gate, {}).get("passed") for r in window]
+        computed = [v for v in verdicts if v is not None]
+        if computed:
+            rates[gate] = sum(1 for v in computed if v) / len(computed)
+    return rates
+
+
+def passes_by_margin(window: list[dict[str, Any]], margin: float) -> bool:
+    """challenger.sh's early exit: every gate passes >= 70% of runs and clears its
+    average threshold by `margin` (fp-rate from below)."""
+    rates = gate_pass_rates(window)
+    if not rates or any(r < GATE_PASS_RATE for r in rates.values()):
+        return False
+    for gate in CORE_GATES:
+        pairs = [(float(g["value"]), float(g["threshold"]))
+                 for r in window
+                 if (g := r.get("gate_results", {}).get(gate, {})).get("value") is not None
+                 and g.get("threshold") is not None]
+        if not pairs:
+            continue
+        value = sum(v for v, _ in pairs) / len(pairs)
+        thresh = sum(t for _, t in pairs) / len(pairs)
+        if (thresh - value if "false-positive" in gate else value - thresh) < margin:
+            return False
+    return True
+
+
+# --- benchmark ----------------------------------------------------------------
+
+
+def _scratch(root: str, name: str, registry: str) -> dict[str, str]:
+    d = os.path.join(root, name)
+    os.makedirs(d)
+    shutil.copy(registry, os.path.join(d, "model-registry.yaml"))
+    return {**os.environ,
+            "MODEL_REGISTRY": os.path.join(d, "model-registry.yaml"),
+            "FLUXBENCH_RESULTS_JSONL": os.path.join(d, "fluxbench-results.jsonl"),
+            "AGMODB_REPO_PATH": os.path.join(d, "agmodb"),
+            "INTERFLUX_STATE_DIR": os.path.join(d, "state")}
+
+
+def _shell_chain(env: dict[str, str], slug: str, fixtures_dir: str) -> None:
+    def sh(*args: str) -> str:
+        return subprocess.run(["bash", *args], env=env, check=True, capture_output=True, text=True).stdout
+    sh(os.path.join(SCRIPT_DIR, "fluxbench-qualify.sh"), slug, "--mock", "--fixtures-dir", fixtures_dir)
+    sh(os.path.join(SCRIPT_DIR, "fluxbench-sync.sh"))
+    with open(env["FLUXBENCH_RESULTS_JSONL"]) as fh:
+        summary = [line for line in fh if '"is_summary":true' in line][-1]
+    shadow = env["FLUXBENCH_RESULTS_JSONL"] + ".shadow.json"
+    with open(shadow, "w") as fh:
+        fh.write(summary)
+    sh(os.path.join(SCRIPT_DIR, "fluxbench-drift.sh"), slug, shadow)
+
+
+def bench(fixtures_dir: str = DEFAULT_FIXTURES_DIR, repeat: int = 3,
+          registry: str | None = None, shell: bool = True) -> dict[str, Any]:
+    """Median wall time of qualify→sync→drift: shell chain vs. this module's CLI (both
+    include interpreter startup), each on a fresh scratch copy of the registry."""
+    registry = registry or Paths.from_env().registry
+    n_fixtures = len(load_fixtures(fixtures_dir)[0])
+    shell = shell and all(shutil.which(t) for t in ("bash", "jq", "flock", "yq"))
+    times: dict[str, list[float]] = {"shell": [], "inprocess": []}
+    with tempfile.TemporaryDirectory(prefix="fluxbench-bench-") as root:
+        for i in range(repeat):
+            slug = f"bench-model-{i}"
+            if shell:
+                env = _scratch(root, f"shell-{i}", registry)
+                start = time.perf_counter()
+                _shell_chain(env, slug, fixtures_dir)
+                times["shell"].append(time.perf_counter() - start)
+            env = _scratch(root, f"inproc-{i}", registry)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.abspath(__file__), "run", slug, "--fixtures-dir",
+                            fixtures_dir, "--stages", "qualify,sync,drift"],
+                           env=env, check=True, capture_output=True)
+            times["inprocess"].append(time.perf_counter() - start)
+    doc: dict[str, Any] = {"fixtures": n_fixtures, "repeat": repeat, "stages": ["qualify", "sync", "drift"]}
+    for name, samples in times.items():
+        doc[f"{name}_s"] = round(statistics.median(samples), 3) if samples else None
+    if doc["shell_s"] and doc["inprocess_s"]:
+        doc["speedup"] = round(doc["shell_s"] / doc["inprocess_s"], 1)
+    return doc
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_fluxbench_pipeline", description="In-process FluxBench pipeline.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("slug")
+    r.add_argument("--fixtures-dir", default=DEFAULT_FIXTURES_DIR)
+    r.add_argument("--work-dir", default=None, help="score responses from a qualify --emit work dir")
+    r.add_argument("--stages", default=",".join(STAGES))
+    r.add_argument("--shadow", default=None, help="result JSON whose metrics drift compares")
+    r.add_argument("--fleet-check", action="store_true")
+    r.add_argument("--dry-run-sync", action="store_true")
+    r.add_argument("--jobs", type=int, default=1, help="score fixtures in N worker processes")
+    r.add_argument("--bootstrap", type=int, default=0, metavar="N", help="bootstrap intervals from N resamples")
+    r.add_argument("--confidence", type=float, default=0.95)
+    r.add_argument("--gate-on-lcb", action="store_true",
+                   help="qualify only when every gate's confidence bound clears its threshold")
+    c = sub.add_parser("calibrate")
+    src = c.add_mutually_exclusive_group(required=True)
+    src.add_argument("--fixtures-dir", default=None, help="mock: ground truth scored against itself")
+    src.add_argument("--work-dir", default=None, help="score responses from a calibrate --emit work dir")
+    c.add_argument("--output", required=True)
+    c.add_argument("--jobs", type=int, default=1)
+    c.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                   help="use each percentile's N-resample confidence bound as the threshold")
+    c.add_argument("--confidence", type=float, default=0.95)
+    b = sub.add_parser("bench")
+    b.add_argument("--fixtures-dir", default=DEFAULT_FIXTURES_DIR)
+    b.add_argument("--repeat", type=int, default=3)
+    b.add_argument("--no-shell", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.cmd == "bench":
+            doc = bench(args.fixtures_dir, args.repeat, shell=not args.no_shell)
+        elif args.cmd == "calibrate":
+            doc = Pipeline(Paths.from_env(), jobs=args.jobs, resamples=args.bootstrap,
+                           confidence=args.confidence).calibrate(args.output, args.fixtures_dir, args.work_dir)
+        else:
+            stages = tuple(s for s in args.stages.split(",") if s)
+            unknown = [s for s in stages if s not in STAGES]
+            if unknown:
+                raise PipelineError(2, f"unknown stage(s): {', '.join(unknown)}")
+            shadow = None
+            if args.shadow:
+                with open(args.shadow) as fh:
+                    shadow = json.load(fh)
+            doc = Pipeline(Paths.from_env(), jobs=args.jobs, resamples=args.bootstrap, confidence=args.confidence,
+                           gate_on_lcb=args.gate_on_lcb).run(
+                args.slug, stages, args.fixtures_dir, args.work_dir, shadow,
+                args.fleet_check, args.dry_run_sync)
+    except PipelineError as exc:
+        print(f"fluxbench_pipeline: {exc}", file=sys.stderr)
+        return exc.code
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        print(f"fluxbench_pipeline: {exc}", file=sys.stderr)
+        return 2
+    except subprocess.CalledProcessError as exc:
+        print(f"fluxbench_pipeline: {exc}\n{exc.stderr}", file=sys.stderr)
+        return 1
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,8 @@ Computes finding-recall, false-positive-rate, severity-accuracy, and gate
 verdicts for a model's findings against a baseline. Uses the Hungarian
 algorithm for optimal bipartite matching of findings.
 
-Public function:
+Public functions:
+    match_findings(model_findings, baseline_findings) -> [(model_idx, baseline_idx)]
     score_findings(model_findings, baseline_findings, format_compliance,
                    t_format=0.95, t_recall=0.60, t_fp=0.20, t_severity=0.70)
         -> dict (full score report including gate verdicts)
@@ -162,6 +163,19 @@ def _clean_num(v: float) -> float | int:
     return v
 
 
+def match_findings(
+    model_findings: list[dict[str, Any]], baseline_findings: list[dict[str, Any]]
+) -> list[tuple[int, int]]:
+    """Optimal (model_idx, baseline_idx) pairs: Hungarian over match_score."""
+    if not model_findings or not baseline_findings:
+        return []
+    score_matrix = [
+        [match_score(m, b) for b in baseline_findings]
+        for m in model_findings
+    ]
+    return hungarian_maximize(score_matrix)
+
+
 def score_findings(
     model_findings: list[dict[str, Any]],
     baseline_findings: list[dict[str, Any]],
@@ -172,17 +186,9 @@ def score_findings(
     t_severity: float = 0.70,
 ) -> dict[str, Any]:
     """Run the full scoring pipeline and return metrics + gate verdicts."""
-    # Build score matrix and run Hungarian.
     n_model = len(model_findings)
     n_baseline = len(baseline_findings)
-    if n_model > 0 and n_baseline > 0:
-        score_matrix = [
-            [match_score(model_findings[mi], baseline_findings[bi]) for bi in range(n_baseline)]
-            for mi in range(n_model)
-        ]
-        matched_pairs = hungarian_maximize(score_matrix)
-    else:
-        matched_pairs = []
+    matched_pairs = match_findings(model_findings, baseline_findings)
 
     used_model = {mi for mi, _ in matched_pairs}
     used_baseline = {bi for _, bi in matched_pairs}
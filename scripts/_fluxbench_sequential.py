@@ -0,0 +1,244 @@
+"""Sequential (SPRT) early stop for FluxBench challenger evaluation.
+
+fluxbench-challenger.sh evaluate decides on a fixed schedule: promote once
+promotion_threshold runs pass every gate >= 70% of the time (or at run 5
+when every gate clears its threshold by early_exit_margin), reject only
+after stale_threshold runs. A challenger that fails its first three runs
+outright still burns shadow-run tokens until run 21.
+
+This module runs Wald's sequential probability ratio test on each gate's
+per-run pass/fail outcomes (the `passed` flags fluxbench-score.sh writes
+for recall, false-positive rate, severity accuracy and format compliance;
+uncomputed gates such as persona adherence are skipped). Per gate:
+
+    H0  pass rate p0 = 0.70 - indifference     (the challenger is failing)
+    H1  pass rate p1 = 0.70 + indifference     (the challenger is passing)
+    Λ   += ln(p1/p0) on a pass, ln((1-p1)/(1-p0)) on a fail
+    accept H1 at Λ >= ln((1-β)/α), accept H0 at Λ <= ln(β/(1-α))
+
+with α the chance of promoting a failing model and β the chance of
+rejecting a passing one. Each gate stops at its first boundary crossing.
+The challenger is promoted once every gate has accepted H1 and rejected
+as soon as any gate accepts H0; until then the fixed schedule applies
+unchanged. Because one gate's verdict decides, the k tested gates each
+run at α/k and β/k (Bonferroni), which keeps the challenger-level error
+rates at or under α and β. Run separately at full β, four gates rejected
+roughly 20% of challengers at the 0.85 design point. The split widens
+the bounds: at the defaults a flawless challenger needs 11 runs, one
+more than promotion_threshold. Sequential rejection is where the savings
+come from, and the feature ships disabled. Runs are read oldest first from the latest stale_threshold + 1
+results (the fixed rule's whole horizon).
+
+Every decision reports `runs` (the run that decided it), `runs_saved`
+against the fixed rule (promotion_threshold runs to promote,
+stale_threshold + 1 to reject), and Wald's average sample number for the
+accepted hypothesis as `expected_runs` / `expected_runs_saved`.
+
+Config, in budget.yaml (off when the block is absent):
+
+    challenger:
+      sequential:
+        enabled: false
+        alpha: 0.05          # P(promote | failing), split across gates
+        beta: 0.10           # P(reject | passing), split across gates
+        indifference: 0.15   # half-width around the 0.70 pass rate
+
+CLI (fluxbench-challenger.sh evaluate calls `decide` when enabled):
+    python3 _fluxbench_sequential.py decide <slug>
+        prints {"verdict": "promoted"|"rejected"|null, ...}; the caller
+        applies the registry write
+
+Paths follow the scripts' environment: BUDGET_CONFIG,
+FLUXBENCH_RESULTS_JSONL.
+
+Exit codes:
+    0  ok (an undecided test prints verdict null)
+    2  unreadable budget config or bad arguments
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _log_segments  # noqa: E402
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(SCRIPT_DIR, "..", "config", "flux-drive")
+GATE_PASS_RATE = 0.70
+# challenger.sh's core_gates; gates whose `passed` is null (persona adherence) are skipped.
+GATES = (
+    "fluxbench-format-compliance",
+    "fluxbench-finding-recall",
+    "fluxbench-false-positive-rate",
+    "fluxbench-severity-accuracy",
+    "fluxbench-persona-adherence",
+)
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_fluxbench_sequential] {msg % args}", file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class SequentialConfig:
+    enabled: bool = False
+    alpha: float = 0.05
+    beta: float = 0.10
+    indifference: float = 0.15
+    promotion_threshold: int = 10
+    stale_threshold: int = 20
+
+    @classmethod
+    def from_challenger(cls, challenger: dict[str, Any]) -> "SequentialConfig":
+        seq = challenger.get("sequential") or {}
+        cfg = cls(enabled=seq.get("enabled") is True,
+                  alpha=float(seq.get("alpha", 0.05)), beta=float(seq.get("beta", 0.10)),
+                  indifference=float(seq.get("indifference", 0.15)),
+                  promotion_threshold=int(challenger.get("promotion_threshold", 10)),
+                  stale_threshold=int(challenger.get("stale_threshold", 20)))
+        if not (0 < cfg.alpha < 1 and 0 < cfg.beta < 1 and cfg.alpha + cfg.beta < 1):
+            raise ValueError(f"sequential alpha/beta must be in (0, 1) with alpha + beta < 1, "
+                             f"got {cfg.alpha}/{cfg.beta}")
+        if not (0 < cfg.indifference and cfg.p0 > 0 and cfg.p1 < 1):
+            raise ValueError(f"sequential indifference must be in (0, 0.30), got {cfg.indifference}")
+        return cfg
+
+    @property
+    def p0(self) -> float:
+        return GATE_PASS_RATE - self.indifference
+
+    @property
+    def p1(self) -> float:
+        return GATE_PASS_RATE + self.indifference
+
+    def split(self, gates: int) -> "SequentialConfig":
+        """The per-gate config when `gates` tests run side by side (Bonferroni)."""
+        return dataclasses.replace(self, alpha=self.alpha / gates, beta=self.beta / gates)
+
+    @property
+    def bounds(self) -> tuple[float, float]:
+        """(lower, upper) log-likelihood-ratio boundaries."""
+        return math.log(self.beta / (1 - self.alpha)), math.log((1 - self.beta) / self.alpha)
+
+    @property
+    def steps(self) -> tuple[float, float]:
+        """Λ increments for a pass and a fail."""
+        return math.log(self.p1 / self.p0), math.log((1 - self.p1) / (1 - self.p0))
+
+
+def expected_runs(cfg: SequentialConfig, passing: bool) -> float:
+    """Wald's average sample number for one gate when H1 (passing) or H0 holds."""
+    lower, upper = cfg.bounds
+    win, lose = cfg.steps
+    p = cfg.p1 if passing else cfg.p0
+    drift = p * win + (1 - p) * lose
+    if passing:
+        return ((1 - cfg.beta) * upper + cfg.beta * lower) / drift
+    return (cfg.alpha * upper + (1 - cfg.alpha) * lower) / drift
+
+
+def gate_test(outcomes: list[bool], cfg: SequentialConfig) -> dict[str, Any]:
+    """SPRT over one gate's pass/fail outcomes, oldest first; stops at the first crossing."""
+    lower, upper = cfg.bounds
+    win, lose = cfg.steps
+    llr = 0.0
+    for n, passed in enumerate(outcomes, 1):
+        llr += win if passed else lose
+        if llr >= upper:
+            return {"decision": "pass", "at": n, "llr": round(llr, 4)}
+        if llr <= lower:
+            return {"decision": "fail", "at": n, "llr": round(llr, 4)}
+    return {"decision": None, "at": None, "llr": round(llr, 4)}
+
+
+def decide(window: list[dict[str, Any]], cfg: SequentialConfig) -> dict[str, Any]:
+    """Combine per-gate tests over results records (oldest first) into a challenger verdict.
+
+    Each gate with any outcomes is tested at cfg.split(gates tested).
+    `runs` counts records up to and including the deciding one, so it
+    matches fluxbench-challenger.sh's run count for the same records.
+    """
+    samples: dict[str, list[tuple[int, Any]]] = {}
+    for gate in GATES:
+        indexed = [(i, r.get("gate_results", {}).get(gate, {}).get("passed")) for i, r in enumerate(window)]
+        indexed = [(i, v) for i, v in indexed if v is not None]
+        if indexed:
+            samples[gate] = indexed
+    gate_cfg = cfg.split(len(samples)) if samples else cfg
+    gates: dict[str, dict[str, Any]] = {}
+    for gate, indexed in samples.items():
+        test = gate_test([bool(v) for _, v in indexed], gate_cfg)
+        if test["at"] is not None:
+            test["at"] = indexed[test["at"] - 1][0] + 1  # sample count → record count
+        gates[gate] = test
+
+    failed = [(t["at"], g) for g, t in gates.items() if t["decision"] == "fail"]
+    passed = [t["at"] for t in gates.values() if t["decision"] == "pass"]
+    verdict, runs, fixed = None, None, None
+    if failed:
+        verdict, runs = "rejected", min(failed)[0]
+        fixed = cfg.stale_threshold + 1
+    elif gates and len(passed) == len(gates):
+        verdict, runs = "promoted", max(passed)
+        fixed = cfg.promotion_threshold
+    doc: dict[str, Any] = {"verdict": verdict, "reason": "sequential", "runs": runs, "gates": gates}
+    if verdict is None:
+        doc["runs"] = len(window)
+        return doc
+    expected = math.ceil(max(expected_runs(gate_cfg, verdict == "promoted"), 1.0))
+    doc.update({"runs_saved": max(0, fixed - runs), "expected_runs": expected,
+                "expected_runs_saved": max(0, fixed - expected)})
+    if verdict == "rejected":
+        doc["failed_gates"] = sorted(g for _, g in failed)
+    return doc
+
+
+def load_config(budget_path: str) -> SequentialConfig:
+    with open(budget_path) as fh:
+        return SequentialConfig.from_challenger((yaml.safe_load(fh) or {}).get("challenger") or {})
+
+
+def evaluate(results_path: str, slug: str, cfg: SequentialConfig) -> dict[str, Any]:
+    """Sequential verdict for a challenger from its latest stale_threshold + 1 results."""
+    window = _log_segments.latest(results_path, slug, cfg.stale_threshold + 1)
+    doc = decide(window, cfg)
+    _debug("%s: %s after %s of %d runs", slug, doc["verdict"], doc["runs"], len(window))
+    return {"model": slug, **doc}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_fluxbench_sequential",
+                                     description="SPRT early stop for challenger evaluation.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("decide")
+    d.add_argument("slug")
+    args = parser.parse_args(argv)
+
+    budget = os.environ.get("BUDGET_CONFIG") or os.path.join(CONFIG_DIR, "budget.yaml")
+    results = os.environ.get("FLUXBENCH_RESULTS_JSONL") or os.path.join(SCRIPT_DIR, "..", "data",
+                                                                          "fluxbench-results.jsonl")
+    try:
+        cfg = load_config(budget)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        print(f"fluxbench_sequential: {exc}", file=sys.stderr)
+        return 2
+    if not cfg.enabled:
+        print(json.dumps({"model": args.slug, "verdict": None, "reason": "sequential disabled"}))
+        return 0
+    print(json.dumps(evaluate(results, args.slug, cfg)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""Multi-process mock-mode stress harness for the FluxBench scoring engine.
+
+fluxbench-qualify.sh --mock scores each fixture's ground truth against
+itself: every finding matches its twin exactly, so the matcher and the
+Hungarian solver only ever see the single-pass happy path on ~5x5
+matrices. This harness generates realistic model output at scale instead
+and times the scoring engine on it.
+
+A load level is a total number of ground-truth findings (default
+10, 100, 1000, 10000) split into cases of at most --max-case findings — the
+solver is O(n^3) in pure Python, so a case is one review's worth of
+findings, not the whole level. Each case draws its baseline from the pooled
+qualification ground truths (copy k of a finding moves to `c<k>/<file>`,
+so copies share descriptions but not locations, as repeated defects do),
+then derives the model's findings with seeded perturbations:
+
+    drop            finding missed entirely
+    jitter          line moved by 1-8 (past 5 the location no longer scores)
+    paraphrase      words swapped for synonyms, dropped, or the clause rotated
+    severity_shift  one level up or down (a quarter of the time two)
+    fp_rate         spurious findings injected per kept finding
+
+The model side is shuffled and every finding keeps its origin, so besides
+timing the report measures the matcher itself: `accuracy.precision` is the
+share of Hungarian pairs that joined a finding to its origin, and
+`accuracy.recall` the share of kept findings that were paired back.
+
+Stages, timed per case in the worker that ran it:
+
+    perturb     synthesize baseline and model findings
+    matrix      match_score over every (model, baseline) pair
+    hungarian   hungarian_maximize on that matrix
+    score       score_findings end to end (matrix + solver + metrics)
+
+Per level and stage the report gives p50/p99 case latency (ms),
+throughput (baseline findings per second of stage time, i.e. per worker),
+and peak RSS (max ru_maxrss of any worker at the end of that stage; it is a
+high-water mark, so later stages never read lower). The level's `wall_s`
+and `throughput` cover the whole process pool. Cases are seeded from
+(seed, level, case index), so the findings, pairs and accuracy are
+identical for any --jobs; only the timings move.
+
+The matrix stage dominates (one SequenceMatcher per pair, ~0.75ms on
+fixture-length descriptions), so a level costs about level x max_case
+matcher calls: at the default --max-case 20 the 1000 level takes ~40s
+and the 10000 level ~6min on one core, before --jobs.
+
+CLI:
+    python3 _fluxbench_stress.py run [--sizes 10,100,1000,10000]
+        [--max-case 20] [--jobs N] [--seed 0] [--fixtures-dir D]
+        [--drop 0.1] [--jitter 0.3] [--paraphrase 0.5]
+        [--severity-shift 0.2] [--fp-rate 0.15] [--output FILE]
+        prints the report as JSON (and writes it to FILE)
+
+Exit codes:
+    0  ok
+    2  bad arguments or unreadable fixtures
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _fluxbench_pipeline  # noqa: E402
+import _fluxbench_score  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000)
+STAGES = ("perturb", "matrix", "hungarian", "score")
+SEVERITIES = ("P0", "P1", "P2", "P3")
+# Reviewer vocabulary drift: what a model says instead of what the ground truth says.
+SYNONYMS = {
+    "missing": "absent", "no": "lacks", "can": "may", "unchecked": "unvalidated",
+    "error": "failure", "errors": "failures", "exception": "error", "handling": "checks",
+    "input": "argument", "validation": "checking", "null": "None", "file": "path",
+    "user": "caller", "return": "yield", "returns": "gives back", "causing": "leading to",
+    "race": "data race", "leak": "leakage", "query": "statement", "unbounded": "unlimited",
+    "does": "will", "not": "never", "when": "if", "should": "must",
+}
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_fluxbench_stress] {msg % args}", file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class Perturbation:
+    drop: float = 0.10
+    jitter: float = 0.30
+    paraphrase: float = 0.50
+    severity_shift: float = 0.20
+    fp_rate: float = 0.15
+
+    def __post_init__(self) -> None:
+        for name, value in asdict(self).items():
+            if not 0 <= value <= 1:
+                raise ValueError(f"{name} must be in [0, 1], got {value}")
+
+
+@functools.lru_cache(maxsize=4)
+def ground_truth_pool(fixtures_dir: str) -> tuple[dict[str, Any], ...]:
+    """Every qualification ground-truth finding, in fixture order (cached per worker)."""
+    fixtures, _ = _fluxbench_pipeline.load_fixtures(fixtures_dir)
+    pool = tuple(f for fx in fixtures for f in fx.ground_truth.get("findings") or [])
+    if not pool:
+        raise _fluxbench_pipeline.PipelineError(2, f"no ground-truth findings in {fixtures_dir}")
+    return pool
+
+
+def _paraphrase(text: str, rng: random.Random) -> str:
+    words = text.split()
+    out = []
+    for w in words:
+        key = w.lower().strip(",.:;")
+        if key in SYNONYMS and rng.random() < 0.5:
+            out.append(SYNONYMS[key])
+        elif rng.random() < 0.08 and len(words) > 4:
+            continue
+        else:
+            out.append(w)
+    if len(out) > 6 and rng.random() < 0.3:
+        cut = rng.randrange(2, len(out) - 2)
+        out = out[cut:] + out[:cut]  # "X because Y" → "Y ... X"
+    return " ".join(out)
+
+
+def _jitter(location: str, rng: random.Random) -> str:
+    path, line = _fluxbench_score._parse_loc_parts(location)
+    if line is None:
+        return location
+    return f"{path}:{max(1, line + rng.choice((-1, 1)) * rng.randint(1, 8))}"
+
+
+def _shift(severity: str, rng: random.Random) -> str:
+    level = SEVERITIES.index(severity) if severity in SEVERITIES else 2
+    step = rng.choice((-1, 1)) * (2 if rng.random() < 0.25 else 1)
+    if not 0 <= level + step <= 3:
+        step = -step  # reflect at P0/P3 so a shift always changes the severity
+    return SEVERITIES[level + step]
+
+
+def synthesize(pool: tuple[dict[str, Any], ...], size: int, rng: random.Random,
+               knobs: Perturbation) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[int | None]]:
+    """(baseline, model findings, origin) — origin[i] is the baseline index model finding i
+    was derived from, None for an injected false positive."""
+    baseline = []
+    for j in range(size):
+        src = pool[rng.randrange(len(pool))]
+        baseline.append({**src, "location": f"c{j}/{src.get('location', '')}"})
+    model: list[tuple[dict[str, Any], int | None]] = []
+    for bi, b in enumerate(baseline):
+        if rng.random() < knobs.drop:
+            continue
+        m = dict(b)
+        if rng.random() < knobs.jitter:
+            m["location"] = _jitter(m["location"], rng)
+        if rng.random() < knobs.paraphrase:
+            m["description"] = _paraphrase(m.get("description", ""), rng)
+        if rng.random() < knobs.severity_shift:
+            m["severity"] = _shift(_fluxbench_score._sev(m), rng)
+        model.append((m, bi))
+    for k in range(sum(rng.random() < knobs.fp_rate for _ in range(len(model)))):
+        src = pool[rng.randrange(len(pool))]
+        model.append(({"severity": rng.choice(SEVERITIES), "location": f"fp{k}/{src.get('location', '')}",
+                       "description": _paraphrase(src.get("description", ""), rng)}, None))
+    rng.shuffle(model)
+    return baseline, [m for m, _ in model], [origin for _, origin in model]
+
+
+def _rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+
+
+def run_case(task: tuple[str, int, str, Perturbation]) -> dict[str, Any]:
+    """Synthesize and score one case, timing each stage (runs in a pool worker)."""
+    fixtures_dir, size, seed, knobs = task
+    pool = ground_truth_pool(fixtures_dir)
+    latency, rss = {}, {}
+
+    start = time.perf_counter()
+    baseline, model, origin = synthesize(pool, size, random.Random(seed), knobs)
+    latency["perturb"], rss["perturb"] = time.perf_counter() - start, _rss_kb()
+
+    start = time.perf_counter()
+    matrix = [[_fluxbench_score.match_score(m, b) for b in baseline] for m in model]
+    latency["matrix"], rss["matrix"] = time.perf_counter() - start, _rss_kb()
+
+    start = time.perf_counter()
+    pairs = _fluxbench_score.hungarian_maximize(matrix)
+    latency["hungarian"], rss["hungarian"] = time.perf_counter() - start, _rss_kb()
+
+    start = time.perf_counter()
+    _fluxbench_score.score_findings(model, baseline, 1.0)
+    latency["score"], rss["score"] = time.perf_counter() - start, _rss_kb()
+
+    return {"findings": size, "model_findings": len(model), "latency": latency, "rss_kb": rss,
+            "pairs": len(pairs), "correct": sum(origin[mi] == bi for mi, bi in pairs),
+            "kept": sum(o is not None for o in origin)}
+
+
+def case_sizes(total: int, max_case: int) -> list[int]:
+    full, rest = divmod(total, max_case)
+    return [max_case] * full + ([rest] if rest else [])
+
+
+def _nearest_rank(sorted_values: list[float], q: float) -> float:
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def summarize(level: int, cases: list[dict[str, Any]], wall: float) -> dict[str, Any]:
+    """One level's report from its per-case results."""
+    stages = {}
+    for stage in STAGES:
+        times = sorted(c["latency"][stage] for c in cases)
+        busy = sum(times)
+        stages[stage] = {"p50_ms": round(_nearest_rank(times, 0.50) * 1000, 3),
+                         "p99_ms": round(_nearest_rank(times, 0.99) * 1000, 3),
+                         "throughput": round(level / busy, 1) if busy else None,
+                         "peak_rss_mb": round(max(c["rss_kb"][stage] for c in cases) / 1024, 1)}
+    pairs, correct, kept = (sum(c[k] for c in cases) for k in ("pairs", "correct", "kept"))
+    return {"findings": level, "cases": len(cases), "model_findings": sum(c["model_findings"] for c in cases),
+            "wall_s": round(wall, 3), "throughput": round(level / wall, 1) if wall else None,
+            "accuracy": {"precision": round(correct / pairs, 4) if pairs else None,
+                         "recall": round(correct / kept, 4) if kept else None},
+            "stages": stages}
+
+
+def stress(sizes: tuple[int, ...] = DEFAULT_SIZES, max_case: int = 20, jobs: int = 1, seed: int = 0,
+           fixtures_dir: str = _fluxbench_pipeline.DEFAULT_FIXTURES_DIR,
+           knobs: Perturbation = Perturbation()) -> dict[str, Any]:
+    """Run every load level through the scoring engine; see module docstring."""
+    if not sizes or any(s < 1 for s in sizes):
+        raise ValueError(f"sizes must be positive, got {list(sizes)}")
+    if max_case < 1:
+        raise ValueError(f"max-case must be >= 1, got {max_case}")
+    fixtures_dir = os.path.abspath(fixtures_dir)
+    ground_truth_pool(fixtures_dir)  # fail fast on bad fixtures, before any worker starts
+    levels = []
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        for level in sizes:
+            tasks = [(fixtures_dir, n, f"{seed}:{level}:{i}", knobs)
+                     for i, n in enumerate(case_sizes(level, max_case))]
+            start = time.perf_counter()
+            cases = list(executor.map(run_case, tasks)) if executor else [run_case(t) for t in tasks]
+            levels.append(summarize(level, cases, time.perf_counter() - start))
+            _debug("level %d: %d cases in %.2fs", level, len(cases), levels[-1]["wall_s"])
+    finally:
+        if executor:
+            executor.shutdown()
+    return {"jobs": jobs, "max_case": max_case, "seed": seed, "perturbation": asdict(knobs), "levels": levels}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_fluxbench_stress", description="FluxBench scoring stress harness.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                   help="comma-separated total ground-truth findings per load level")
+    r.add_argument("--max-case", type=int, default=20, help="findings per scored case")
+    r.add_argument("--jobs", type=int, default=1)
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--fixtures-dir", default=_fluxbench_pipeline.DEFAULT_FIXTURES_DIR)
+    defaults = Perturbation()
+    for name in asdict(defaults):
+        r.add_argument(f"--{name.replace('_', '-')}", type=float, default=getattr(defaults, name))
+    r.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = tuple(int(s) for s in args.sizes.split(",") if s.strip())
+        knobs = Perturbation(**{name: getattr(args, name) for name in asdict(defaults)})
+        doc = stress(sizes, args.max_case, max(1, args.jobs), args.seed, args.fixtures_dir, knobs)
+    except _fluxbench_pipeline.PipelineError as exc:
+        print(f"fluxbench_stress: {exc}", file=sys.stderr)
+        return 2
+    except ValueError as exc:
+        print(f"fluxbench_stress: {exc}", file=sys.stderr)
+        return 2
+    out = json.dumps(doc, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(out + "\n")
+    print(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Synthesis grounding verifier — single-pass Python port of verify-synthesis-grounding.sh.
+
+The bash implementation ran awk twice per agent file (quire-mark, then index
+bullets), concatenated every index line into one string, and grep'd that
+string once per synthesized finding — O(agents x findings) process spawns.
+Here every agent file is read once, building:
+
+    grounded_keys:  set of "SEVERITY|ID"        (exact grounding)
+    grounded_ids:   dict ID -> set of severities (severity-mismatch detection)
+
+and each finding in findings.json is classified with two hash lookups.
+
+Semantics, output text, `--json` shape and exit codes are identical to the
+bash version (see that script's header for the rationale behind each rule):
+
+* corpus: every `*.md` in OUTPUT_DIR except summary/synthesis/findings and
+  `*.reactions` / `*.reactions.error`; every line matching
+  `^-[ \\t]*[Pp][0-9]+[ \\t]*\\|` with a non-empty second `|` field grounds
+  `SEVERITY|ID`;
+* quire-mark: with --run-uuid (or FLUX_RUN_UUID), files whose first
+  non-empty line is not exactly `<!-- run-uuid: {uuid} -->` are Foreign and
+  excluded;
+* policy: ungrounded P0/P1 → violation; ungrounded P2+ and severity
+  mismatches warn; --strict makes every ungrounded finding and mismatch a
+  violation.
+
+Usage: _grounding.py <OUTPUT_DIR> [--run-uuid <uuid>] [--strict] [--json]
+Exit codes: 0 ok (or warn-only) | 2 invalid invocation / missing inputs | 3 grounding violation
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Any
+
+USAGE = "Usage: verify-synthesis-grounding.sh <OUTPUT_DIR> [--run-uuid <uuid>] [--strict] [--json]"
+
+_BULLET_RE = re.compile(r"^-[ \t]*([Pp][0-9]+)[ \t]*\|")
+_SKIP_BASES = frozenset({"summary", "synthesis", "findings"})
+
+
+@dataclass
+class Corpus:
+    grounded_keys: set[str] = field(default_factory=set)
+    grounded_ids: dict[str, set[str]] = field(default_factory=dict)
+    foreign: int = 0
+
+
+@dataclass
+class GroundingResult:
+    checked: int = 0
+    ungrounded: list[str] = field(default_factory=list)
+    severity_mismatch: list[str] = field(default_factory=list)
+    blocking_ungrounded: list[str] = field(default_factory=list)
+    violation: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.violation:
+            return "violation"
+        if self.ungrounded or self.severity_mismatch:
+            return "warn"
+        return "ok"
+
+
+def _is_agent_file(name: str) -> bool:
+    if not name.endswith(".md"):
+        return False
+    base = name[: -len(".md")]
+    return not (base in _SKIP_BASES or base.endswith((".reactions", ".reactions.error")))
+
+
+def build_corpus(output_dir: str, run_uuid: str = "") -> Corpus:
+    """One read per agent file: quire-mark check and bullet harvest together."""
+    corpus = Corpus()
+    marker = f"<!-- run-uuid: {run_uuid} -->"
+    for name in sorted(os.listdir(output_dir)):
+        if not _is_agent_file(name):
+            continue
+        path = os.path.join(output_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding="utf-8", errors="replace", newline="") as fh:
+            lines = fh.read().split("\n")
+        if run_uuid:
+            first = next((ln for ln in lines if ln.split()), None)
+            if first != marker:
+                corpus.foreign += 1
+                continue
+        for line in lines:
+            m = _BULLET_RE.match(line)
+            if not m:
+                continue
+            parts = line.split("|")
+            ident = parts[1].strip(" \t")
+            if not ident:
+                continue
+            sev = m.group(1).upper()
+            corpus.grounded_keys.add(f"{sev}|{ident}")
+            corpus.grounded_ids.setdefault(ident, set()).add(sev)
+    return corpus
+
+
+def synthesized_keys(findings_doc: Any) -> list[str]:
+    """`SEVERITY|ID` for each findings.json entry with a non-empty id, in file order."""
+    findings = findings_doc.get("findings") if isinstance(findings_doc, dict) else None
+    keys = []
+    for f in findings or []:
+        if not isinstance(f, dict):
+            continue
+        ident = f.get("id")
+        if ident is None or ident == "":
+            continue
+        if isinstance(ident, bool):
+            ident = "true" if ident else "false"
+        elif not isinstance(ident, str):
+            ident = json.dumps(ident)
+        sev = f.get("severity") or ""
+        keys.append(f"{str(sev).upper()}|{ident}")
+    return keys
+
+
+def classify(keys: list[str], corpus: Corpus, strict: bool = False) -> GroundingResult:
+    result = GroundingResult()
+    for key in keys:
+        result.checked += 1
+        if key in corpus.grounded_keys:
+            continue
+        sev, _, ident = key.partition("|")
+        if ident in corpus.grounded_ids:
+            result.severity_mismatch.append(key)
+            continue
+        result.ungrounded.append(key)
+        if strict or sev in ("P0", "P1"):
+            result.violation = True
+            result.blocking_ungrounded.append(key)
+    if strict and result.severity_mismatch:
+        result.violation = True
+    return result
+
+
+def _parse_args(argv: list[str]) -> tuple[str, str, bool, bool] | None:
+    if not argv or not argv[0]:
+        return None
+    output_dir, rest = argv[0], argv[1:]
+    run_uuid = os.environ.get("FLUX_RUN_UUID", "")
+    strict = emit_json = False
+    i = 0
+    while i < len(rest):
+        arg = rest[i]
+        if arg == "--run-uuid":
+            run_uuid = rest[i + 1] if i + 1 < len(rest) else ""
+            i += 2
+        elif arg == "--strict":
+            strict = True
+            i += 1
+        elif arg == "--json":
+            emit_json = True
+            i += 1
+        else:
+            print(f"Unknown arg: {arg}", file=sys.stderr)
+            return None
+    return output_dir, run_uuid, strict, emit_json
+
+
+def _dump(obj: dict[str, Any]) -> str:
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parsed = _parse_args(sys.argv[1:] if argv is None else argv)
+    if parsed is None:
+        print(USAGE, file=sys.stderr)
+        return 2
+    output_dir, run_uuid, strict, emit_json = parsed
+
+    if not os.path.isdir(output_dir):
+        print(f"Error: OUTPUT_DIR '{output_dir}' not found", file=sys.stderr)
+        return 2
+    findings_path = os.path.join(output_dir, "findings.json")
+    if not os.path.isfile(findings_path):
+        print(f"Error: findings.json not found in '{output_dir}'", file=sys.stderr)
+        return 2
+
+    corpus = build_corpus(output_dir, run_uuid)
+    try:
+        with open(findings_path, encoding="utf-8") as fh:
+            keys = synthesized_keys(json.load(fh))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        keys = []  # bash parity: an unparseable findings.json has nothing to ground
+
+    if not keys:
+        if emit_json:
+            print(_dump({"status": "ok", "checked": 0, "ungrounded": [], "severity_mismatch": [],
+                         "foreign_skipped": corpus.foreign}))
+        else:
+            print(f"grounding: OK — 0 synthesized findings to verify "
+                  f"({corpus.foreign} foreign files skipped)")
+        return 0
+
+    r = classify(keys, corpus, strict)
+    if emit_json:
+        print(_dump({"status": r.status, "checked": r.checked, "ungrounded": r.ungrounded,
+                     "severity_mismatch": r.severity_mismatch,
+                     "foreign_skipped": corpus.foreign, "strict": strict}))
+    else:
+        if r.violation:
+            err = ["grounding: VIOLATION — synthesized findings not backed by any agent "
+                   "Findings Index entry:"]
+            for key in r.blocking_ungrounded:
+                sev, _, ident = key.partition("|")
+                err.append(f"  - ungrounded: {sev} {ident} (no index entry with this id)")
+            if strict:
+                for key in r.severity_mismatch:
+                    sev, _, ident = key.partition("|")
+                    err.append(f"  - severity-mismatch: {sev} {ident} "
+                               "(id exists in an index under a different severity)")
+            print("\n".join(err), file=sys.stderr)
+        else:
+            print(f"grounding: OK — {r.checked} synthesized findings verified against agent "
+                  f"indexes ({corpus.foreign} foreign files skipped)")
+        if not strict:
+            for key in r.ungrounded:
+                sev, _, ident = key.partition("|")
+                if sev in ("P0", "P1"):
+                    continue
+                print(f"grounding: warn — ungrounded {sev} finding {ident} "
+                      "(below blocking threshold)", file=sys.stderr)
+            for key in r.severity_mismatch:
+                sev, _, ident = key.partition("|")
+                print(f"grounding: warn — {sev} {ident} grounded by id but severity differs "
+                      "from index (possible dedup escalation)", file=sys.stderr)
+    return 3 if r.violation else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
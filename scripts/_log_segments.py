@@ -0,0 +1,593 @@
+"""Segmented JSONL logs: size/age rotation into gzip segments plus a manifest.
+
+`triage.jsonl`, `decisions.log` and `fluxbench-results.jsonl` are append-only
+and were never trimmed, so every reader rescanned them from byte 0. This
+module rotates a live log into compressed, immutable segments and records
+what each segment holds, so readers can skip the segments outside their
+query window without decompressing them.
+
+Layout for a live log `<dir>/<name>` (writers are unchanged — they keep
+appending to the live file):
+
+    <dir>/<name>                          live log
+    <dir>/<name>.segments/manifest.json   {"version", "kind", "segments": [...]}
+    <dir>/<name>.segments/000001.jsonl.gz
+    <dir>/<name>.segments/000002.jsonl.gz ...
+
+Each manifest entry records `seq`, `file`, `lines`, `bytes` (uncompressed),
+`base_offset` (where the segment starts in the logical log = all segments
+followed by the live file), `min_ts`/`max_ts` (ISO-8601 UTC, null when no
+line carried a timestamp), `rotated_at`, and — for keyed logs — `keys`, the
+record count per key value (`model_slug` for FluxBench results).
+
+Rotation runs under an exclusive lock on `<name>.lock`, which is the lock
+the FluxBench writers already take (fd 200 domain), so results appends and
+rotation serialize. triage.jsonl and decisions.log writers append without a
+lock; for them the live file is renamed aside first (new appends create a
+fresh live file) and compressed, then any bytes that landed in the renamed
+file after it was read — appends through an fd opened before the rename —
+are moved back onto the live log until the file has been quiet for a short
+settle window, and only then is it unlinked. A crash mid-rotation leaves `<seq>.rotating` in the segments
+directory, which the next rotation finishes before doing anything else.
+
+Public API:
+    rotate(log_path, kind=None, *, max_bytes, max_age_days, force, on_rotate) -> Segment | None
+    load_manifest(log_path) -> list[Segment]
+    iter_lines(log_path, since=None)      # raw lines, segments then live
+    iter_records(log_path, since=None)    # decoded JSON objects
+    iter_segment(log_path, seg, start, end)  # (global_start, global_end, raw)
+    latest(log_path, key, n=None)         # last n records for a key, oldest first
+    count(log_path, key)
+    locked(log_path)                      # context manager on <name>.lock
+
+CLI:
+    python3 _log_segments.py rotate <log> [--kind K] [--max-bytes N] [--max-age-days D] [--force]
+    python3 _log_segments.py ls <log>
+    python3 _log_segments.py cat <log> [--since ISO]
+    python3 _log_segments.py count <log> --key VALUE
+    python3 _log_segments.py latest <log> --key VALUE [-n N]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import fcntl
+import gzip
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+MANIFEST_VERSION = 1
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30.0
+LOCK_TIMEOUT_S = 30.0
+# How long a sealed `.rotating` file must go unchanged before it is unlinked,
+# for appenders that opened the live log just before the rename.
+ROTATE_SETTLE_S = 0.05
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_log_segments] {msg % args}", file=sys.stderr)
+
+
+# --- log kinds ---------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class LogKind:
+    name: str
+    ts_field: str
+    ts_unit: str  # "iso" | "ms"
+    key_field: str | None = None
+
+
+KINDS = {
+    "triage": LogKind("triage", "ts", "iso"),
+    "decisions": LogKind("decisions", "timestamp_ms", "ms"),
+    "fluxbench": LogKind("fluxbench", "timestamp", "iso", "model_slug"),
+    "jsonl": LogKind("jsonl", "ts", "iso"),
+}
+
+
+def infer_kind(log_path: str) -> LogKind:
+    name = os.path.basename(log_path)
+    if name == "decisions.log":
+        return KINDS["decisions"]
+    if name.startswith("triage"):
+        return KINDS["triage"]
+    if "fluxbench" in name or "results" in name:
+        return KINDS["fluxbench"]
+    return KINDS["jsonl"]
+
+
+def _parse_iso(ts: str) -> float | None:
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except (ValueError, AttributeError, TypeError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def record_time(kind: LogKind, rec: dict) -> float | None:
+    """Epoch seconds of a record, or None when it carries no usable timestamp."""
+    value = rec.get(kind.ts_field)
+    if kind.ts_unit == "ms":
+        return value / 1000.0 if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return _parse_iso(value) if isinstance(value, str) else None
+
+
+def _epoch(since: datetime | float | None) -> float | None:
+    if since is None or isinstance(since, (int, float)):
+        return since
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since.timestamp()
+
+
+def _decode(raw: bytes) -> dict | None:
+    line = raw.decode("utf-8", errors="replace").strip()
+    if not line:
+        return None
+    try:
+        rec = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+# --- manifest ----------------------------------------------------------------
+
+
+@dataclass
+class Segment:
+    seq: int
+    file: str
+    lines: int
+    bytes: int
+    base_offset: int
+    min_ts: str | None
+    max_ts: str | None
+    rotated_at: str
+    keys: dict[str, int] | None = None
+
+    @property
+    def end_offset(self) -> int:
+        return self.base_offset + self.bytes
+
+    def ends_before(self, since: float) -> bool:
+        """True when every timestamped line is older than `since`.
+
+        A segment without timestamps is never skipped.
+        """
+        newest = _parse_iso(self.max_ts) if self.max_ts else None
+        return newest is not None and newest < since
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Segment":
+        return cls(**{k: d.get(k) for k in cls.__dataclass_fields__})
+
+
+def segments_dir(log_path: str) -> str:
+    return f"{log_path}.segments"
+
+
+def manifest_path(log_path: str) -> str:
+    return os.path.join(segments_dir(log_path), "manifest.json")
+
+
+def has_segments(log_path: str) -> bool:
+    return os.path.isfile(manifest_path(log_path))
+
+
+def load_manifest(log_path: str) -> list[Segment]:
+    path = manifest_path(log_path)
+    try:
+        with open(path) as fh:
+            doc = json.load(fh)
+    except FileNotFoundError:
+        return []
+    except (OSError, json.JSONDecodeError) as exc:
+        # Written via tmp+rename, so this means outside tampering. Say so loudly:
+        # silently returning [] would hide every rotated record.
+        print(f"_log_segments: unreadable manifest {path}: {exc}", file=sys.stderr)
+        return []
+    return [Segment.from_dict(s) for s in doc.get("segments", []) if isinstance(s, dict)]
+
+
+def _write_manifest(log_path: str, kind: LogKind, segments: list[Segment]) -> None:
+    path = manifest_path(log_path)
+    tmp = f"{path}.tmp"
+    doc = {"version": MANIFEST_VERSION, "kind": kind.name,
+           "segments": [asdict(s) for s in segments]}
+    with open(tmp, "w") as fh:
+        json.dump(doc, fh, indent=2)
+        fh.write("\n")
+    os.replace(tmp, path)
+
+
+def live_base(segments: list[Segment]) -> int:
+    """Logical offset of the live log's byte 0."""
+    return segments[-1].end_offset if segments else 0
+
+
+# --- readers -----------------------------------------------------------------
+
+
+def _segment_file(log_path: str, seg: Segment) -> str:
+    return os.path.join(segments_dir(log_path), seg.file)
+
+
+def iter_segment(log_path: str, seg: Segment, start: int | None = None,
+                 end: int | None = None) -> Iterator[tuple[int, int, bytes]]:
+    """(global_start, global_end, raw) for a segment's lines in [start, end)."""
+    pos = seg.base_offset
+    with gzip.open(_segment_file(log_path, seg), "rb") as fh:
+        for raw in fh:
+            nxt = pos + len(raw)
+            if end is not None and pos >= end:
+                return
+            if start is None or pos >= start:
+                yield pos, nxt, raw
+            pos = nxt
+
+
+def iter_lines(log_path: str, since: datetime | float | None = None) -> Iterator[bytes]:
+    """Raw lines of the logical log: segments oldest-first, then the live file.
+
+    With `since`, segments whose newest timestamp is older are skipped
+    without being opened. Lines are not filtered — callers still apply
+    their exact window to what is yielded.
+    """
+    cutoff = _epoch(since)
+    for seg in load_manifest(log_path):
+        if cutoff is not None and seg.ends_before(cutoff):
+            _debug("skip %s (max_ts %s)", seg.file, seg.max_ts)
+            continue
+        try:
+            for _start, _end, raw in iter_segment(log_path, seg):
+                yield raw
+        except (OSError, EOFError) as exc:
+            print(f"_log_segments: unreadable segment {seg.file}: {exc}", file=sys.stderr)
+    try:
+        with open(log_path, "rb") as fh:
+            yield from fh
+    except FileNotFoundError:
+        return
+
+
+def iter_records(log_path: str, since: datetime | float | None = None) -> Iterator[dict]:
+    for raw in iter_lines(log_path, since):
+        rec = _decode(raw)
+        if rec is not None:
+            yield rec
+
+
+def _live_matching(log_path: str, field_name: str, key: str) -> list[dict]:
+    out = []
+    try:
+        with open(log_path, "rb") as fh:
+            for raw in fh:
+                rec = _decode(raw)
+                if rec is not None and rec.get(field_name) == key:
+                    out.append(rec)
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def latest(log_path: str, key: str, n: int | None = None, kind: LogKind | None = None) -> list[dict]:
+    """The last `n` records whose key field equals `key` (all when n is None), oldest first.
+
+    Walks the live file, then segments newest-first, stopping once `n`
+    records are found; segments whose `keys` count lacks `key` are skipped.
+    """
+    kind = kind or infer_kind(log_path)
+    field_name = kind.key_field or "model_slug"
+    found = _live_matching(log_path, field_name, key)
+    chunks = [found]
+    have = len(found)
+    for seg in reversed(load_manifest(log_path)):
+        if n is not None and have >= n:
+            break
+        if seg.keys is not None and not seg.keys.get(key):
+            continue
+        chunk = [rec for _s, _e, raw in iter_segment(log_path, seg)
+                 if (rec := _decode(raw)) is not None and rec.get(field_name) == key]
+        chunks.append(chunk)
+        have += len(chunk)
+    records = [rec for chunk in reversed(chunks) for rec in chunk]
+    if n is None:
+        return records
+    return records[-n:] if n > 0 else []
+
+
+def count(log_path: str, key: str, kind: LogKind | None = None) -> int:
+    """Records whose key field equals `key`; segments answer from the manifest."""
+    kind = kind or infer_kind(log_path)
+    field_name = kind.key_field or "model_slug"
+    total = len(_live_matching(log_path, field_name, key))
+    for seg in load_manifest(log_path):
+        if seg.keys is not None:
+            total += seg.keys.get(key, 0)
+        else:
+            total += sum(1 for _s, _e, raw in iter_segment(log_path, seg)
+                         if (rec := _decode(raw)) is not None and rec.get(field_name) == key)
+    return total
+
+
+# --- rotation ----------------------------------------------------------------
+
+
+@contextlib.contextmanager
+def locked(log_path: str, timeout: float = LOCK_TIMEOUT_S) -> Iterator[None]:
+    """Exclusive flock on `<log>.lock` — the FluxBench results writers' lock."""
+    with open(f"{log_path}.lock", "a") as fh:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"lock timeout after {timeout:.0f}s on {log_path}.lock")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def rotation_reason(log_path: str, kind: LogKind, max_bytes: int | None,
+                    max_age_days: float | None, now: float | None = None) -> str | None:
+    """Why the live log is due for rotation ("size" / "age"), or None."""
+    try:
+        size = os.path.getsize(log_path)
+    except FileNotFoundError:
+        return None
+    if size == 0:
+        return None
+    if max_bytes is not None and size >= max_bytes:
+        return "size"
+    if max_age_days is not None:
+        now = time.time() if now is None else now
+        with open(log_path, "rb") as fh:
+            for raw in fh:
+                rec = _decode(raw)
+                ts = record_time(kind, rec) if rec is not None else None
+                if ts is not None:
+                    return "age" if ts < now - max_age_days * 86400 else None
+    return None
+
+
+def _compress(pending: str, dest: str, kind: LogKind) -> dict[str, Any]:
+    lines = size = 0
+    lo = hi = None
+    keys: dict[str, int] | None = {} if kind.key_field else None
+    tmp = f"{dest}.tmp"
+    with open(pending, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as out:
+        for raw in src:
+            out.write(raw)
+            lines += 1
+            size += len(raw)
+            rec = _decode(raw)
+            if rec is None:
+                continue
+            ts = record_time(kind, rec)
+            if ts is not None:
+                lo = ts if lo is None else min(lo, ts)
+                hi = ts if hi is None else max(hi, ts)
+            if keys is not None:
+                k = rec.get(kind.key_field)
+                if isinstance(k, str):
+                    keys[k] = keys.get(k, 0) + 1
+    os.replace(tmp, dest)
+    return {"lines": lines, "bytes": size, "keys": keys,
+            "min_ts": _iso(lo) if lo is not None else None,
+            "max_ts": _iso(hi) if hi is not None else None}
+
+
+def _seal(log_path: str, kind: LogKind, segments: list[Segment], seq: int,
+          pending: str, inode: int, on_rotate: Callable[[Segment, int], None] | None) -> Segment:
+    name = f"{seq:06d}.jsonl.gz"
+    stats = _compress(pending, os.path.join(segments_dir(log_path), name), kind)
+    seg = Segment(seq=seq, file=name, base_offset=live_base(segments),
+                  rotated_at=_iso(time.time()), **stats)
+    _write_manifest(log_path, kind, [*segments, seg])
+    segments.append(seg)
+    if on_rotate is not None:
+        on_rotate(seg, inode)
+    _rehome_late(log_path, pending, seg.bytes)
+    os.unlink(pending)
+    _debug("sealed %s: %d lines, %d bytes", name, seg.lines, seg.bytes)
+    return seg
+
+
+def _rehome_late(log_path: str, pending: str, sealed: int) -> None:
+    """Append whatever reached `pending` past its first `sealed` bytes to the live log.
+
+    Polls until size and mtime hold still for ROTATE_SETTLE_S. Late lines land
+    after anything appended to the fresh live log since the rename, so they
+    keep their bytes but not their position.
+    """
+    offset, last = sealed, None
+    while True:
+        st = os.stat(pending)
+        if st.st_size > offset:
+            with open(pending, "rb") as src, open(log_path, "ab") as dst:
+                src.seek(offset)
+                late = src.read()
+                dst.write(late)
+            offset += len(late)
+            _debug("re-homed %d late bytes from %s", len(late), pending)
+        sig = (st.st_size, st.st_mtime_ns)
+        if sig == last:
+            return
+        last = sig
+        time.sleep(ROTATE_SETTLE_S)
+
+
+def _recover(log_path: str, kind: LogKind, segments: list[Segment]) -> None:
+    """Finish (or discard) a rotation interrupted by a crash."""
+    sdir = segments_dir(log_path)
+    if not os.path.isdir(sdir):
+        return
+    for name in sorted(os.listdir(sdir)):
+        if not name.endswith(".rotating"):
+            continue
+        seq = int(name.split(".")[0])
+        path = os.path.join(sdir, name)
+        done = next((s for s in segments if s.seq == seq), None)
+        if done is not None:
+            # Manifest already committed; only the re-home and unlink were lost.
+            _rehome_late(log_path, path, done.bytes)
+            os.unlink(path)
+        else:
+            _seal(log_path, kind, segments, seq, path, os.stat(path).st_ino, None)
+
+
+def rotate(
+    log_path: str,
+    kind: LogKind | None = None,
+    *,
+    max_bytes: int | None = DEFAULT_MAX_BYTES,
+    max_age_days: float | None = DEFAULT_MAX_AGE_DAYS,
+    force: bool = False,
+    now: float | None = None,
+    on_rotate: Callable[[Segment, int], None] | None = None,
+) -> Segment | None:
+    """Seal the live log into the next segment if it is due (or `force`).
+
+    `on_rotate(segment, inode)` runs under the lock after the manifest is
+    written, with the inode the live log had — triage-stats uses it to carry
+    its index over the rotation instead of rebuilding.
+    """
+    kind = kind or infer_kind(log_path)
+    with locked(log_path):
+        segments = load_manifest(log_path)
+        _recover(log_path, kind, segments)
+        if force:
+            due = os.path.exists(log_path) and os.path.getsize(log_path) > 0
+        else:
+            due = rotation_reason(log_path, kind, max_bytes, max_age_days, now) is not None
+        if not due:
+            return None
+        os.makedirs(segments_dir(log_path), exist_ok=True)
+        seq = (segments[-1].seq if segments else 0) + 1
+        pending = os.path.join(segments_dir(log_path), f"{seq:06d}.rotating")
+        inode = os.stat(log_path).st_ino
+        os.rename(log_path, pending)
+        return _seal(log_path, kind, segments, seq, pending, inode, on_rotate)
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def _triage_hook(log_path: str):
+    """Carry triage-stats' index across the rotation when one exists."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import _triage_store
+
+    db = os.path.join(os.path.dirname(log_path), _triage_store.DB_FILENAME)
+    if not os.path.exists(db):
+        return None, None
+    conn = _triage_store.open_store(db)
+    return conn, lambda seg, inode: _triage_store.note_rotation(conn, log_path, seg, inode)
+
+
+def _cli_rotate(args: argparse.Namespace) -> int:
+    kind = KINDS[args.kind] if args.kind else infer_kind(args.log)
+    conn, hook = _triage_hook(args.log) if kind.name == "triage" else (None, None)
+    try:
+        seg = rotate(args.log, kind, max_bytes=args.max_bytes,
+                     max_age_days=args.max_age_days, force=args.force, on_rotate=hook)
+    except TimeoutError as exc:
+        print(f"_log_segments: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if conn is not None:
+            conn.close()
+    print(json.dumps({"rotated": False} if seg is None else {"rotated": True, **asdict(seg)}))
+    return 0
+
+
+def _cli_ls(args: argparse.Namespace) -> int:
+    segs = load_manifest(args.log)
+    live = os.path.getsize(args.log) if os.path.exists(args.log) else 0
+    print(json.dumps({"segments": [asdict(s) for s in segs], "live_bytes": live}, indent=2))
+    return 0
+
+
+def _cli_cat(args: argparse.Namespace) -> int:
+    since = _parse_iso(args.since) if args.since else None
+    if args.since and since is None:
+        print(f"_log_segments: bad --since: {args.since}", file=sys.stderr)
+        return 2
+    out = sys.stdout.buffer
+    for raw in iter_lines(args.log, since):
+        out.write(raw if raw.endswith(b"\n") else raw + b"\n")
+    return 0
+
+
+def _cli_count(args: argparse.Namespace) -> int:
+    print(count(args.log, args.key))
+    return 0
+
+
+def _cli_latest(args: argparse.Namespace) -> int:
+    for rec in latest(args.log, args.key, args.n):
+        print(json.dumps(rec))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="_log_segments",
+        description="Rotate append-only JSONL logs into gzip segments and read them back.",
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("rotate", help="Seal the live log into a segment if due")
+    p.add_argument("log")
+    p.add_argument("--kind", choices=sorted(KINDS), default=None)
+    p.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    p.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS)
+    p.add_argument("--force", action="store_true", help="rotate any non-empty live log")
+    p.set_defaults(func=_cli_rotate)
+
+    p = sub.add_parser("ls", help="Print the manifest and live log size")
+    p.add_argument("log")
+    p.set_defaults(func=_cli_ls)
+
+    p = sub.add_parser("cat", help="Stream the logical log (segments, then live)")
+    p.add_argument("log")
+    p.add_argument("--since", default=None, help="ISO timestamp; skip older segments")
+    p.set_defaults(func=_cli_cat)
+
+    p = sub.add_parser("count", help="Count records for a key (e.g. model slug)")
+    p.add_argument("log")
+    p.add_argument("--key", required=True)
+    p.set_defaults(func=_cli_count)
+
+    p = sub.add_parser("latest", help="Last N records for a key, oldest first")
+    p.add_argument("log")
+    p.add_argument("--key", required=True)
+    p.add_argument("-n", type=int, default=None)
+    p.set_defaults(func=_cli_latest)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
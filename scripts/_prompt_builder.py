@@ -0,0 +1,396 @@
+"""Prompt-cache-aware prompt assembly for flux-drive agent launches.
+
+launch.md builds each agent prompt from references/prompt-template.md in
+template order: Output Format (with the agent name and run UUID already
+substituted), then Review Task, knowledge, domain and overlay context,
+project context, the document reference, focus area, research escalation
+and the peer-findings protocol. Almost all of that text is identical across
+the agents of a run, but because agent-specific text appears in the very
+first lines, no two prompts share a byte-identical prefix. Provider prompt
+caching (cache_read_input_tokens) only reuses exact prefixes, so every
+agent paid full input price for the shared text.
+
+This module assembles the same content ordered from most-shared to
+least-shared:
+
+    S1 static    agent-invariant template sections (Output Format, Research
+                 Escalation, Peer Findings Protocol) with the run variables
+                 substituted and `{agent-name}` normalized to `{AGENT_NAME}`
+    S2 project   Review Task + Project Context + run-level knowledge
+    S3 document  the shared Document/Diff-to-Review header (stats, README
+                 excerpt, divergence notes)
+    S4 agent     per-agent knowledge, domain and overlay context, the
+                 agent's review file (its slice, from the _slicer.py
+                 manifest, or the shared file), focus area, project-agent
+                 instructions, and the `AGENT_NAME` binding with the
+                 agent's concrete findings paths
+
+so S1..S3 form a common prefix for every agent dispatched with the same
+`subagent_type` (the runtime system prompt is part of the cached prefix,
+so plugin agents with distinct native prompts only share with themselves —
+across stages and reruns — while Project Agents, all `general-purpose`,
+share with each other). The document itself stays in files the agents
+Read: inlining it would route it through the orchestrator's output tokens
+once per agent.
+
+The breakpoint plan marks the end of each shared segment (at most three,
+leaving the API's fourth cache_control slot for the runtime). A breakpoint
+is dropped when its prefix is below the model's minimum cacheable length
+(1024 tokens, 2048 for Haiku). Tokens are estimated as chars/4, the same
+estimate token-count.py falls back to. Expected cache reads walk agents in
+launch order: an agent reads the deepest breakpoint prefix an earlier agent
+of the same family already wrote. S1 carries the run's RUN_UUID, so the
+walk starts cold every run: prefixes are shared between the agents of one
+run, not across reruns.
+
+`report` compares those expectations with the subagent JSONLs via
+token-count.py's first-turn fields. Actual first-turn reads also include the
+runtime's cached system prompt and tool definitions, so a healthy run shows
+actual >= expected; actual well below expected means the shared prefix was
+not reused (launched concurrently before the first write landed, or the
+runtime did not break the cache at the segment boundary).
+
+Spec (JSON):
+    {"run": {"OUTPUT_DIR": ..., "RUN_UUID": ..., "FINDINGS_HELPER": ...,
+             "mode": "review|research", "model": "sonnet"},
+     "project": "markdown", "knowledge": "markdown", "document": "markdown",
+     "slices": "manifest path (optional)", "review_file": "path (optional)",
+     "agents": [{"name": "fd-safety", "subagent_type": "...", "knowledge": "...",
+                 "domain": "...", "overlay": "...", "focus": "...",
+                 "instructions": "..."}]}          # list order = launch order
+
+CLI:
+    python3 _prompt_builder.py build SPEC [--out-dir DIR] [--model M] [--template PATH]
+        writes DIR/prompt-{agent}.md and DIR/prompt-plan.json (printed);
+        DIR defaults to {OUTPUT_DIR}/.prompts
+    python3 _prompt_builder.py report --plan PLAN (--usage AGENT=JSONL ... | --usage-map JSON)
+
+Exit codes:
+    0  ok
+    2  unreadable spec/plan/template or missing run variable
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_SCRIPTS = Path(__file__).resolve().parent
+DEFAULT_TEMPLATE = str(_SCRIPTS.parent / "skills" / "flux-engine" / "references" / "prompt-template.md")
+PLAN_NAME = "prompt-plan.json"
+
+CHARS_PER_TOKEN = 4
+MIN_CACHEABLE_TOKENS = 1024
+MIN_CACHEABLE_TOKENS_HAIKU = 2048
+STATIC_SECTIONS = ("Output Format", "Research Escalation", "Peer Findings Protocol")
+REVIEW_ONLY = {"Peer Findings Protocol"}
+RUN_VARS = ("OUTPUT_DIR", "RUN_UUID", "FINDINGS_HELPER")
+SHARED_SEGMENTS = ("static", "project", "document")
+
+_HEADING = re.compile(r"^## (.+?)\s*(?:\[.*\]|\(.*\))?\s*$")  # "[review only …]", "(Optional)"
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_prompt_builder] {msg % args}", file=sys.stderr)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def min_cacheable(model: str | None) -> int:
+    return MIN_CACHEABLE_TOKENS_HAIKU if model and "haiku" in model.lower() else MIN_CACHEABLE_TOKENS
+
+
+def _sha(*parts: str) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode())
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+# --- template ----------------------------------------------------------------
+
+
+def load_template(path: str = DEFAULT_TEMPLATE) -> dict[str, str]:
+    """Return the template's `## ` sections (title → body) from its fenced block. Raises OSError."""
+    lines = Path(path).read_text().splitlines()
+    fences = [i for i, line in enumerate(lines) if line.strip() == "```"]
+    if len(fences) < 2:
+        raise OSError(f"{path}: no fenced template block")
+    sections: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    for line in lines[fences[0] + 1:fences[-1]]:
+        m = _HEADING.match(line)
+        if m:
+            current = sections.setdefault(m.group(1), [])
+        elif current is not None:
+            current.append(line)
+    out = {}
+    for title, body in sections.items():
+        while body and body[-1].strip() in ("", "---"):
+            body.pop()
+        out[title] = "\n".join(body).strip("\n")
+    return out
+
+
+def static_segment(template: dict[str, str], run: dict[str, Any], mode: str = "review") -> str:
+    """S1: the agent-invariant sections with run variables bound. Raises ValueError."""
+    missing = [v for v in RUN_VARS if not run.get(v)]
+    if missing:
+        raise ValueError(f"missing run variable(s): {', '.join(missing)}")
+    absent = [t for t in STATIC_SECTIONS if t not in template]
+    if absent:
+        raise ValueError(f"template lacks static section(s): {', '.join(absent)}")
+    parts = []
+    for title in STATIC_SECTIONS:
+        if mode == "research" and title in REVIEW_ONLY:
+            continue
+        body = template[title].replace("{agent-name}", "{AGENT_NAME}")
+        for var in RUN_VARS:
+            body = body.replace("{%s}" % var, str(run[var]))
+        parts.append(f"## {title}\n\n{body}")
+    return "\n\n".join(parts)
+
+
+# --- assembly ----------------------------------------------------------------
+
+
+def _section(title: str, body: str | None) -> str:
+    body = (body or "").strip()
+    if not body:
+        return ""
+    return body if body.startswith("## ") else f"## {title}\n\n{body}"
+
+
+def _join(*parts: str) -> str:
+    return "\n\n".join(p for p in parts if p)
+
+
+def review_file_section(agent: str, slices: dict[str, Any] | None, review_file: str | None) -> str:
+    """The per-agent file reference: its slice when sliced, else the shared file."""
+    entry = (slices or {}).get("agents", {}).get(agent)
+    path = (entry or {}).get("file") or review_file or (slices or {}).get("shared_file")
+    if not path:
+        return ""
+    diff = (slices or {}).get("input_type") == "diff"
+    lines = [f"**Review file**: `{path}`", "", "Your FIRST action must be to Read this file using the Read tool."]
+    if entry and entry.get("mode") == "sliced":
+        unit, ask = ("hunks", "Request full hunks: {filename}") if diff else ("sections", "Request full section: {name}")
+        lines += ["", f"This file contains your priority {unit} in full plus one-line summaries of the rest. "
+                      f"If you need full content for a summarized item, note \"{ask}\" in your findings."]
+        if diff:
+            lines += ["", f"[Diff slicing active: {len(entry.get('priority', []))} priority files "
+                          f"({entry.get('priority_lines', 0)} lines), {len(entry.get('context', []))} context files]"]
+    else:
+        lines += ["", f"It contains the full {'diff' if diff else 'document'} under review."]
+    return _section("Review File", "\n".join(lines))
+
+
+@dataclass
+class AgentPrompt:
+    name: str
+    family: str
+    segments: list[tuple[str, str]]
+
+    @property
+    def text(self) -> str:
+        return "".join(body for _, body in self.segments)
+
+
+def assemble(spec: dict[str, Any], template: dict[str, str], slices: dict[str, Any] | None = None) -> list[AgentPrompt]:
+    """Build every agent's prompt as ordered segments. Raises ValueError/KeyError on a bad spec."""
+    run = spec.get("run", {})
+    shared = {
+        "static": static_segment(template, run, run.get("mode", "review")),
+        "project": _join(_section("Review Task", spec.get("project")), _section("Knowledge Context", spec.get("knowledge"))),
+        "document": _section("Document to Review", spec.get("document")),
+    }
+    prompts = []
+    for agent in spec["agents"]:
+        name = agent["name"]
+        findings = f"{run['OUTPUT_DIR']}/{name}.{run['RUN_UUID']}.md"
+        tail = _join(
+            _section("Knowledge Context", agent.get("knowledge")),
+            _section("Domain Context", agent.get("domain")),
+            _section("Overlay Context", agent.get("overlay")),
+            review_file_section(name, slices, spec.get("review_file")),
+            _section("Your Focus Area", agent.get("focus")),
+            _section("Agent Instructions", agent.get("instructions")),
+            f"## Agent Name\n\nYou are `{name}`. Use `{name}` wherever this prompt says `{{AGENT_NAME}}`: "
+            f"write your findings to `{findings}.partial` and rename it to `{findings}` when done.",
+        )
+        # Shared segments end with the separator so each boundary is a stable byte offset.
+        segments = [(seg, shared[seg] + "\n\n") for seg in SHARED_SEGMENTS if shared[seg]]
+        segments.append(("agent", tail + "\n"))
+        family = agent.get("subagent_type") or f"interflux:review:{name}"
+        prompts.append(AgentPrompt(name, family, segments))
+    return prompts
+
+
+# --- breakpoint plan -----------------------------------------------------------
+
+
+def breakpoints(prompt: AgentPrompt, min_tokens: int) -> list[dict[str, Any]]:
+    out, offset, text = [], 0, prompt.text
+    for seg, body in prompt.segments[:-1]:
+        offset += len(body)
+        tokens = estimate_tokens(text[:offset])
+        out.append({"after": seg, "offset": offset, "prefix_tokens": tokens,
+                    "prefix_sha": _sha(prompt.family, text[:offset]), "cacheable": tokens >= min_tokens})
+    return out
+
+
+def plan(prompts: list[AgentPrompt], model: str | None = None,
+         now: float | None = None) -> dict[str, Any]:
+    """Breakpoint plan plus expected first-turn cache reads, walking agents in launch order."""
+    now = time.time() if now is None else now
+    min_tokens = min_cacheable(model)
+    written: set[str] = set()
+    agents: dict[str, Any] = {}
+    for p in prompts:
+        bps = breakpoints(p, min_tokens)
+        cacheable = [bp for bp in bps if bp["cacheable"]]
+        hits = [bp for bp in cacheable if bp["prefix_sha"] in written]
+        read = hits[-1]["prefix_tokens"] if hits else 0
+        total = estimate_tokens(p.text)
+        agents[p.name] = {
+            "family": p.family,
+            "prompt_tokens": total,
+            "segments": [{"name": s, "tokens": estimate_tokens(b), "sha": _sha(b)} for s, b in p.segments],
+            "breakpoints": bps,
+            "expected_cache_read": read,
+            "expected_cache_write": total - read,
+        }
+        written.update(bp["prefix_sha"] for bp in cacheable)
+        _debug("%s: %d tokens, expected read %d", p.name, total, read)
+    expected = sum(a["expected_cache_read"] for a in agents.values())
+    total = sum(a["prompt_tokens"] for a in agents.values())
+    return {
+        "built_at": int(now),
+        "model": model,
+        "min_cacheable_tokens": min_tokens,
+        "launch_order": [p.name for p in prompts],
+        "agents": agents,
+        "totals": {"prompt_tokens": total, "expected_cache_read": expected,
+                   "expected_read_ratio": round(expected / total, 4) if total else 0.0},
+    }
+
+
+def build(spec: dict[str, Any], out_dir: str | None = None, *, model: str | None = None,
+          template_path: str = DEFAULT_TEMPLATE, now: float | None = None) -> dict[str, Any]:
+    """Write prompt-{agent}.md files and the plan; return the plan. Raises OSError/ValueError."""
+    run = spec.get("run", {})
+    out_dir = out_dir or os.path.join(str(run.get("OUTPUT_DIR") or "."), ".prompts")
+    slices = None
+    if spec.get("slices"):
+        with open(spec["slices"]) as fh:
+            slices = json.load(fh)
+    prompts = assemble(spec, load_template(template_path), slices)
+    plan_path = os.path.join(out_dir, PLAN_NAME)
+    doc = plan(prompts, model or run.get("model"), now)
+    os.makedirs(out_dir, exist_ok=True)
+    for p in prompts:
+        path = os.path.join(out_dir, f"prompt-{p.name.split(':')[-1]}.md")
+        with open(path, "w") as fh:
+            fh.write(p.text)
+        doc["agents"][p.name]["file"] = path
+    with open(plan_path, "w") as fh:
+        json.dump(doc, fh, indent=2)
+    return doc
+
+
+# --- report --------------------------------------------------------------------
+
+
+def _token_count() -> Any:
+    spec = importlib.util.spec_from_file_location("token_count", _SCRIPTS / "token-count.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def report(plan_doc: dict[str, Any], usage_paths: dict[str, str]) -> dict[str, Any]:
+    """Expected vs actual first-turn cache reads per agent and for the run."""
+    tc = _token_count()
+    agents: dict[str, Any] = {}
+    expected = actual = 0
+    for name in plan_doc.get("launch_order", []):
+        entry = plan_doc["agents"][name]
+        row: dict[str, Any] = {"expected_cache_read": entry["expected_cache_read"], "actual": None}
+        path = usage_paths.get(name)
+        if path:
+            try:
+                usage = tc.sum_usage(path)
+            except OSError as exc:
+                _debug("%s: %s", name, exc)
+                usage = None
+            if usage and usage.get("_valid_lines"):
+                row["actual"] = {"first_cache_read": usage["first_cache_read"],
+                                 "first_cache_creation": usage["first_cache_creation"],
+                                 "cache_read": usage["cache_read"], "cache_creation": usage["cache_creation"]}
+                row["delta"] = usage["first_cache_read"] - entry["expected_cache_read"]
+                expected += entry["expected_cache_read"]
+                actual += usage["first_cache_read"]
+        agents[name] = row
+    measured = sum(1 for r in agents.values() if r["actual"] is not None)
+    return {
+        "agents": agents,
+        "totals": {"measured_agents": measured, "expected_cache_read": expected,
+                   "actual_first_cache_read": actual,
+                   "hit_ratio": round(actual / expected, 4) if expected else None},
+    }
+
+
+# --- CLI -----------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_prompt_builder", description="Cache-aware agent prompt assembly.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("spec")
+    b.add_argument("--out-dir", default=None)
+    b.add_argument("--model", default=None)
+    b.add_argument("--template", default=DEFAULT_TEMPLATE)
+    r = sub.add_parser("report")
+    r.add_argument("--plan", required=True)
+    r.add_argument("--usage", action="append", default=[], metavar="AGENT=JSONL")
+    r.add_argument("--usage-map", default=None, help="JSON object agent → subagent JSONL path")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.cmd == "build":
+            with open(args.spec) as fh:
+                spec = json.load(fh)
+            doc = build(spec, args.out_dir, model=args.model, template_path=args.template)
+        else:
+            with open(args.plan) as fh:
+                plan_doc = json.load(fh)
+            paths: dict[str, str] = {}
+            if args.usage_map:
+                with open(args.usage_map) as fh:
+                    paths.update(json.load(fh))
+            for item in args.usage:
+                agent, _, path = item.partition("=")
+                paths[agent] = path
+            doc = report(plan_doc, paths)
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"prompt_builder: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""Per-provider token-bucket rate limiter shared with openrouter-dispatch.
+
+flux-backoff.sh reacts to 429s *after* they happen by halving `.dispatch-cap`.
+That is congestion control, not pacing: the request that tripped the limit has
+already been lost, along with its retry tokens. model-registry.yaml already
+declares `providers.<name>.rate_limit` (requests/min), but only the
+openrouter-dispatch MCP server honored it, and only for its own calls.
+
+This module is the proactive half. Each provider gets two token buckets that
+refill continuously:
+
+    requests bucket — capacity `rate_limit` (requests/min), 1 token per dispatch
+    tokens bucket   — capacity `tokens_per_min`, debited by the estimated
+                      prompt+completion tokens of the dispatch
+
+A dispatch is admitted only when BOTH buckets can pay. Otherwise the caller
+sleeps for exactly the refill time needed and retries, so dispatches are paced
+under the provider limit instead of tripping it.
+
+Shared state: the buckets live in `${INTERFLUX_STATE_DIR:-~/.config/interflux}/
+<provider>-state.json`, guarded by the same O_EXCL `<state>.lock` protocol the
+MCP server uses (30s wait, 25ms poll, 60s stale-break). For `openrouter` this
+is the MCP server's own state file, so `flux-dispatch.sh acquire` and
+`review_with_model` draw from one budget. Unknown keys (the MCP spend ledger's
+`cumulativeSpendUsd`) are preserved on every write.
+
+Persisted keys (camelCase to match mcp-servers/openrouter-dispatch/index.ts):
+    tokenBucket — requests bucket (historical name, predates the tokens bucket)
+    tpmBucket   — tokens bucket; may go negative after an under-estimate is
+                  settled, which delays later admissions (debt, floored at -cap)
+    lastRefill  — epoch milliseconds of the last refill of both buckets
+
+Limits (env > model-registry.yaml > unlimited):
+    <PROVIDER>_RATE_LIMIT      / providers.<p>.rate_limit      requests/min
+    <PROVIDER>_TOKENS_PER_MIN  / providers.<p>.tokens_per_min  tokens/min
+A missing or non-positive limit disables that bucket; a provider with neither
+is unlimited and `acquire` returns immediately without touching the state file.
+
+CLI (used by flux-dispatch.sh acquire):
+    python3 _rate_limit.py acquire <provider> [--tokens N] [--timeout S]
+    python3 _rate_limit.py settle  <provider> --estimated N --actual M
+    python3 _rate_limit.py status  <provider>
+
+Exit codes:
+    0  admitted / settled / status printed
+    1  acquire timed out before both buckets could pay
+    2  model registry unparseable
+    4  invalid invocation
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lib_registry import load_materialized  # noqa: E402
+
+_PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_REGISTRY = str(_PLUGIN_ROOT / "config" / "flux-drive" / "model-registry.yaml")
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser("~"), ".config", "interflux")
+
+# Lock protocol constants — must match openrouter-dispatch/index.ts.
+LOCK_WAIT_S = 30.0
+LOCK_POLL_S = 0.025
+LOCK_STALE_S = 60.0
+
+DEFAULT_ACQUIRE_TIMEOUT = 600.0  # matches flux-dispatch.sh DEFAULT_TIMEOUT
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_rate_limit] {msg % args}", file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """Per-minute limits for one provider. 0 disables the corresponding bucket."""
+
+    requests_per_min: float = 0.0
+    tokens_per_min: float = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_min > 0 or self.tokens_per_min > 0
+
+
+def _positive(value: Any) -> float:
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return n if n > 0 else 0.0
+
+
+def load_limits(
+    provider: str,
+    registry_path: str | None = None,
+    env: dict[str, str] | None = None,
+) -> ProviderLimits:
+    """Resolve a provider's limits: env override, then registry, then unlimited.
+
+    A missing registry file is not an error (unlimited). An unparseable one
+    raises — silently dispatching unpaced would hide the misconfiguration.
+    """
+    env = os.environ if env is None else env
+    path = registry_path or env.get("MODEL_REGISTRY") or DEFAULT_REGISTRY
+    node: dict[str, Any] = {}
+    if os.path.isfile(path):
+        reg = load_materialized(path)
+        providers = reg.get("providers") or {}
+        if isinstance(providers, dict) and isinstance(providers.get(provider), dict):
+            node = providers[provider]
+
+    prefix = provider.upper().replace("-", "_")
+    rpm = _positive(env.get(f"{prefix}_RATE_LIMIT")) or _positive(node.get("rate_limit"))
+    tpm = _positive(env.get(f"{prefix}_TOKENS_PER_MIN")) or _positive(node.get("tokens_per_min"))
+    return ProviderLimits(requests_per_min=rpm, tokens_per_min=tpm)
+
+
+def state_path(provider: str, state_dir: str | None = None) -> str:
+    """Canonical shared state file for a provider."""
+    base = state_dir or os.environ.get("INTERFLUX_STATE_DIR") or DEFAULT_STATE_DIR
+    return os.path.join(base, f"{provider}-state.json")
+
+
+# --- bucket arithmetic (pure; mirrored in dispatch-core.ts) -----------------
+
+
+def refill(state: dict[str, Any], limits: ProviderLimits, now_ms: float) -> None:
+    """Refill both buckets for the time elapsed since `lastRefill`.
+
+    Missing keys start full — a fresh state file must not make the first
+    dispatch of a run wait a whole minute.
+    """
+    last = state.get("lastRefill")
+    elapsed = max(0.0, now_ms - last) if isinstance(last, (int, float)) else 0.0
+    if limits.requests_per_min > 0:
+        cap = limits.requests_per_min
+        cur = state.get("tokenBucket")
+        cur = cap if not isinstance(cur, (int, float)) else min(cap, cur)
+        state["tokenBucket"] = min(cap, cur + elapsed * cap / 60000.0)
+    if limits.tokens_per_min > 0:
+        cap = limits.tokens_per_min
+        cur = state.get("tpmBucket")
+        cur = cap if not isinstance(cur, (int, float)) else min(cap, cur)
+        state["tpmBucket"] = min(cap, cur + elapsed * cap / 60000.0)
+    state["lastRefill"] = now_ms
+
+
+def try_take(
+    state: dict[str, Any], limits: ProviderLimits, tokens: float, now_ms: float
+) -> float:
+    """Refill, then debit one request and `tokens` tokens if both buckets can pay.
+
+    Returns 0.0 when admitted (buckets debited), otherwise the seconds until
+    both buckets will have refilled enough (buckets untouched). A dispatch
+    larger than the whole per-minute token budget is clamped to the capacity so
+    it is admitted once the bucket is full rather than never.
+    """
+    refill(state, limits, now_ms)
+    wait_ms = 0.0
+    if limits.requests_per_min > 0:
+        deficit = 1.0 - state["tokenBucket"]
+        if deficit > 0:
+            wait_ms = max(wait_ms, deficit * 60000.0 / limits.requests_per_min)
+    need = 0.0
+    if limits.tokens_per_min > 0:
+        need = min(max(0.0, tokens), limits.tokens_per_min)
+        deficit = need - state["tpmBucket"]
+        if deficit > 0:
+            wait_ms = max(wait_ms, deficit * 60000.0 / limits.tokens_per_min)
+    if wait_ms > 0:
+        return wait_ms / 1000.0
+    if limits.requests_per_min > 0:
+        state["tokenBucket"] -= 1.0
+    if limits.tokens_per_min > 0:
+        state["tpmBucket"] -= need
+    return 0.0
+
+
+def settle_tokens(
+    state: dict[str, Any], limits: ProviderLimits, estimated: float, actual: float
+) -> None:
+    """Correct the tokens bucket once a dispatch's real usage is known.
+
+    An over-estimate is refunded; an under-estimate becomes debt (negative
+    bucket, floored at -capacity) that delays later admissions. `estimated`
+    is clamped to the capacity exactly as try_take clamped the debit, so a
+    dispatch larger than the per-minute budget cannot refund more than it paid.
+    """
+    if limits.tokens_per_min <= 0:
+        return
+    cap = limits.tokens_per_min
+    cur = state.get("tpmBucket")
+    cur = cap if not isinstance(cur, (int, float)) else cur
+    debited = min(max(0.0, estimated), cap)
+    state["tpmBucket"] = max(-cap, min(cap, cur + debited - max(0.0, actual)))
+
+
+# --- shared state file ------------------------------------------------------
+
+
+@contextmanager
+def _state_lock(path: str) -> Iterator[None]:
+    """O_EXCL lockfile compatible with openrouter-dispatch's acquireLock()."""
+    lock = f"{path}.lock"
+    deadline = time.monotonic() + LOCK_WAIT_S
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock).st_mtime > LOCK_STALE_S:
+                    os.unlink(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{lock}: lock wait exceeded {LOCK_WAIT_S:.0f}s")
+            time.sleep(LOCK_POLL_S)
+            continue
+        with os.fdopen(fd, "w") as fh:
+            fh.write(f"{os.getpid()}\n{int(time.time() * 1000)}\n")
+        break
+    try:
+        yield
+    finally:
+        try:
+            os.unlink(lock)
+        except FileNotFoundError:
+            pass
+
+
+def _load_state(path: str) -> dict[str, Any]:
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as exc:
+        _debug("state: %s unreadable, starting fresh: %s", path, exc)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_state(path: str, state: dict[str, Any]) -> None:
+    state["updatedAt"] = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+    tmp = f"{path}.tmp.{os.getpid()}"
+    fd = os.open(tmp, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+    with os.fdopen(fd, "w") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked_state(path: str) -> Iterator[dict[str, Any]]:
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    with _state_lock(path):
+        state = _load_state(path)
+        yield state
+        _save_state(path, state)
+
+
+# --- public operations ------------------------------------------------------
+
+
+def acquire(
+    provider: str,
+    tokens: float = 0.0,
+    *,
+    timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+    limits: ProviderLimits | None = None,
+    state_dir: str | None = None,
+) -> tuple[bool, float]:
+    """Block until the provider's buckets admit one dispatch of `tokens` tokens.
+
+    Returns (admitted, seconds_waited). Sleeps only for the computed refill
+    time (capped by the remaining timeout), never a fixed poll interval.
+    """
+    limits = limits if limits is not None else load_limits(provider)
+    if not limits.enabled:
+        return True, 0.0
+    path = state_path(provider, state_dir)
+    start = time.monotonic()
+    deadline = start + max(0.0, timeout)
+    while True:
+        with _locked_state(path) as state:
+            wait = try_take(state, limits, tokens, time.time() * 1000.0)
+        if wait <= 0:
+            return True, time.monotonic() - start
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False, time.monotonic() - start
+        time.sleep(min(wait, remaining))
+
+
+def settle(
+    provider: str,
+    estimated: float,
+    actual: float,
+    *,
+    limits: ProviderLimits | None = None,
+    state_dir: str | None = None,
+) -> None:
+    """Apply settle_tokens() to the shared state under the lock."""
+    limits = limits if limits is not None else load_limits(provider)
+    if limits.tokens_per_min <= 0:
+        return
+    with _locked_state(state_path(provider, state_dir)) as state:
+        refill(state, limits, time.time() * 1000.0)
+        settle_tokens(state, limits, estimated, actual)
+
+
+def status(
+    provider: str,
+    *,
+    limits: ProviderLimits | None = None,
+    state_dir: str | None = None,
+) -> dict[str, Any]:
+    """Current (refilled, not persisted) bucket levels for inspection."""
+    limits = limits if limits is not None else load_limits(provider)
+    path = state_path(provider, state_dir)
+    state = _load_state(path)
+    refill(state, limits, time.time() * 1000.0)
+    return {
+        "provider": provider,
+        "requests_per_min": limits.requests_per_min,
+        "tokens_per_min": limits.tokens_per_min,
+        "requests_available": state.get("tokenBucket"),
+        "tokens_available": state.get("tpmBucket"),
+        "state_file": path,
+    }
+
+
+# --- CLI ------------------------------------------------------------------
+
+
+def _cli_acquire(args: argparse.Namespace) -> int:
+    admitted, waited = acquire(args.provider, args.tokens, timeout=args.timeout)
+    if not admitted:
+        print(f"timeout {waited:.2f}", file=sys.stderr)
+        return 1
+    print(f"ok {waited:.2f}")
+    return 0
+
+
+def _cli_settle(args: argparse.Namespace) -> int:
+    settle(args.provider, args.estimated, args.actual)
+    print("ok")
+    return 0
+
+
+def _cli_status(args: argparse.Namespace) -> int:
+    print(json.dumps(status(args.provider), sort_keys=True))
+    return 0
+
+
+def _non_negative(value: str) -> float:
+    n = float(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return n
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="_rate_limit",
+        description="Per-provider requests/min + tokens/min token-bucket limiter.",
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    acq = sub.add_parser("acquire", help="Block until one dispatch is admitted")
+    acq.add_argument("provider")
+    acq.add_argument("--tokens", type=_non_negative, default=0.0,
+                     help="Estimated prompt+completion tokens for this dispatch")
+    acq.add_argument("--timeout", type=_non_negative, default=DEFAULT_ACQUIRE_TIMEOUT)
+    acq.set_defaults(func=_cli_acquire)
+
+    st = sub.add_parser("settle", help="Refund/debit tokens once actual usage is known")
+    st.add_argument("provider")
+    st.add_argument("--estimated", type=_non_negative, required=True)
+    st.add_argument("--actual", type=_non_negative, required=True)
+    st.set_defaults(func=_cli_settle)
+
+    stat = sub.add_parser("status", help="Print current bucket levels as JSON")
+    stat.add_argument("provider")
+    stat.set_defaults(func=_cli_status)
+
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as exc:
+        return 4 if exc.code else 0
+    try:
+        return args.func(args)
+    except (yaml.YAMLError, ValueError) as exc:
+        print(f"_rate_limit: registry parse error: {exc}", file=sys.stderr)
+        return 2
+    except TimeoutError as exc:
+        print(f"_rate_limit: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,720 @@
+"""Deterministic content slicer for phases/slicing.md.
+
+Diff and document slicing used to be carried out in prose by the
+orchestrating model: it read the routing tables in slicing.md, classified
+every file/section per agent, and wrote the per-agent temp files by hand.
+That spent orchestrator tokens and two runs over the same input could route
+differently. This module does the same work mechanically:
+
+* **Routing is read from slicing.md itself** — the `#### <agent>` blocks
+  (Priority file patterns, Priority hunk keywords), the ship-class patterns,
+  the cross-cutting table and the section-heading keyword table — so the
+  doc stays the single source of truth ("Extending Routing Patterns" keeps
+  working without touching code).
+* **One parse, one index.** The input is split once into diff hunks (or
+  `## ` sections). Each agent's file globs compile to a single anchored
+  regex, and hunk keywords are resolved into an inverted index (keyword →
+  hunks containing it) by scanning the lowered diff text with `str.find`,
+  skipping to the next hunk after each hit — so each keyword costs one pass
+  over the input regardless of how many agents share it.
+* **slicing.md thresholds** apply as written: cross-cutting agents get full
+  content; ≥ 80% priority coverage sends full content; zero priority items
+  fall back to full content (with a warning); sections mentioning
+  auth/credentials/secrets/tokens/certificates are always priority for
+  fd-safety. Agents without routing patterns (cognitive, generated) get
+  full content.
+
+Glob semantics follow the doc: `*` stays within a path segment, `**` spans
+segments, `?` is one character. A pattern also covers everything under a
+directory it matches (gitignore-style), so `**/render*` routes
+`ui/renderer/canvas.ts`.
+
+Output (in --out-dir):
+    flux-drive-{stem}-{ts}.{diff|md}           shared full content
+    flux-drive-{stem}-{ts}-{agent}.{diff|md}   per-agent slices
+    flux-drive-{stem}-{ts}.slices.json         manifest (also printed)
+    flux-drive-{stem}-{ts}.hunks.diff          content-addressed hunk store (diffs)
+
+The manifest carries per-agent mode, file, priority/context items, line
+counts and coverage (priority lines / total lines), the slicing.md
+`section_map`, the ship-class files matched, and `domain_coverage` — the
+fraction of input lines that at least one domain agent reviews in full.
+For diffs, each sliced agent also lists its `chunks` (store ids, in slice
+order) and `prefix_chunks`; `shared_prefix` names the chunks every sliced
+agent starts with and `hunk_store` reports unique vs referenced lines (see
+`layout_chunks`).
+
+CLI:
+    python3 _slicer.py slice INPUT --agents a,b,... [--type auto|diff|document]
+        [--out-dir DIR] [--stem S] [--ts TS] [--routing slicing.md] [--force]
+    python3 _slicer.py routes [--routing slicing.md]     # parsed routing table
+
+Exit codes:
+    0  slices written
+    2  unreadable input or routing doc
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+_PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROUTING = str(_PLUGIN_ROOT / "skills" / "flux-engine" / "phases" / "slicing.md")
+
+DIFF_MIN_LINES = 1000
+DOC_MIN_LINES = 200
+FULL_COVERAGE = 0.8
+SAMPLE_HEAD, SAMPLE_TAIL = 50, 20
+SUMMARY_CHARS = 160
+SAFETY_AGENT = "fd-safety"
+SAFETY_OVERRIDE = re.compile(r"auth|credential|secret|token|certificate", re.IGNORECASE)
+
+_BACKTICKS = re.compile(r"`([^`]+)`")
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+# --- routing -----------------------------------------------------------------
+
+
+def glob_to_regex(pattern: str) -> str:
+    """slicing.md glob → regex fragment (unanchored)."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def compile_globs(patterns: Iterable[str]) -> re.Pattern[str] | None:
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    body = "|".join(f"(?:{glob_to_regex(p)})" for p in patterns)
+    return re.compile(f"(?:{body})(?:/.*)?")
+
+
+def _word_regex(keywords: Iterable[str]) -> re.Pattern[str] | None:
+    # Short keywords (UX, AI, CLI) must be whole words; longer ones match as
+    # a word prefix so "deploy" covers "deployment".
+    parts = [rf"\b{re.escape(k.lower())}\b" if len(k) <= 3 else rf"\b{re.escape(k.lower())}"
+             for k in keywords]
+    return re.compile("|".join(parts)) if parts else None
+
+
+@dataclass
+class AgentRoute:
+    name: str
+    file_patterns: list[str] = field(default_factory=list)
+    hunk_keywords: list[str] = field(default_factory=list)
+    heading_keywords: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.file_regex = compile_globs(self.file_patterns)
+        self.heading_regex = _word_regex(self.heading_keywords)
+        self._each = [(p, compile_globs([p])) for p in self.file_patterns]
+
+    def file_reason(self, path: str) -> str | None:
+        """The first glob routing `path` to this agent, if any."""
+        if self.file_regex is None or not self.file_regex.fullmatch(path):
+            return None
+        return next((p for p, rx in self._each if rx.fullmatch(path)), None)
+
+
+@dataclass
+class Routing:
+    agents: dict[str, AgentRoute]
+    cross_cutting: frozenset[str]
+    ship_class: list[str]
+
+    def __post_init__(self) -> None:
+        self.ship_regex = compile_globs(self.ship_class)
+
+    def route(self, agent: str) -> AgentRoute | None:
+        return self.agents.get(agent.split(":")[-1])
+
+    def is_cross_cutting(self, agent: str) -> bool:
+        return agent.split(":")[-1] in self.cross_cutting
+
+
+def _ticks(line: str) -> list[str]:
+    return _BACKTICKS.findall(line)
+
+
+def load_routing(path: str = DEFAULT_ROUTING) -> Routing:
+    """Parse slicing.md's routing tables. Raises OSError."""
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    files: dict[str, list[str]] = {}
+    keywords: dict[str, list[str]] = {}
+    heading: dict[str, list[str]] = {}
+    cross: set[str] = set()
+    ship: list[str] = []
+    section = current = expect = None
+    for line in lines:
+        stripped = line.strip()
+        if line.startswith("## "):
+            section, current, expect = line[3:].strip(), None, None
+        elif line.startswith("### "):
+            current = None
+            expect = "cross" if line[4:].strip().lower().startswith("cross-cutting") else None
+        elif line.startswith("#### "):
+            current, expect = line[5:].strip(), None
+            files.setdefault(current, [])
+            keywords.setdefault(current, [])
+        elif stripped.startswith("**Priority file patterns"):
+            expect = "files"
+        elif stripped.startswith("**Ship-class file patterns"):
+            expect = "ship"
+        elif stripped.startswith("**Priority hunk keywords"):
+            if current:
+                keywords[current].extend(_ticks(stripped))
+            expect = None
+        elif stripped.startswith("|") and not set(stripped) <= set("|-: "):
+            cells = [c.strip() for c in stripped.strip("|").split("|")]
+            if cells[0] == "Agent":
+                continue
+            if expect == "cross":
+                cross.add(cells[0])
+            elif section == "Document Slicing" and len(cells) == 2:
+                heading[cells[0]] = [k.strip() for k in cells[1].split(",") if k.strip()]
+        elif stripped and expect in ("files", "ship") and current:
+            (files[current] if expect == "files" else ship).extend(_ticks(stripped))
+            expect = None
+    agents = {name: AgentRoute(name, files.get(name, []), keywords.get(name, []), heading.get(name, []))
+              for name in sorted(set(files) | set(heading))}
+    return Routing(agents, frozenset(cross), ship)
+
+
+# --- diff parsing ------------------------------------------------------------
+
+
+@dataclass
+class Hunk:
+    header: str
+    lines: list[str]
+    added: int
+    removed: int
+
+
+@dataclass
+class FileDiff:
+    path: str
+    header: list[str]
+    hunks: list[Hunk] = field(default_factory=list)
+    binary: bool = False
+
+    @property
+    def added(self) -> int:
+        return sum(h.added for h in self.hunks)
+
+    @property
+    def removed(self) -> int:
+        return sum(h.removed for h in self.hunks)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.header) + sum(1 + len(h.lines) for h in self.hunks)
+
+
+def _path_from_header(line: str) -> str:
+    # "diff --git a/x b/x" → x; "+++ b/x" → x
+    if line.startswith("diff --git "):
+        parts = line.split(" b/", 1)
+        return parts[1] if len(parts) == 2 else line.split()[-1]
+    path = line[4:].split("\t", 1)[0]
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def parse_diff(text: str) -> list[FileDiff]:
+    """Split a unified diff into files and hunks. Identical hunks are kept once."""
+    lines = text.splitlines()
+    git_style = any(line.startswith("diff --git ") for line in lines)
+    files: dict[str, FileDiff] = {}
+    seen: set[tuple[str, str, tuple[str, ...]]] = set()
+    current: FileDiff | None = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        starts_file = (line.startswith("diff --git ") if git_style
+                       else line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "))
+        if starts_file:
+            path = _path_from_header(line if git_style else lines[i + 1])
+            if path == "/dev/null":
+                path = _path_from_header(line)
+            current = files.get(path) or FileDiff(path, [])
+            files[path] = current
+            if not current.header:
+                current.header.append(line)
+            i += 1
+            continue
+        if current is None:
+            i += 1
+            continue
+        m = _HUNK_HEADER.match(line)
+        if not m:
+            if line.startswith("Binary files") or line.startswith("GIT binary patch"):
+                current.binary = True
+            if not current.hunks and line not in current.header:
+                current.header.append(line)
+            i += 1
+            continue
+        old_left = int(m.group(1) or 1)
+        new_left = int(m.group(2) or 1)
+        body: list[str] = []
+        added = removed = 0
+        i += 1
+        while i < len(lines) and (old_left > 0 or new_left > 0):
+            row = lines[i]
+            tag = row[:1]
+            if tag == "+":
+                new_left -= 1
+                added += 1
+            elif tag == "-":
+                old_left -= 1
+                removed += 1
+            elif tag == "\\":
+                pass
+            else:  # context (a blank context line may have lost its leading space)
+                old_left -= 1
+                new_left -= 1
+            body.append(row)
+            i += 1
+        while i < len(lines) and lines[i].startswith("\\"):
+            body.append(lines[i])
+            i += 1
+        key = (current.path, line, tuple(body))
+        if key in seen:
+            continue
+        seen.add(key)
+        current.hunks.append(Hunk(line, body, added, removed))
+    return list(files.values())
+
+
+def keyword_index(files: list[FileDiff], keywords: Iterable[str]) -> dict[str, set[int]]:
+    """Inverted index: keyword → ids of hunks containing it (case-insensitive).
+
+    Hunk ids are positions in the flattened (file, hunk) order.
+    """
+    chunks = []
+    starts = []
+    pos = 0
+    for f in files:
+        for h in f.hunks:
+            text = "\n".join(h.lines).lower()
+            starts.append(pos)
+            chunks.append(text)
+            pos += len(text) + 2
+    haystack = "\n\0".join(chunks)
+    ends = [s + len(c) for s, c in zip(starts, chunks)]
+    index: dict[str, set[int]] = {}
+    for kw in set(keywords):
+        needle = kw.lower()
+        hits: set[int] = set()
+        at = haystack.find(needle)
+        while at != -1:
+            hunk = bisect.bisect_right(starts, at) - 1
+            hits.add(hunk)
+            at = haystack.find(needle, ends[hunk] + 1)
+        if hits:
+            index[kw] = hits
+    return index
+
+
+# --- documents ---------------------------------------------------------------
+
+
+@dataclass
+class Section:
+    title: str
+    lines: list[str]
+
+    def summary(self) -> str:
+        for line in self.lines[1:]:
+            text = line.strip().lstrip("#>-*| ").strip()
+            if text and not text.startswith("```"):
+                sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+                return sentence if len(sentence) <= SUMMARY_CHARS else sentence[:SUMMARY_CHARS - 1] + "…"
+        return ""
+
+
+def parse_document(text: str) -> tuple[list[str], list[Section]]:
+    """(preamble lines, `## ` sections)."""
+    preamble: list[str] = []
+    sections: list[Section] = []
+    fence = False
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            fence = not fence
+        if not fence and line.startswith("## "):
+            sections.append(Section(line[3:].strip(), [line]))
+        elif sections:
+            sections[-1].lines.append(line)
+        else:
+            preamble.append(line)
+    return preamble, sections
+
+
+# --- slicing -----------------------------------------------------------------
+
+
+@dataclass
+class AgentSlice:
+    agent: str
+    mode: str
+    priority: list[str] = field(default_factory=list)
+    context: list[str] = field(default_factory=list)
+    reasons: dict[str, str] = field(default_factory=dict)
+    priority_lines: int = 0
+    lines_reviewed: int = 0
+    body: list[str] | None = None
+    file: str = ""
+    hunks: list[int] = field(default_factory=list)
+    summary: list[str] = field(default_factory=list)
+    chunks: list[str] = field(default_factory=list)
+    prefix_chunks: int = 0
+
+    def manifest(self, total: int) -> dict[str, Any]:
+        doc = {"mode": self.mode, "file": self.file, "priority": self.priority,
+               "context": self.context, "reasons": self.reasons,
+               "priority_lines": self.priority_lines, "lines_reviewed": self.lines_reviewed,
+               "coverage": round(self.priority_lines / total, 4) if total else 1.0}
+        if self.chunks:
+            doc["chunks"] = self.chunks
+            doc["prefix_chunks"] = self.prefix_chunks
+        return doc
+
+
+def _full(agent: str, mode: str, total: int) -> AgentSlice:
+    return AgentSlice(agent, mode, priority_lines=total, lines_reviewed=total)
+
+
+def _finish(s: AgentSlice, total: int) -> AgentSlice:
+    """Apply the zero-priority and 80% overlap rules."""
+    if not s.priority:
+        print(f"slicer: {s.agent} has zero priority items; sending full content", file=sys.stderr)
+        return _full(s.agent, "full (zero-priority fallback)", total)
+    if total and s.priority_lines / total >= FULL_COVERAGE:
+        full = _full(s.agent, "full (>= 80% priority)", total)
+        full.priority, full.reasons = s.priority, s.reasons
+        return full
+    return s
+
+
+def slice_diff(files: list[FileDiff], agents: list[str], routing: Routing) -> tuple[dict[str, AgentSlice], set[int]]:
+    total = sum(f.line_count for f in files)
+    all_keywords = [k for a in agents if (r := routing.route(a)) for k in r.hunk_keywords]
+    index = keyword_index(files, all_keywords)
+    spans = []
+    hid = 0
+    for f in files:
+        spans.append(range(hid, hid + len(f.hunks)))
+        hid += len(f.hunks)
+    out: dict[str, AgentSlice] = {}
+    covered: set[int] = set()
+    for agent in agents:
+        route = routing.route(agent)
+        if routing.is_cross_cutting(agent):
+            out[agent] = _full(agent, "full (cross-cutting)", total)
+            continue
+        if route is None or not (route.file_patterns or route.hunk_keywords):
+            out[agent] = _full(agent, "full (no routing patterns)", total)
+            continue
+        hunk_reason: dict[int, str] = {}
+        for kw in route.hunk_keywords:
+            for h in index.get(kw, ()):
+                hunk_reason.setdefault(h, f"keyword:{kw}")
+        s = AgentSlice(agent, "sliced")
+        for f, span in zip(files, spans):
+            glob = route.file_reason(f.path)
+            if f.binary:
+                glob = None
+            picked = [h for h in span if glob or h in hunk_reason]
+            if not picked:
+                s.context.append(f.path)
+                s.summary.append(f"[context] {f.path}: +{f.added} -{f.removed}")
+                continue
+            s.priority.append(f.path)
+            s.reasons[f.path] = f"glob:{glob}" if glob else hunk_reason[picked[0]]
+            s.hunks.extend(picked)
+            s.priority_lines += len(f.header) + sum(1 + len(f.hunks[h - span.start].lines) for h in picked)
+            omitted = [f.hunks[h - span.start] for h in span if h not in picked]
+            if omitted:
+                s.summary.append(f"[context] {f.path}: +{sum(o.added for o in omitted)} "
+                                 f"-{sum(o.removed for o in omitted)}")
+        out[agent] = _finish(s, total)
+        if out[agent].mode == "sliced" or out[agent].mode.startswith("full (>="):
+            priority = set(out[agent].priority)
+            covered.update(i for i, f in enumerate(files) if f.path in priority)
+    return out, covered
+
+
+def layout_chunks(files: list[FileDiff], slices: dict[str, AgentSlice]) -> dict[str, list[str]]:
+    """Content-address the sliced hunks and order every slice shared-first.
+
+    Each priority hunk becomes a self-contained chunk (file header + hunk),
+    keyed by the first 16 hex digits of its SHA-256. A slice lists chunks by
+    descending number of sliced agents that include them, then input order,
+    so the chunks every sliced agent shares form an identical leading prefix
+    in each slice — prompt caching can reuse it across agents — and each
+    agent's own chunks follow. Context summaries close the slice. Sets each
+    sliced agent's `body`, `chunks`, `prefix_chunks` and `lines_reviewed`;
+    returns the store (chunk id → lines).
+    """
+    sliced = [s for s in slices.values() if s.mode == "sliced"]
+    owners: dict[int, int] = {}
+    for s in sliced:
+        for h in s.hunks:
+            owners[h] = owners.get(h, 0) + 1
+    located: dict[int, tuple[FileDiff, Hunk]] = {}
+    hid = 0
+    for f in files:
+        for hunk in f.hunks:
+            if hid in owners:
+                located[hid] = (f, hunk)
+            hid += 1
+    store: dict[str, list[str]] = {}
+    ids: dict[int, str] = {}
+    for h in sorted(owners):
+        f, hunk = located[h]
+        lines = [*f.header, hunk.header, *hunk.lines]
+        ids[h] = hashlib.sha256("\n".join(lines).encode()).hexdigest()[:16]
+        store[ids[h]] = lines
+    for s in sliced:
+        order = sorted(s.hunks, key=lambda h: (-owners[h], h))
+        s.chunks = [ids[h] for h in order]
+        s.prefix_chunks = sum(1 for h in order if owners[h] == len(sliced))
+        s.body = [line for h in order for line in store[ids[h]]] + s.summary
+        s.lines_reviewed = len(s.body)
+    return store
+
+
+def slice_document(preamble: list[str], sections: list[Section], agents: list[str],
+                   routing: Routing) -> tuple[dict[str, AgentSlice], set[int]]:
+    total = len(preamble) + sum(len(s.lines) for s in sections)
+    samples = []
+    for sec in sections:
+        body = sec.lines[1:]
+        sample = body if len(body) <= SAMPLE_HEAD + SAMPLE_TAIL else body[:SAMPLE_HEAD] + body[-SAMPLE_TAIL:]
+        samples.append((sec.title.lower(), "\n".join(sample).lower(), "\n".join(sec.lines)))
+    out: dict[str, AgentSlice] = {}
+    covered: set[int] = set()
+    for agent in agents:
+        route = routing.route(agent)
+        if routing.is_cross_cutting(agent):
+            out[agent] = _full(agent, "full (cross-cutting)", total)
+            continue
+        if route is None or route.heading_regex is None:
+            out[agent] = _full(agent, "full (no routing patterns)", total)
+            continue
+        s = AgentSlice(agent, "sliced", body=list(preamble), priority_lines=0)
+        for sec, (title, sample, full_text) in zip(sections, samples):
+            reason = None
+            if (m := route.heading_regex.search(title)):
+                reason = f"heading:{m.group(0)}"
+            elif (m := route.heading_regex.search(sample)):
+                reason = f"body:{m.group(0)}"
+            elif agent.split(":")[-1] == SAFETY_AGENT and (m := SAFETY_OVERRIDE.search(full_text)):
+                reason = f"safety-override:{m.group(0).lower()}"
+            if reason:
+                s.priority.append(sec.title)
+                s.reasons[sec.title] = reason
+                s.priority_lines += len(sec.lines)
+                s.body.extend(sec.lines)
+            else:
+                s.context.append(sec.title)
+                summary = sec.summary()
+                s.body.append(f"- **{sec.title}**: {summary} ({len(sec.lines)} lines)" if summary
+                              else f"- **{sec.title}** ({len(sec.lines)} lines)")
+        s.lines_reviewed = len(s.body)
+        out[agent] = _finish(s, total)
+        if out[agent].mode == "sliced" or out[agent].mode.startswith("full (>="):
+            covered.update(i for i, sec in enumerate(sections) if sec.title in out[agent].priority)
+    return out, covered
+
+
+def write_store(pack_path: str, store: dict[str, list[str]]) -> dict[str, list[int]]:
+    """Write chunks, sorted by id, into one pack file; return id → [offset, length].
+
+    One pack instead of a file per chunk: a large diff has ~1000 chunks and
+    file creation dominated the run.
+    """
+    index: dict[str, list[int]] = {}
+    parts = []
+    offset = 0
+    for cid in sorted(store):
+        blob = ("\n".join(store[cid]) + "\n").encode()
+        index[cid] = [offset, len(blob)]
+        parts.append(blob)
+        offset += len(blob)
+    tmp = f"{pack_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(b"".join(parts))
+    os.replace(tmp, pack_path)
+    return index
+
+
+def read_chunk(pack_path: str, entry: list[int]) -> str:
+    """One chunk's text, given its manifest `hunk_store.index` entry."""
+    with open(pack_path, "rb") as fh:
+        fh.seek(entry[0])
+        return fh.read(entry[1]).decode()
+
+
+def detect_type(path: str, text: str) -> str:
+    if path.endswith((".diff", ".patch")) or text.startswith(("diff --git ", "--- ")):
+        return "diff"
+    return "document"
+
+
+def run(input_path: str, agents: list[str], *, kind: str = "auto", out_dir: str = "/tmp",
+        stem: str | None = None, ts: str | None = None, routing_path: str = DEFAULT_ROUTING,
+        force: bool = False) -> dict[str, Any]:
+    """Slice `input_path` for `agents`, write the files, return the manifest. Raises OSError."""
+    with open(input_path, errors="replace") as fh:
+        text = fh.read()
+    routing = load_routing(routing_path)
+    kind = detect_type(input_path, text) if kind == "auto" else kind
+    stem = stem or Path(input_path).stem
+    ts = ts or str(int(time.time()))
+    ext = "diff" if kind == "diff" else "md"
+    base = os.path.join(out_dir, f"flux-drive-{stem}-{ts}")
+    shared = f"{base}.{ext}"
+    os.makedirs(out_dir, exist_ok=True)
+
+    ship: list[str] = []
+    if kind == "diff":
+        files = parse_diff(text)
+        total = sum(f.line_count for f in files)
+        threshold = DIFF_MIN_LINES
+        if routing.ship_regex is not None:
+            ship = [f.path for f in files if routing.ship_regex.fullmatch(f.path)]
+    else:
+        preamble, sections = parse_document(text)
+        total = len(preamble) + sum(len(s.lines) for s in sections)
+        threshold = DOC_MIN_LINES
+        if routing.ship_regex is not None and routing.ship_regex.fullmatch(input_path.removeprefix("./")):
+            ship = [input_path]
+
+    store: dict[str, list[str]] = {}
+    active = force or total >= threshold
+    if not active:
+        slices = {a: _full(a, "full (below threshold)", total) for a in agents}
+        covered_lines = total
+    elif kind == "diff":
+        slices, covered = slice_diff(files, agents, routing)
+        covered_lines = sum(files[i].line_count for i in covered)
+        store = layout_chunks(files, slices)
+    else:
+        slices, covered = slice_document(preamble, sections, agents, routing)
+        covered_lines = len(preamble) + sum(len(sections[i].lines) for i in covered)
+
+    with open(shared, "w") as fh:
+        fh.write(text)
+    pack_index: dict[str, list[int]] = {}
+    if store:
+        pack_index = write_store(f"{base}.hunks.{ext}", store)
+    section_map: dict[str, Any] = {}
+    for agent, s in slices.items():
+        if s.mode == "sliced" and s.body is not None:
+            s.file = f"{base}-{agent.split(':')[-1]}.{ext}"
+            with open(s.file, "w") as fh:
+                fh.write("\n".join(s.body) + "\n")
+            section_map[agent] = {"priority": s.priority, "context": s.context}
+        else:
+            s.file = shared
+            section_map[agent] = {"mode": "full"}
+
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "input_type": kind,
+        "total_lines": total,
+        "sliced": active,
+        "threshold": threshold,
+        "shared_file": shared,
+        "ship_class": ship,
+        "domain_coverage": round(covered_lines / total, 4) if total else 1.0,
+        "agents": {a: s.manifest(total) for a, s in slices.items()},
+        "section_map": section_map,
+    }
+    if store:
+        sliced = [s for s in slices.values() if s.mode == "sliced"]
+        prefix = sliced[0].chunks[:sliced[0].prefix_chunks] if sliced else []
+        manifest["hunk_store"] = {
+            "pack": f"{base}.hunks.{ext}",
+            "index": pack_index,
+            "chunks": len(store),
+            "lines": sum(len(v) for v in store.values()),
+            "refs": sum(len(s.chunks) for s in sliced),
+            "ref_lines": sum(len(store[c]) for s in sliced for c in s.chunks),
+        }
+        manifest["shared_prefix"] = {"chunks": prefix, "lines": sum(len(store[c]) for c in prefix)}
+    with open(f"{base}.slices.json", "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="_slicer", description="Per-agent diff/document slicing.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("slice")
+    p.add_argument("input")
+    p.add_argument("--agents", required=True, help="comma-separated agent names")
+    p.add_argument("--type", choices=("auto", "diff", "document"), default="auto")
+    p.add_argument("--out-dir", default="/tmp")
+    p.add_argument("--stem", default=None, help="INPUT_STEM (default: input file stem)")
+    p.add_argument("--ts", default=None, help="run timestamp shared by all temp files")
+    p.add_argument("--routing", default=DEFAULT_ROUTING)
+    p.add_argument("--force", action="store_true", help="slice below the size thresholds")
+    r = sub.add_parser("routes")
+    r.add_argument("--routing", default=DEFAULT_ROUTING)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.cmd == "routes":
+            routing = load_routing(args.routing)
+            doc: Any = {
+                "cross_cutting": sorted(routing.cross_cutting),
+                "ship_class": routing.ship_class,
+                "agents": {n: {"file_patterns": a.file_patterns, "hunk_keywords": a.hunk_keywords,
+                               "heading_keywords": a.heading_keywords}
+                           for n, a in sorted(routing.agents.items())},
+            }
+        else:
+            agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+            doc = run(args.input, agents, kind=args.type, out_dir=args.out_dir, stem=args.stem,
+                      ts=args.ts, routing_path=args.routing, force=args.force)
+    except OSError as exc:
+        print(f"slicer: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(doc, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
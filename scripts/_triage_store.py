@@ -0,0 +1,483 @@
+"""Indexed triage-log store: daily per-agent rollups over triage.jsonl.
+
+`.clavain/interflux/triage.jsonl` grows forever, and triage-stats.py used to
+re-read and re-parse all of it for every query, keeping every score in a
+list. This module maintains a SQLite database beside the log
+(`triage.db`, stdlib sqlite3) that makes a `--days=N` query cost O(N days)
+with constant memory:
+
+* **Incremental ingest.** The store remembers the log's inode and the byte
+  offset of the last complete line ingested. Each call parses only the bytes
+  appended since (a torn final line is left for next time). A truncated or
+  replaced log (new inode, or size below the offset) triggers a rebuild.
+* **Daily rollups** keyed by (UTC day, agent, input_stem): runs, selected,
+  n/sum/sumsq of final_score and quality_signal_adjust, a skip-reason
+  histogram, and the distinct run ids — everything triage-stats reports.
+* **Byte-offset day index.** For each day and source (the live log, or a
+  rotated segment), the [start, end) byte range that holds its entries. A
+  window's cutoff falls mid-day, so that one boundary day is re-scanned from
+  the raw log (only its byte ranges) and filtered by exact timestamp. Every
+  other day comes from the rollups, which makes the result identical to a
+  full scan.
+* **Rotation-aware.** Offsets are positions in the logical log — rotated
+  gzip segments (see _log_segments.py) followed by the live file. The store
+  records which segment sequence it has absorbed; `note_rotation` (called by
+  `_log_segments.py rotate` under the log lock) carries the index across a
+  rotation, and a rotation it missed triggers a rebuild from the segments.
+
+Each rollup also keeps the logical offset of its first entry. Ordering by it
+reproduces the full scan's first-seen order, which breaks ties between
+agents and between skip reasons.
+
+Public API:
+    open_store(db_path) -> sqlite3.Connection
+    ingest(conn, log_path) -> int                      # lines ingested
+    query(conn, log_path, cutoff, input_stem) -> Summary
+    note_rotation(conn, log_path, segment, inode) -> bool
+    Summary / AgentStats — also used by triage-stats.py's --no-index path
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _log_segments  # noqa: E402
+
+SCHEMA_VERSION = 2
+DB_FILENAME = "triage.db"
+# Flush pending rollups to SQLite every N ingested lines (bounds ingest memory).
+FLUSH_EVERY = 50_000
+
+
+def _debug(msg: str, *args: Any) -> None:
+    if os.environ.get("INTERFLUX_DEBUG"):
+        print(f"[_triage_store] {msg % args}", file=sys.stderr)
+
+
+def parse_iso(ts: str) -> datetime | None:
+    try:
+        return datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=timezone.utc)
+    except (ValueError, AttributeError):
+        return None
+
+
+def skip_reason_key(reason: str) -> str:
+    """Coarse-grain a skip reason for histogram purposes."""
+    return reason.split(":")[0].split(" 0")[0].strip()[:60]
+
+
+def _agent_of(e: dict) -> str | None:
+    agent = e.get("agent")
+    if not agent:
+        return None
+    return agent if isinstance(agent, str) else json.dumps(agent, sort_keys=True)
+
+
+def _stem_of(e: dict) -> str:
+    stem = e.get("input_stem")
+    return stem if isinstance(stem, str) else ""
+
+
+# --- aggregation -------------------------------------------------------------
+
+
+@dataclass
+class AgentStats:
+    runs: int = 0
+    selected: int = 0
+    n_final: int = 0
+    sum_final: float = 0.0
+    sumsq_final: float = 0.0
+    n_qsa: int = 0
+    sum_qsa: float = 0.0
+    sumsq_qsa: float = 0.0
+    first_offset: int = sys.maxsize
+    # reason -> [count, first_offset]
+    skip_reasons: dict[str, list[int]] = field(default_factory=dict)
+
+    def add(self, e: dict, offset: int) -> None:
+        self.runs += 1
+        self.first_offset = min(self.first_offset, offset)
+        if e.get("selected"):
+            self.selected += 1
+        fs = e.get("final_score")
+        if isinstance(fs, (int, float)):
+            self.n_final += 1
+            self.sum_final += float(fs)
+            self.sumsq_final += float(fs) ** 2
+        qsa = e.get("quality_signal_adjust")
+        if isinstance(qsa, (int, float)):
+            self.n_qsa += 1
+            self.sum_qsa += float(qsa)
+            self.sumsq_qsa += float(qsa) ** 2
+        reason = e.get("skip_reason") or ""
+        if reason:
+            self.add_reason(skip_reason_key(str(reason)), 1, offset)
+
+    def add_reason(self, key: str, count: int, offset: int) -> None:
+        slot = self.skip_reasons.get(key)
+        if slot is None:
+            self.skip_reasons[key] = [count, offset]
+        else:
+            slot[0] += count
+            slot[1] = min(slot[1], offset)
+
+    def merge(self, other: "AgentStats") -> None:
+        self.runs += other.runs
+        self.selected += other.selected
+        self.n_final += other.n_final
+        self.sum_final += other.sum_final
+        self.sumsq_final += other.sumsq_final
+        self.n_qsa += other.n_qsa
+        self.sum_qsa += other.sum_qsa
+        self.sumsq_qsa += other.sumsq_qsa
+        self.first_offset = min(self.first_offset, other.first_offset)
+        for key, (count, off) in other.skip_reasons.items():
+            self.add_reason(key, count, off)
+
+    @property
+    def avg_final(self) -> float:
+        return self.sum_final / self.n_final if self.n_final else 0
+
+    @property
+    def avg_qsa(self) -> float:
+        return self.sum_qsa / self.n_qsa if self.n_qsa else 0
+
+    def top_skip_reasons(self, k: int = 3) -> list[tuple[str, int]]:
+        ordered = sorted(self.skip_reasons.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        return [(reason, count) for reason, (count, _off) in ordered[:k]]
+
+
+@dataclass
+class Summary:
+    by_agent: dict[str, AgentStats] = field(default_factory=dict)
+    runs_seen: set[str] = field(default_factory=set)
+
+    def add(self, e: dict, offset: int) -> None:
+        agent = _agent_of(e)
+        if agent is None:
+            return
+        run_id = e.get("run_id", "")
+        if run_id:
+            self.runs_seen.add(str(run_id))
+        self.by_agent.setdefault(agent, AgentStats()).add(e, offset)
+
+    def agents_in_order(self) -> list[tuple[str, AgentStats]]:
+        """First-seen order, as a dict built during a full scan would have."""
+        return sorted(self.by_agent.items(), key=lambda kv: kv[1].first_offset)
+
+
+def summarize(entries: Iterable[dict]) -> Summary:
+    """Constant-memory aggregation of an entry stream (offset = stream position)."""
+    s = Summary()
+    for i, e in enumerate(entries):
+        s.add(e, i)
+    return s
+
+
+# --- store -------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT, agent TEXT, stem TEXT,
+    runs INTEGER, selected INTEGER,
+    n_final INTEGER, sum_final REAL, sumsq_final REAL,
+    n_qsa INTEGER, sum_qsa REAL, sumsq_qsa REAL,
+    first_offset INTEGER,
+    PRIMARY KEY (day, agent, stem)
+);
+CREATE TABLE IF NOT EXISTS daily_skip (
+    day TEXT, agent TEXT, stem TEXT, reason TEXT, count INTEGER, first_offset INTEGER,
+    PRIMARY KEY (day, agent, stem, reason)
+);
+CREATE TABLE IF NOT EXISTS daily_runs (
+    day TEXT, stem TEXT, run_id TEXT, PRIMARY KEY (day, stem, run_id)
+);
+CREATE TABLE IF NOT EXISTS day_offsets (
+    day TEXT, source TEXT, start_offset INTEGER, end_offset INTEGER,
+    PRIMARY KEY (day, source)
+);
+"""
+_TABLES = ("meta", "daily", "daily_skip", "daily_runs", "day_offsets")
+
+
+def open_store(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        _debug("schema v%s != v%s, rebuilding %s", version, SCHEMA_VERSION, db_path)
+        for t in _TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {t}")
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    return conn
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: Any) -> None:
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+
+def _clear(conn: sqlite3.Connection) -> None:
+    for t in _TABLES:
+        conn.execute(f"DELETE FROM {t}")
+
+
+class _Pending:
+    """Rollup deltas accumulated in memory between flushes."""
+
+    def __init__(self) -> None:
+        self.daily: dict[tuple[str, str, str], AgentStats] = {}
+        self.runs: set[tuple[str, str, str]] = set()
+        self.offsets: dict[tuple[str, str], list[int]] = {}
+
+    def add(self, day: str, source: str, e: dict, start: int, end: int) -> None:
+        rng = self.offsets.get((day, source))
+        if rng is None:
+            self.offsets[(day, source)] = [start, end]
+        else:
+            rng[0] = min(rng[0], start)
+            rng[1] = max(rng[1], end)
+        agent = _agent_of(e)
+        if agent is None:
+            return
+        stem = _stem_of(e)
+        self.daily.setdefault((day, agent, stem), AgentStats()).add(e, start)
+        run_id = e.get("run_id", "")
+        if run_id:
+            self.runs.add((day, stem, str(run_id)))
+
+    def flush(self, conn: sqlite3.Connection) -> None:
+        conn.executemany(
+            """INSERT INTO daily VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+               ON CONFLICT(day, agent, stem) DO UPDATE SET
+                 runs = runs + excluded.runs, selected = selected + excluded.selected,
+                 n_final = n_final + excluded.n_final,
+                 sum_final = sum_final + excluded.sum_final,
+                 sumsq_final = sumsq_final + excluded.sumsq_final,
+                 n_qsa = n_qsa + excluded.n_qsa, sum_qsa = sum_qsa + excluded.sum_qsa,
+                 sumsq_qsa = sumsq_qsa + excluded.sumsq_qsa,
+                 first_offset = MIN(first_offset, excluded.first_offset)""",
+            [(d, a, s, st.runs, st.selected, st.n_final, st.sum_final, st.sumsq_final,
+              st.n_qsa, st.sum_qsa, st.sumsq_qsa, st.first_offset)
+             for (d, a, s), st in self.daily.items()],
+        )
+        conn.executemany(
+            """INSERT INTO daily_skip VALUES (?,?,?,?,?,?)
+               ON CONFLICT(day, agent, stem, reason) DO UPDATE SET
+                 count = count + excluded.count,
+                 first_offset = MIN(first_offset, excluded.first_offset)""",
+            [(d, a, s, reason, count, off)
+             for (d, a, s), st in self.daily.items()
+             for reason, (count, off) in st.skip_reasons.items()],
+        )
+        conn.executemany("INSERT OR IGNORE INTO daily_runs VALUES (?,?,?)", sorted(self.runs))
+        conn.executemany(
+            """INSERT INTO day_offsets VALUES (?,?,?,?)
+               ON CONFLICT(day, source) DO UPDATE SET
+                 start_offset = MIN(start_offset, excluded.start_offset),
+                 end_offset = MAX(end_offset, excluded.end_offset)""",
+            [(d, src, lo, hi) for (d, src), (lo, hi) in self.offsets.items()],
+        )
+        self.__init__()
+
+
+def _iter_lines(path: str, start: int, end: int | None = None) -> Iterator[tuple[int, int, bytes]]:
+    """(start, end, raw) for each complete line in [start, end)."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        pos = start
+        for raw in fh:
+            if end is not None and pos >= end:
+                return
+            if not raw.endswith(b"\n"):
+                return  # torn tail: a writer is mid-append
+            yield pos, pos + len(raw), raw
+            pos += len(raw)
+
+
+def _decode(raw: bytes) -> dict | None:
+    line = raw.decode("utf-8", errors="replace").strip()
+    if not line:
+        return None
+    try:
+        e = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return e if isinstance(e, dict) else None
+
+
+def _absorb(conn: sqlite3.Connection, lines: Iterable[tuple[int, int, bytes]],
+            source: str) -> tuple[int, int | None]:
+    """Roll up (start, end, raw) lines. Returns (lines read, end of the last one)."""
+    pending = _Pending()
+    n = 0
+    last = None
+    for start, end, raw in lines:
+        last = end
+        n += 1
+        e = _decode(raw)
+        if e is None:
+            continue
+        ts = parse_iso(e.get("ts", ""))
+        if ts is None:
+            continue
+        pending.add(ts.date().isoformat(), source, e, start, end)
+        if n % FLUSH_EVERY == 0:
+            pending.flush(conn)
+    pending.flush(conn)
+    return n, last
+
+
+def _iter_live(log_path: str, base: int, start: int,
+               end: int | None = None) -> Iterator[tuple[int, int, bytes]]:
+    """Live-log lines with logical offsets (live byte 0 sits at `base`)."""
+    local_end = None if end is None else end - base
+    for s, e, raw in _iter_lines(log_path, start - base, local_end):
+        yield s + base, e + base, raw
+
+
+def ingest(conn: sqlite3.Connection, log_path: str) -> int:
+    """Ingest lines appended to `log_path` since the last call. Returns lines read.
+
+    Holds the log's rotation lock so a concurrent `_log_segments.py rotate`
+    cannot move bytes between the stat and the read.
+    """
+    with _log_segments.locked(log_path):
+        return _ingest_locked(conn, log_path)
+
+
+def _ingest_locked(conn: sqlite3.Connection, log_path: str) -> int:
+    segments = _log_segments.load_manifest(log_path)
+    seg_seq = segments[-1].seq if segments else 0
+    base = _log_segments.live_base(segments)
+    try:
+        st: os.stat_result | None = os.stat(log_path)
+    except FileNotFoundError:
+        st = None
+    inode = _get_meta(conn, "inode")
+    offset = int(_get_meta(conn, "offset") or 0)
+    consistent = (int(_get_meta(conn, "seg_seq") or 0) == seg_seq
+                  and int(_get_meta(conn, "base") or 0) == base)
+    if consistent and inode and st is not None:
+        consistent = int(inode) == st.st_ino and st.st_size >= offset
+    if consistent and inode and st is None:
+        consistent = False
+    n = 0
+    with conn:
+        if not consistent:
+            _debug("log rotated, replaced or truncated; rebuilding")
+            _clear(conn)
+            for seg in segments:
+                n += _absorb(conn, _log_segments.iter_segment(log_path, seg), seg.file)[0]
+            inode, offset = None, 0
+            _set_meta(conn, "seg_seq", seg_seq)
+            _set_meta(conn, "base", base)
+        if st is None:
+            _set_meta(conn, "inode", "")
+            _set_meta(conn, "offset", 0)
+            return n
+        if not inode:
+            offset = 0  # fresh store, or the first live file after a rotation
+        elif st.st_size == offset:
+            return n
+        read, last = _absorb(conn, _iter_live(log_path, base, base + offset), "")
+        if last is not None:
+            offset = last - base
+        _set_meta(conn, "inode", st.st_ino)
+        _set_meta(conn, "offset", offset)
+    return n + read
+
+
+def note_rotation(conn: sqlite3.Connection, log_path: str,
+                  seg: "_log_segments.Segment", inode: int) -> bool:
+    """Carry the index across a rotation of the live log into `seg`.
+
+    Called with the log lock held, after the manifest gained `seg`. Absorbs
+    whatever the live log gained since the last ingest (now the segment's
+    tail) and repoints the live day ranges at the segment. Returns False,
+    leaving the store for the next ingest to rebuild, if the store was not
+    in step with the log that was rotated.
+    """
+    if (int(_get_meta(conn, "seg_seq") or 0) != seg.seq - 1
+            or int(_get_meta(conn, "base") or 0) != seg.base_offset
+            or (_get_meta(conn, "inode") or "") not in ("", str(inode))):
+        return False
+    offset = int(_get_meta(conn, "offset") or 0) if _get_meta(conn, "inode") else 0
+    with conn:
+        conn.execute("UPDATE day_offsets SET source = ? WHERE source = ''", (seg.file,))
+        _absorb(conn, _log_segments.iter_segment(log_path, seg, seg.base_offset + offset),
+                seg.file)
+        _set_meta(conn, "seg_seq", seg.seq)
+        _set_meta(conn, "base", seg.end_offset)
+        _set_meta(conn, "inode", "")
+        _set_meta(conn, "offset", 0)
+    return True
+
+
+def query(
+    conn: sqlite3.Connection,
+    log_path: str,
+    cutoff: datetime,
+    input_stem: str | None = None,
+) -> Summary:
+    """Per-agent stats for entries with ts >= cutoff (and matching input_stem)."""
+    cutoff_day = cutoff.date().isoformat()
+    stem_sql = " AND stem = ?" if input_stem else ""
+    params: tuple = (cutoff_day, input_stem) if input_stem else (cutoff_day,)
+    summary = Summary()
+
+    for row in conn.execute(
+        f"""SELECT agent, SUM(runs), SUM(selected), SUM(n_final), SUM(sum_final),
+                   SUM(sumsq_final), SUM(n_qsa), SUM(sum_qsa), SUM(sumsq_qsa),
+                   MIN(first_offset)
+            FROM daily WHERE day > ?{stem_sql} GROUP BY agent""", params):
+        summary.by_agent[row[0]] = AgentStats(*row[1:])
+    for agent, reason, count, off in conn.execute(
+        f"""SELECT agent, reason, SUM(count), MIN(first_offset)
+            FROM daily_skip WHERE day > ?{stem_sql} GROUP BY agent, reason""", params):
+        summary.by_agent[agent].add_reason(reason, count, off)
+    summary.runs_seen.update(
+        r[0] for r in conn.execute(
+            f"SELECT DISTINCT run_id FROM daily_runs WHERE day > ?{stem_sql}", params))
+
+    # Boundary day: exact timestamp filter over just its byte ranges.
+    segments = {seg.file: seg for seg in _log_segments.load_manifest(log_path)}
+    base = int(_get_meta(conn, "base") or 0)
+    ranges = conn.execute(
+        "SELECT source, start_offset, end_offset FROM day_offsets WHERE day = ? "
+        "ORDER BY start_offset", (cutoff_day,)).fetchall()
+    boundary = Summary()
+    for source, lo, hi in ranges:
+        if source:
+            lines = _log_segments.iter_segment(log_path, segments[source], lo, hi)
+        else:
+            lines = _iter_live(log_path, base, lo, hi)
+        for start, _end, raw in lines:
+            e = _decode(raw)
+            if e is None:
+                continue
+            ts = parse_iso(e.get("ts", ""))
+            if ts is None or ts < cutoff or ts.date().isoformat() != cutoff_day:
+                continue
+            if input_stem and e.get("input_stem") != input_stem:
+                continue
+            boundary.add(e, start)
+    summary.runs_seen |= boundary.runs_seen
+    for agent, st in boundary.by_agent.items():
+        summary.by_agent.setdefault(agent, AgentStats()).merge(st)
+    return summary
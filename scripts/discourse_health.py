@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""discourse_health.py — Sawyer Flow Envelope metrics (rsj.7) for one run or many.
+
+Computes, from a synthesis `findings.json`:
+
+* participation_gini — Gini coefficient of per-agent finding counts;
+* novelty_rate — share of findings only one agent raised
+  (`convergence_corrected` if present, else `convergence`, default 1);
+* response_relevance — share of findings with non-empty `evidence_sources`;
+
+and classifies the run `healthy` / `degraded` / `unhealthy` against
+`config/flux-drive/discourse-sawyer.yaml`.
+
+All three metrics come out of one pass over the findings array. For large
+files the array is streamed element by element (`iter_findings`) instead of
+loading the whole document, and the config is read once per process — the
+previous discourse-health.sh spawned python3 per YAML key and per threshold
+comparison. Output matches discourse-health.sh byte-for-byte (same keys,
+order, jq-style round-half-up to 3 places, integer-valued floats printed as
+integers).
+
+Module API:
+    load_thresholds(config_path=None) -> Thresholds
+    iter_findings(path) -> Iterator[dict]
+    compute_metrics(findings) -> dict
+    classify(metrics, thresholds) -> (flow_state, warnings)
+    run_health(output_dir, thresholds) -> dict
+    trend(roots, thresholds) -> dict
+
+CLI:
+    python3 discourse_health.py health <OUTPUT_DIR> [--config <sawyer.yaml>]
+        JSON to stdout + {OUTPUT_DIR}/discourse-health.json
+        exit 1 if findings.json is missing (error JSON still written)
+    python3 discourse_health.py trend <ROOT>... [--config <sawyer.yaml>] [--jsonl]
+        Finds every findings.json under each ROOT, computes per-run metrics
+        (oldest first by findings.json mtime) and prints a summary: flow-state
+        counts, mean/p50/p90 per metric, and first-half vs second-half means so
+        a drift in discourse health across hundreds of reviews is visible.
+        --jsonl prints one per-run record per line instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+import yaml
+
+DEFAULT_CONFIG = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "config", "flux-drive", "discourse-sawyer.yaml"
+)
+# findings.json at or above this size is streamed rather than json.load()ed.
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+_CHUNK = 1 << 16
+
+
+@dataclass
+class Thresholds:
+    gini_max: float = 0.3
+    novelty_min: float = 0.1
+    relevance_min: float = 0.7
+    degraded_gini: float = 0.5
+    degraded_novelty: float = 0.05
+    degraded_relevance: float = 0.5
+
+
+def _dig(d: Any, dotted: str) -> Any:
+    for key in dotted.split("."):
+        if not isinstance(d, dict) or key not in d:
+            return None
+        d = d[key]
+    return d
+
+
+def load_thresholds(config_path: str | None = None) -> Thresholds:
+    """Read the flow envelope once. Missing file/keys keep the shipped defaults.
+
+    `states.degraded.*` feeds the degraded band (discourse-health.sh hardcoded it).
+    """
+    t = Thresholds()
+    if not config_path or not os.path.isfile(config_path):
+        return t
+    try:
+        with open(config_path) as fh:
+            data = yaml.safe_load(fh)
+    except yaml.YAMLError:
+        return t
+    for attr, path in (
+        ("gini_max", "flow_envelope.participation_gini_max"),
+        ("novelty_min", "flow_envelope.novelty_rate_min"),
+        ("relevance_min", "flow_envelope.response_relevance_min"),
+        ("degraded_gini", "flow_envelope.states.degraded.gini_below"),
+        ("degraded_novelty", "flow_envelope.states.degraded.novelty_above"),
+        ("degraded_relevance", "flow_envelope.states.degraded.relevance_above"),
+    ):
+        v = _dig(data, path)
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            setattr(t, attr, v)
+    return t
+
+
+# --- input ----------------------------------------------------------------
+
+
+def _stream_array(fh, key: str) -> Iterator[Any]:
+    """Yield elements of the top-level `key` array without loading the document.
+
+    A minimal scanner finds `"key": [` at depth 1 (tracking strings/escapes),
+    then each element is decoded with `raw_decode`, pulling more input only
+    when an element straddles the buffer end.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more(keep: int) -> bool:
+        """Append a chunk, dropping everything before `keep`."""
+        nonlocal buf, pos, eof
+        chunk = fh.read(_CHUNK)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[keep:] + chunk
+        pos -= keep
+        return True
+
+    # Phase 1: locate the array. Only the current string token (if any) has
+    # to survive a refill, so the prefix before "findings" is never retained.
+    depth = 0
+    in_str = esc = False
+    token_start = 0
+    last_string: str | None = None
+    while True:
+        if pos >= len(buf):
+            keep = token_start if in_str else pos
+            if not more(keep):
+                return
+            if in_str:
+                token_start = 0
+        ch = buf[pos]
+        pos += 1
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+                if depth == 1:
+                    last_string = json.loads(buf[token_start:pos])
+            continue
+        if ch == '"':
+            in_str = True
+            token_start = pos - 1
+        elif ch in "{[":
+            if depth == 1 and ch == "[" and last_string == key:
+                break
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+        elif ch == ",":
+            last_string = None
+
+    # Phase 2: decode elements.
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or not more(pos):
+                break
+        if pos >= len(buf):
+            return
+        if buf[pos] == "]":
+            return
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not more(pos):
+                    raise
+                continue
+            # A number at the buffer edge may be truncated ("12" of "123").
+            if end == len(buf) and not eof and more(pos):
+                continue
+            break
+        yield value
+        pos = end
+
+
+def iter_findings(path: str) -> Iterator[dict]:
+    """Yield the `findings` entries of a findings.json, streaming large files."""
+    if os.path.getsize(path) < STREAM_THRESHOLD_BYTES:
+        with open(path, encoding="utf-8") as fh:
+            doc = json.load(fh)
+        items = doc.get("findings") if isinstance(doc, dict) else None
+        yield from items or []
+        return
+    with open(path, encoding="utf-8") as fh:
+        yield from _stream_array(fh, "findings")
+
+
+# --- metrics ----------------------------------------------------------------
+
+
+def _round3(x: float) -> float:
+    """jq's `x * 1000 | round / 1000` (round half away from zero)."""
+    return math.copysign(math.floor(abs(x) * 1000 + 0.5), x) / 1000
+
+
+def _num(v: float) -> float | int:
+    """Integer-valued floats print as integers, as jq does."""
+    return int(v) if float(v).is_integer() else v
+
+
+def _agent_key(agent: Any) -> str:
+    return agent if isinstance(agent, str) else json.dumps(agent)
+
+
+def gini(counts: Iterable[int]) -> float:
+    values = sorted(counts)
+    n = len(values)
+    if n <= 1:
+        return 0.0
+    total = sum(values)
+    if total == 0:
+        return 0.0
+    weighted = sum((i + 1) * v for i, v in enumerate(values))
+    return (2 * weighted) / (n * total) - (n + 1) / n
+
+
+def compute_metrics(findings: Iterable[dict]) -> dict[str, Any]:
+    """Single pass: per-agent counts, novel count, evidence count."""
+    counts: dict[str, int] = {}
+    total = novel = with_evidence = 0
+    for f in findings:
+        if not isinstance(f, dict):
+            continue
+        total += 1
+        key = _agent_key(f.get("agent"))
+        counts[key] = counts.get(key, 0) + 1
+        conv = f.get("convergence_corrected")
+        if conv is None:
+            conv = f.get("convergence")
+            if conv is None or conv is False:
+                conv = 1
+        if conv == 1 and not isinstance(conv, bool):
+            novel += 1
+        ev = f.get("evidence_sources")
+        if ev is not None and (len(ev) if hasattr(ev, "__len__") else abs(ev)) > 0:
+            with_evidence += 1
+    return {
+        "participation_gini": _num(_round3(gini(counts.values()))),
+        "novelty_rate": _num(_round3(novel / total)) if total else 0,
+        "response_relevance": _num(_round3(with_evidence / total)) if total else 0,
+        "agent_finding_counts": dict(sorted(counts.items())),
+        "total_findings": total,
+        "metrics_source": "findings.json",
+    }
+
+
+def classify(metrics: dict[str, Any], t: Thresholds) -> tuple[str, list[str]]:
+    g = metrics["participation_gini"]
+    nv = metrics["novelty_rate"]
+    rel = metrics["response_relevance"]
+    if g <= t.gini_max and nv >= t.novelty_min and rel >= t.relevance_min:
+        state = "healthy"
+    elif g <= t.degraded_gini and nv >= t.degraded_novelty and rel >= t.degraded_relevance:
+        state = "degraded"
+    else:
+        state = "unhealthy"
+    warnings = []
+    if g > t.gini_max:
+        warnings.append(f"participation_gini ({g}) exceeds threshold ({t.gini_max})")
+    if nv < t.novelty_min:
+        warnings.append(f"novelty_rate ({nv}) below threshold ({t.novelty_min})")
+    if rel < t.relevance_min:
+        warnings.append(f"response_relevance ({rel}) below threshold ({t.relevance_min})")
+    return state, warnings
+
+
+def run_health(output_dir: str, t: Thresholds) -> dict[str, Any]:
+    metrics = compute_metrics(iter_findings(os.path.join(output_dir, "findings.json")))
+    state, warnings = classify(metrics, t)
+    return {**metrics, "flow_state": state, "warnings": warnings}
+
+
+# --- trending -----------------------------------------------------------------
+
+
+def _find_runs(roots: list[str]) -> list[str]:
+    runs = set()
+    for root in roots:
+        if os.path.isfile(os.path.join(root, "findings.json")):
+            runs.add(os.path.abspath(root))
+        for dirpath, _dirnames, filenames in os.walk(root):
+            if "findings.json" in filenames:
+                runs.add(os.path.abspath(dirpath))
+    return sorted(runs, key=lambda d: (os.path.getmtime(os.path.join(d, "findings.json")), d))
+
+
+def _quantile(sorted_vals: list[float], q: float) -> float:
+    idx = min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))
+    return sorted_vals[idx]
+
+
+def _summarize(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"mean": None, "p50": None, "p90": None}
+    s = sorted(values)
+    return {"mean": _num(_round3(sum(s) / len(s))), "p50": _quantile(s, 0.5),
+            "p90": _quantile(s, 0.9)}
+
+
+def iter_runs(roots: list[str], t: Thresholds) -> Iterator[dict[str, Any]]:
+    for run_dir in _find_runs(roots):
+        path = os.path.join(run_dir, "findings.json")
+        rec: dict[str, Any] = {"run": run_dir, "mtime": int(os.path.getmtime(path))}
+        try:
+            rec.update(run_health(run_dir, t))
+        except (OSError, ValueError) as exc:  # JSONDecodeError is a ValueError
+            rec.update({"error": str(exc), "flow_state": "unknown"})
+        yield rec
+
+
+def trend(roots: list[str], t: Thresholds) -> dict[str, Any]:
+    records = [r for r in iter_runs(roots, t)]
+    ok = [r for r in records if "error" not in r]
+    states: dict[str, int] = {"healthy": 0, "degraded": 0, "unhealthy": 0, "unknown": 0}
+    for r in records:
+        states[r["flow_state"]] = states.get(r["flow_state"], 0) + 1
+    metrics = ("participation_gini", "novelty_rate", "response_relevance")
+    half = len(ok) // 2
+    out: dict[str, Any] = {
+        "runs": len(records),
+        "errors": len(records) - len(ok),
+        "flow_states": states,
+        "metrics": {m: _summarize([r[m] for r in ok]) for m in metrics},
+        "drift": {},
+    }
+    if half:
+        for m in metrics:
+            early = sum(r[m] for r in ok[:half]) / half
+            late = sum(r[m] for r in ok[half:]) / (len(ok) - half)
+            out["drift"][m] = {"first_half_mean": _num(_round3(early)),
+                               "second_half_mean": _num(_round3(late)),
+                               "delta": _num(_round3(late - early))}
+    return out
+
+
+# --- CLI ------------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="discourse_health.py",
+                                     description="Sawyer Flow Envelope metrics")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_health = sub.add_parser("health", help="metrics for one OUTPUT_DIR")
+    p_health.add_argument("output_dir")
+    p_health.add_argument("--config", default=DEFAULT_CONFIG)
+    p_trend = sub.add_parser("trend", help="metrics across a directory of runs")
+    p_trend.add_argument("roots", nargs="+")
+    p_trend.add_argument("--config", default=DEFAULT_CONFIG)
+    p_trend.add_argument("--jsonl", action="store_true", help="one record per run")
+    args = parser.parse_args(argv)
+
+    t = load_thresholds(args.config)
+
+    if args.cmd == "trend":
+        if args.jsonl:
+            for rec in iter_runs(args.roots, t):
+                print(json.dumps(rec, separators=(",", ":")))
+        else:
+            print(json.dumps(trend(args.roots, t), indent=2))
+        return 0
+
+    out_path = os.path.join(args.output_dir, "discourse-health.json")
+    if not os.path.isfile(os.path.join(args.output_dir, "findings.json")):
+        text = '{"error":"findings.json not found","flow_state":"unknown"}'
+        print(text)
+        try:
+            with open(out_path, "w") as fh:
+                fh.write(text + "\n")
+        except OSError:
+            pass
+        return 1
+    try:
+        result = run_health(args.output_dir, t)
+    except ValueError as exc:
+        print(f"discourse_health: findings.json unreadable: {exc}", file=sys.stderr)
+        return 2
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    with open(out_path, "w") as fh:
+        fh.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
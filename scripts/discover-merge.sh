@@ -17,6 +17,7 @@ TODAY=$(date +%Y-%m-%d)
 
 # Parse results, filter by confidence, merge into registry (UNDER FLOCK)
 export _DM_REGISTRY="$MODEL_REGISTRY"
+export _DM_SCRIPTS="$SCRIPT_DIR"
 export _DM_RESULTS="$RESULTS_FILE"
 export _DM_MIN_CONF="$MIN_CONFIDENCE"
 export _DM_TODAY="$TODAY"
@@ -30,6 +31,8 @@ flock -w 30 -x 201 || exit 3
 
 python3 -c "
 import yaml, json, os, sys, re
+sys.path.insert(0, os.environ['_DM_SCRIPTS'])
+from lib_registry import compact_locked, load_registry
 
 VALID_SLUG = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9/_.-]{0,127}$')
 
@@ -38,11 +41,11 @@ results_path = os.environ['_DM_RESULTS']
 min_conf = float(os.environ['_DM_MIN_CONF'])
 today = os.environ['_DM_TODAY']
 
-with open(reg_path) as f:
-    reg = yaml.safe_load(f) or {}
-
-if 'models' not in reg or reg['models'] is None:
-    reg['models'] = {}
+# This rewrites the YAML wholesale, so fold any event-mode writes into it first
+# (under the lock held above): the dedupe must see them, and replaying them
+# after this write would clobber it.
+compact_locked(reg_path)
+reg = load_registry(reg_path)
 
 with open(results_path) as f:
     results = json.load(f)
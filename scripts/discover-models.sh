@@ -56,7 +56,8 @@ _discover_models_date_to_epoch() {
 
 # Check refresh interval
 if [[ "$FORCE" != true && -f "$MODEL_REGISTRY" ]]; then
-    last_discovery=$(yq -r '.last_discovery // ""' "$MODEL_REGISTRY" 2>/dev/null)
+    # lib_registry get, not yq: it replays event-mode writes pending in the event log.
+    last_discovery=$(python3 "${SCRIPT_DIR}/lib_registry.py" get "$MODEL_REGISTRY" .last_discovery 2>/dev/null) || last_discovery=""
     if [[ -n "$last_discovery" && "$last_discovery" != "null" ]]; then
         interval=$(yq -r '.model_discovery.refresh_interval // "weekly"' "$BUDGET_FILE" 2>/dev/null)
         case "$interval" in
@@ -2,7 +2,7 @@
 # estimate-costs.sh — Query interstat for per-agent token cost estimates
 # Usage: estimate-costs.sh [--model MODEL] [--slicing]
 # Output: JSON object mapping agent_name -> estimated_tokens
-# Requires: sqlite3, jq, budget.yaml
+# Requires: jq, budget.yaml, and python3 (or sqlite3 with FLUX_COST_ESTIMATES_LEGACY=1)
 
 set -euo pipefail
 
@@ -81,9 +81,58 @@ classify_agent() {
   esac
 }
 
+# --- Locate the fleet registry (fallback for agents not in interstat) ---
+_find_lib_fleet() {
+  local candidates=()
+  # 1. Explicit env var (highest priority, works in all deployment contexts)
+  [[ -n "${CLAVAIN_SOURCE_DIR:-}" ]] && candidates+=("${CLAVAIN_SOURCE_DIR}/scripts/lib-fleet.sh")
+  # 2. Plugin cache (deployed context)
+  local cache_dir="${HOME}/.claude/plugins/cache"
+  if [[ -d "$cache_dir" ]]; then
+    local latest
+    latest="$(ls -d "$cache_dir"/*/clavain/*/scripts/lib-fleet.sh 2>/dev/null | tail -1)"
+    [[ -n "$latest" ]] && candidates+=("$latest")
+  fi
+  # 3. Monorepo relative path (development context, last resort)
+  local script_dir
+  script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+  candidates+=("$script_dir/../../../os/Clavain/scripts/lib-fleet.sh")
+  for f in "${candidates[@]}"; do
+    if [[ -f "$f" ]]; then
+      echo "$f"
+      return 0
+    fi
+  done
+  return 1
+}
+
+_FLEET_AVAILABLE=false
+LIB_FLEET="$(_find_lib_fleet 2>/dev/null)" || LIB_FLEET=""
+if [[ -n "$LIB_FLEET" ]]; then
+  # Source lib-fleet.sh; it requires yq which we don't mandate here,
+  # so suppress errors and check if it loaded successfully
+  source "$LIB_FLEET" 2>/dev/null && _FLEET_AVAILABLE=true || true
+fi
+
+# Fast path: _cost_estimates.py runs the interstat query in-process against a
+# read-only connection and caches the result until the DB changes (or the
+# FLUX_COST_CACHE_TTL expires). Without a fleet registry it produces the whole
+# document; with one it supplies the interstat half and the merge below runs.
+_USE_PY=false
+if [[ "${FLUX_COST_ESTIMATES_LEGACY:-0}" != "1" ]] && command -v python3 >/dev/null 2>&1; then
+  _USE_PY=true
+fi
+if [[ "$_USE_PY" == true && "$_FLEET_AVAILABLE" != true ]]; then
+  _py_args=(estimate --model "$MODEL" --db "$DB_PATH" --budget "$BUDGET_FILE")
+  [[ "$SLICING" == "true" ]] && _py_args+=(--slicing)
+  exec python3 "$SCRIPT_DIR/_cost_estimates.py" "${_py_args[@]}"
+fi
+
 # Query interstat for historical averages
 ESTIMATES="{}"
-if [[ -f "$DB_PATH" ]]; then
+if [[ "$_USE_PY" == true ]]; then
+  ESTIMATES=$(python3 "$SCRIPT_DIR/_cost_estimates.py" interstat --model "$MODEL" --db "$DB_PATH") || ESTIMATES="{}"
+elif [[ -f "$DB_PATH" ]]; then
   # Query agents with >= 3 runs for reliable estimates
   # Return both billing tokens (input+output, for budget) and total tokens (for context/reporting)
   # Capture stderr separately so schema-drift (e.g. renamed columns) surfaces instead of
@@ -120,38 +169,6 @@ if [[ -f "$DB_PATH" ]]; then
 fi
 
 # --- Fleet registry fallback for agents not in interstat (>= 3 runs) ---
-_find_lib_fleet() {
-  local candidates=()
-  # 1. Explicit env var (highest priority, works in all deployment contexts)
-  [[ -n "${CLAVAIN_SOURCE_DIR:-}" ]] && candidates+=("${CLAVAIN_SOURCE_DIR}/scripts/lib-fleet.sh")
-  # 2. Plugin cache (deployed context)
-  local cache_dir="${HOME}/.claude/plugins/cache"
-  if [[ -d "$cache_dir" ]]; then
-    local latest
-    latest="$(ls -d "$cache_dir"/*/clavain/*/scripts/lib-fleet.sh 2>/dev/null | tail -1)"
-    [[ -n "$latest" ]] && candidates+=("$latest")
-  fi
-  # 3. Monorepo relative path (development context, last resort)
-  local script_dir
-  script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-  candidates+=("$script_dir/../../../os/Clavain/scripts/lib-fleet.sh")
-  for f in "${candidates[@]}"; do
-    if [[ -f "$f" ]]; then
-      echo "$f"
-      return 0
-    fi
-  done
-  return 1
-}
-
-_FLEET_AVAILABLE=false
-LIB_FLEET="$(_find_lib_fleet 2>/dev/null)" || LIB_FLEET=""
-if [[ -n "$LIB_FLEET" ]]; then
-  # Source lib-fleet.sh; it requires yq which we don't mandate here,
-  # so suppress errors and check if it loaded successfully
-  source "$LIB_FLEET" 2>/dev/null && _FLEET_AVAILABLE=true || true
-fi
-
 if [[ "$_FLEET_AVAILABLE" == true ]]; then
   # Get all agents in registry that aren't already in interstat estimates
   fleet_agents="$(fleet_list 2>/dev/null)" || fleet_agents=""
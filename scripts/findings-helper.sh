@@ -74,6 +74,12 @@ case "$cmd" in
       echo "Error: directory '$output_dir' not found" >&2
       exit 1
     fi
+    # Fast path: _findings_index.py serves agents already parsed by flux-watch
+    # from findings-index.jsonl and parses only the rest. Same output format.
+    # FLUX_FINDINGS_INDEX=0 forces the awk path below.
+    if [[ "${FLUX_FINDINGS_INDEX:-1}" != "0" ]] && command -v python3 >/dev/null 2>&1; then
+      exec python3 "$(dirname "${BASH_SOURCE[0]}")/_findings_index.py" read-indexes "$output_dir"
+    fi
     for f in "$output_dir"/*.md; do
       [[ -f "$f" ]] || continue
       base=$(basename "$f" .md)
@@ -102,6 +108,13 @@ case "$cmd" in
       exit 1
     fi
 
+    # Preferred: _convergence.py clusters paraphrased findings (trigram cosine,
+    # blocked by section) and reads the live findings index. Same TSV output.
+    # The awk below is the exact-match fallback when python3 is unavailable.
+    if [[ "${FLUX_FINDINGS_INDEX:-1}" != "0" ]] && command -v python3 >/dev/null 2>&1; then
+      exec python3 "$(dirname "${BASH_SOURCE[0]}")/_convergence.py" "$output_dir"
+    fi
+
     # Collect all P0/P1 findings with agent attribution via read-indexes
     raw=$("$0" read-indexes "$output_dir")
     if [[ -z "$raw" ]]; then
@@ -100,6 +100,18 @@ MIN_EFFECTIVE_CAP="$(_num "${FLUX_BACKOFF_MIN_CAP:-}" min_effective_cap "$DEFAUL
 _cap_file()  { echo "${1%/}/.dispatch-cap"; }
 _lock_file() { echo "${1%/}/.dispatch-slots.lock"; }  # shared fd-204 domain
 
+# Record a cap change in {OUTPUT_DIR}/decisions.log (decision_type
+# `concurrency`, same stream as scripts/_adaptive_cap.py). Best-effort: a
+# logging failure must never fail the backpressure path.
+_log_cap_change() {
+    local output_dir="$1" name="$2" old="$3" new="$4"
+    [[ "$old" == "$new" ]] && return 0
+    python3 "$SCRIPT_DIR/_decisions_log.py" log "$name" "cap ${old} -> ${new}" \
+        --decision-type=concurrency --output-dir "$output_dir" \
+        --extra-json "{\"old_cap\":${old},\"new_cap\":${new},\"base_max\":${base_max}}" \
+        >/dev/null 2>&1 || true
+}
+
 # Read the congestion cap (the throttled ceiling). Empty/garbage = unset.
 _read_cap() {
     local f="$1" v
@@ -190,8 +202,12 @@ decrease() {
     fi
 
     # Hold the shared dispatch lock for the read-modify-write; the critical
-    # section echoes the new cap, captured through $() (lib-lock.sh contract).
-    _with_lock_ex "$lock" _decrease_locked
+    # section echoes "old new", captured through $() (lib-lock.sh contract).
+    local pair old new
+    pair="$(_with_lock_ex "$lock" _decrease_locked)" || return $?
+    read -r old new <<<"$pair"
+    _log_cap_change "$output_dir" backoff-decrease "$old" "$new"
+    echo "$new"
 }
 
 # Runs under the fd-204 lock; sees decrease()'s locals via dynamic scoping.
@@ -203,7 +219,7 @@ _decrease_locked() {
     new=$(( (cur + DECREASE_FACTOR - 1) / DECREASE_FACTOR ))
     (( new < MIN_EFFECTIVE_CAP )) && new="$MIN_EFFECTIVE_CAP"
     echo "$new" > "$cap_file"
-    echo "$new"
+    echo "$cur $new"
 }
 
 # --- increase: additive recovery (slow-start) ------------------------------
@@ -221,7 +237,11 @@ increase() {
         base_max="$(bash "$SCRIPT_DIR/flux-dispatch.sh" maxcap "$output_dir" 2>/dev/null || echo 6)"
     fi
 
-    _with_lock_ex "$lock" _increase_locked
+    local pair old new
+    pair="$(_with_lock_ex "$lock" _increase_locked)" || return $?
+    read -r old new <<<"$pair"
+    _log_cap_change "$output_dir" backoff-increase "$old" "$new"
+    echo "$new"
 }
 
 # Runs under the fd-204 lock; sees increase()'s locals via dynamic scoping.
@@ -229,6 +249,7 @@ _increase_locked() {
     local cur n out
     cur="$(_read_cap "$cap_file")"
     if [[ -z "$cur" ]]; then
+        cur="$base_max"
         out="$base_max"   # already at base; nothing throttled
     else
         n=$(( cur + 1 ))
@@ -240,7 +261,7 @@ _increase_locked() {
             out="$n"
         fi
     fi
-    echo "$out"
+    echo "$cur $out"
 }
 
 # --- effective: print the current effective cap ---------------------------
@@ -10,7 +10,11 @@
 # Usage:
 #   flux-dispatch.sh acquire <output_dir> [max] [timeout_secs]
 #       Block until a dispatch slot is free, then claim it. Prints "ok <in_flight>/<max>".
-#       Exit 0 on slot claimed, 1 on timeout (no slot freed within timeout_secs).
+#       Exit 0 on slot claimed, 1 on timeout (no slot freed within timeout_secs,
+#       or the provider rate limiter could not admit — see Rate pacing below).
+#       When $FLUX_DISPATCH_OUTPUT names the agent's terminal .md, the claim
+#       also records that agent's dispatch time (epoch ms) so `wait` can
+#       measure dispatch-to-.md latency from it.
 #   flux-dispatch.sh release <output_dir>
 #       Release one slot. Exit 0 (idempotent: never drops below zero).
 #   flux-dispatch.sh count <output_dir>
@@ -19,9 +23,13 @@
 #       Convenience for the release path: block until <output_file> (an agent's
 #       terminal .md) appears, then release one slot. Exit 0 on appearance,
 #       1 on timeout (slot is still released so the cap cannot deadlock).
+#       The dispatch-to-.md latency (or the timeout) is fed to the adaptive
+#       concurrency controller (scripts/_adaptive_cap.py) before the release,
+#       in milliseconds from the agent's `acquire` stamp (falling back to the
+#       moment `wait` was called when no stamp was recorded).
 #   flux-dispatch.sh reset <output_dir> [max]
 #       (Re)initialize the slot file to zero in-flight and clear any congestion
-#       cap from a prior run. Call once before a wave.
+#       cap and dispatch stamps from a prior run. Call once before a wave.
 #   flux-dispatch.sh maxcap <output_dir> [max]
 #       Print the resolved BASE cap (ignoring the congestion cap). Used by
 #       scripts/flux-backoff.sh to seed the multiplicative-decrease cap.
@@ -31,6 +39,12 @@
 # EFFECTIVE cap = min(base_max, .dispatch-cap), so transient-failure backpressure
 # multiplicatively lowers the live slot ceiling. See flux-backoff.sh.
 #
+# Rate pacing: when $FLUX_DISPATCH_PROVIDER is set, `acquire` additionally draws
+# one request (and $FLUX_DISPATCH_TOKENS estimated tokens) from that provider's
+# token buckets via scripts/_rate_limit.py after claiming a slot — the same
+# buckets the openrouter-dispatch MCP server debits. If the buckets cannot pay
+# before the acquire timeout, the slot is released and acquire exits 1.
+#
 # Resolution order for <max> (highest precedence first):
 #   1. explicit <max> argument
 #   2. $MAX_CONCURRENT_AGENTS env var
@@ -93,6 +107,23 @@ resolve_max() {
 _slot_file() { echo "${1%/}/.dispatch-slots"; }
 _lock_file() { echo "${1%/}/.dispatch-slots.lock"; }
 _cap_file()  { echo "${1%/}/.dispatch-cap"; }   # congestion cap (issue #9 backpressure)
+_adaptive_file() { echo "${1%/}/.dispatch-adaptive.json"; }  # _adaptive_cap.py state
+_started_dir() { echo "${1%/}/.dispatch-started"; }  # per-agent dispatch stamps (epoch ms)
+
+# Agent key for an output file: its basename minus the .md suffix. `acquire`
+# stamps and `wait` samples under the same key.
+_agent_key() { local a; a="$(basename "$1")"; echo "${a%.md}"; }
+
+# Wall clock in epoch milliseconds. $EPOCHREALTIME (bash >= 5) carries
+# microseconds; older shells (macOS bash 3.2) fall back to whole seconds.
+_now_ms() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        local us="${EPOCHREALTIME/[.,]/}"
+        echo $(( us / 1000 ))
+    else
+        echo $(( $(date +%s) * 1000 ))
+    fi
+}
 
 # Effective cap = min(base_max, congestion_cap). The congestion cap is written by
 # flux-backoff.sh `decrease` on sustained 429s (issue #9), so a transient-failure
@@ -123,6 +154,8 @@ _read_count() {
 _reset_locked() {
     echo 0 > "$slot"
     rm -f "$cap"   # clear any congestion cap left by a prior run (issue #9)
+    rm -f "$adaptive"   # and the adaptive controller's latency baselines
+    rm -rf "$started"   # and any dispatch stamps an unfinished wave left behind
 }
 _acquire_locked() {
     local eff_local cur
@@ -152,6 +185,7 @@ case "$cmd" in
     output_dir="${1:?reset requires <output_dir>}"; shift || true
     mkdir -p "$output_dir"
     slot="$(_slot_file "$output_dir")"; lock="$(_lock_file "$output_dir")"; cap="$(_cap_file "$output_dir")"
+    adaptive="$(_adaptive_file "$output_dir")"; started="$(_started_dir "$output_dir")"
     _with_lock_ex "$lock" _reset_locked
     echo "ok 0/$(resolve_max "${1:-}")"
     ;;
@@ -179,6 +213,26 @@ case "$cmd" in
         _with_lock_ex "$lock" _acquire_locked && claimed=1 || claimed=""
         eff="$(effective_max "$output_dir" "$base_max")"
         if [[ -n "$claimed" ]]; then
+            if [[ -n "${FLUX_DISPATCH_PROVIDER:-}" ]]; then
+                # Pace under the provider's requests/min + tokens/min limits.
+                # Runs outside the fd-204 lock: the bucket wait can be long and
+                # must not block releases or other acquires.
+                remaining=$(( deadline - $(date +%s) ))
+                (( remaining < 1 )) && remaining=1
+                if ! python3 "$SCRIPT_DIR/_rate_limit.py" acquire "$FLUX_DISPATCH_PROVIDER" \
+                        --tokens "${FLUX_DISPATCH_TOKENS:-0}" --timeout "$remaining" >/dev/null; then
+                    _with_lock_ex "$lock" _release_locked
+                    echo "ratelimit $(_read_count "$slot")/$eff" >&2
+                    exit 1
+                fi
+            fi
+            if [[ -n "${FLUX_DISPATCH_OUTPUT:-}" ]]; then
+                # Stamp the dispatch moment (after any rate pacing — the agent
+                # only starts now) for `wait`'s latency sample.
+                started="$(_started_dir "$output_dir")"
+                mkdir -p "$started"
+                _now_ms > "$started/$(_agent_key "$FLUX_DISPATCH_OUTPUT")"
+            fi
             echo "ok $(_read_count "$slot")/$eff"
             exit 0
         fi
@@ -210,6 +264,7 @@ case "$cmd" in
     output_file="${1:?wait requires <output_file>}"; shift || true
     max="$(resolve_max "${1:-}")"; shift || true
     timeout="${1:-$DEFAULT_TIMEOUT}"
+    waited_ms="$(_now_ms)"
     deadline=$(( $(date +%s) + timeout ))
     rc=0
     while [[ ! -e "$output_file" ]]; do
@@ -219,6 +274,22 @@ case "$cmd" in
         fi
         sleep "$POLL_INTERVAL"
     done
+    # Feed the completion latency to the adaptive controller (no-op when
+    # dispatch.adaptive.enabled is false). It takes the fd-204 lock itself, so
+    # it runs before — never inside — the release critical section.
+    # Latency runs from the agent's `acquire` stamp, not from this call: an
+    # agent that finished before `wait` ran must not read as a 0s sample.
+    agent="$(_agent_key "$output_file")"
+    stamp="$(_started_dir "$output_dir")/$agent"
+    started_ms="$(cat "$stamp" 2>/dev/null || true)"
+    [[ "$started_ms" =~ ^[0-9]+$ ]] || started_ms="$waited_ms"
+    elapsed_ms=$(( $(_now_ms) - started_ms ))
+    (( elapsed_ms < 0 )) && elapsed_ms=0
+    dropped=(); (( rc != 0 )) && dropped=(--dropped)
+    python3 "$SCRIPT_DIR/_adaptive_cap.py" sample "$output_dir" "$agent" \
+        "$(printf '%d.%03d' $(( elapsed_ms / 1000 )) $(( elapsed_ms % 1000 )))" \
+        --base-max "$max" ${dropped[@]+"${dropped[@]}"} >/dev/null 2>&1 || true
+    rm -f "$stamp"
     # Always release the slot — a timed-out agent must not permanently consume
     # admission capacity (that would deadlock the cap for the rest of the run).
     "$0" release "$output_dir" >/dev/null
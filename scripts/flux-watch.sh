@@ -1,6 +1,10 @@
 #!/usr/bin/env bash
 # flux-watch.sh — Watch OUTPUT_DIR for agent .md file completions.
-# Prefers inotifywait (zero-CPU filesystem events), falls back to 5s polling.
+# Delegates to _flux_watch.py when python3 is available (inotify via ctypes,
+# 250ms polling fallback, .partial growth tracking, per-agent TTFB/TTC metrics
+# in {OUTPUT_DIR}/watch-metrics.jsonl). Otherwise prefers inotifywait
+# (zero-CPU filesystem events), falls back to 5s polling.
+# FLUX_WATCH_LEGACY=1 forces the bash implementation.
 #
 # Usage: flux-watch.sh <output_dir> [expected_count] [timeout_secs]
 # Output: prints each completed .md filename to stdout as it appears
@@ -22,6 +26,12 @@ STALL_RESCUE="${STALL_RESCUE:-0}"
 STALL_TIMEOUT="${STALL_TIMEOUT:-60}"
 EXPECTED_AGENTS="${EXPECTED_AGENTS:-}"
 
+# Same stdout contract and exit codes; stall env vars are read from the environment.
+if [[ "${FLUX_WATCH_LEGACY:-0}" != "1" ]] && command -v python3 >/dev/null 2>&1; then
+    export STALL_RESCUE STALL_TIMEOUT EXPECTED_AGENTS
+    exec python3 "$(dirname "${BASH_SOURCE[0]}")/_flux_watch.py" "$OUTPUT_DIR" "$EXPECTED" "$TIMEOUT"
+fi
+
 seen=0
 declare -A reported  # track already-reported files
 START_TIME=$(date +%s)
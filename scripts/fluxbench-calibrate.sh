@@ -4,6 +4,8 @@
 #   fluxbench-calibrate.sh --fixtures-dir <dir> --output <thresholds.yaml> --mock
 #   fluxbench-calibrate.sh --emit --fixtures-dir <dir> --output <thresholds.yaml>
 #   fluxbench-calibrate.sh --score --work-dir <dir> --output <thresholds.yaml>
+# --jobs N (N > 1, --mock/--score) scores fixtures in N worker processes via
+# _fluxbench_pipeline.py calibrate; thresholds and results lines are the same.
 set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -16,6 +18,7 @@ work_dir=""
 mock_mode=false
 emit_mode=false
 score_mode=false
+jobs=1
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -25,6 +28,7 @@ while [[ $# -gt 0 ]]; do
     --mock)         mock_mode=true; shift ;;
     --emit)         emit_mode=true; shift ;;
     --score)        score_mode=true; shift ;;
+    --jobs)         jobs="$2"; shift 2 ;;
     *) echo "Unknown argument: $1" >&2; exit 1 ;;
   esac
 done
@@ -44,6 +48,22 @@ if [[ "$mode_count" -gt 1 ]]; then
   exit 1
 fi
 
+[[ "$jobs" =~ ^[1-9][0-9]*$ ]] || { echo "Error: --jobs must be a positive integer, got: $jobs" >&2; exit 1; }
+
+# --- Parallel scoring: hand the scoring loop and threshold write to the runner ---
+if [[ "$jobs" -gt 1 && "$emit_mode" != "true" ]]; then
+  [[ -n "$output_file" ]] || { echo "Error: --output required" >&2; exit 1; }
+  if [[ "$score_mode" == "true" ]]; then
+    [[ -d "$work_dir" ]] || { echo "Error: work directory not found: $work_dir" >&2; exit 1; }
+    _fc_src=(--work-dir "$work_dir")
+  else
+    [[ -d "$fixtures_dir" ]] || { echo "Error: fixtures directory not found: $fixtures_dir" >&2; exit 1; }
+    _fc_src=(--fixtures-dir "$fixtures_dir")
+  fi
+  python3 "${SCRIPT_DIR}/_fluxbench_pipeline.py" calibrate "${_fc_src[@]}" --output "$output_file" --jobs "$jobs" >/dev/null
+  exit $?
+fi
+
 # --- Shared: compute_percentile ---
 # p25 = 25th percentile (conservative — achievable by 75% of runs)
 # For false-positive-rate: higher_is_worse, so use p75 instead (75th percentile = the worst 25%)
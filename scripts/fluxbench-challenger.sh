@@ -12,6 +12,9 @@ CONFIG_DIR="${SCRIPT_DIR}/../config/flux-drive"
 export MODEL_REGISTRY="${MODEL_REGISTRY:-${CONFIG_DIR}/model-registry.yaml}"
 export BUDGET_CONFIG="${BUDGET_CONFIG:-${CONFIG_DIR}/budget.yaml}"
 export RESULTS_JSONL="${FLUXBENCH_RESULTS_JSONL:-${SCRIPT_DIR}/../data/fluxbench-results.jsonl}"
+# Registry reads go through lib_registry.load_registry_cached, which replays
+# event-mode writes still pending in the event log (see lib_registry.py).
+export _FB_SCRIPTS="$SCRIPT_DIR"
 
 # shellcheck source=lib-registry.sh
 source "${SCRIPT_DIR}/lib-registry.sh"
@@ -31,13 +34,19 @@ _require_file() {
   [[ -f "$path" ]] || { echo "Error: ${label} not found: ${path}" >&2; exit 1; }
 }
 
+# True when results exist, live or rotated into segments (_log_segments.py).
+_have_results() {
+  [[ -f "$RESULTS_JSONL" || -f "${RESULTS_JSONL}.segments/manifest.json" ]]
+}
+
 _count_runs() {
   local slug="$1"
-  if [[ ! -f "$RESULTS_JSONL" ]]; then
+  if ! _have_results; then
     echo 0
     return
   fi
-  jq -c --arg slug "$slug" 'select(.model_slug == $slug)' "$RESULTS_JSONL" 2>/dev/null | wc -l | tr -d ' '
+  # Rotated segments are counted from their manifest, not decompressed.
+  python3 "${SCRIPT_DIR}/_log_segments.py" count "$RESULTS_JSONL" --key "$slug" 2>/dev/null || echo 0
 }
 
 # Atomic registry write: set a model's status field
@@ -73,12 +82,13 @@ _action_select() {
 
   result=$(python3 -c "
 import yaml, json, sys, os
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+from lib_registry import load_registry_cached
 
 reg_path = os.environ.get('MODEL_REGISTRY', '')
 budget_path = os.environ.get('BUDGET_CONFIG', '')
 
-with open(reg_path) as f:
-    reg = yaml.safe_load(f) or {}
+reg = load_registry_cached(reg_path)
 
 with open(budget_path) as f:
     budget = yaml.safe_load(f) or {}
@@ -205,33 +215,57 @@ c = d.get('challenger', {})
 print(c.get('promotion_threshold', 10))
 print(c.get('early_exit_margin', 0.20))
 print(c.get('stale_threshold', 20))
+print('true' if (c.get('sequential') or {}).get('enabled') is True else 'false')
 ")
   promotion_threshold=$(echo "$_budget_vals" | sed -n '1p')
   early_exit_margin=$(echo "$_budget_vals" | sed -n '2p')
   stale_threshold=$(echo "$_budget_vals" | sed -n '3p')
+  sequential_enabled=$(echo "$_budget_vals" | sed -n '4p')
+
+  # Sequential early stop (challenger.sequential in budget.yaml): promote or
+  # reject as soon as the SPRT reaches its configured confidence. An undecided
+  # test falls through to the fixed-N rules below.
+  if [[ "$sequential_enabled" == "true" ]] && _have_results; then
+    local seq_result seq_verdict
+    seq_result=$(FLUXBENCH_RESULTS_JSONL="$RESULTS_JSONL" \
+      python3 "${SCRIPT_DIR}/_fluxbench_sequential.py" decide "$model_slug") || seq_result=""
+    seq_verdict=$(echo "$seq_result" | jq -r '.verdict // empty' 2>/dev/null || true)
+    if [[ "$seq_verdict" == "promoted" ]]; then
+      _promote_model "$model_slug" || { echo "Error: failed to promote $model_slug" >&2; return 1; }
+      echo "Sequential test: promoted $model_slug after $(echo "$seq_result" | jq -r '.runs') runs" >&2
+      echo "$seq_result"
+      return 0
+    elif [[ "$seq_verdict" == "rejected" ]]; then
+      _set_model_status "$model_slug" "rejected" || { echo "Error: failed to reject $model_slug" >&2; return 1; }
+      echo "Sequential test: rejected $model_slug after $(echo "$seq_result" | jq -r '.runs') runs" >&2
+      echo "$seq_result"
+      return 0
+    fi
+  fi
 
   run_count=$(_count_runs "$model_slug")
 
   # Insufficient runs — not ready to evaluate
   if [[ "$run_count" -lt "$promotion_threshold" ]]; then
     # Check early exit: >= 5 runs AND all gates pass by > early_exit_margin
-    if [[ "$run_count" -ge 5 ]] && [[ -f "$RESULTS_JSONL" ]]; then
+    if [[ "$run_count" -ge 5 ]] && _have_results; then
       export _FB_SLUG="$model_slug"
       export _FB_EARLY_MARGIN="$early_exit_margin"
       export _FB_PROMO_THRESH="$promotion_threshold"
+      export _FB_SCRIPTS="$SCRIPT_DIR"
 
       early_exit=$(python3 -c "
 import json, sys, os
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+import _log_segments
 
 slug = os.environ['_FB_SLUG']
 results_path = os.environ['RESULTS_JSONL']
 early_margin = float(os.environ['_FB_EARLY_MARGIN'])
 promo_thresh = int(os.environ.get('_FB_PROMO_THRESH', '10'))
 
-with open(results_path) as f:
-    lines = [json.loads(l) for l in f if l.strip()]
-
-model_runs = [r for r in lines if r.get('model_slug') == slug]
+# Only the recent window is evaluated: stop reading segments once it is full.
+model_runs = _log_segments.latest(results_path, slug, promo_thresh)
 if not model_runs:
     print('false')
     sys.exit(0)
@@ -323,7 +357,7 @@ print('true' if all_pass_by_margin else 'false')
   fi
 
   # Enough runs: evaluate all 5 core gates
-  if [[ ! -f "$RESULTS_JSONL" ]]; then
+  if ! _have_results; then
     jq -n \
       --arg slug "$model_slug" \
       '{"verdict": "insufficient_runs", "model": $slug, "runs": 0, "reason": "no results file"}'
@@ -333,20 +367,20 @@ print('true' if all_pass_by_margin else 'false')
   export _FB_SLUG="$model_slug"
   export _FB_STALE="$stale_threshold"
   export _FB_PROMO_THRESH="$promotion_threshold"
+  export _FB_SCRIPTS="$SCRIPT_DIR"
 
   verdict=$(python3 -c "
 import json, sys, os
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+import _log_segments
 
 slug = os.environ['_FB_SLUG']
 results_path = os.environ['RESULTS_JSONL']
 stale_threshold = int(os.environ['_FB_STALE'])
 promo_thresh = int(os.environ.get('_FB_PROMO_THRESH', '10'))
 
-with open(results_path) as f:
-    lines = [json.loads(l) for l in f if l.strip()]
-
-model_runs = [r for r in lines if r.get('model_slug') == slug]
-run_count = len(model_runs)
+run_count = _log_segments.count(results_path, slug)
+model_runs = _log_segments.latest(results_path, slug, promo_thresh)
 
 if not model_runs:
     print(json.dumps({'verdict': 'failing', 'model': slug, 'runs': 0, 'failed_gates': []}))
@@ -421,10 +455,11 @@ print(budget.get('challenger', {}).get('stale_threshold', 20))
 
   # Find challenger model in registry
   challenger_slug=$(python3 -c "
-import yaml, json, os
+import json, os, sys
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+from lib_registry import load_registry_cached
 
-with open(os.environ.get('MODEL_REGISTRY', '')) as f:
-    reg = yaml.safe_load(f) or {}
+reg = load_registry_cached(os.environ.get('MODEL_REGISTRY', ''))
 
 models = reg.get('models', {}) or {}
 if isinstance(models, list):
@@ -17,7 +17,7 @@ COUNTER_FILE="${DRIFT_SAMPLE_COUNTER:-${DATA_DIR}/drift-sample-counter}"
 force=false
 [[ "${1:-}" == "--force" ]] && force=true
 
-# Require yq for registry reads
+# Require yq: fluxbench-drift.sh (run per model below) needs it
 if ! command -v yq >/dev/null 2>&1; then
   echo "Error: yq required for drift sampling" >&2
   exit 1
@@ -26,8 +26,12 @@ fi
 [[ -f "$MODEL_REGISTRY" ]] || { echo "Error: model registry not found: $MODEL_REGISTRY" >&2; exit 1; }
 
 # --- Config ---
-sample_rate=$(yq -r '.fluxbench.sample_rate // 10' "$MODEL_REGISTRY")
-max_sample_gap=$(yq -r '.fluxbench.max_sample_gap // 20' "$MODEL_REGISTRY")
+_ds_config=$(python3 "${SCRIPT_DIR}/lib_registry.py" get "$MODEL_REGISTRY" \
+  '.fluxbench.sample_rate // 10' '.fluxbench.max_sample_gap // 20')
+{
+  read -r sample_rate
+  read -r max_sample_gap
+} <<< "$_ds_config"
 
 # --- Counter management (atomic) ---
 mkdir -p "$(dirname "$COUNTER_FILE")"
@@ -85,12 +89,12 @@ fi
 _write_counter 0
 
 # --- Find qualified models with baselines ---
-export _FB_REGISTRY_PATH="$MODEL_REGISTRY"
+export _FB_REGISTRY_PATH="$MODEL_REGISTRY" _FB_SCRIPTS="$SCRIPT_DIR"
 qualified_slugs=$(python3 -c "
-import yaml, os
-with open(os.environ['_FB_REGISTRY_PATH']) as f:
-    reg = yaml.safe_load(f) or {}
-models = reg.get('models', {}) or {}
+import os, sys
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+from lib_registry import load_registry_cached
+models = load_registry_cached(os.environ['_FB_REGISTRY_PATH'])['models']
 for slug, m in models.items():
     if isinstance(m, dict) and m.get('status') in ('qualified', 'auto-qualified'):
         if m.get('qualified_baseline') is not None:
@@ -111,24 +115,24 @@ while IFS= read -r slug; do
   models_checked=$((models_checked + 1))
 
   # Get latest JSONL entry for this model
-  if [[ ! -f "$RESULTS_JSONL" ]]; then
+  if [[ ! -f "$RESULTS_JSONL" && ! -f "${RESULTS_JSONL}.segments/manifest.json" ]]; then
     continue
   fi
 
   shadow_file=$(mktemp)
 
   export _FB_SLUG="$slug"
-  export _FB_RESULTS="$RESULTS_JSONL"
+  export _FB_RESULTS="$RESULTS_JSONL" _FB_SCRIPTS="$SCRIPT_DIR"
   python3 -c "
 import json, os, sys
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+import _log_segments
 
 slug = os.environ['_FB_SLUG']
 results_path = os.environ['_FB_RESULTS']
 
-with open(results_path) as f:
-    lines = [json.loads(l) for l in f if l.strip()]
-
-model_runs = [r for r in lines if r.get('model_slug') == slug]
+# Latest run only: reads the live log, then rotated segments newest-first.
+model_runs = _log_segments.latest(results_path, slug, 1)
 if not model_runs:
     json.dump({'metrics': {}}, sys.stdout)
     sys.exit(0)
@@ -165,14 +169,14 @@ if [[ ${#drift_detected_models[@]} -gt 0 ]]; then
 
   shadow_file=$(mktemp)
   export _FB_SLUG="$first_drifted"
-  export _FB_RESULTS="$RESULTS_JSONL"
+  export _FB_RESULTS="$RESULTS_JSONL" _FB_SCRIPTS="$SCRIPT_DIR"
   python3 -c "
 import json, os, sys
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+import _log_segments
 slug = os.environ['_FB_SLUG']
 results_path = os.environ['_FB_RESULTS']
-with open(results_path) as f:
-    lines = [json.loads(l) for l in f if l.strip()]
-model_runs = [r for r in lines if r.get('model_slug') == slug]
+model_runs = _log_segments.latest(results_path, slug, 1)
 latest = model_runs[-1] if model_runs else {}
 json.dump({'metrics': latest.get('metrics', {})}, sys.stdout)
 " > "$shadow_file" 2>/dev/null
@@ -25,16 +25,23 @@ metrics_file="${METRICS_FILE:-${SCRIPT_DIR}/../config/flux-drive/fluxbench-metri
 [[ -f "$shadow_result" ]] || { echo "Error: shadow result not found: $shadow_result" >&2; exit 1; }
 [[ -f "$registry" ]]      || { echo "Error: model registry not found: $registry" >&2; exit 1; }
 
-# Require yq for registry operations
+# Require yq for the metrics map (registry reads and writes use lib_registry.py)
 if ! command -v yq >/dev/null 2>&1; then
   echo "Error: yq is required but not found. Install with: pip install yq" >&2
   exit 1
 fi
 
-# Read drift config from registry root (root-level config, not per-model)
-drift_threshold=$(yq -r '.fluxbench.drift_threshold // 0.15' "$registry")
-hysteresis_band=$(yq -r '.fluxbench.hysteresis_band // 0.05' "$registry")
-correlated_drift_threshold=$(yq -r '.fluxbench.correlated_drift_threshold // 0.50' "$registry")
+# Read drift config from registry root (root-level config, not per-model).
+# One lib_registry.py get answers all three from the parsed-registry snapshot.
+_fd_config=$(python3 "${SCRIPT_DIR}/lib_registry.py" get "$registry" \
+  '.fluxbench.drift_threshold // 0.15' \
+  '.fluxbench.hysteresis_band // 0.05' \
+  '.fluxbench.correlated_drift_threshold // 0.50')
+{
+  read -r drift_threshold
+  read -r hysteresis_band
+  read -r correlated_drift_threshold
+} <<< "$_fd_config"
 
 # Build higher_is_better map from metrics config.
 # Do NOT swallow yq errors here: if the metrics file is present but malformed, an empty map
@@ -79,16 +86,21 @@ _flock_rc=0
 (
   flock -w 30 -x 201 || exit 3
 
-  # Read model's qualified baseline
-  baseline_json=$(yq -o=json ".models.\"${_safe_slug}\".qualified_baseline // null" "$registry")
+  # Read model's qualified baseline (compact JSON) and current drift_flagged
+  # state in one call. The snapshot is keyed on the registry's stat, so this
+  # sees any write that landed before we took the lock.
+  _fd_model=$(python3 "${SCRIPT_DIR}/lib_registry.py" get "$registry" \
+    ".models.\"${_safe_slug}\".qualified_baseline // null" \
+    ".models.\"${_safe_slug}\".drift_flagged // false")
+  {
+    read -r baseline_json
+    read -r drift_flagged
+  } <<< "$_fd_model"
   if [[ "$baseline_json" == "null" || -z "$baseline_json" ]]; then
     echo "Error: no qualified_baseline for model '$_safe_slug'" >&2
     exit 1
   fi
 
-  # Read current drift_flagged state
-  drift_flagged=$(yq -r ".models.\"${_safe_slug}\".drift_flagged // false" "$registry")
-
   # Compare each baseline metric against current — pass data via env vars (no interpolation)
   export _FB_BASELINE_JSON="$baseline_json"
   export _FB_CURRENT_METRICS="$current_metrics"
@@ -168,18 +180,17 @@ print(json.dumps(result))
 
   _verdict=$(echo "$_result" | jq -r '.verdict')
 
-  # If drift detected, flag the model in registry
-  if [[ "$_verdict" == "drift_detected" ]]; then
-    cp "$registry" "${registry}.tmp"
-    yq -i ".models.\"${_safe_slug}\".drift_flagged = true" "${registry}.tmp"
-    mv "${registry}.tmp" "$registry"
-  fi
-
-  # If drift cleared, unflag the model
-  if [[ "$_verdict" == "drift_cleared" ]]; then
-    cp "$registry" "${registry}.tmp"
-    yq -i ".models.\"${_safe_slug}\".drift_flagged = false" "${registry}.tmp"
-    mv "${registry}.tmp" "$registry"
+  # Flag the model on drift, unflag it once cleared. commit_locked because fd 201
+  # is already held here; in event mode it appends rather than rewriting the YAML,
+  # so a later replay of older events cannot clobber the flag.
+  if [[ "$_verdict" == "drift_detected" || "$_verdict" == "drift_cleared" ]]; then
+    python3 -c "
+import sys
+sys.path.insert(0, sys.argv[1])
+from lib_registry import commit_locked
+commit_locked(sys.argv[2], [{'op': 'set-field', 'slug': sys.argv[3], 'key': 'drift_flagged',
+                             'value': sys.argv[4] == 'drift_detected'}])
+" "$SCRIPT_DIR" "$registry" "$_safe_slug" "$_verdict" || exit 1
   fi
 
   echo "$_result" > "$_drift_output_file"
@@ -201,16 +212,18 @@ verdict=$(echo "$result" | jq -r '.verdict')
 # This reads post-write state, so it runs outside the main flock.
 if [[ "$fleet_check" == "true" && "$verdict" == "drift_detected" ]]; then
   export _FB_REGISTRY_PATH="$registry"
+  export _FB_SCRIPTS="$SCRIPT_DIR"
   export _FB_CORRELATED_THRESH="$correlated_drift_threshold"
   fleet_result=$(python3 -c "
 import json, sys, os
 
 registry_path = os.environ['_FB_REGISTRY_PATH']
 
-# Count qualified models and how many are drift-flagged
-import yaml
-with open(registry_path) as f:
-    reg = yaml.safe_load(f)
+# Count qualified models and how many are drift-flagged. load_registry_cached
+# replays pending event-mode writes, including the flag just set above.
+sys.path.insert(0, os.environ['_FB_SCRIPTS'])
+from lib_registry import load_registry_cached
+reg = load_registry_cached(registry_path)
 
 models = reg.get('models', {}) or {}
 if isinstance(models, list):
@@ -1,12 +1,16 @@
 #!/usr/bin/env bash
 # fluxbench-qualify.sh — run qualification suite for a candidate model
-# Usage: fluxbench-qualify.sh <model-slug> [--mock] [--emit] [--score] [--fixtures-dir <dir>] [--work-dir <dir>]
+# Usage: fluxbench-qualify.sh <model-slug> [--mock] [--emit] [--score] [--fixtures-dir <dir>] [--work-dir <dir>] [--jobs N]
 #
 # Modes:
 #   --mock                 Single-pass mock qualification (ground-truth as model output)
 #   --emit                 Emit JSON descriptors for orchestrator (real mode), then exit
 #   --score --work-dir D   Score completed responses from work directory (real mode)
 #   (none of the above)    Error — must specify --mock, --emit, or --score
+#
+# --jobs N (N > 1) scores fixtures in N worker processes: --mock and --score
+# hand off to _fluxbench_pipeline.py, which writes the same results lines,
+# summary and registry update (one locked results append per run).
 set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -24,6 +28,7 @@ emit_mode=false
 score_mode=false
 fixtures_dir="$DEFAULT_FIXTURES_DIR"
 work_dir=""
+jobs=1
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -32,6 +37,7 @@ while [[ $# -gt 0 ]]; do
     --score)        score_mode=true; shift ;;
     --fixtures-dir) fixtures_dir="$2"; shift 2 ;;
     --work-dir)     work_dir="$2"; shift 2 ;;
+    --jobs)         jobs="$2"; shift 2 ;;
     -*)             echo "Error: unknown flag $1" >&2; exit 1 ;;
     *)
       if [[ -z "$model_slug" ]]; then
@@ -43,7 +49,8 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
-[[ -n "$model_slug" ]] || { echo "Usage: fluxbench-qualify.sh <model-slug> [--mock] [--emit] [--score] [--fixtures-dir <dir>] [--work-dir <dir>]" >&2; exit 1; }
+[[ -n "$model_slug" ]] || { echo "Usage: fluxbench-qualify.sh <model-slug> [--mock] [--emit] [--score] [--fixtures-dir <dir>] [--work-dir <dir>] [--jobs N]" >&2; exit 1; }
+[[ "$jobs" =~ ^[1-9][0-9]*$ ]] || { echo "Error: --jobs must be a positive integer, got: $jobs" >&2; exit 1; }
 
 # Validate model_slug format (matches discover-merge.sh VALID_SLUG pattern)
 if [[ ! "$model_slug" =~ ^[a-zA-Z0-9][a-zA-Z0-9/_.-]{0,127}$ ]]; then
@@ -144,8 +151,8 @@ _write_summary_jsonl() {
 # --- Shared: atomic registry update ---
 _update_registry() {
   # Build the merge payload (status + qualified_via + optional fluxbench metrics)
-  # via a single python invocation, then apply it through registry_atomic_mutate.
-  # The mutate helper acquires its own flock, so this function MUST NOT be
+  # via a single python invocation, then apply it as one registry transaction.
+  # The commit acquires its own flock, so this function MUST NOT be
   # called from inside an existing flock on ${MODEL_REGISTRY}.lock.
   local slug="$_FB_SLUG"
   local new_status="$_FB_STATUS"
@@ -201,35 +208,24 @@ print(should)
 "
   )
 
-  local rc=0
-  registry_atomic_mutate "$MODEL_REGISTRY" merge-fields "$slug" "$payload_json" || rc=$?
+  # Both writes go through one registry transaction: one lock, one load/dump,
+  # and the baseline never lands without the status merge (or vice versa).
+  registry_txn_begin
+  registry_txn_queue merge-fields "$slug" "$payload_json"
+  if [[ "$should_baseline" == "1" && "$baseline_json" != "NONE" ]]; then
+    registry_txn_queue set-field-if-absent "$slug" "qualified_baseline" "$baseline_json"
+  fi
+
+  local results rc=0
+  results=$(registry_txn_commit "$MODEL_REGISTRY") || rc=$?
   if [[ $rc -ne 0 ]]; then
-    echo "Error: registry merge-fields failed (rc=$rc)" >&2
+    echo "Error: registry update failed (rc=$rc)" >&2
     return 1
   fi
-
-  if [[ "$should_baseline" == "1" && "$baseline_json" != "NONE" ]]; then
-    rc=0
-    registry_atomic_mutate "$MODEL_REGISTRY" set-field-if-absent "$slug" "qualified_baseline" "$baseline_json" || rc=$?
-    if [[ $rc -ne 0 ]]; then
-      echo "Error: registry set-field-if-absent for qualified_baseline failed (rc=$rc)" >&2
-      return 1
-    fi
-    # If the baseline was already set, lib_registry preserves it silently. Print a
-    # post-write check so the legacy "preserving existing baseline" message still
-    # appears when relevant.
-    local current
-    current=$(python3 -c "
-import yaml, json, sys, os
-reg = yaml.safe_load(open('$MODEL_REGISTRY')) or {}
-m = (reg.get('models') or {}).get('$slug') or {}
-b = m.get('qualified_baseline') or {}
-new = json.loads('''$baseline_json''')
-print('preserved' if b != new else 'set')
-" 2>/dev/null)
-    if [[ "$current" == "preserved" ]]; then
-      echo "  qualified_baseline already set — preserving existing baseline" >&2
-    fi
+  # set-field-if-absent reports "preserved" when a baseline already exists —
+  # lib_registry keeps it, and the legacy message still appears.
+  if [[ "$results" == *'"result": "preserved"'* ]]; then
+    echo "  qualified_baseline already set — preserving existing baseline" >&2
   fi
 }
 
@@ -252,6 +248,14 @@ if $score_mode; then
   [[ -f "${work_dir}/manifest.json" ]] || { echo "Error: manifest.json not found in work directory: $work_dir" >&2; exit 1; }
 fi
 
+# --- Parallel scoring: the in-process runner owns the whole qualify stage ---
+if [[ "$jobs" -gt 1 ]] && ! $emit_mode; then
+  _fq_args=(run "$model_slug" --stages qualify --fixtures-dir "$fixtures_dir" --jobs "$jobs")
+  $score_mode && _fq_args+=(--work-dir "$work_dir")
+  MODEL_REGISTRY="$MODEL_REGISTRY" python3 "${SCRIPT_DIR}/_fluxbench_pipeline.py" "${_fq_args[@]}" >/dev/null
+  exit $?
+fi
+
 # ============================================================
 # --emit mode: output JSON descriptors for orchestrator, exit
 # ============================================================
@@ -516,9 +520,9 @@ for fid in m.get('fixtures_detail', []):
   export _FB_QUAL_MODE="real"
 
   if [[ -f "$MODEL_REGISTRY" ]]; then
-    # _update_registry uses lib-registry.sh's registry_atomic_mutate which
-    # acquires its own flock with a 30s timeout per atomic mutation. No outer
-    # flock here — that would self-deadlock the inner one (flock(2) is per-FD).
+    # _update_registry commits a lib-registry.sh transaction, which acquires
+    # its own flock with a 30s timeout. No outer flock here — that would
+    # self-deadlock the inner one (flock(2) is per-FD).
     export _FB_SLUG="$model_slug"
     export _FB_STATUS="$new_status"
     export _FB_AVG_METRICS="${avg_metrics:-"{}"}"
@@ -657,20 +661,14 @@ fi
 export _FB_QUAL_MODE="mock"
 
 if [[ -f "$MODEL_REGISTRY" ]]; then
-  # flock -w 30 prevents silent hangs when a concurrent writer holds the lock.
-  _fq_flock_rc=0
-  (
-    flock -w 30 -x 201 || exit 3
-    export _FB_SLUG="$model_slug"
-    export _FB_STATUS="$new_status"
-    export _FB_AVG_METRICS="${avg_metrics:-"{}"}"
-    _update_registry
-  ) 201>"${MODEL_REGISTRY}.lock" || _fq_flock_rc=$?
-  if [[ $_fq_flock_rc -eq 3 ]]; then
-    echo "  Error: registry lock timeout after 30s (mock mode)" >&2
-    exit 1
-  elif [[ $_fq_flock_rc -ne 0 ]]; then
-    echo "  Error: registry write failed in mock mode (rc=$_fq_flock_rc)" >&2
+  # Same as real mode: the registry transaction takes the flock itself (30s
+  # timeout). An outer flock on the same lock file would block it until the
+  # timeout and fail every mock qualification.
+  export _FB_SLUG="$model_slug"
+  export _FB_STATUS="$new_status"
+  export _FB_AVG_METRICS="${avg_metrics:-"{}"}"
+  if ! _update_registry; then
+    echo "  Error: registry write failed in mock mode" >&2
     exit 1
   fi
   echo "  Registry updated: $MODEL_REGISTRY" >&2
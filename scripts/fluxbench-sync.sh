@@ -20,12 +20,16 @@ _atomic_write_sync_state() {
 }
 
 # --- Guard: nothing to sync if JSONL missing or empty ---
-if [[ ! -f "$results_jsonl" ]]; then
+# Rotated segments (_log_segments.py rotate) may still hold unsynced entries.
+has_segments=false
+[[ -f "${results_jsonl}.segments/manifest.json" ]] && has_segments=true
+
+if [[ ! -f "$results_jsonl" ]] && ! $has_segments; then
   echo "No results file found at ${results_jsonl} — nothing to sync."
   exit 0
 fi
 
-if [[ ! -s "$results_jsonl" ]]; then
+if [[ ! -s "$results_jsonl" ]] && ! $has_segments; then
   echo "Results file is empty — nothing to sync."
   exit 0
 fi
@@ -70,7 +74,7 @@ _fs_flock_rc=0
 
     pending_lines+=("$line")
     pending_run_ids+=("$run_id")
-  done < <(jq -c '.' "$results_jsonl" 2>/dev/null)
+  done < <(python3 "${SCRIPT_DIR}/_log_segments.py" cat "$results_jsonl" | jq -c '.' 2>/dev/null)
 
   if [[ ${#pending_lines[@]} -eq 0 ]]; then
     echo "All entries already synced — nothing to sync."
@@ -22,4 +22,22 @@ if [[ ! -f "${SERVER_DIR}/dist/index.js" ]]; then
     (cd "$SERVER_DIR" && npm ci && npm run build) >&2
 fi
 
+# Pace against the same limits as scripts/_rate_limit.py (flux-dispatch.sh debits
+# the shared buckets too): env override, then model-registry.yaml
+# providers.openrouter.{rate_limit,tokens_per_min}. Unresolved limits keep the
+# server's defaults.
+if _or_limits=$(python3 -c "
+import sys
+sys.path.insert(0, sys.argv[1])
+from _rate_limit import load_limits
+limits = load_limits('openrouter')
+print(f'{limits.requests_per_min:g} {limits.tokens_per_min:g}')
+" "$SCRIPT_DIR"); then
+    read -r _or_rpm _or_tpm <<<"$_or_limits"
+    [[ "$_or_rpm" != 0 ]] && export OPENROUTER_RATE_LIMIT="$_or_rpm"
+    [[ "$_or_tpm" != 0 ]] && export OPENROUTER_TOKENS_PER_MIN="$_or_tpm"
+else
+    echo "openrouter-dispatch: could not resolve rate limits; using server defaults" >&2
+fi
+
 exec node "${SERVER_DIR}/dist/index.js" "$@"
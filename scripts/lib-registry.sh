@@ -10,12 +10,24 @@
 #   registry_atomic_mutate "$MODEL_REGISTRY" set-field <slug> <key> <value-json>
 #   registry_atomic_mutate "$MODEL_REGISTRY" promote   <slug>
 #
+# Several mutations of one registry should go through a transaction so they
+# share one lock, one YAML load and one dump, and land all-or-nothing:
+#   registry_txn_begin
+#   registry_txn_queue merge-fields        <slug> <fields-json>
+#   registry_txn_queue set-field-if-absent <slug> <key> <value-json>
+#   registry_txn_commit "$MODEL_REGISTRY"   # prints per-op results JSON
+#
+# With FLUX_REGISTRY_EVENTS=1 (or once model-registry.yaml.events.jsonl
+# exists) every write is appended to that event log instead of rewriting the
+# YAML; registry_compact folds it back (see lib_registry.py).
+#
 # Returns:
 #   0  success
 #   1  mutation failed (unspecified)
 #   2  registry parse error or registry path missing
 #   3  slug not found OR lock timeout (caller distinguishes via stderr)
 #   4  invalid invocation
+#   5  write-once field (qualified_baseline) already set — event mode only
 #
 # Lock fd is hardcoded to 201 to match existing fluxbench scripts. If a caller
 # needs a different fd domain, they should source lib-registry.sh in a subshell
@@ -28,13 +40,25 @@ _LIB_REGISTRY_PY="${_LIB_REGISTRY_PY:-${CLAUDE_PLUGIN_ROOT:-$(cd "$(dirname "${B
 registry_atomic_mutate() {
   local registry="$1"
   shift
-  local op="$1"
-  shift  # remaining args are op-specific
 
   if [[ ! -f "$registry" ]]; then
     echo "lib-registry: registry not found: $registry" >&2
     return 2
   fi
+  _registry_locked_apply "$registry" "$@"
+}
+
+# Run one lib_registry.py op against a tmp copy under the registry flock and
+# swap it in. Shared by registry_atomic_mutate and registry_txn_commit.
+_registry_locked_apply() {
+  local registry="$1"
+  local op="$2"
+  shift 2  # remaining args are op-specific
+
+  if [[ -e "${registry}.events.jsonl" || "${FLUX_REGISTRY_EVENTS:-0}" == "1" ]]; then
+    _registry_append "$registry" "$op" "$@"
+    return
+  fi
 
   local lock_path="${registry}.lock"
   local _flock_rc=0
@@ -69,6 +93,115 @@ registry_atomic_mutate() {
   esac
 }
 
+# Event mode (lib_registry.py docstring): append the op(s) as one event instead
+# of rewriting the YAML. lib_registry.py append takes the same lock itself.
+_registry_append() {
+  local registry="$1"
+  local op="$2"
+  shift 2
+  local rc=0 line
+  if [[ "$op" == "batch" ]]; then
+    python3 "$_LIB_REGISTRY_PY" append "$registry" "$1" || rc=$?
+  else
+    line=$(_registry_op_json "$op" "$@") || return 4
+    printf '%s\n' "$line" | python3 "$_LIB_REGISTRY_PY" append "$registry" - >/dev/null || rc=$?
+  fi
+  case "$rc" in
+    0|3) return "$rc" ;;
+    2) echo "lib-registry: parse error in $registry" >&2; return 2 ;;
+    4) echo "lib-registry: invalid invocation" >&2; return 4 ;;
+    5) return 5 ;;
+    *)
+      echo "lib-registry: append failed for $registry (rc=$rc)" >&2
+      return 1
+      ;;
+  esac
+}
+
+# Fold the event log into model-registry.yaml (no-op outside event mode).
+registry_compact() {
+  local registry="$1"
+  [[ -e "${registry}.events.jsonl" ]] || return 0
+  python3 "$_LIB_REGISTRY_PY" compact "$registry" >/dev/null
+}
+
+# --- Transactions ---
+# The queue is a JSON Lines file of lib_registry.py batch ops. Queueing is pure
+# bash (no python, no lock); registry_txn_commit applies the whole queue in one
+# locked load/dump and discards it whether or not the commit succeeded.
+
+_REGISTRY_TXN=""
+
+registry_txn_begin() {
+  registry_txn_abort
+  _REGISTRY_TXN=$(mktemp "${TMPDIR:-/tmp}/registry-txn.XXXXXX")
+}
+
+# JSON-encode a slug/key. They are identifiers, so control characters are refused.
+_registry_json_str() {
+  local s="$1"
+  if [[ "$s" == *[[:cntrl:]]* ]]; then
+    echo "lib-registry: control character in '$s'" >&2
+    return 4
+  fi
+  s=${s//\\/\\\\}
+  s=${s//\"/\\\"}
+  printf '"%s"' "$s"
+}
+
+# Print one batch op as a JSON line: _registry_op_json <op> <slug> [args...].
+_registry_op_json() {
+  local op="$1" slug key nl=$'\n'
+  slug=$(_registry_json_str "${2:-}") || return 4
+  case "$op:$#" in
+    set-field:4|set-field-if-absent:4)
+      key=$(_registry_json_str "$3") || return 4
+      printf '{"op":"%s","slug":%s,"key":%s,"value":%s}\n' "$op" "$slug" "$key" "${4//$nl/ }" ;;
+    merge-fields:3)
+      printf '{"op":"%s","slug":%s,"fields":%s}\n' "$op" "$slug" "${3//$nl/ }" ;;
+    promote:2)
+      printf '{"op":"%s","slug":%s}\n' "$op" "$slug" ;;
+    *)
+      echo "lib-registry: invalid txn op: $*" >&2
+      return 4 ;;
+  esac
+}
+
+# registry_txn_queue <op> <slug> [args...] — args as for registry_atomic_mutate.
+registry_txn_queue() {
+  if [[ -z "$_REGISTRY_TXN" ]]; then
+    echo "lib-registry: registry_txn_queue without registry_txn_begin" >&2
+    return 4
+  fi
+  local line
+  line=$(_registry_op_json "$@") || return 4
+  printf '%s\n' "$line" >> "$_REGISTRY_TXN"
+}
+
+registry_txn_commit() {
+  local registry="$1"
+  if [[ -z "$_REGISTRY_TXN" ]]; then
+    echo "lib-registry: registry_txn_commit without registry_txn_begin" >&2
+    return 4
+  fi
+  local queue="$_REGISTRY_TXN" rc=0
+  _REGISTRY_TXN=""
+  if [[ ! -s "$queue" ]]; then
+    rm -f "$queue"
+    return 0
+  fi
+  registry_atomic_mutate "$registry" batch "$queue" || rc=$?
+  rm -f "$queue"
+  return "$rc"
+}
+
+registry_txn_abort() {
+  if [[ -n "$_REGISTRY_TXN" ]]; then
+    rm -f "$_REGISTRY_TXN"
+  fi
+  _REGISTRY_TXN=""
+}
+
 # Convenience wrapper: set a single string field on a model.
 registry_set_string_field() {
   local registry="$1" slug="$2" key="$3" value="$4"
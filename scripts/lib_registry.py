@@ -10,6 +10,14 @@ Public API:
     get_model(reg, slug) -> dict | None
     set_model_field(reg, slug, key, value) -> bool  (True if mutation applied)
     validate_and_dump(reg, path) -> None
+    parse_ops(text) -> list[dict]
+    apply_batch(reg, ops) -> (dict, list[dict])  (all-or-nothing on a copy)
+    load_registry_cached(path) -> dict  (JSON snapshot keyed on inode/mtime/size)
+    load_materialized(path) -> dict  (YAML + event-log tail)
+    append_events(path, ops) -> list[dict]  /  compact(path) -> int
+    compact_locked(path) -> int  (compact() when the caller already holds the lock)
+    commit_batch(path, ops) -> list[dict]  (locked write, YAML or event mode)
+    query(reg, expr) -> Any  ('.a.b."dotted.slug" // default', yq-style)
 
 CLI (used by lib-registry.sh registry_atomic_mutate):
     python3 -m lib_registry set-field           <path> <slug> <key> <value-json>
@@ -17,19 +25,62 @@ CLI (used by lib-registry.sh registry_atomic_mutate):
     python3 -m lib_registry merge-fields        <path> <slug> <fields-json>  # shallow merge, creates slug if absent
     python3 -m lib_registry promote             <path> <slug>
     python3 -m lib_registry validate            <path>
+    python3 -m lib_registry batch               <path> <ops-file|->     # ordered ops, one load/dump
+    python3 -m lib_registry get                 <path> <expr> [<expr> ...]
+    python3 -m lib_registry append              <path> <ops-file|->     # event mode: one appended event
+    python3 -m lib_registry compact             <path>                  # fold the event log into the YAML
+
+A batch is a JSON array (or JSON Lines) of op objects mirroring the single-op
+CLI — {"op": "set-field", "slug", "key", "value"}, {"op": "set-field-if-absent",
+"slug", "key", "value"}, {"op": "merge-fields", "slug", "fields"},
+{"op": "promote", "slug"}. Ops apply in order to one in-memory copy, so a later
+op sees earlier ones (merge-fields can create the slug a following set-field
+targets); if any op fails nothing is written. Per-op results are printed as
+JSON: set | preserved | created | merged | promoted.
+
+`get` answers many yq-style queries with one process and one parse, printing
+one line per expression like `yq -r`: strings raw, null/true/false as words,
+mappings and lists as compact JSON (so are strings containing newlines). A
+`// default` suffix (JSON, else a bare string) applies when the value is
+missing, null or false. Reads go through a parsed snapshot in
+$INTERFLUX_STATE_DIR/registry-snapshots (default ~/.config/interflux), keyed
+on the file's inode, mtime and size — lib-registry.sh swaps the registry in
+with mv, so every write changes the key and the next read re-parses.
+INTERFLUX_REGISTRY_CACHE=0 disables the snapshot.
+
+Event mode (opt-in: FLUX_REGISTRY_EVENTS=1, sticky once <path>.events.jsonl
+exists). Instead of re-dumping the whole YAML per mutation, `append` validates
+a batch against the materialized registry under the registry flock and
+appends it as one JSON line {"ts", "ops"}; lib-registry.sh routes its writes
+there automatically. The YAML becomes a snapshot: `get`/load_registry_cached
+read it plus a replay of the log tail, and compaction (every COMPACT_EVERY
+events, or `compact`) folds the log into the YAML and truncates it.
+qualified_baseline is write-once in this mode — an event that would change a
+set baseline is rejected at append time (exit 5). Scripts that still parse the
+YAML directly see mutations only after compaction; writers that bypass
+lib-registry.sh keep working, with pending events replayed on top.
 
 Exit codes:
     0  success
     2  registry path missing or unparseable
-    3  slug not found (set-field / promote)
+    3  slug not found (set-field / promote), or lock timeout (append / compact)
     4  invalid input (bad JSON value, missing arg)
+    5  write-once field already set (event mode)
 """
 from __future__ import annotations
 
+import contextlib
+import copy
+import fcntl
+import hashlib
+import io
 import json
 import os
+import re
 import sys
-from typing import Any
+import tempfile
+import time
+from typing import Any, Iterator
 
 import yaml
 
@@ -157,6 +208,388 @@ def validate_and_dump(reg: dict[str, Any], path: str) -> None:
         yaml.safe_load(f)
 
 
+BATCH_OPS: dict[str, tuple[str, ...]] = {
+    "set-field": ("slug", "key", "value"),
+    "set-field-if-absent": ("slug", "key", "value"),
+    "merge-fields": ("slug", "fields"),
+    "promote": ("slug",),
+}
+
+
+class BatchError(Exception):
+    """A batch op failed; `code` is the CLI exit code (3 slug not found, 4 invalid op)."""
+
+    def __init__(self, code: int, index: int, message: str) -> None:
+        super().__init__(f"op {index}: {message}")
+        self.code = code
+        self.index = index
+
+
+def parse_ops(text: str) -> list[dict[str, Any]]:
+    """Parse a batch as a JSON array or JSON Lines. Raises ValueError."""
+    text = text.strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        ops = json.loads(text)
+    else:
+        ops = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not isinstance(ops, list):
+        raise ValueError("batch must be a JSON array or JSON Lines")
+    return ops
+
+
+def _check_op(index: int, op: Any) -> str:
+    if not isinstance(op, dict) or op.get("op") not in BATCH_OPS:
+        raise BatchError(4, index, f"unknown op {op.get('op') if isinstance(op, dict) else op!r}")
+    name = op["op"]
+    missing = [k for k in BATCH_OPS[name] if k not in op]
+    if missing:
+        raise BatchError(4, index, f"{name} missing {', '.join(missing)}")
+    if not isinstance(op["slug"], str) or ("key" in BATCH_OPS[name] and not isinstance(op["key"], str)):
+        raise BatchError(4, index, f"{name} slug/key must be strings")
+    if name == "merge-fields" and not isinstance(op["fields"], dict):
+        raise BatchError(4, index, "merge-fields fields must be an object")
+    return name
+
+
+def apply_batch(reg: dict[str, Any], ops: list[dict[str, Any]],
+                write_once: frozenset[str] = frozenset()) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Apply ops in order to a deep copy of reg; return (new_reg, per-op results).
+
+    All-or-nothing: every op is schema-checked before any is applied, and a
+    failing op raises BatchError with reg left untouched. Fields named in
+    `write_once` may be set while absent/None but never changed afterwards
+    (BatchError code 5).
+    """
+    names = [_check_op(i, op) for i, op in enumerate(ops)]
+    new = copy.deepcopy(reg)
+    normalize_models(new)
+    return new, _apply_checked(new, names, ops, write_once)
+
+
+def _write_once_guard(model: dict[str, Any] | None, fields: dict[str, Any],
+                      write_once: frozenset[str], index: int) -> None:
+    for key in write_once.intersection(fields):
+        current = (model or {}).get(key)
+        if current is not None and fields[key] != current:
+            raise BatchError(5, index, f"{key} is write-once and already set")
+
+
+def _apply_checked(reg: dict[str, Any], names: list[str], ops: list[dict[str, Any]],
+                   write_once: frozenset[str]) -> list[dict[str, Any]]:
+    results = []
+    for i, (name, op) in enumerate(zip(names, ops)):
+        slug = op["slug"]
+        model = get_model(reg, slug)
+        if name == "merge-fields":
+            _write_once_guard(model, op["fields"], write_once, i)
+            merge_model_fields(reg, slug, op["fields"])
+            result = "merged" if model is not None else "created"
+        elif model is None:
+            raise BatchError(3, i, f"slug '{slug}' not found")
+        elif name == "set-field":
+            _write_once_guard(model, {op["key"]: op["value"]}, write_once, i)
+            set_model_field(reg, slug, op["key"], op["value"])
+            result = "set"
+        elif name == "set-field-if-absent":
+            result = "set" if model.get(op["key"]) is None else "preserved"
+            set_model_field_if_absent(reg, slug, op["key"], op["value"])
+        else:
+            promote_model(reg, slug)
+            result = "promoted"
+        results.append({"op": name, "slug": slug, "result": result})
+    return results
+
+
+# --- Event log -----------------------------------------------------------------
+
+EVENTS_SUFFIX = ".events.jsonl"
+COMPACT_EVERY = 256
+WRITE_ONCE_FIELDS = frozenset({"qualified_baseline"})
+LOCK_TIMEOUT_S = 30.0
+
+
+def events_path(path: str) -> str:
+    return path + EVENTS_SUFFIX
+
+
+def events_enabled(path: str) -> bool:
+    """Event mode is on once the log exists, or when FLUX_REGISTRY_EVENTS=1 asks for it."""
+    return os.path.exists(events_path(path)) or os.environ.get("FLUX_REGISTRY_EVENTS") == "1"
+
+
+@contextlib.contextmanager
+def registry_lock(path: str, timeout: float = LOCK_TIMEOUT_S) -> Iterator[None]:
+    """Exclusive flock on `<registry>.lock` — the same lock lib-registry.sh takes on fd 201."""
+    with open(f"{path}.lock", "a") as fh:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"lock timeout after {timeout:.0f}s on {path}.lock")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def read_events(path: str) -> list[dict[str, Any]]:
+    """Events in append order. A torn trailing line (crash mid-append) is skipped."""
+    events = []
+    try:
+        with open(events_path(path)) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(event, dict) and isinstance(event.get("ops"), list):
+                    events.append(event)
+    except FileNotFoundError:
+        pass
+    return events
+
+
+def replay(reg: dict[str, Any], events: list[dict[str, Any]]) -> dict[str, Any]:
+    """Apply events to reg in place. An event that no longer applies (the YAML was
+    rewritten under it) is skipped whole, keeping each event all-or-nothing."""
+    normalize_models(reg)
+    for event in events:
+        ops = event["ops"]
+        try:
+            names = [_check_op(i, op) for i, op in enumerate(ops)]
+            trial = copy.deepcopy(reg)
+            with contextlib.redirect_stderr(io.StringIO()):  # promote warned at append time
+                _apply_checked(trial, names, ops, frozenset())
+        except BatchError as exc:
+            print(f"lib_registry: skipping event at {event.get('ts', '?')}: {exc}", file=sys.stderr)
+            continue
+        reg.clear()
+        reg.update(trial)
+    return reg
+
+
+def load_materialized(path: str) -> dict[str, Any]:
+    """The registry as readers should see it: YAML snapshot + event-log tail."""
+    reg = load_registry(path)
+    events = read_events(path)
+    return replay(reg, events) if events else reg
+
+
+def _dump_atomic(reg: dict[str, Any], path: str) -> None:
+    """validate_and_dump to a sibling tmpfile, then rename over path (new inode)."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    try:
+        validate_and_dump(reg, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def compact_locked(path: str) -> int:
+    """compact() for a caller already holding the registry lock (registry_lock, or
+    lib-registry.sh's fd 201) — run it before reading or rewriting the YAML directly."""
+    events = read_events(path)
+    if not events:
+        return 0
+    _dump_atomic(replay(load_registry(path), events), path)
+    # A crash between the replace and this truncate replays the folded events
+    # once more on the next read; every op is idempotent, so that is harmless.
+    with open(events_path(path), "w"):
+        pass
+    return len(events)
+
+
+def compact(path: str) -> int:
+    """Fold the event log into the YAML snapshot; return the number of events folded."""
+    with registry_lock(path):
+        return compact_locked(path)
+
+
+def append_events(path: str, ops: list[dict[str, Any]], now: float | None = None) -> list[dict[str, Any]]:
+    """Validate ops against the materialized registry and append them as one event.
+
+    Raises BatchError (nothing appended), TimeoutError on lock timeout.
+    Compacts once the log holds COMPACT_EVERY events.
+    """
+    with registry_lock(path):
+        return _append_locked(path, ops, now)
+
+
+def _append_locked(path: str, ops: list[dict[str, Any]], now: float | None) -> list[dict[str, Any]]:
+    _, results = apply_batch(load_registry_cached(path), ops, WRITE_ONCE_FIELDS)
+    if not ops:
+        return results
+    event = {"ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)), "ops": ops}
+    line = json.dumps(event, separators=(",", ":")) + "\n"
+    fd = os.open(events_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    if len(read_events(path)) >= COMPACT_EVERY:
+        compact_locked(path)
+    return results
+
+
+def commit_locked(path: str, ops: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Write ops the way lib-registry.sh would; the caller holds registry_lock(path).
+
+    Event mode appends one event; otherwise the batch is applied to the YAML
+    and swapped in atomically. Raises BatchError with nothing written.
+    """
+    if events_enabled(path):
+        return _append_locked(path, ops, None)
+    new, results = apply_batch(load_registry(path), ops)
+    if ops:
+        _dump_atomic(new, path)
+    return results
+
+
+def commit_batch(path: str, ops: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """commit_locked under the registry flock — the in-process registry_txn_commit."""
+    with registry_lock(path):
+        return commit_locked(path, ops)
+
+
+# --- Read path ---------------------------------------------------------------
+
+SNAPSHOT_DIRNAME = "registry-snapshots"
+_QUERY_SEGMENT = re.compile(r'"([^"]*)"|([^."\[\]]+)|\[(\d+)\]')
+
+
+def snapshot_path(path: str, state_dir: str | None = None) -> str:
+    base = (state_dir or os.environ.get("INTERFLUX_STATE_DIR")
+            or os.path.join(os.path.expanduser("~"), ".config", "interflux"))
+    digest = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+    return os.path.join(base, SNAPSHOT_DIRNAME, f"{digest}.json")
+
+
+def _stat_key(path: str) -> list[Any]:
+    st = os.stat(path)
+    key: list[Any] = [os.path.abspath(path), st.st_ino, st.st_mtime_ns, st.st_size]
+    try:
+        ev = os.stat(events_path(path))
+        key += [ev.st_ino, ev.st_mtime_ns, ev.st_size]
+    except FileNotFoundError:
+        pass
+    return key
+
+
+def load_registry_cached(path: str, state_dir: str | None = None) -> dict[str, Any]:
+    """load_materialized() through a JSON snapshot keyed on the file's stat.
+
+    A stale, missing or unreadable snapshot falls back to a fresh parse, which
+    then refreshes it. Registries that JSON cannot represent (e.g. unquoted
+    YAML dates) are parsed every time rather than snapshotted lossily.
+    """
+    key = _stat_key(path)
+    if os.environ.get("INTERFLUX_REGISTRY_CACHE", "1") == "0":
+        return load_materialized(path)
+    snap = snapshot_path(path, state_dir)
+    try:
+        with open(snap) as f:
+            doc = json.load(f)
+        if doc.get("key") == key:
+            return doc["registry"]
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+    reg = load_materialized(path)
+    try:
+        text = json.dumps({"key": key, "registry": reg})
+    except (TypeError, ValueError):
+        return reg
+    try:
+        os.makedirs(os.path.dirname(snap), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(snap), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, snap)
+    except OSError:
+        pass  # read-only state dir: still answer from the fresh parse
+    return reg
+
+
+def parse_query(expr: str) -> tuple[list[str | int], bool, Any]:
+    """Split '.a."b.c"[0] // default' into (segments, has_default, default). Raises ValueError."""
+    path, sep, default_text = expr.partition("//")
+    path = path.strip()
+    if path.startswith("."):
+        path = path[1:]
+    segments: list[str | int] = []
+    pos = 0
+    while pos < len(path):
+        if path[pos] == ".":
+            pos += 1
+            continue
+        m = _QUERY_SEGMENT.match(path, pos)
+        if not m:
+            raise ValueError(f"bad query path: {expr!r}")
+        quoted, bare, index = m.groups()
+        segments.append(int(index) if index is not None else (quoted if quoted is not None else bare))
+        pos = m.end()
+    default: Any = None
+    if sep:
+        default_text = default_text.strip()
+        try:
+            default = json.loads(default_text)
+        except json.JSONDecodeError:
+            default = default_text
+    return segments, bool(sep), default
+
+
+def query(reg: Any, expr: str) -> Any:
+    """Resolve one yq-style path expression against a loaded registry."""
+    segments, has_default, default = parse_query(expr)
+    node = reg
+    for seg in segments:
+        if isinstance(seg, int) and isinstance(node, list):
+            node = node[seg] if seg < len(node) else None
+        elif isinstance(node, dict):
+            node = node.get(seg if isinstance(seg, str) else str(seg))
+        else:
+            node = None
+        if node is None:
+            break
+    if has_default and (node is None or node is False):
+        return default
+    return node
+
+
+def format_value(value: Any) -> str:
+    """yq -r style rendering, one line per value."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str) and "\n" not in value:
+        return value
+    if isinstance(value, (int, float)):
+        return json.dumps(value)
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _cli_get(path: str, exprs: list[str]) -> int:
+    try:
+        for expr in exprs:
+            parse_query(expr)
+    except ValueError as exc:
+        print(f"lib_registry: {exc}", file=sys.stderr)
+        return 4
+    reg = load_registry_cached(path)
+    for expr in exprs:
+        print(format_value(query(reg, expr)))
+    return 0
+
+
 def _cli_set_field(path: str, slug: str, key: str, value_json: str) -> int:
     try:
         value = json.loads(value_json)
@@ -209,6 +642,62 @@ def _cli_promote(path: str, slug: str) -> int:
     return 0
 
 
+def _cli_batch(path: str, ops_path: str) -> int:
+    try:
+        if ops_path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(ops_path) as f:
+                text = f.read()
+        ops = parse_ops(text)
+    except (OSError, json.JSONDecodeError, ValueError) as exc:
+        print(f"lib_registry: invalid batch: {exc}", file=sys.stderr)
+        return 4
+    reg = load_registry(path)
+    try:
+        new, results = apply_batch(reg, ops)
+    except BatchError as exc:
+        print(f"lib_registry: batch aborted, nothing written — {exc}", file=sys.stderr)
+        return exc.code
+    if ops:
+        validate_and_dump(new, path)
+    print(json.dumps(results))
+    return 0
+
+
+def _cli_append(path: str, ops_path: str) -> int:
+    try:
+        if ops_path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(ops_path) as f:
+                text = f.read()
+        ops = parse_ops(text)
+    except (OSError, json.JSONDecodeError, ValueError) as exc:
+        print(f"lib_registry: invalid batch: {exc}", file=sys.stderr)
+        return 4
+    try:
+        results = append_events(path, ops)
+    except BatchError as exc:
+        print(f"lib_registry: event rejected, nothing appended — {exc}", file=sys.stderr)
+        return exc.code
+    except TimeoutError as exc:
+        print(f"lib_registry: {exc}", file=sys.stderr)
+        return 3
+    print(json.dumps(results))
+    return 0
+
+
+def _cli_compact(path: str) -> int:
+    try:
+        folded = compact(path)
+    except TimeoutError as exc:
+        print(f"lib_registry: {exc}", file=sys.stderr)
+        return 3
+    print(json.dumps({"folded": folded}))
+    return 0
+
+
 def _cli_validate(path: str) -> int:
     load_registry(path)  # raises if unparseable
     return 0
@@ -216,7 +705,7 @@ def _cli_validate(path: str) -> int:
 
 def main(argv: list[str]) -> int:
     if len(argv) < 2:
-        print("usage: lib_registry <set-field|promote|validate> ...", file=sys.stderr)
+        print("usage: lib_registry <set-field|set-field-if-absent|merge-fields|promote|batch|append|compact|get|validate> ...", file=sys.stderr)
         return 4
     op = argv[1]
     try:
@@ -228,6 +717,14 @@ def main(argv: list[str]) -> int:
             return _cli_merge_fields(argv[2], argv[3], argv[4])
         if op == "promote" and len(argv) == 4:
             return _cli_promote(argv[2], argv[3])
+        if op == "batch" and len(argv) == 4:
+            return _cli_batch(argv[2], argv[3])
+        if op == "append" and len(argv) == 4:
+            return _cli_append(argv[2], argv[3])
+        if op == "compact" and len(argv) == 3:
+            return _cli_compact(argv[2])
+        if op == "get" and len(argv) >= 4:
+            return _cli_get(argv[2], argv[3:])
         if op == "validate" and len(argv) == 3:
             return _cli_validate(argv[2])
     except FileNotFoundError as exc:
@@ -0,0 +1,207 @@
+"""Unit tests for scripts/_adaptive_cap.py."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _adaptive_cap as ac  # noqa: E402
+import _decisions_log as dl  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "_adaptive_cap.py")
+DISPATCH = str(ROOT / "scripts" / "flux-dispatch.sh")
+CFG = ac.AdaptiveConfig()
+
+
+def _state(limit: float = 6.0) -> ac.ControllerState:
+    return ac.ControllerState(limit=limit)
+
+
+# --- load_config ----------------------------------------------------------
+
+
+def test_load_config_shipped_budget() -> None:
+    cfg = ac.load_config(ac.DEFAULT_BUDGET)
+    assert cfg.enabled is True
+    assert cfg.min_cap == 1
+    assert 0 < cfg.smoothing <= 1
+
+
+def test_load_config_missing_file_defaults(tmp_path: Path) -> None:
+    assert ac.load_config(str(tmp_path / "absent.yaml")) == ac.AdaptiveConfig()
+
+
+def test_load_config_rejects_out_of_range(tmp_path: Path) -> None:
+    budget = tmp_path / "budget.yaml"
+    budget.write_text(
+        "dispatch:\n  adaptive:\n    smoothing: 7\n    tolerance: 0.2\n"
+        "  backoff:\n    min_effective_cap: 2\n"
+    )
+    cfg = ac.load_config(str(budget))
+    assert cfg.smoothing == CFG.smoothing
+    assert cfg.tolerance == CFG.tolerance
+    assert cfg.min_cap == 2
+
+
+def test_load_config_env_override(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FLUX_ADAPTIVE_CAP", "0")
+    assert ac.load_config(ac.DEFAULT_BUDGET).enabled is False
+
+
+# --- update ---------------------------------------------------------------
+
+
+def test_first_sample_seeds_both_rtts() -> None:
+    st = _state()
+    g = ac.update(st, CFG, 60.0, inflight=6, base_max=6)
+    assert st.short_rtt == st.long_rtt == 60.0
+    assert g == 1.0
+    assert st.limit == 6.0  # clamped at base
+
+
+def test_latency_inflation_shrinks_limit() -> None:
+    st = _state()
+    for lat in (60, 60, 60, 60):
+        ac.update(st, CFG, lat, inflight=6, base_max=6)
+    for lat in (240, 240, 240):
+        g = ac.update(st, CFG, lat, inflight=6, base_max=6)
+    assert g < 1.0
+    assert ac.effective_cap(st.limit, CFG, 6) < 6
+
+
+def test_stable_latency_recovers_limit() -> None:
+    st = _state(limit=2.0)
+    for _ in range(8):
+        # Saturated: every slot the cap allows is in use.
+        ac.update(st, CFG, 60.0, inflight=int(st.limit), base_max=6)
+    assert ac.effective_cap(st.limit, CFG, 6) == 6
+
+
+def test_app_limited_does_not_grow() -> None:
+    st = _state(limit=4.0)
+    ac.update(st, CFG, 60.0, inflight=1, base_max=6)
+    assert st.limit == 4.0
+
+
+def test_dropped_sample_is_max_congestion() -> None:
+    st = _state()
+    g = ac.update(st, CFG, 300.0, inflight=6, base_max=6, dropped=True)
+    assert g == 0.5
+    assert st.limit < 6.0
+
+
+def test_limit_floored_at_min_cap() -> None:
+    st = _state(limit=1.0)
+    for _ in range(10):
+        ac.update(st, CFG, 1000.0, inflight=1, base_max=6, dropped=True)
+    assert st.limit >= CFG.min_cap
+    assert ac.effective_cap(st.limit, CFG, 6) == 1
+
+
+def test_long_rtt_decays_after_latency_drop() -> None:
+    st = ac.ControllerState(limit=6.0, short_rtt=300.0, long_rtt=300.0, samples=5)
+    for _ in range(5):
+        ac.update(st, CFG, 30.0, inflight=6, base_max=6)
+    before = st.long_rtt
+    ac.update(st, CFG, 30.0, inflight=6, base_max=6)
+    assert st.long_rtt < before
+
+
+def test_effective_cap_floors() -> None:
+    assert ac.effective_cap(4.99, CFG, 6) == 4
+    assert ac.effective_cap(9.0, CFG, 6) == 6
+    assert ac.effective_cap(0.2, CFG, 6) == 1
+
+
+# --- sample (filesystem + decisions log) ---------------------------------
+
+
+def test_sample_writes_cap_and_logs_change(tmp_path: Path) -> None:
+    (tmp_path / ".dispatch-slots").write_text("6\n")
+    for lat in (60, 60, 60, 300, 300, 300):
+        cap = ac.sample(str(tmp_path), "fd-x", lat, base_max=6, cfg=CFG)
+    assert cap < 6
+    assert (tmp_path / ".dispatch-cap").read_text().strip() == str(cap)
+    records = dl.read_log(str(tmp_path))
+    assert records, "cap change must be logged"
+    rec = records[-1]
+    assert rec["name"] == "adaptive-cap"
+    assert rec["decision_type"] == "concurrency"
+    assert rec["extra"]["new_cap"] == cap
+    assert rec["extra"]["agent"] == "fd-x"
+    assert {"gradient", "short_rtt_s", "long_rtt_s", "inflight"} <= rec["extra"].keys()
+
+
+def test_sample_no_change_no_log(tmp_path: Path) -> None:
+    (tmp_path / ".dispatch-slots").write_text("6\n")
+    ac.sample(str(tmp_path), "fd-x", 60, base_max=6, cfg=CFG)
+    ac.sample(str(tmp_path), "fd-y", 61, base_max=6, cfg=CFG)
+    assert dl.read_log(str(tmp_path)) == []
+    assert not (tmp_path / ".dispatch-cap").exists()
+
+
+def test_sample_adopts_backoff_decrease(tmp_path: Path) -> None:
+    (tmp_path / ".dispatch-slots").write_text("2\n")
+    ac.sample(str(tmp_path), "fd-x", 60, base_max=6, cfg=CFG)
+    (tmp_path / ".dispatch-cap").write_text("2\n")  # flux-backoff.sh decrease
+    ac.sample(str(tmp_path), "fd-y", 60, base_max=6, cfg=CFG)
+    state = json.loads((tmp_path / ".dispatch-adaptive.json").read_text())
+    assert state["limit"] < 3.0
+
+
+def test_sample_recovery_removes_cap_file(tmp_path: Path) -> None:
+    (tmp_path / ".dispatch-slots").write_text("5\n")
+    (tmp_path / ".dispatch-cap").write_text("5\n")
+    for _ in range(4):
+        cap = ac.sample(str(tmp_path), "fd-x", 60, base_max=6, cfg=CFG)
+    assert cap == 6
+    assert not (tmp_path / ".dispatch-cap").exists()
+
+
+def test_sample_disabled_is_noop(tmp_path: Path) -> None:
+    cfg = ac.AdaptiveConfig(enabled=False)
+    assert ac.sample(str(tmp_path), "fd-x", 9999, base_max=6, dropped=True, cfg=cfg) == 6
+    assert list(tmp_path.iterdir()) == []
+
+
+# --- CLI + flux-dispatch.sh wiring ---------------------------------------
+
+
+def test_cli_sample_prints_cap(tmp_path: Path) -> None:
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "sample", str(tmp_path), "fd-x", "42", "--base-max", "4"],
+        capture_output=True, text=True, check=False,
+    )
+    assert result.returncode == 0
+    assert result.stdout.strip() == "4"
+
+
+def test_cli_rejects_negative_latency(tmp_path: Path) -> None:
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "sample", str(tmp_path), "fd-x", "-1"],
+        capture_output=True, text=True, check=False,
+    )
+    assert result.returncode == 4
+
+
+def test_dispatch_wait_feeds_controller_and_reset_clears(tmp_path: Path) -> None:
+    (tmp_path / "fd-x.md").write_text("done\n")
+    env = dict(os.environ, FLUX_ADAPTIVE_CAP="1")
+    subprocess.run(["bash", DISPATCH, "reset", str(tmp_path), "3"], check=True,
+                   capture_output=True, env=env)
+    subprocess.run(["bash", DISPATCH, "acquire", str(tmp_path), "3"], check=True,
+                   capture_output=True, env=env)
+    subprocess.run(["bash", DISPATCH, "wait", str(tmp_path), str(tmp_path / "fd-x.md"), "3", "5"],
+                   check=True, capture_output=True, env=env)
+    state = json.loads((tmp_path / ".dispatch-adaptive.json").read_text())
+    assert state["samples"] == 1
+    subprocess.run(["bash", DISPATCH, "reset", str(tmp_path), "3"], check=True,
+                   capture_output=True, env=env)
+    assert not (tmp_path / ".dispatch-adaptive.json").exists()
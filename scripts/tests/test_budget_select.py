@@ -0,0 +1,115 @@
+"""Unit tests for scripts/_budget_select.py."""
+from __future__ import annotations
+
+import itertools
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _budget_select as bs  # noqa: E402
+
+CONFIG = bs.BudgetConfig(budgets={"plan": 150000}, min_agents=2,
+                         exempt_agents=frozenset({"fd-safety", "fd-correctness"}))
+
+
+def C(name: str, score: float, cost: int, stage: int = 2) -> bs.Candidate:
+    return bs.Candidate(name, score, stage, cost)
+
+
+def _names(result: dict, key: str = "selected") -> set[str]:
+    return {a["name"] for a in result[key]}
+
+
+def test_load_config_and_overrides(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = bs.load_config()
+    assert cfg.budgets["plan"] == 150000 and cfg.min_agents == 2
+    assert cfg.exempt_agents == {"fd-safety", "fd-correctness"}
+
+    (tmp_path / ".claude").mkdir()
+    (tmp_path / ".claude" / "flux-drive-budget.yaml").write_text("budgets:\n  plan: 1000\nmin_agents: 1\n")
+    cfg = bs.load_config(project_root=str(tmp_path))
+    assert cfg.budgets == {"plan": 1000} and cfg.min_agents == 1
+    monkeypatch.setenv("FLUX_BUDGET_REMAINING", "400")
+    assert bs.effective_budget(cfg, "plan") == 400
+    with pytest.raises(KeyError):
+        bs.effective_budget(cfg, "nope")
+
+
+def test_knapsack_beats_greedy_by_score() -> None:
+    cands = [C("fd-architecture", 5, 40000, stage=1), C("fd-quality", 4, 30000, stage=1),
+             C("fd-perf", 5, 60000), C("fd-game", 4, 40000), C("fd-ux", 4, 40000)]
+    result = bs.select(cands, 150000, CONFIG)
+    assert _names(result) == {"fd-architecture", "fd-quality", "fd-game", "fd-ux"}
+    assert result["expected_score"] == 17 and result["greedy_score"] == 14
+    assert result["selected_tokens"] == 150000 and not result["over_budget"]
+    (perf,) = result["excluded"]
+    assert perf["name"] == "fd-perf" and perf["reason"] == "budget"
+    assert perf["marginal"] == {"score_delta": -3.0, "extra_tokens": 20000}
+
+
+def test_forced_agents_and_ship_class() -> None:
+    cands = [C("fd-architecture", 6, 90000, stage=1), C("fd-correctness", 3, 50000),
+             C("fd-safety", 0, 45000), C("fd-perf", 7, 1000), C("fd-zero", 0, 1)]
+    result = bs.select(cands, 100000, CONFIG)
+    reasons = {a["name"]: a["reason"] for a in result["selected"]}
+    assert reasons == {"fd-architecture": "stage-1", "fd-correctness": "exempt"}
+    assert result["over_budget"] and result["capacity"] == 0
+    assert {a["name"]: a["reason"] for a in result["excluded"]}["fd-zero"] == "score"
+
+    shipped = bs.select(cands, 100000, CONFIG, ship_class=True)
+    safety = next(a for a in shipped["selected"] if a["name"] == "fd-safety")
+    assert safety["reason"] == "ship-class" and safety["stage"] == 1
+
+
+def test_min_agents_constrains_and_tops_up() -> None:
+    # fd-big alone outscores fd-b + fd-c, but min_agents=3 needs two Stage 2 picks.
+    cands = [C("fd-a", 3, 10, stage=1), C("fd-big", 7, 100), C("fd-b", 3, 50), C("fd-c", 3, 50)]
+    cfg = bs.BudgetConfig(budgets={}, min_agents=3)
+    assert _names(bs.select(cands, 110, cfg)) == {"fd-a", "fd-b", "fd-c"}
+    # Nothing fits: the top-scoring agents are added over budget.
+    result = bs.select(cands, 10, cfg)
+    assert {a["name"]: a["reason"] for a in result["selected"]} == {
+        "fd-a": "stage-1", "fd-big": "min_agents", "fd-b": "min_agents"}
+    assert result["over_budget"]
+
+
+def test_matches_brute_force_and_is_deterministic() -> None:
+    rng = random.Random(7)
+    for _ in range(40):
+        pool = [C(f"fd-{i}", rng.choice([0.5, 1, 2, 3.5, 5, 8]), rng.randrange(1000, 60000))
+                for i in range(7)]
+        cap = rng.randrange(20000, 200000)
+        best = max((sum(c.score for c in s), -sum(c.cost for c in s))
+                   for r in range(len(pool) + 1) for s in itertools.combinations(pool, r)
+                   if sum(c.cost for c in s) <= cap)
+        cfg = bs.BudgetConfig(min_agents=0)
+        result = bs.select(pool, cap, cfg)
+        assert (result["expected_score"], -result["selected_tokens"]) == (pytest.approx(best[0]), best[1])
+        assert bs.select(list(reversed(pool)), cap, cfg) == result
+
+
+def test_cli_predicts_missing_costs(tmp_path: Path, capsys: pytest.CaptureFixture[str],
+                                    monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("FLUX_BUDGET_REMAINING", raising=False)
+    cands = tmp_path / "c.json"
+    cands.write_text(json.dumps({"agents": [
+        {"name": "fd-architecture", "score": 5, "stage": 1, "est_tokens": 40000},
+        {"name": "fd-people", "score": 3, "stage": 2},
+        {"name": "fd-perf", "score": 4, "stage": 2, "est_tokens": 70000}]}))
+    assert bs.main(["select", "--input-type", "plan", "--candidates", str(cands)]) == 0
+    doc = json.loads(capsys.readouterr().out)
+    assert doc["budget"] == 150000 and doc["budget_type"] == "plan"
+    people = next(a for a in doc["selected"] if a["name"] == "fd-people")
+    assert people["est_tokens"] == 35000  # budget.yaml cognitive default via the predictor
+    assert doc["expected_score"] == 12 and doc["selected_tokens"] == 145000
+
+    assert bs.main(["select", "--input-type", "nope", "--candidates", str(cands)]) == 2
+    cands.write_text("[{\"score\": 1}]")
+    assert bs.main(["select", "--input-type", "plan", "--candidates", str(cands)]) == 2
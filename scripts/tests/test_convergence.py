@@ -0,0 +1,106 @@
+"""Unit tests for scripts/_convergence.py."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _convergence as cv  # noqa: E402
+import _findings_index as fi  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "_convergence.py")
+HELPER = str(ROOT / "scripts" / "findings-helper.sh")
+
+
+def _agent(d: Path, name: str, *bullets: str) -> None:
+    body = "### Findings Index\n" + "".join(f"- {b}\n" for b in bullets) + "Verdict: risky\n"
+    (d / f"{name}.md").write_text(body)
+
+
+def _run(d: Path, **kw) -> dict:
+    return cv.convergence(fi.open_index(str(d)), cv.ConvergenceConfig(**kw))
+
+
+def test_paraphrases_cluster_within_section(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", 'P0 | A-1 | "Auth" | Token leaked in logs',
+           'P1 | A-2 | "Cache" | Race condition in cache eviction')
+    _agent(tmp_path, "fd-b", 'P1 | B-1 | "Auth" | Auth token leaked into logs')
+    _agent(tmp_path, "fd-c", 'P2 | C-1 | "Auth" | Token leaked in logs')  # filtered out
+    report = _run(tmp_path)
+    assert (report["total_findings"], report["overlapping_findings"], report["agent_count"]) == (2, 1, 2)
+    assert report["overlap_ratio"] == 0.5
+    (shared,) = [c for c in report["clusters"] if len(c["agents"]) == 2]
+    assert shared["agents"] == ["fd-a", "fd-b"]
+    assert shared["severity"] == "P0"
+    assert [m["id"] for m in shared["members"]] == ["A-1", "B-1"]
+
+
+def test_threshold_one_is_exact_match(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", 'P0 | A-1 | "Auth" | Token leaked in logs')
+    _agent(tmp_path, "fd-b", 'P1 | B-1 | "Auth" | Auth token leaked into logs',
+           'P1 | B-2 | "Auth" | token-leaked in logs!')
+    report = _run(tmp_path, threshold=1.0)
+    # "token-leaked in logs!" normalizes to the same key as A-1, the paraphrase does not.
+    assert (report["total_findings"], report["overlapping_findings"]) == (2, 1)
+
+
+def test_sections_block_comparison(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", 'P0 | A-1 | "Auth" | Token leaked in logs')
+    _agent(tmp_path, "fd-b", 'P0 | B-1 | "Logging" | Token leaked in logs')
+    report = _run(tmp_path)
+    assert report["overlapping_findings"] == 0
+    assert report["total_findings"] == 2
+
+
+def test_per_agent_contribution(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", 'P0 | A-1 | "S" | Unbounded retry loop',
+           'P1 | A-2 | "S" | Missing lock on registry write')
+    _agent(tmp_path, "fd-b", 'P1 | B-1 | "S" | Retry loop is unbounded')
+    pa = _run(tmp_path)["per_agent"]
+    assert pa["fd-a"] == {"findings": 2, "clusters": 2, "shared": 1, "unique": 1, "contribution": 0.75}
+    assert pa["fd-b"] == {"findings": 1, "clusters": 1, "shared": 1, "unique": 0, "contribution": 0.25}
+
+
+def test_run_uuid_excludes_foreign(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text('<!-- run-uuid: r1 -->\n### Findings Index\n- P0 | A | "S" | x y z\n')
+    (tmp_path / "fd-b.md").write_text('<!-- run-uuid: old -->\n### Findings Index\n- P0 | B | "S" | x y z\n')
+    report = cv.convergence(fi.open_index(str(tmp_path)), run_uuid="r1")
+    assert report["agent_count"] == 1
+
+
+def test_load_config(tmp_path: Path) -> None:
+    assert cv.load_config(cv.DEFAULT_CONFIG) == cv.ConvergenceConfig(0.6, ("P0", "P1"))
+    cfg = tmp_path / "r.yaml"
+    cfg.write_text("convergence:\n  similarity_threshold: 3\n  severities: [p0]\n")
+    assert cv.load_config(str(cfg)) == cv.ConvergenceConfig(0.6, ("P0",))
+
+
+def test_helper_convergence_tsv(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", 'P0 | A-1 | "Auth" | Token leaked in logs')
+    _agent(tmp_path, "fd-b", 'P1 | B-1 | "Auth" | Auth token leaked into logs')
+    out = subprocess.run(["bash", HELPER, "convergence", str(tmp_path)],
+                         capture_output=True, text=True, check=True).stdout
+    assert out == "1.0000\t1\t1\t2\n"
+
+
+def test_cli_json_and_empty_dir(tmp_path: Path) -> None:
+    res = subprocess.run([sys.executable, SCRIPT, str(tmp_path), "--json"],
+                         capture_output=True, text=True, check=True)
+    data = json.loads(res.stdout)
+    assert data["total_findings"] == 0 and data["clusters"] == []
+    res = subprocess.run([sys.executable, SCRIPT, str(tmp_path)],
+                         capture_output=True, text=True, check=True)
+    assert res.stdout == "0.0000\t0\t0\t0\n"
+
+
+def test_cli_errors(tmp_path: Path) -> None:
+    assert subprocess.run([sys.executable, SCRIPT, str(tmp_path / "nope")],
+                          capture_output=True, check=False).returncode == 1
+    env = dict(os.environ, FLUX_CONVERGENCE_THRESHOLD="bogus")
+    assert subprocess.run([sys.executable, SCRIPT, str(tmp_path)], env=env,
+                          capture_output=True, check=False).returncode == 1
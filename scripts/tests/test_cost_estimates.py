@@ -0,0 +1,134 @@
+"""Unit tests for scripts/_cost_estimates.py and estimate-costs.sh's Python path."""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _cost_estimates as ce  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "estimate-costs.sh")
+MODEL = "claude-sonnet-4-6"
+
+
+def _make_db(path: Path, rows: list[tuple]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE agent_runs (
+        id INTEGER PRIMARY KEY, timestamp TEXT, session_id TEXT, agent_name TEXT NOT NULL,
+        input_tokens INTEGER, output_tokens INTEGER, total_tokens INTEGER, model TEXT)""")
+    conn.executemany("INSERT INTO agent_runs (timestamp, session_id, agent_name, input_tokens, "
+                     "output_tokens, total_tokens, model) VALUES ('t', 's', ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+ROWS = (
+    [("interflux:fd-safety", 15000, 20000, 35000, MODEL)] * 3
+    + [("fd-safety", 16000, None, 40000, None)]
+    + [("fd-quality", 1000, 1001, 5000, MODEL)] * 2          # < 3 runs
+    + [("fd-perf", 100, 200, 300, "other-model")] * 5         # other model
+    + [("fd-arch", 10, 11, None, MODEL)] * 4                  # no total_tokens
+)
+
+
+def test_query_matches_shell_semantics(tmp_path: Path) -> None:
+    db = _make_db(tmp_path / "metrics.db", ROWS)
+    assert ce.query_interstat(str(db), MODEL) == {
+        "fd-safety": {"est_tokens": 36250, "est_billing": 30250, "sample_size": 4, "source": "interstat"},
+    }
+
+
+def test_cache_hit_skips_query_until_db_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    db = _make_db(tmp_path / "metrics.db", ROWS)
+    cache = str(tmp_path / "state" / ce.CACHE_FILENAME)
+    calls = []
+    real = ce.query_interstat
+    monkeypatch.setattr(ce, "query_interstat", lambda *a: (calls.append(a), real(*a))[1])
+
+    first = ce.interstat_estimates(str(db), MODEL, cache_file=cache, ttl=60, now=1000)
+    assert ce.interstat_estimates(str(db), MODEL, cache_file=cache, ttl=60, now=1030) == first
+    assert len(calls) == 1
+    ce.interstat_estimates(str(db), "other-model", cache_file=cache, ttl=60, now=1030)
+    assert len(calls) == 2  # keyed per model
+
+    conn = sqlite3.connect(db)
+    conn.executemany("INSERT INTO agent_runs (agent_name, total_tokens, model) VALUES (?, ?, ?)",
+                     [("fd-new", 10, MODEL)] * 3)
+    conn.commit()
+    conn.close()
+    fresh = ce.interstat_estimates(str(db), MODEL, cache_file=cache, ttl=60, now=1031)
+    assert "fd-new" in fresh and len(calls) == 3
+
+    ce.interstat_estimates(str(db), MODEL, cache_file=cache, ttl=60, now=1200)
+    assert len(calls) == 4  # TTL expired
+
+
+def test_query_is_read_only_and_errors_degrade(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    db = _make_db(tmp_path / "metrics.db", ROWS)
+    before = ce.db_signature(str(db))
+    ce.interstat_estimates(str(db), MODEL, use_cache=False)
+    assert ce.db_signature(str(db)) == before
+
+    broken = tmp_path / "broken.db"
+    sqlite3.connect(broken).execute("CREATE TABLE agent_runs (agent_name TEXT)").connection.commit()
+    cache = str(tmp_path / "c.json")
+    assert ce.interstat_estimates(str(broken), MODEL, cache_file=cache) == {}
+    assert "sqlite query failed" in capsys.readouterr().err
+    assert not os.path.exists(cache)  # failures are not cached
+    assert ce.interstat_estimates(str(tmp_path / "missing.db"), MODEL) == {}
+
+
+def test_budget_defaults_and_multiplier(tmp_path: Path) -> None:
+    assert ce.load_defaults() == {"review": 40000, "cognitive": 35000, "research": 15000,
+                                  "oracle": 80000, "generated": 40000}
+    assert ce.load_slicing_multiplier() == 0.5
+    cfg = tmp_path / "b.yaml"
+    cfg.write_text("agent_defaults:\n  review: 12345  # note\nslicing_multiplier: 0.25\n")
+    assert ce.load_defaults(str(cfg))["review"] == 12345
+    assert ce.load_defaults(str(cfg))["oracle"] == 40000
+    assert ce.load_slicing_multiplier(str(cfg)) == 0.25
+    assert ce.load_slicing_multiplier(str(tmp_path / "none.yaml")) == 0.5
+
+
+def _run(home: Path, *args: str, **env: str) -> subprocess.CompletedProcess[str]:
+    full_env = {**os.environ, "HOME": str(home), **env}
+    full_env.pop("CLAVAIN_SOURCE_DIR", None)
+    full_env.pop("INTERFLUX_STATE_DIR", None)
+    return subprocess.run(["bash", SCRIPT, *args], capture_output=True, text=True,
+                          check=False, env=full_env)
+
+
+def test_script_output_shape(tmp_path: Path) -> None:
+    _make_db(tmp_path / ".claude" / "interstat" / "metrics.db", ROWS)
+    r = _run(tmp_path, "--model", MODEL, "--slicing")
+    assert r.returncode == 0, r.stderr
+    doc = json.loads(r.stdout)
+    assert set(doc) == {"estimates", "defaults", "slicing_multiplier"}
+    assert doc["estimates"]["fd-safety"]["est_billing"] == 30250
+    assert doc["slicing_multiplier"] == 0.5
+    assert (tmp_path / ".config" / "interflux" / ce.CACHE_FILENAME).exists()
+    assert json.loads(_run(tmp_path, "--model", MODEL).stdout)["slicing_multiplier"] == 1.0
+
+
+def test_script_rejects_bad_model(tmp_path: Path) -> None:
+    r = _run(tmp_path, "--model", "x'; DROP TABLE agent_runs; --")
+    assert r.returncode == 1 and "invalid model name" in r.stderr
+
+
+@pytest.mark.skipif(shutil.which("sqlite3") is None, reason="legacy path needs the sqlite3 CLI")
+def test_script_parity_with_legacy_sqlite_path(tmp_path: Path) -> None:
+    _make_db(tmp_path / ".claude" / "interstat" / "metrics.db", ROWS)
+    py = json.loads(_run(tmp_path, "--model", MODEL, "--slicing").stdout)
+    sh = json.loads(_run(tmp_path, "--model", MODEL, "--slicing", FLUX_COST_ESTIMATES_LEGACY="1").stdout)
+    assert py == sh
@@ -0,0 +1,140 @@
+"""Unit tests for scripts/_cost_predictor.py."""
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _cost_predictor as cp  # noqa: E402
+
+MODEL = "claude-sonnet-4-6"
+
+
+def _make_db(path: Path, rows: list[tuple]) -> Path:
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE agent_runs (
+        id INTEGER PRIMARY KEY, agent_name TEXT NOT NULL, input_tokens INTEGER,
+        output_tokens INTEGER, total_tokens INTEGER, model TEXT)""")
+    conn.executemany("INSERT INTO agent_runs (agent_name, input_tokens, output_tokens, "
+                     "total_tokens, model) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _write_report(root: Path, name: str, *, budget_type: str, lines: int | None,
+                  agents: list[tuple[str, int, bool]], model: str = MODEL) -> None:
+    d = root / name
+    d.mkdir(parents=True)
+    report = {"budget_type": budget_type, "model": model,
+              "agents": [{"name": a, "actual_billing": t, "actual_total": t * 2,
+                          "slicing_applied": s} for a, t, s in agents]}
+    if lines is not None:
+        report["input_lines"] = lines
+    (d / "findings.json").write_text(json.dumps({"cost_report": report}))
+
+
+def test_quantile_helpers() -> None:
+    vals = sorted(float(v) for v in range(1, 11))
+    assert cp._quantile(vals, 0.5) == 5 and cp._quantile(vals, 0.9) == 9
+    assert cp.classify_agent("fd-people") == "cognitive"
+    assert cp.classify_agent("repo-analyst") == "research"
+    assert cp.classify_agent("fd-safety") == "review"
+
+
+def test_interstat_quantiles_per_model_and_agent(tmp_path: Path) -> None:
+    rows = ([("interflux:fd-safety", v, 0, v, MODEL) for v in range(100, 1100, 100)]
+            + [("fd-safety", 5000, 0, 5000, None)]
+            + [("fd-safety", 9, 0, 9, "other")])
+    db = _make_db(tmp_path / "m.db", rows)
+    q = cp.query_quantiles(str(db))
+    model_cell = q["agent_model"]["fd-safety"][MODEL]
+    assert model_cell["n"] == 11                     # NULL-model row counts for every model
+    assert (model_cell["p50"], model_cell["p90"]) == (600, 1000)
+    assert q["agent_model"]["fd-safety"]["other"]["n"] == 2
+    assert q["agent"]["fd-safety"]["n"] == 12
+
+    cache = tmp_path / "state" / "cost-estimates.json"
+    import _cost_estimates as ce
+    ce.cached_query(str(db), "quantiles|billing", lambda: q, cache_file=str(cache))
+    assert json.loads(cache.read_text())  # shares the estimate-costs cache file
+
+
+def test_elasticity_recovers_size_exponent() -> None:
+    obs = [cp.Observation("fd-a", 1000 * (n / 500) ** 0.8, input_lines=n) for n in (100, 200, 400, 800, 1600)]
+    obs += [cp.Observation("fd-b", 3000 * (n / 500) ** 0.8, input_lines=n) for n in (50, 500, 5000)]
+    assert cp.fit_elasticity(obs) == pytest.approx(0.8)
+    assert cp.fit_elasticity(obs[:4]) == 0.0          # too few points to fit
+    steep = [cp.Observation("fd-a", n ** 3, input_lines=n) for n in range(10, 100, 10)]
+    assert cp.fit_elasticity(steep) == cp.BETA_MAX
+
+
+def test_backoff_hierarchy(tmp_path: Path) -> None:
+    for i in range(6):
+        _write_report(tmp_path, f"r{i}", budget_type="plan", lines=500,
+                      agents=[("fd-safety", 1000 + 100 * i, False), ("fd-quality", 2000, False)])
+    interstat = {"agent_model": {"fd-perf": {MODEL: {"n": 7, "p50": 8000, "p90": 12000}}},
+                 "agent": {"fd-perf": {"n": 20, "p50": 9000, "p90": 15000},
+                           "fd-game": {"n": 5, "p50": 100, "p90": 200}}}
+    pred = cp.Predictor(cp.cost_report_observations([str(tmp_path)]), interstat,
+                        defaults={"review": 40000, "cognitive": 35000}, slicing_fallback=0.5)
+
+    p = pred.predict("fd-safety", MODEL, "plan", 500)
+    assert p.basis == "agent+model+type" and (p.p50, p.n) == (1200, 6)
+    assert pred.predict("fd-safety", "other-model", "plan", 500).basis == "agent+type"
+    assert pred.predict("fd-perf", MODEL, "plan").basis == "interstat:agent+model"
+    assert pred.predict("fd-perf", "other-model").basis == "interstat:agent"
+    p = pred.predict("fd-people", MODEL)
+    assert (p.basis, p.p50, p.p90) == ("default", 35000, 35000 * cp.PRIOR_P90_RATIO)
+
+    sliced = pred.predict("fd-perf", "", slicing=True)
+    assert sliced.basis.endswith("+slicing-ratio") and sliced.p50 == 4500
+    assert pred.predict("fd-quality", MODEL, slicing=True).basis == "default"  # never sliced
+
+
+def test_learned_slicing_ratio_and_size_scaling(tmp_path: Path) -> None:
+    obs = []
+    for n in (250, 500, 1000, 2000, 4000):
+        obs.append(cp.Observation("fd-safety", 1000 * n / 500, MODEL, "repo", n, False))
+        obs.append(cp.Observation("fd-safety", 250 * n / 500, MODEL, "repo", n, True))
+    pred = cp.Predictor(obs, slicing_fallback=0.5)
+    assert pred.beta == pytest.approx(1.0)
+    assert pred.slicing_ratio == pytest.approx(0.25)
+    assert pred.predict("fd-safety", MODEL, "repo", 2000).p50 == pytest.approx(4000)
+    assert pred.predict("fd-safety", MODEL, "repo", 2000, slicing=True).p50 == pytest.approx(1000)
+
+
+def test_set_total_and_overrun_probability() -> None:
+    preds = [cp.Prediction(f"a{i}", 1000, 1000 + cp.Z90 * 100, 10, "x") for i in range(4)]
+    t = cp.total(preds)
+    assert t["p50"] == 4000
+    assert t["p90"] == pytest.approx(4000 + cp.Z90 * 200)
+    assert t["p90"] < sum(p.p90 for p in preds)      # pooled spread < summed p90s
+    assert cp.overrun_probability(preds, 4000) == pytest.approx(0.5)
+    assert cp.overrun_probability(preds, t["p90"]) == pytest.approx(0.1)
+    flat = [cp.Prediction("a", 10, 10, 0, "x")]
+    assert cp.overrun_probability(flat, 9) == 1.0 and cp.overrun_probability(flat, 10) == 0.0
+
+
+def test_cli_predict(tmp_path: Path, capsys: pytest.CaptureFixture[str],
+                     monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("INTERFLUX_STATE_DIR", str(tmp_path / "state"))
+    db = _make_db(tmp_path / "m.db", [("fd-safety", 1000, 0, 1000, MODEL)] * 6)
+    rc = cp.main(["predict", "--agents", "fd-safety,fd-people", "--model", MODEL,
+                  "--db", str(db), "--budget", "50000"])
+    assert rc == 0
+    doc = json.loads(capsys.readouterr().out)
+    assert doc["agents"]["fd-safety"] == {"p50": 1000, "p90": 1000, "n": 6,
+                                          "basis": "interstat:agent+model"}
+    assert doc["agents"]["fd-people"]["basis"] == "default"
+    assert doc["total"]["p50"] == 36000
+    assert 0 < doc["overrun_probability"] < 0.5
+    assert math.isclose(doc["total"]["p90"], 36000 + cp.Z90 * 17500 / cp.Z90, abs_tol=1)
+    assert cp.main(["predict", "--agents", "a", "--model", "bad model"]) == 1
@@ -0,0 +1,154 @@
+"""Unit tests for scripts/_findings_index.py."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _findings_index as fi  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "_findings_index.py")
+HELPER = str(ROOT / "scripts" / "findings-helper.sh")
+
+AGENT_MD = """<!-- run-uuid: r1 -->
+### Findings Index
+- P0 | SAF-1 | "Auth" | Token leaked in logs
+- P2 | SAF-2 | "Docs" | Typo in README
+Verdict: risky
+
+### Summary
+- P1 | NOT-1 | "Prose" | this bullet is outside the index
+<!-- flux-drive:complete -->
+"""
+
+
+def _records(d: Path) -> list[dict]:
+    return [json.loads(x) for x in (d / fi.INDEX_FILENAME).read_text().splitlines()]
+
+
+def test_parse_bullet_fields() -> None:
+    assert fi.parse_bullet('- p1 | ARC-3 | "Section A" | Title | with pipe') == {
+        "severity": "P1", "id": "ARC-3", "section": "Section A", "title": "Title | with pipe",
+    }
+    assert fi.parse_bullet("Verdict: safe")["severity"] is None
+
+
+def test_agent_base_exclusions() -> None:
+    assert fi.agent_base("fd-x.r1.md.partial") == "fd-x.r1"
+    assert fi.agent_base("synthesis.md") is None
+    assert fi.agent_base("fd-x.reactions.md") is None
+    assert fi.agent_base("fd-x.md.partial.aborted-1") is None
+
+
+def test_incremental_partial_then_rename(tmp_path: Path) -> None:
+    idx = fi.FindingsIndex(str(tmp_path), str(tmp_path / fi.INDEX_FILENAME))
+    partial = tmp_path / "fd-a.md.partial"
+    partial.write_text("<!-- run-uuid: r1 -->\n### Findings Index\n- P0 | SAF-1 | \"Auth\" | Tok")
+    a = idx.update(str(partial))
+    assert a is not None and a.lines == []  # fragment not yet newline-terminated
+    with partial.open("a") as fh:
+        fh.write("en leaked\n")
+    idx.update(str(partial))
+    assert [ln.title for ln in a.lines] == ["Token leaked"]
+    with partial.open("a") as fh:
+        fh.write("Verdict: risky\n\n### Summary\n- P1 | X-1 | \"S\" | prose\n")
+    partial.rename(tmp_path / "fd-a.md")
+    a = idx.update(str(tmp_path / "fd-a.md"))
+    assert [ln.text for ln in a.lines] == ['- P0 | SAF-1 | "Auth" | Token leaked', "Verdict: risky"]
+    assert a.run_uuid == "r1"
+    assert a.complete is not None
+    events = [r["event"] for r in _records(tmp_path)]
+    assert events == ["reset", "line", "line", "complete"]
+
+
+def test_replay_serves_completed_agents_without_reparse(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text(AGENT_MD)
+    fi.open_index(str(tmp_path), persist=True)
+    before = len(_records(tmp_path))
+    idx = fi.open_index(str(tmp_path), persist=True)
+    assert len(_records(tmp_path)) == before  # nothing re-emitted
+    (a,) = idx.completed()
+    assert [ln.id for ln in a.findings] == ["SAF-1", "SAF-2"]
+
+
+def test_replaced_file_is_reset(tmp_path: Path) -> None:
+    md = tmp_path / "fd-a.md"
+    md.write_text(AGENT_MD)
+    fi.open_index(str(tmp_path), persist=True)
+    md.unlink()
+    md.write_text("### Findings Index\n- P1 | NEW-1 | \"S\" | Replaced\n")
+    fi.open_index(str(tmp_path), persist=True)
+    idx = fi.FindingsIndex.load(str(tmp_path))
+    assert [ln.id for ln in idx.agents["fd-a"].findings] == ["NEW-1"]
+
+
+def test_deleted_or_renamed_agent_is_not_served(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text(AGENT_MD)
+    (tmp_path / "fd-b.md").write_text("### Findings Index\n- P1 | B-1 | \"X\" | Thing\n")
+    fi.open_index(str(tmp_path), persist=True)
+    (tmp_path / "fd-b.md").unlink()
+    helper = subprocess.run(["bash", HELPER, "read-indexes", str(tmp_path)],
+                            capture_output=True, text=True, check=True)
+    assert "fd-b" not in helper.stdout and "fd-a\t" in helper.stdout
+    (tmp_path / "fd-a.md").rename(tmp_path / "fd-a.old")
+    assert fi.open_index(str(tmp_path), persist=True).completed() == []
+    assert fi.FindingsIndex.load(str(tmp_path)).agents == {}  # the log records the drop
+
+
+def test_load_skips_torn_lines_and_drops_incomplete(tmp_path: Path) -> None:
+    (tmp_path / fi.INDEX_FILENAME).write_text(
+        '{"event":"line","agent":"fd-a","line_no":2,"text":"- P0 | A | \\"S\\" | t"}\n{"event":"li'
+    )
+    assert fi.FindingsIndex.load(str(tmp_path)).agents == {}
+
+
+def test_read_indexes_matches_awk_path(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.r1.md").write_text(AGENT_MD)
+    (tmp_path / "fd-b.r1.md").write_text("## findings index\n- P1 | B-1 | \"X\" | Thing\n#### Next\n")
+    (tmp_path / "fd-c.r1.md.partial").write_text(AGENT_MD)
+    (tmp_path / "synthesis.md").write_text(AGENT_MD)
+    (tmp_path / "fd-a.reactions.md").write_text(AGENT_MD)
+    fast = subprocess.run(["bash", HELPER, "read-indexes", str(tmp_path)],
+                          capture_output=True, text=True, check=True)
+    slow = subprocess.run(["bash", HELPER, "read-indexes", str(tmp_path)],
+                          capture_output=True, text=True, check=True,
+                          env=dict(os.environ, FLUX_FINDINGS_INDEX="0"))
+    # The awk path's {2,4} interval quantifier is a no-op under mawk, which
+    # silently yields nothing; parity is only meaningful against gawk.
+    awk = subprocess.run(["awk", "--version"], capture_output=True, text=True, check=False)
+    if "GNU Awk" in awk.stdout:
+        assert fast.stdout == slow.stdout
+    assert fast.stdout.splitlines() == [
+        'fd-a.r1\t- P0 | SAF-1 | "Auth" | Token leaked in logs',
+        'fd-a.r1\t- P2 | SAF-2 | "Docs" | Typo in README',
+        "fd-a.r1\tVerdict: risky",
+        'fd-b.r1\t- P1 | B-1 | "X" | Thing',
+    ]
+
+
+def test_cli_missing_dir_exit_one(tmp_path: Path) -> None:
+    result = subprocess.run([sys.executable, SCRIPT, "read-indexes", str(tmp_path / "nope")],
+                            capture_output=True, text=True, check=False)
+    assert result.returncode == 1
+    assert "not found" in result.stderr
+
+
+def test_cli_build_summary(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text(AGENT_MD)
+    result = subprocess.run([sys.executable, SCRIPT, "build", str(tmp_path)],
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == {"agents": 1, "lines": 3, "findings": 2}
+    assert (tmp_path / fi.INDEX_FILENAME).exists()
+
+
+def test_flux_watch_builds_index_while_watching(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text(AGENT_MD)
+    subprocess.run([sys.executable, str(ROOT / "scripts" / "_flux_watch.py"), str(tmp_path), "1", "5"],
+                   capture_output=True, text=True, check=True)
+    idx = fi.FindingsIndex.load(str(tmp_path))
+    assert [ln.id for ln in idx.agents["fd-a"].findings] == ["SAF-1", "SAF-2"]
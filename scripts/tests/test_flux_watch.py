@@ -0,0 +1,187 @@
+"""Unit tests for scripts/_flux_watch.py (and its flux-watch.sh wiring)."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _flux_watch as fw  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "_flux_watch.py")
+WATCH_SH = str(ROOT / "scripts" / "flux-watch.sh")
+
+
+def _metrics(path: Path) -> list[dict]:
+    f = path / fw.METRICS_FILENAME
+    if not f.exists():
+        return []
+    return [json.loads(line) for line in f.read_text().splitlines() if line]
+
+
+def _later(delay: float, fn) -> threading.Thread:
+    def run() -> None:
+        time.sleep(delay)
+        fn()
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def source_factory(request: pytest.FixtureRequest):
+    def make(directory: Path):
+        if request.param == "poll":
+            return fw.PollSource(0.02)
+        try:
+            return fw.InotifySource(str(directory))
+        except OSError:
+            pytest.skip("inotify unavailable on this host")
+    return make
+
+
+def test_agent_key() -> None:
+    assert fw.agent_key("fd-x.md") == "fd-x"
+    assert fw.agent_key("fd-x.abc123.md.partial") == "fd-x.abc123"
+    assert fw.agent_key("synthesis.md") is None
+    assert fw.agent_key("fd-x.md.partial.aborted-1700000000") is None
+    assert fw.agent_key("fd-x.abort") is None
+
+
+def test_existing_files_reported_and_exit_zero(tmp_path: Path, source_factory) -> None:
+    for name in ("fd-a.md", "fd-b.md", "triage.md", "fd-c.md.partial"):
+        (tmp_path / name).write_text("x\n")
+    out = io.StringIO()
+    w = fw.Watcher(str(tmp_path), 2, 5, out=out)
+    assert w.run(source_factory(tmp_path)) == 0
+    lines = out.getvalue().splitlines()
+    assert [line.split("] ")[1] for line in lines] == ["fd-a", "fd-b"]
+    assert lines[0].startswith("[1/2 | ")
+
+
+def test_rename_detected_with_ttfb_and_ttc(tmp_path: Path, source_factory) -> None:
+    partial = tmp_path / "fd-a.r1.md.partial"
+
+    def write_then_rename() -> None:
+        partial.write_text("<!-- run-uuid: r1 -->\n")
+        time.sleep(0.1)
+        with partial.open("a") as fh:
+            fh.write("### Findings Index\n")
+        time.sleep(0.1)
+        partial.rename(tmp_path / "fd-a.r1.md")
+
+    out = io.StringIO()
+    w = fw.Watcher(str(tmp_path), 1, 5, run_uuid="r1", out=out)
+    _later(0.05, write_then_rename)
+    assert w.run(source_factory(tmp_path)) == 0
+    assert out.getvalue().strip().endswith("] fd-a.r1")
+    (rec,) = _metrics(tmp_path)
+    assert rec["agent"] == "fd-a.r1"
+    assert rec["status"] == "completed"
+    assert rec["run_uuid"] == "r1"
+    assert rec["ttfb_s"] is not None and rec["ttc_s"] is not None
+    assert rec["ttfb_s"] < rec["ttc_s"] < 5
+    assert rec["bytes"] > 0
+
+
+def test_timeout_exit_one_and_pending_metrics(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text("done\n")
+    (tmp_path / "fd-b.md.partial").write_text("partial\n")
+    w = fw.Watcher(str(tmp_path), 2, 0.2, out=io.StringIO())
+    assert w.run(fw.PollSource(0.02)) == 1
+    statuses = {r["agent"]: r["status"] for r in _metrics(tmp_path)}
+    assert statuses == {"fd-a": "completed", "fd-b": "timed-out"}
+
+
+def test_expected_zero_runs_to_timeout(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text("done\n")
+    out = io.StringIO()
+    w = fw.Watcher(str(tmp_path), 0, 0.1, out=out)
+    assert w.run(fw.PollSource(0.02)) == 1
+    assert out.getvalue().startswith("[1 | 0s] fd-a")
+
+
+def test_stall_rescue_writes_stub_for_silent_agent(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text("done\n")
+    out = io.StringIO()
+    w = fw.Watcher(str(tmp_path), 2, 5, stall_rescue=True, stall_timeout=0.2,
+                   expected_agents=["fd-a", "fd-b"], out=out)
+    assert w.run(fw.PollSource(0.02)) == 0
+    stub = (tmp_path / "fd-b.md").read_text()
+    assert "STATUS: error" in stub
+    peer = json.loads((tmp_path / "peer-findings.jsonl").read_text())
+    assert peer["agent"] == "fd-b" and peer["kind"] == "stall"
+    assert out.getvalue().splitlines()[-1].endswith("] fd-b")
+    assert {"agent": "fd-b", "status": "rescued"}.items() <= _metrics(tmp_path)[-1].items()
+
+
+def test_partial_growth_defers_stall_rescue(tmp_path: Path) -> None:
+    """A steadily growing partial keeps the stall window open for everyone."""
+    partial = tmp_path / "fd-a.md.partial"
+    stop = threading.Event()
+
+    def grow() -> None:
+        while not stop.is_set():
+            with partial.open("a") as fh:
+                fh.write("line\n")
+            time.sleep(0.05)
+
+    t = threading.Thread(target=grow, daemon=True)
+    t.start()
+    try:
+        w = fw.Watcher(str(tmp_path), 2, 0.6, stall_rescue=True, stall_timeout=0.3,
+                       expected_agents=["fd-b"], out=io.StringIO())
+        w.run(fw.PollSource(0.02))
+    finally:
+        stop.set()
+        t.join()
+    # fd-b is only rescued by the final timeout sweep, never mid-run.
+    assert w.progress["fd-a"].first_byte_at is not None
+    assert (tmp_path / "fd-b.md").exists()
+
+
+def test_stopped_partial_flagged_stalled_not_stubbed(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md.partial").write_text("started\n")
+    w = fw.Watcher(str(tmp_path), 1, 0.5, stall_rescue=True, stall_timeout=0.15,
+                   expected_agents=["fd-a"], out=io.StringIO())
+    assert w.run(fw.PollSource(0.02)) == 1
+    assert not (tmp_path / "fd-a.md").exists()
+    assert "stalled" in [r["status"] for r in _metrics(tmp_path)]
+
+
+def test_run_scoped_output_satisfies_bare_expected_agent(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.r9.md.partial").write_text("x\n")
+    w = fw.Watcher(str(tmp_path), 1, 5, stall_rescue=True, stall_timeout=0.1,
+                   expected_agents=["fd-a"], run_uuid="r9", out=io.StringIO())
+    w.rescue_stalled()
+    assert not (tmp_path / "fd-a.md").exists()
+
+
+def test_flux_watch_sh_delegates_and_matches_contract(tmp_path: Path) -> None:
+    (tmp_path / "fd-a.md").write_text("done\n")
+    env = dict(os.environ, FLUX_WATCH_POLL_MS="20")
+    result = subprocess.run(["bash", WATCH_SH, str(tmp_path), "1", "5"],
+                            capture_output=True, text=True, env=env, check=False)
+    assert result.returncode == 0
+    assert result.stdout.strip() == "[1/1 | 0s] fd-a"
+    assert _metrics(tmp_path)[0]["agent"] == "fd-a"
+
+
+def test_cli_timeout_exit_code(tmp_path: Path) -> None:
+    result = subprocess.run([sys.executable, SCRIPT, str(tmp_path), "1", "0"],
+                            capture_output=True, text=True, check=False)
+    assert result.returncode == 1
+
+
+def test_cli_usage_error() -> None:
+    result = subprocess.run([sys.executable, SCRIPT], capture_output=True, text=True, check=False)
+    assert result.returncode == 2
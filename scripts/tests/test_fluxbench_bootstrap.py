@@ -0,0 +1,146 @@
+"""Unit tests for scripts/_fluxbench_bootstrap.py."""
+from __future__ import annotations
+
+import dataclasses
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _fluxbench_bootstrap as fb  # noqa: E402
+import _fluxbench_pipeline as fp  # noqa: E402
+import _fluxbench_score as fs  # noqa: E402
+
+FIXTURES = ROOT / "tests" / "fixtures" / "qualification"
+THRESHOLDS = {fb.FORMAT: 0.95, fb.RECALL: 0.60, fb.FP_RATE: 0.20, fb.SEVERITY: 0.70}
+
+
+def _ground_truths() -> list[list[dict]]:
+    return [json.loads((d / "ground-truth.json").read_text())["findings"]
+            for d in sorted(FIXTURES.iterdir()) if d.name.startswith("fixture-")]
+
+
+def _perturb(truth: list[dict], rng: random.Random) -> list[dict]:
+    """Drop some findings, shift some severities, add a made-up one."""
+    out = []
+    for f in truth:
+        if rng.random() < 0.3:
+            continue
+        if rng.random() < 0.3:
+            f = {**f, "severity": rng.choice(["P0", "P1", "P2", "P3"])}
+        out.append(f)
+    return out + [{"severity": "P2", "location": "nowhere.py:1", "description": "made up"}]
+
+
+def test_fixture_match_metrics_agree_with_score_findings() -> None:
+    rng = random.Random(3)
+    for truth in _ground_truths():
+        for model in (truth, _perturb(truth, rng), _perturb(truth, rng), [], truth[:1]):
+            want = fs.score_findings(model, truth, 1.0)
+            recall, fp_rate, severity, p0 = fb.FixtureMatch.from_findings(model, truth).metrics()
+            assert (round(recall, 4), round(fp_rate, 4), round(severity, 4), p0) == \
+                (want["recall"], want["fp_rate"], want["severity_accuracy"], want["p0_auto_fail"])
+    assert fb.FixtureMatch.from_findings([], []).metrics() == (1.0, 0.0, 1.0, False)
+
+
+def test_sampler_draws_are_unbiased_and_fall_back_past_255_findings() -> None:
+    fx = fb.FixtureMatch(weight=(3.0, 1.0, 1.0), found=(3.0, 0.0, 1.0), matched=(1, 0, 1), sev_ok=(1, 0, 0),
+                         p0=(0, 0, 0), fp=(1, 0, 0, 0, 0))
+    rng = random.Random(1)
+    draws = [fb._Sampler(fx).draw(rng) for _ in range(20_000)]
+    assert sum(d[1] for d in draws) / len(draws) == pytest.approx(0.2, abs=0.01)  # FP share is a plain mean
+    assert all(0 <= d[0] <= 1 and 0 <= d[2] <= 1 for d in draws)
+
+    big = fb.FixtureMatch(weight=(1.0,) * 300, found=(1.0, 0.0) * 150, matched=(1, 0) * 150, sev_ok=(1, 0) * 150,
+                          p0=(0,) * 300, fp=(0,) * 300)
+    sampler = fb._Sampler(big)
+    assert sampler.base is None
+    recall, fp_rate, severity, p0 = sampler.draw(random.Random(2))
+    assert 0.35 < recall < 0.65 and fp_rate == 0.0 and severity == 1.0 and not p0
+
+
+def test_bootstrap_is_seeded_and_independent_of_jobs() -> None:
+    rng = random.Random(5)
+    fixtures = [fb.FixtureMatch.from_findings(_perturb(t, rng), t) for t in _ground_truths()]
+    doc = fb.bootstrap(fixtures, THRESHOLDS, resamples=2500, seed=9)
+    assert doc == fb.bootstrap(fixtures, THRESHOLDS, resamples=2500, seed=9, jobs=2)
+    assert doc != fb.bootstrap(fixtures, THRESHOLDS, resamples=2500, seed=10)
+    for name, m in doc["metrics"].items():
+        assert m["lower"] <= m["estimate"] <= m["upper"], name
+        assert 0 <= doc["gates"][name]["p_pass"] <= 1
+
+    with pytest.raises(ValueError):
+        fb.bootstrap(fixtures, THRESHOLDS, confidence=1.0)
+    with pytest.raises(ValueError):
+        fb.bootstrap([], THRESHOLDS)
+
+
+def test_failed_fixture_counts_against_format_compliance_only() -> None:
+    fixtures = [fb.FixtureMatch.from_findings(t, t) for t in _ground_truths()]
+    clean = fb.bootstrap(fixtures, THRESHOLDS, resamples=1000)
+    assert clean["metrics"][fb.RECALL] == {"estimate": 1.0, "lower": 1.0, "upper": 1.0}
+    assert all(g["p_pass"] == 1.0 and g["lcb_pass"] for g in clean["gates"].values())
+
+    doc = fb.bootstrap(fixtures[:4] + [fb.FixtureMatch.failed()], THRESHOLDS, resamples=1000)
+    assert doc["metrics"][fb.FORMAT]["estimate"] == 0.8
+    assert doc["gates"][fb.FORMAT]["p_pass"] < 0.5 and not doc["gates"][fb.FORMAT]["lcb_pass"]
+    assert doc["metrics"][fb.RECALL]["lower"] == 1.0
+
+
+def _noisy_fixtures(tmp_path: Path) -> tuple[Path, Path]:
+    """Three fixtures of five P2 findings; the response finds four of each."""
+    fixtures, work = tmp_path / "fixtures", tmp_path / "work"
+    names = [f"fixture-{i:02d}" for i in range(3)]
+    for i, name in enumerate(names):
+        truth = [{"severity": "P2", "location": f"mod{i}.py:{10 * k}", "description": f"defect {k} in mod{i}"}
+                 for k in range(5)]
+        (fixtures / name).mkdir(parents=True)
+        (fixtures / name / "ground-truth.json").write_text(json.dumps({"findings": truth}))
+        (work / name).mkdir(parents=True)
+        (work / name / "response.json").write_text(json.dumps({"findings": truth[:4]}))
+    (work / "manifest.json").write_text(json.dumps({"fixtures": names}))
+    return fixtures, work
+
+
+def test_qualify_gate_on_lcb_holds_back_a_thin_pass(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fixtures, work = _noisy_fixtures(tmp_path)
+    monkeypatch.setenv("INTERFLUX_STATE_DIR", str(tmp_path / "state"))
+    thresholds = tmp_path / "thresholds.yaml"
+    thresholds.write_text(yaml.dump({"thresholds": {fb.RECALL: 0.75}}))
+    paths = dataclasses.replace(fp.Paths.from_env({
+        "MODEL_REGISTRY": str(tmp_path / "model-registry.yaml"),
+        "FLUXBENCH_RESULTS_JSONL": str(tmp_path / "fluxbench-results.jsonl")}), thresholds=str(thresholds))
+    (tmp_path / "model-registry.yaml").write_text(yaml.dump({"models": {}}))
+
+    plain = fp.Pipeline(paths, now=1, resamples=2000).qualify("m", str(fixtures), str(work))
+    assert plain.status == "auto-qualified"  # recall 0.8 >= 0.75 on every fixture
+    recall = plain.to_dict()["bootstrap"]["gates"][fb.RECALL]
+    assert recall["p_pass"] < 1 and not recall["lcb_pass"]
+
+    gated = fp.Pipeline(paths, now=2, resamples=2000, gate_on_lcb=True).qualify("n", str(fixtures), str(work))
+    assert gated.status == "candidate"
+    assert "bootstrap" not in fp.Pipeline(paths, now=3).qualify("o", str(fixtures), str(work)).to_dict()
+
+
+def test_calibrate_bootstrap_writes_confidence_block(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fixtures, work = _noisy_fixtures(tmp_path)
+    monkeypatch.setenv("INTERFLUX_STATE_DIR", str(tmp_path / "state"))
+    paths = fp.Paths.from_env({"MODEL_REGISTRY": str(tmp_path / "model-registry.yaml"),
+                               "FLUXBENCH_RESULTS_JSONL": str(tmp_path / "fluxbench-results.jsonl")})
+    out = tmp_path / "thresholds.yaml"
+    doc = fp.Pipeline(paths, now=1, resamples=500, confidence=0.9).calibrate(str(out), str(fixtures))
+    written = yaml.safe_load(out.read_text())
+    assert written["confidence"]["level"] == 0.9 and written["confidence"]["resamples"] == 500
+    recall = written["confidence"][fb.RECALL]
+    assert recall == doc["confidence"][fb.RECALL] and recall["lower"] <= recall["point"] <= recall["upper"]
+    assert written["thresholds"][fb.RECALL] == recall["lower"]
+    assert written["thresholds"][fb.FP_RATE] == written["confidence"][fb.FP_RATE]["upper"]
+
+    low, high = fb.percentile_interval([0.2, 0.4, 0.6, 0.8], lambda v: fp.percentile(v, 25), 1000)
+    assert 0.2 <= low <= fp.percentile([0.2, 0.4, 0.6, 0.8], 25) <= high <= 0.8
@@ -0,0 +1,109 @@
+"""Unit tests for scripts/_fluxbench_drift.py."""
+from __future__ import annotations
+
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _fluxbench_drift as fd  # noqa: E402
+import _fluxbench_pipeline as fp  # noqa: E402
+import lib_registry as lr  # noqa: E402
+
+RECALL = "fluxbench-finding-recall"
+FP_RATE = "fluxbench-false-positive-rate"
+BASE = {RECALL: 0.9, FP_RATE: 0.1}
+
+
+def _paths(tmp_path: Path, models: dict, runs: list[tuple[str, dict]]) -> fp.Paths:
+    reg = tmp_path / "model-registry.yaml"
+    reg.write_text(yaml.dump({"fluxbench": {"drift_threshold": 0.15, "hysteresis_band": 0.05},
+                              "models": models}))
+    results = tmp_path / "fluxbench-results.jsonl"
+    results.write_text("".join(json.dumps({"model_slug": slug, "qualification_run_id": f"run-{i}",
+                                           "metrics": metrics}) + "\n"
+                               for i, (slug, metrics) in enumerate(runs)))
+    return fp.Paths.from_env({"MODEL_REGISTRY": str(reg), "FLUXBENCH_RESULTS_JSONL": str(results)})
+
+
+def _model(**extra) -> dict:
+    return {"status": "qualified", "qualified_baseline": dict(BASE), **extra}
+
+
+def test_latest_verdicts_match_drift_script_rules(tmp_path: Path) -> None:
+    rng = random.Random(7)
+    models, runs = {}, []
+    for n in range(40):
+        slug = f"m{n}"
+        models[slug] = _model(drift_flagged=rng.random() < 0.5)
+        for _ in range(rng.randint(1, 3)):
+            runs.append((slug, {RECALL: round(rng.uniform(0.6, 1.0), 3), FP_RATE: round(rng.uniform(0, 0.4), 3)}))
+    paths = _paths(tmp_path, models, runs)
+    pipeline = fp.Pipeline(paths)
+    doc = fd.run_scan(paths, fleet_check=False)
+
+    latest = {slug: metrics for slug, metrics in runs}
+    for slug, model in pipeline.registry()["models"].items():
+        want = fp.drift_verdict(slug, model["qualified_baseline"], latest[slug], 0.15, 0.05,
+                                model["drift_flagged"], pipeline.higher_is_better)
+        got = doc["models"][slug]
+        assert (got["verdict"], got["drifted_metrics"], got["max_drift"]) == \
+            (want["verdict"], want["drifted_metrics"], want["max_drift"]), slug
+
+
+def test_summary_line_stands_in_for_its_fixture_lines(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    paths = _paths(tmp_path, {}, [])
+    monkeypatch.setenv("INTERFLUX_STATE_DIR", str(tmp_path / "state"))
+    fp.Pipeline(paths, now=1_790_000_000).qualify("m", str(ROOT / "tests" / "fixtures" / "qualification"))
+    hist = fd.load_history(paths.results)
+    assert hist.models == ["m"] and hist.run_ids == ["summary-qr-m-1790000000"]
+    assert hist.columns[RECALL][0] == 1.0
+
+
+def test_cusum_and_ewma_flag_a_slide_the_threshold_misses(tmp_path: Path) -> None:
+    runs = [("slow", {RECALL: 0.9, FP_RATE: 0.1})] + [("slow", {RECALL: 0.8, FP_RATE: 0.1}) for _ in range(4)]
+    paths = _paths(tmp_path, {"slow": _model(), "steady": _model()},
+                   runs + [("steady", {RECALL: 0.88, FP_RATE: 0.12})])
+    doc = fd.run_scan(paths)
+    slow = doc["models"]["slow"]
+    assert slow["verdict"] == "no_drift" and slow["deltas"] == {FP_RATE: 0.0, RECALL: 0.1}
+    assert slow["early_warning"] == [RECALL]
+    # Four runs at 0.10 over a 0.05 slack: S = 0.20 > 0.15, excursion from the first slipped run.
+    assert slow["alarms"] == {RECALL: {"cusum": 0.2, "since": "run-1"}}
+    assert doc["models"]["steady"]["early_warning"] == []
+    # Improvement in a lower-is-better metric never accumulates.
+    assert FP_RATE not in slow["alarms"]
+
+
+def test_fleet_check_marks_correlated_drift(tmp_path: Path) -> None:
+    bad = {RECALL: 0.9, FP_RATE: 0.4}
+    paths = _paths(tmp_path, {"a": _model(), "b": _model(), "c": _model(status="auto-qualified")},
+                   [("a", bad), ("b", {RECALL: 0.9, FP_RATE: 0.1}), ("c", bad)])
+    doc = fd.run_scan(paths)
+    assert doc["fleet"]["flagged"] == 1 and doc["fleet"]["total"] == 2
+    assert doc["fleet"]["baseline_shift"] is True
+    assert doc["fleet"]["correlated_metrics"] == [FP_RATE]
+    assert doc["models"]["a"]["verdict"] == "baseline_shift_suspected"
+    assert doc["models"]["c"]["verdict"] == "baseline_shift_suspected"
+    assert fd.run_scan(paths, fleet_check=False)["models"]["a"]["verdict"] == "drift_detected"
+
+
+def test_apply_flags_and_clears_in_one_transaction(tmp_path: Path, capsys: pytest.CaptureFixture,
+                                                   monkeypatch: pytest.MonkeyPatch) -> None:
+    paths = _paths(tmp_path, {"hit": _model(), "ok": _model(drift_flagged=True), "new": {"status": "candidate"}},
+                   [("hit", {RECALL: 0.5}), ("ok", {RECALL: 0.9, FP_RATE: 0.1}), ("new", {RECALL: 0.1})])
+    doc = fd.run_scan(paths, apply=True)
+    assert doc["applied"] == 2 and "new" not in doc["models"]
+    models = lr.load_registry(paths.registry)["models"]
+    assert models["hit"]["drift_flagged"] is True and models["ok"]["drift_flagged"] is False
+
+    monkeypatch.setenv("MODEL_REGISTRY", paths.registry)
+    monkeypatch.setenv("FLUXBENCH_RESULTS_JSONL", paths.results)
+    assert fd.main(["scan", "--slug", "hit"]) == 0
+    assert list(json.loads(capsys.readouterr().out)["models"]) == ["hit"]
@@ -0,0 +1,270 @@
+"""Unit tests for scripts/_fluxbench_pipeline.py."""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _fluxbench_pipeline as fp  # noqa: E402
+import lib_registry as lr  # noqa: E402
+
+FIXTURES = ROOT / "tests" / "fixtures" / "qualification"
+NOW = 1_790_000_000
+
+
+def _env(tmp_path: Path) -> dict[str, str]:
+    tmp_path.mkdir(exist_ok=True)
+    reg = tmp_path / "model-registry.yaml"
+    if not reg.exists():
+        reg.write_text(yaml.dump({"fluxbench": {"drift_threshold": 0.15, "hysteresis_band": 0.05},
+                                  "models": {"incumbent": {"status": "qualified"}}}))
+    return {"MODEL_REGISTRY": str(reg), "FLUXBENCH_RESULTS_JSONL": str(tmp_path / "fluxbench-results.jsonl"),
+            "AGMODB_REPO_PATH": str(tmp_path / "agmodb"), "INTERFLUX_STATE_DIR": str(tmp_path / "state")}
+
+
+def _pipeline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, now: float = NOW) -> fp.Pipeline:
+    env = _env(tmp_path)
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    return fp.Pipeline(fp.Paths.from_env(env), now=now)
+
+
+def _results(p: fp.Pipeline) -> list[dict]:
+    return [json.loads(line) for line in Path(p.paths.results).read_text().splitlines()]
+
+
+def test_mock_run_writes_script_compatible_records(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    doc = p.run("vendor/model-a", stages=("qualify", "sync", "drift"), fixtures_dir=str(FIXTURES))
+    run_id = f"qr-vendor/model-a-{NOW}"
+    assert doc["qualification_run_id"] == run_id
+    assert doc["stages"]["qualify"]["status"] == "auto-qualified"
+
+    lines = _results(p)
+    assert [r["qualification_run_id"] for r in lines] == [run_id] * 5 + [f"summary-{run_id}"]
+    assert lines[0]["gate_results"]["fluxbench-finding-recall"]["threshold"] == p.thresholds[
+        "fluxbench-finding-recall"]
+    assert lines[-1]["is_summary"] and lines[-1]["metrics"]["fluxbench-finding-recall"] == 1
+
+    model = lr.load_registry(p.paths.registry)["models"]["vendor/model-a"]
+    assert model["status"] == "auto-qualified" and model["qualified_via"] == "mock"
+    assert model["qualified_baseline"]["fluxbench-finding-recall"] == 1.0
+
+    assert doc["stages"]["sync"]["synced"] == 6
+    agmodb = json.loads((tmp_path / "agmodb" / "vendor--model-a.json").read_text())
+    assert agmodb["qualification_run_id"] == f"summary-{run_id}"
+    state = json.loads((tmp_path / ".sync-state").read_text())
+    assert state == {run_id: "committed", f"summary-{run_id}": "committed"}
+    assert p.sync()["synced"] == 0  # idempotent
+    assert doc["stages"]["drift"]["verdict"] == "no_drift"
+
+    # A second qualification keeps the first baseline.
+    again = fp.Pipeline(p.paths, now=NOW + 60).qualify("vendor/model-a", str(FIXTURES))
+    assert again.registry[1]["result"] == "preserved"
+
+
+def test_work_dir_scoring_counts_missing_responses(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    work = tmp_path / "work"
+    fixtures = sorted(d.name for d in FIXTURES.iterdir() if d.name.startswith("fixture-"))
+    detail = [{"fixture_id": f, "ground_truth_path": str(FIXTURES / f / "ground-truth.json")} for f in fixtures]
+    detail[1]["ground_truth_path"] = "/etc/passwd"  # outside fixtures dir → default path
+    work.mkdir()
+    (work / "manifest.json").write_text(json.dumps({"fixtures": fixtures, "fixtures_detail": detail}))
+    for f in fixtures[:3]:
+        (work / f).mkdir()
+        gt = json.loads((FIXTURES / f / "ground-truth.json").read_text())
+        (work / f / "response.json").write_text(json.dumps({"findings": gt["findings"]}))
+    (work / fixtures[3]).mkdir()
+    (work / fixtures[3] / "response.json").write_text(json.dumps({"verdict": "ok"}))
+
+    report = p.qualify("model-b", str(FIXTURES), str(work))
+    assert report.mode == "real" and report.status == "candidate"
+    assert report.format_compliance_rate == 0.6
+    assert [o.failure for o in report.fixtures] == [None, None, None, "response missing findings array",
+                                                     "response file missing"]
+    assert len(_results(p)) == 4  # three scored fixtures + summary
+    model = lr.load_registry(p.paths.registry)["models"]["model-b"]
+    assert model["qualified_via"] == "real" and "qualified_baseline" not in model
+
+
+def test_drift_flags_and_clears_under_hysteresis(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    base = {"fluxbench-finding-recall": 0.9, "fluxbench-false-positive-rate": 0.1}
+    lr.commit_batch(p.paths.registry, [{"op": "merge-fields", "slug": "m", "fields": {
+        "status": "qualified", "qualified_baseline": base}}])
+
+    hit = p.drift("m", {"fluxbench-finding-recall": 0.9, "fluxbench-false-positive-rate": 0.4}, fleet_check=True)
+    assert hit["verdict"] == "baseline_shift_suspected"  # 1 of 2 qualified models flagged ≥ 0.50
+    assert hit["drifted_metrics"] == ["fluxbench-false-positive-rate"] and hit["max_drift"] == 0.3
+    assert lr.load_registry(p.paths.registry)["models"]["m"]["drift_flagged"] is True
+
+    assert p.drift("m", {"fluxbench-finding-recall": 0.8})["verdict"] == "drift_recovering"
+    assert p.drift("m", {"fluxbench-finding-recall": 0.88, "fluxbench-false-positive-rate": 0.05})[
+        "verdict"] == "drift_cleared"
+    assert lr.load_registry(p.paths.registry)["models"]["m"]["drift_flagged"] is False
+    # Improvement in a lower-is-better metric is not drift.
+    assert p.drift("m", {"fluxbench-false-positive-rate": 0.0})["verdict"] == "no_drift"
+    with pytest.raises(fp.PipelineError):
+        p.drift("incumbent", {})
+
+
+def test_drift_writes_go_to_event_log_in_event_mode(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    monkeypatch.setenv("FLUX_REGISTRY_EVENTS", "1")
+    before = Path(p.paths.registry).read_text()
+    p.run("m", stages=("qualify", "drift"), fixtures_dir=str(FIXTURES),
+          shadow={"metrics": {"fluxbench-finding-recall": 0.5}})
+    assert Path(p.paths.registry).read_text() == before
+    assert len(lr.read_events(p.paths.registry)) == 2
+    assert p.registry()["models"]["m"]["drift_flagged"] is True
+
+
+def _run_line(slug: str, recall: float, passed: bool) -> dict:
+    gates = {g: {"value": 1.0, "threshold": 0.5, "passed": True} for g in fp.CORE_GATES[:4]}
+    gates["fluxbench-finding-recall"] = {"value": recall, "threshold": 0.5, "passed": passed}
+    gates["fluxbench-persona-adherence"] = {"value": None, "threshold": 0.6, "passed": None}
+    gates["fluxbench-false-positive-rate"] = {"value": 0.0, "threshold": 0.5, "passed": True}
+    return {"model_slug": slug, "qualification_run_id": f"qr-{slug}-{recall}", "gate_results": gates}
+
+
+def test_challenger_tick_selects_then_evaluates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    budget = tmp_path / "budget.yaml"
+    budget.write_text(yaml.dump({"challenger": {"pre_inclusion_runs": 2, "promotion_threshold": 10,
+                                                "early_exit_margin": 0.2, "stale_threshold": 12}}))
+    p.paths.budget = str(budget)
+    fb = {"format_compliance": 1.0, "finding_recall": 0.7, "false_positive_rate": 0.1}
+    lr.commit_batch(p.paths.registry, [
+        {"op": "merge-fields", "slug": "weak", "fields": {"status": "auto-qualified", "qualified_via": "real",
+                                                         "fluxbench": {**fb, "finding_recall": 0.4}}},
+        {"op": "merge-fields", "slug": "strong", "fields": {"status": "auto-qualified", "qualified_via": "real",
+                                                           "fluxbench": fb}},
+        {"op": "merge-fields", "slug": "mocked", "fields": {"status": "auto-qualified", "qualified_via": "mock",
+                                                           "fluxbench": {**fb, "finding_recall": 1.0}}}])
+
+    assert p.challenger() == {"action": "select", "selected": None, "reason": "insufficient pre-inclusion runs",
+                              "model": "strong", "runs": 0, "required": 2}
+    p.append_results([_run_line("strong", 0.9, True) for _ in range(4)])
+    picked = p.challenger()
+    assert picked["selected"] == "strong" and picked["candidates_evaluated"] == 2
+    assert p.registry()["models"]["strong"]["status"] == "challenger"
+
+    assert p.challenger()["verdict"] == "insufficient_runs"
+    p.append_results([_run_line("strong", 0.9, True)])
+    early = p.challenger()  # 5 runs, every gate clears its threshold by ≥ 0.2
+    assert early == {"action": "evaluate", "verdict": "promoted", "reason": "early_exit", "model": "strong",
+                     "runs": 5}
+    assert p.registry()["models"]["strong"]["status"] == "qualified"
+
+    lr.commit_batch(p.paths.registry, [{"op": "set-field", "slug": "weak", "key": "status",
+                                        "value": "challenger"}])
+    p.append_results([_run_line("weak", 0.3, False) for _ in range(13)])
+    assert p.challenger_evaluate("weak")["verdict"] == "rejected"
+    assert p.registry()["models"]["weak"]["status"] == "rejected"
+
+
+@pytest.mark.skipif(not all(shutil.which(t) for t in ("bash", "jq", "flock")),
+                    reason="shell pipeline needs bash, jq and flock")
+def test_matches_qualify_script_and_shares_sync_state(tmp_path: Path) -> None:
+    shell_env = {**os.environ, **_env(tmp_path / "shell")}
+    subprocess.run(["bash", str(ROOT / "scripts" / "fluxbench-qualify.sh"), "m", "--mock"],
+                   env=shell_env, check=True, capture_output=True)
+    py = fp.Pipeline(fp.Paths.from_env(_env(tmp_path / "py")), now=NOW)
+    py.qualify("m", str(FIXTURES))
+
+    def strip(rec: dict) -> dict:
+        return {k: v for k, v in rec.items() if k not in ("timestamp", "qualification_run_id")}
+    shell_lines = [json.loads(x) for x in Path(shell_env["FLUXBENCH_RESULTS_JSONL"]).read_text().splitlines()]
+    assert [strip(r) for r in shell_lines] == [strip(r) for r in _results(py)]
+    assert lr.load_registry(shell_env["MODEL_REGISTRY"])["models"]["m"] == \
+        lr.load_registry(py.paths.registry)["models"]["m"]
+
+    # The runner syncs; sync.sh then finds nothing pending.
+    py.sync()
+    out = subprocess.run(["bash", str(ROOT / "scripts" / "fluxbench-sync.sh")], check=True, text=True,
+                         capture_output=True, env={**os.environ, **_env(tmp_path / "py")}).stdout
+    assert "nothing to sync" in out
+
+
+def _many_fixtures(tmp_path: Path, copies: int) -> Path:
+    out = tmp_path / "many"
+    src = sorted(d for d in FIXTURES.iterdir() if d.name.startswith("fixture-"))
+    for i in range(copies):
+        shutil.copytree(src[i % len(src)], out / f"fixture-{i:03d}")
+    return out
+
+
+def test_parallel_qualify_merges_in_fixture_order(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    many = _many_fixtures(tmp_path, 12)
+    serial = _pipeline(tmp_path / "serial", monkeypatch).qualify("m", str(many))
+    env = _env(tmp_path / "pool")
+    pooled = fp.Pipeline(fp.Paths.from_env(env), now=NOW, jobs=3).qualify("m", str(many))
+    assert pooled.to_dict() == serial.to_dict()
+    strip = [{k: v for k, v in r.items() if k != "timestamp"}
+             for r in (json.loads(x) for x in Path(env["FLUXBENCH_RESULTS_JSONL"]).read_text().splitlines())]
+    assert strip == [{k: v for k, v in r.items() if k != "timestamp"}
+                     for r in _results(fp.Pipeline(fp.Paths.from_env(_env(tmp_path / "serial"))))]
+    assert fp.score_all([], jobs=4) == []
+
+
+def test_calibrate_work_dir_uses_p25_and_p75_for_false_positives(tmp_path: Path,
+                                                                 monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _pipeline(tmp_path, monkeypatch)
+    fixtures = sorted(d for d in FIXTURES.iterdir() if d.name.startswith("fixture-"))
+    manifest = []
+    for i, fx in enumerate(fixtures):
+        gt = json.loads((fx / "ground-truth.json").read_text())
+        resp = tmp_path / "work" / fx.name / "response.json"
+        resp.parent.mkdir(parents=True)
+        if i < 4:  # last fixture's response never arrived
+            # Fixture i keeps i of its findings and adds one spurious finding.
+            extra = {**gt["findings"][0], "location": "nowhere:0", "description": "made up"}
+            resp.write_text(json.dumps({"findings": gt["findings"][:i] + [extra]}))
+        manifest.append({"fixture_id": fx.name, "response_path": str(resp),
+                         "ground_truth_path": str(fx / "ground-truth.json")})
+    (tmp_path / "work" / "manifest.json").write_text(json.dumps(manifest))
+
+    out = tmp_path / "thresholds.yaml"
+    p.calibrate(str(out), work_dir=str(tmp_path / "work"))
+    doc = yaml.safe_load(out.read_text())
+    assert doc["source"] == "claude-baseline" and doc["fixture_count"] == 4
+    records = _results(p)
+    assert [r["model_slug"] for r in records] == ["calibration-score"] * 4
+    recall = [r["metrics"]["fluxbench-finding-recall"] for r in records]
+    fp_rate = [r["metrics"]["fluxbench-false-positive-rate"] for r in records]
+    assert doc["thresholds"]["fluxbench-finding-recall"] == fp.percentile(recall, 25)
+    assert doc["thresholds"]["fluxbench-false-positive-rate"] == fp.percentile(fp_rate, 75)
+    assert doc["thresholds"]["fluxbench-persona-adherence"] == 1.0
+
+    with pytest.raises(fp.PipelineError):
+        p.calibrate(str(out), work_dir=str(tmp_path))  # no manifest
+
+
+def test_percentile_interpolates_like_calibrate_script() -> None:
+    assert fp.percentile([], 25) == 0.0
+    assert fp.percentile([0.4], 75) == 0.4
+    assert fp.percentile([1.0, 0.0, 0.5, 0.25], 25) == 0.1875
+    assert fp.percentile([0.1, 0.2, 0.3], 75) == 0.25
+
+
+@pytest.mark.skipif(not all(shutil.which(t) for t in ("bash", "jq", "flock")),
+                    reason="shell pipeline needs bash, jq and flock")
+def test_qualify_script_jobs_flag_delegates_to_runner(tmp_path: Path) -> None:
+    env = {**os.environ, **_env(tmp_path)}
+    script = str(ROOT / "scripts" / "fluxbench-qualify.sh")
+    bad = subprocess.run(["bash", script, "m", "--mock", "--jobs", "0"], env=env, capture_output=True, text=True)
+    assert bad.returncode == 1 and "--jobs" in bad.stderr
+    subprocess.run(["bash", script, "m", "--mock", "--jobs", "2"], env=env, check=True, capture_output=True)
+    lines = [json.loads(x) for x in Path(env["FLUXBENCH_RESULTS_JSONL"]).read_text().splitlines()]
+    assert len(lines) == 6 and lines[-1]["is_summary"]
+    assert lr.load_registry(env["MODEL_REGISTRY"])["models"]["m"]["status"] == "auto-qualified"
@@ -0,0 +1,112 @@
+"""Unit tests for scripts/_fluxbench_sequential.py."""
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _fluxbench_pipeline as fp  # noqa: E402
+import _fluxbench_sequential as fs  # noqa: E402
+import lib_registry as lr  # noqa: E402
+
+CFG = fs.SequentialConfig(enabled=True)  # p0 0.55, p1 0.85, alpha 0.05, beta 0.10
+
+
+def _run(slug: str, passed: bool, recall_passed: bool | None = None) -> dict:
+    gates = {g: {"value": 1.0, "threshold": 0.5, "passed": passed} for g in fs.GATES[:4]}
+    if recall_passed is not None:
+        gates["fluxbench-finding-recall"]["passed"] = recall_passed
+    gates["fluxbench-persona-adherence"] = {"value": None, "threshold": 0.6, "passed": None}
+    return {"model_slug": slug, "gate_results": gates}
+
+
+def test_gate_test_stops_at_first_boundary_crossing() -> None:
+    # ln(.85/.55) = 0.435 per pass against ln(18) = 2.89; ln(1/3) = -1.099 per fail against ln(.1/.95) = -2.25.
+    assert fs.gate_test([True] * 10, CFG)["at"] == 7
+    assert fs.gate_test([False] * 10, CFG) == {"decision": "fail", "at": 3, "llr": -3.2958}
+    assert fs.gate_test([True, True, True, False], CFG) == {"decision": None, "at": None, "llr": 0.2073}
+    assert fs.gate_test([True, False] * 5, CFG)["at"] == 8  # a 50% pass rate sits below p0
+    # A later collapse does not undo an accepted hypothesis.
+    assert fs.gate_test([True] * 7 + [False] * 5, CFG)["decision"] == "pass"
+
+
+def test_decide_splits_error_rates_across_gates() -> None:
+    # Four tested gates run at alpha/4, beta/4: ln(.975/.0125) = 4.36 takes 11 passes, not 7.
+    up = fs.decide([_run("m", True) for _ in range(12)], CFG)
+    assert (up["verdict"], up["runs"], up["runs_saved"]) == ("promoted", 11, 0)
+    assert up["expected_runs"] == 21 and up["expected_runs_saved"] == 0
+    assert "fluxbench-persona-adherence" not in up["gates"]
+
+    # Recall alone fails four times: reject at run 4, 17 runs before stale_threshold + 1.
+    down = fs.decide([_run("m", True, recall_passed=False) for _ in range(6)], CFG)
+    assert (down["verdict"], down["runs"], down["runs_saved"]) == ("rejected", 4, 17)
+    assert down["failed_gates"] == ["fluxbench-finding-recall"]
+    assert down["expected_runs"] == 15 and down["expected_runs_saved"] == 6
+
+    # Records without gate results still count as runs.
+    padded = fs.decide([{"model_slug": "m"}] + [_run("m", False) for _ in range(3)], CFG)
+    assert padded["runs"] == 4
+    undecided = fs.decide([_run("m", True), _run("m", False)], CFG)
+    assert undecided["verdict"] is None and undecided["runs"] == 2 and "runs_saved" not in undecided
+
+
+def test_passing_challenger_rejection_rate_stays_within_beta() -> None:
+    # Any one gate's H0 rejects, so unsplit per-gate tests would add up to ~20% here.
+    rng = random.Random(7)
+    rejected = 0
+    for _ in range(1500):
+        window = [{"gate_results": {g: {"passed": rng.random() < CFG.p1} for g in fs.GATES[:4]}}
+                  for _ in range(CFG.stale_threshold + 1)]
+        rejected += fs.decide(window, CFG)["verdict"] == "rejected"
+    assert rejected / 1500 <= CFG.beta
+
+
+def test_config_validation() -> None:
+    assert not fs.SequentialConfig.from_challenger({}).enabled
+    cfg = fs.SequentialConfig.from_challenger({"promotion_threshold": 8, "sequential": {"enabled": True}})
+    assert cfg.enabled and cfg.promotion_threshold == 8 and cfg.stale_threshold == 20
+    with pytest.raises(ValueError):
+        fs.SequentialConfig.from_challenger({"sequential": {"alpha": 0.6, "beta": 0.5}})
+    with pytest.raises(ValueError):
+        fs.SequentialConfig.from_challenger({"sequential": {"indifference": 0.3}})
+
+
+def _setup(tmp_path: Path, runs: list[dict]) -> dict[str, str]:
+    reg = tmp_path / "model-registry.yaml"
+    reg.write_text(yaml.dump({"models": {"c": {"status": "challenger", "qualified_via": "real"}}}))
+    budget = tmp_path / "budget.yaml"  # alpha/beta 0.2 → 0.05 per gate: promote at 7, reject at 3
+    budget.write_text(yaml.dump({"challenger": {"promotion_threshold": 10, "stale_threshold": 20,
+                                                "sequential": {"enabled": True, "alpha": 0.2, "beta": 0.2}}}))
+    results = tmp_path / "fluxbench-results.jsonl"
+    results.write_text("".join(json.dumps(r) + "\n" for r in runs))
+    return {"MODEL_REGISTRY": str(reg), "BUDGET_CONFIG": str(budget), "FLUXBENCH_RESULTS_JSONL": str(results),
+            "INTERFLUX_STATE_DIR": str(tmp_path / "state")}
+
+
+def test_pipeline_challenger_rejects_on_sequential_verdict(tmp_path: Path) -> None:
+    env = _setup(tmp_path, [_run("c", False) for _ in range(3)])
+    p = fp.Pipeline(fp.Paths.from_env(env))
+    doc = p.challenger_evaluate("c")
+    assert doc["verdict"] == "rejected" and doc["reason"] == "sequential" and doc["runs_saved"] == 18
+    assert lr.load_registry(env["MODEL_REGISTRY"])["models"]["c"]["status"] == "rejected"
+
+
+@pytest.mark.skipif(not all(shutil.which(t) for t in ("bash", "jq", "flock")),
+                    reason="challenger.sh needs bash, jq and flock")
+def test_challenger_script_promotes_on_sequential_verdict(tmp_path: Path) -> None:
+    env = {**os.environ, **_setup(tmp_path, [_run("c", True) for _ in range(7)])}
+    out = subprocess.run(["bash", str(ROOT / "scripts" / "fluxbench-challenger.sh"), "evaluate", "c"],
+                         env=env, check=True, capture_output=True, text=True).stdout
+    doc = json.loads(out)
+    assert (doc["verdict"], doc["runs"], doc["runs_saved"]) == ("promoted", 7, 3)
+    assert lr.load_registry(env["MODEL_REGISTRY"])["models"]["c"]["status"] == "qualified"
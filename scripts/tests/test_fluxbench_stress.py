@@ -0,0 +1,74 @@
+"""Unit tests for scripts/_fluxbench_stress.py."""
+from __future__ import annotations
+
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _fluxbench_stress as fst  # noqa: E402
+
+FIXTURES = str(ROOT / "tests" / "fixtures" / "qualification")
+QUIET = fst.Perturbation(drop=0, jitter=0, paraphrase=0, severity_shift=0, fp_rate=0)
+
+
+def test_synthesize_tracks_each_model_finding_to_its_origin() -> None:
+    pool = fst.ground_truth_pool(FIXTURES)
+    knobs = fst.Perturbation(drop=0.2, jitter=1.0, paraphrase=1.0, severity_shift=1.0, fp_rate=0.5)
+    baseline, model, origin = fst.synthesize(pool, 40, random.Random("s"), knobs)
+    assert (baseline, model, origin) == fst.synthesize(pool, 40, random.Random("s"), knobs)
+    assert len(baseline) == 40 and len(model) == len(origin)
+    kept = [i for i in origin if i is not None]
+    assert len(set(kept)) == len(kept) < 40  # each baseline finding at most once, some dropped
+    for m, bi in zip(model, origin):
+        if bi is None:
+            assert m["location"].startswith("fp")
+            continue
+        b = baseline[bi]
+        path, line = fst._fluxbench_score._parse_loc_parts(b["location"])
+        assert m["location"].startswith(path)
+        assert (m["location"] != b["location"]) == (line is not None)  # only line locations jitter
+        assert m["severity"] != b["severity"]
+
+    same = fst.synthesize(pool, 15, random.Random(1), QUIET)
+    assert sorted(same[2]) == list(range(15)) and all(same[1][i] == same[0][o] for i, o in enumerate(same[2]))
+
+
+def test_case_sizes_split_each_level() -> None:
+    assert fst.case_sizes(10, 20) == [10]
+    assert fst.case_sizes(45, 20) == [20, 20, 5]
+    assert fst.case_sizes(40, 20) == [20, 20]
+
+
+def test_stress_reports_every_stage_and_is_stable_across_jobs() -> None:
+    doc = fst.stress((10, 25), max_case=10, fixtures_dir=FIXTURES)
+    assert [(lv["findings"], lv["cases"]) for lv in doc["levels"]] == [(10, 1), (25, 3)]
+    for level in doc["levels"]:
+        assert set(level["stages"]) == set(fst.STAGES)
+        for stage in level["stages"].values():
+            assert 0 <= stage["p50_ms"] <= stage["p99_ms"] and stage["throughput"] > 0
+            assert stage["peak_rss_mb"] > 0
+        assert 0.5 < level["accuracy"]["precision"] <= 1 and 0.5 < level["accuracy"]["recall"] <= 1
+
+    pooled = fst.stress((10, 25), max_case=10, jobs=2, fixtures_dir=FIXTURES)
+    def strip(d: dict) -> list:
+        return [(lv["model_findings"], lv["accuracy"]) for lv in d["levels"]]
+    assert strip(pooled) == strip(doc)
+
+    exact = fst.stress((12,), fixtures_dir=FIXTURES, knobs=QUIET)["levels"][0]
+    assert exact["accuracy"] == {"precision": 1.0, "recall": 1.0} and exact["model_findings"] == 12
+
+
+def test_cli_validates_and_writes_output(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    assert fst.main(["run", "--sizes", "0"]) == 2
+    assert fst.main(["run", "--sizes", "5", "--drop", "1.5"]) == 2
+    assert fst.main(["run", "--sizes", "5", "--fixtures-dir", str(tmp_path)]) == 2
+    capsys.readouterr()
+    out = tmp_path / "stress.json"
+    assert fst.main(["run", "--sizes", "5", "--fixtures-dir", FIXTURES, "--output", str(out)]) == 0
+    assert json.loads(out.read_text()) == json.loads(capsys.readouterr().out)
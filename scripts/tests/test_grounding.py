@@ -0,0 +1,92 @@
+"""Unit tests for scripts/_grounding.py, including parity with the bash fallback.
+
+Behavioural coverage of the CLI contract lives in
+tests/structural/test_verify_synthesis_grounding.py (which now runs the
+Python path); here we test the indexed corpus directly and diff both
+implementations over a scenario matrix.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _grounding as gr  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "verify-synthesis-grounding.sh")
+RUN = "R1"
+
+
+def _agent(d: Path, name: str, lines: list[str], run_uuid: str | None = RUN) -> None:
+    head = [f"<!-- run-uuid: {run_uuid} -->"] if run_uuid else []
+    (d / f"{name}.md").write_text("\n".join([*head, "### Findings Index", *lines, "Verdict: risky"]) + "\n")
+
+
+def _findings(d: Path, findings: list[dict]) -> None:
+    (d / "findings.json").write_text(json.dumps({"findings": findings}))
+
+
+def test_corpus_keys_and_id_map(tmp_path: Path) -> None:
+    _agent(tmp_path, "fd-a", ['- p0 | A-1 | "S" | t', '-P2|A-2|"S"|t', "- P1 |  | empty id"])
+    _agent(tmp_path, "fd-old", ['- P0 | OLD-1 | "S" | t'], run_uuid="stale")
+    _agent(tmp_path, "synthesis", ['- P0 | SYN-1 | "S" | t'])
+    corpus = gr.build_corpus(str(tmp_path), RUN)
+    assert corpus.grounded_keys == {"P0|A-1", "P2|A-2"}
+    assert corpus.grounded_ids == {"A-1": {"P0"}, "A-2": {"P2"}}
+    assert corpus.foreign == 1
+
+
+def test_classify_policy() -> None:
+    corpus = gr.Corpus({"P0|A"}, {"A": {"P0"}})
+    r = gr.classify(["P0|A", "P1|A", "P2|X", "P1|Y"], corpus)
+    assert r.checked == 4
+    assert r.severity_mismatch == ["P1|A"]
+    assert r.ungrounded == ["P2|X", "P1|Y"]
+    assert r.blocking_ungrounded == ["P1|Y"]
+    assert r.status == "violation"
+    strict = gr.classify(["P1|A"], corpus, strict=True)
+    assert strict.violation and strict.blocking_ungrounded == []
+
+
+def test_synthesized_keys_skips_missing_ids() -> None:
+    doc = {"findings": [{"id": "X", "severity": "p1"}, {"id": ""}, {"severity": "P0"}, {"id": 7}]}
+    assert gr.synthesized_keys(doc) == ["P1|X", "|7"]
+
+
+SCENARIOS = {
+    "grounded": ([('fd-a', ['- P0 | A-1 | "S" | t'], RUN)], [{"id": "A-1", "severity": "P0"}], []),
+    "invented_p0": ([('fd-a', ['- P1 | A-1 | "S" | t'], RUN)], [{"id": "Z", "severity": "P0"}], []),
+    "p2_warn": ([('fd-a', ['- P1 | A-1 | "S" | t'], RUN)],
+                [{"id": "Z", "severity": "P2"}, {"id": "A-1", "severity": "P0"}], []),
+    "strict": ([('fd-a', ['- P1 | A-1 | "S" | t'], RUN)],
+               [{"id": "Z", "severity": "P3"}, {"id": "A-1", "severity": "P0"}], ["--strict"]),
+    "foreign": ([('fd-a', ['- P0 | A-1 | "S" | t'], "other")], [{"id": "A-1", "severity": "P0"}], []),
+    "empty": ([('fd-a', [], RUN)], [], []),
+}
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+@pytest.mark.parametrize("json_flag", [[], ["--json"]])
+def test_parity_with_bash_fallback(tmp_path: Path, name: str, json_flag: list[str]) -> None:
+    agents, findings, flags = SCENARIOS[name]
+    for agent, lines, uuid in agents:
+        _agent(tmp_path, agent, lines, uuid)
+    _findings(tmp_path, findings)
+    args = ["bash", SCRIPT, str(tmp_path), "--run-uuid", RUN, *flags, *json_flag]
+    py = subprocess.run(args, capture_output=True, text=True, check=False)
+    sh = subprocess.run(args, capture_output=True, text=True, check=False,
+                        env=dict(os.environ, FLUX_GROUNDING_LEGACY="1"))
+    assert (py.returncode, py.stdout, py.stderr) == (sh.returncode, sh.stdout, sh.stderr)
+
+
+def test_usage_errors_exit_2(tmp_path: Path) -> None:
+    assert gr.main([]) == 2
+    assert gr.main([str(tmp_path), "--bogus"]) == 2
+    assert gr.main([str(tmp_path)]) == 2  # no findings.json
@@ -421,3 +421,241 @@ def test_cli_unknown_op() -> None:
 def test_cli_no_args() -> None:
     result = _run_cli()
     assert result.returncode == 4
+
+
+# --- batch -----------------------------------------------------------------
+
+
+def test_parse_ops_array_and_jsonl() -> None:
+    ops = [{"op": "promote", "slug": "a"}, {"op": "set-field", "slug": "a", "key": "k", "value": 1}]
+    assert lr.parse_ops(json.dumps(ops)) == ops
+    assert lr.parse_ops("\n".join(json.dumps(o) for o in ops) + "\n\n") == ops
+    assert lr.parse_ops("  ") == []
+
+
+def test_apply_batch_in_order_on_copy() -> None:
+    reg = {"models": {"a": {"status": "candidate", "qualified_baseline": {"x": 1}}}}
+    new, results = lr.apply_batch(reg, [
+        {"op": "merge-fields", "slug": "b", "fields": {"status": "candidate"}},
+        {"op": "set-field", "slug": "b", "key": "qualified_via", "value": "mock"},
+        {"op": "set-field-if-absent", "slug": "b", "key": "qualified_baseline", "value": {"x": 2}},
+        {"op": "set-field-if-absent", "slug": "a", "key": "qualified_baseline", "value": {"x": 3}},
+        {"op": "promote", "slug": "b"},
+    ])
+    assert [r["result"] for r in results] == ["created", "set", "set", "preserved", "promoted"]
+    assert new["models"]["b"] == {"status": "qualified", "qualified_via": "mock", "qualified_baseline": {"x": 2}}
+    assert new["models"]["a"]["qualified_baseline"] == {"x": 1}
+    assert "b" not in reg["models"]  # input untouched
+
+
+@pytest.mark.parametrize("ops,code", [
+    ([{"op": "merge-fields", "slug": "a", "fields": {"s": 1}}, {"op": "promote", "slug": "zz"}], 3),
+    ([{"op": "set-field", "slug": "a", "key": "k"}], 4),
+    ([{"op": "teleport", "slug": "a"}], 4),
+    ([{"op": "merge-fields", "slug": "a", "fields": [1]}], 4),
+    (["promote"], 4),
+])
+def test_apply_batch_failures_are_atomic(ops: list, code: int) -> None:
+    reg = {"models": {"a": {"status": "candidate"}}}
+    with pytest.raises(lr.BatchError) as exc:
+        lr.apply_batch(reg, ops)
+    assert exc.value.code == code
+    assert reg == {"models": {"a": {"status": "candidate"}}}
+
+
+def test_cli_batch_writes_once_or_not_at_all(tmp_path: Path) -> None:
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"models": {"a": {"status": "candidate"}}}))
+    ops = tmp_path / "ops.jsonl"
+    ops.write_text(json.dumps({"op": "set-field", "slug": "a", "key": "status", "value": "qualified"}) + "\n"
+                   + json.dumps({"op": "promote", "slug": "missing"}) + "\n")
+    before = p.read_text()
+    result = _run_cli("batch", str(p), str(ops))
+    assert result.returncode == 3 and "nothing written" in result.stderr
+    assert p.read_text() == before
+
+    ops.write_text(json.dumps([{"op": "set-field", "slug": "a", "key": "status", "value": "qualified"}]))
+    result = _run_cli("batch", str(p), str(ops))
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == [{"op": "set-field", "slug": "a", "result": "set"}]
+    assert yaml.safe_load(p.read_text())["models"]["a"]["status"] == "qualified"
+
+    ops.write_text("{not json")
+    assert _run_cli("batch", str(p), str(ops)).returncode == 4
+
+
+def test_shell_txn_queue_and_commit(tmp_path: Path) -> None:
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"models": {"a": {"status": "candidate"}}}))
+    script = f"""
+source "{ROOT / 'scripts' / 'lib-registry.sh'}"
+registry_txn_begin
+registry_txn_queue merge-fields 'new"slug' '{{"status": "candidate",
+  "note": "x"}}'
+registry_txn_queue set-field-if-absent a qualified_baseline '{{"r": 1}}'
+registry_txn_queue promote a
+registry_txn_commit "{p}"
+registry_txn_begin
+registry_txn_queue set-field a status '"retired"'
+registry_txn_queue promote nope
+registry_txn_commit "{p}" || echo "rc=$?"
+registry_txn_queue promote a || echo "rc=$?"
+"""
+    result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=False)
+    lines = result.stdout.splitlines()
+    assert [r["result"] for r in json.loads(lines[0])] == ["created", "set", "promoted"]
+    assert lines[1:] == ["rc=3", "rc=4"]
+    models = yaml.safe_load(p.read_text())["models"]
+    assert models["a"]["status"] == "qualified"  # failed txn left no partial write
+    assert models['new"slug'] == {"status": "candidate", "note": "x"}
+
+
+# --- read path -------------------------------------------------------------
+
+
+@pytest.mark.parametrize("expr,expected", [
+    (".fluxbench.drift_threshold // 0.15", 0.2),
+    (".fluxbench.missing // 0.15", 0.15),
+    ('.models."gpt-4.1".status', "qualified"),
+    (".models.a.eligible_tiers[1]", "analytical"),
+    (".models.a.eligible_tiers[5]", None),
+    (".models.a.drift_flagged // true", True),   # false falls through, like yq
+    (".models.nope.status // unknown", "unknown"),
+    (".models.a.qualified_baseline // null", {"r": 0.8}),
+    ("models.a.status.deeper", None),
+])
+def test_query(expr: str, expected: object) -> None:
+    reg = {"fluxbench": {"drift_threshold": 0.2},
+           "models": {"gpt-4.1": {"status": "qualified"},
+                      "a": {"eligible_tiers": ["checker", "analytical"], "drift_flagged": False,
+                            "qualified_baseline": {"r": 0.8}, "status": "candidate"}}}
+    assert lr.query(reg, expr) == expected
+
+
+def test_format_value_matches_yq_raw() -> None:
+    assert [lr.format_value(v) for v in (None, True, 0.5, 3, "x y", "a\nb", {"k": [1]})] == [
+        "null", "true", "0.5", "3", "x y", '"a\\nb"', '{"k":[1]}']
+
+
+def test_load_registry_cached_invalidates_on_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"models": {"a": {"status": "candidate"}}}))
+    calls = []
+    real = lr.load_registry
+    monkeypatch.setattr(lr, "load_registry", lambda path: calls.append(path) or real(path))
+    state = str(tmp_path / "state")
+    assert lr.load_registry_cached(str(p), state)["models"]["a"]["status"] == "candidate"
+    assert lr.load_registry_cached(str(p), state)["models"]["a"]["status"] == "candidate"
+    assert len(calls) == 1  # second read served from the snapshot
+
+    tmp = tmp_path / "reg.tmp"  # lib-registry.sh style cp → mutate → mv
+    tmp.write_text(yaml.dump({"models": {"a": {"status": "qualified"}}}))
+    tmp.replace(p)
+    assert lr.load_registry_cached(str(p), state)["models"]["a"]["status"] == "qualified"
+    assert len(calls) == 2
+
+    dated = tmp_path / "dated.yaml"  # YAML dates are not JSON: parsed fresh, never snapshotted
+    dated.write_text("last_discovery: 2026-04-12\nmodels: {}\n")
+    assert str(lr.load_registry_cached(str(dated), state)["last_discovery"]) == "2026-04-12"
+    assert not Path(lr.snapshot_path(str(dated), state)).exists()
+
+
+def test_cli_get(tmp_path: Path) -> None:
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"fluxbench": {"sample_rate": 3},
+                            "models": {"a": {"qualified_baseline": {"x": 1}}}}))
+    result = subprocess.run(
+        [sys.executable, LIB_PY, "get", str(p), ".fluxbench.sample_rate // 10",
+         ".fluxbench.max_sample_gap // 20", '.models."a".qualified_baseline // null', ".models.b.status"],
+        capture_output=True, text=True, check=False, env={"INTERFLUX_STATE_DIR": str(tmp_path), "PATH": ""})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["3", "20", '{"x":1}', "null"]
+    assert _run_cli("get", str(p), '.models."unterminated').returncode == 4
+    assert _run_cli("get", str(tmp_path / "missing.yaml"), ".a").returncode == 2
+
+
+# --- event log -------------------------------------------------------------
+
+
+def _event_registry(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("INTERFLUX_STATE_DIR", str(tmp_path / "state"))
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"fluxbench": {"sample_rate": 3},
+                            "models": {"a": {"status": "candidate", "qualified_baseline": None}}}))
+    return p
+
+
+def test_append_events_replay_without_rewriting_yaml(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _event_registry(tmp_path, monkeypatch)
+    before = p.read_text()
+    results = lr.append_events(str(p), [
+        {"op": "merge-fields", "slug": "b", "fields": {"status": "candidate", "qualified_via": "mock"}},
+        {"op": "set-field-if-absent", "slug": "a", "key": "qualified_baseline", "value": {"r": 0.8}}])
+    assert [r["result"] for r in results] == ["created", "set"]
+    lr.append_events(str(p), [{"op": "promote", "slug": "b"}])
+    assert p.read_text() == before  # YAML untouched; two events logged
+    assert len(lr.read_events(str(p))) == 2
+
+    reg = lr.load_registry_cached(str(p))
+    assert reg["models"]["b"]["status"] == "qualified"
+    assert reg["models"]["a"]["qualified_baseline"] == {"r": 0.8}
+    assert lr.load_materialized(str(p)) == reg
+
+    # A torn trailing line (crash mid-append) is ignored.
+    with open(lr.events_path(str(p)), "a") as f:
+        f.write('{"ts": "x", "ops": [{"op": "prom')
+    assert lr.load_materialized(str(p)) == reg
+
+    assert lr.compact(str(p)) == 2
+    assert yaml.safe_load(p.read_text())["models"] == reg["models"]
+    assert lr.read_events(str(p)) == [] and lr.events_enabled(str(p))
+
+
+def test_event_append_enforces_write_once_baseline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _event_registry(tmp_path, monkeypatch)
+    lr.append_events(str(p), [{"op": "set-field", "slug": "a", "key": "qualified_baseline", "value": {"r": 1}}])
+    for ops in ([{"op": "set-field", "slug": "a", "key": "qualified_baseline", "value": {"r": 2}}],
+                [{"op": "merge-fields", "slug": "a", "fields": {"status": "x", "qualified_baseline": None}}],
+                [{"op": "promote", "slug": "a"}, {"op": "promote", "slug": "missing"}]):
+        with pytest.raises(lr.BatchError):
+            lr.append_events(str(p), ops)
+    assert len(lr.read_events(str(p))) == 1  # rejected events never land
+    # Re-asserting the same baseline and if-absent writes are fine.
+    lr.append_events(str(p), [{"op": "set-field", "slug": "a", "key": "qualified_baseline", "value": {"r": 1}},
+                              {"op": "set-field-if-absent", "slug": "a", "key": "qualified_baseline",
+                               "value": {"r": 3}}])
+    assert lr.load_materialized(str(p))["models"]["a"]["qualified_baseline"] == {"r": 1}
+
+
+def test_event_log_auto_compacts(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = _event_registry(tmp_path, monkeypatch)
+    monkeypatch.setattr(lr, "COMPACT_EVERY", 3)
+    for n in range(4):
+        lr.append_events(str(p), [{"op": "set-field", "slug": "a", "key": "runs", "value": n}])
+    assert yaml.safe_load(p.read_text())["models"]["a"]["runs"] == 2
+    assert len(lr.read_events(str(p))) == 1
+    assert lr.load_registry_cached(str(p))["models"]["a"]["runs"] == 3
+
+
+def test_shell_writes_route_to_event_log(tmp_path: Path) -> None:
+    p = tmp_path / "reg.yaml"
+    p.write_text(yaml.dump({"models": {"a": {"status": "candidate", "qualified_baseline": {"r": 1}}}}))
+    before = p.read_text()
+    script = f"""
+source "{ROOT / 'scripts' / 'lib-registry.sh'}"
+registry_set_string_field "{p}" a status auto-qualified
+registry_atomic_mutate "{p}" set-field a qualified_baseline '{{"r": 2}}' || echo "rc=$?"
+registry_txn_begin
+registry_txn_queue merge-fields b '{{"status": "candidate"}}'
+registry_txn_queue promote b
+registry_txn_commit "{p}"
+"""
+    env = {"FLUX_REGISTRY_EVENTS": "1", "INTERFLUX_STATE_DIR": str(tmp_path / "state"), "PATH": "/usr/bin:/bin"}
+    result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=False, env=env)
+    lines = result.stdout.splitlines()
+    assert lines[0] == "rc=5", result.stderr
+    assert [r["result"] for r in json.loads(lines[1])] == ["created", "promoted"]
+    assert p.read_text() == before and len(lr.read_events(str(p))) == 2
+    out = subprocess.run([sys.executable, LIB_PY, "get", str(p), ".models.a.status", ".models.b.status"],
+                         capture_output=True, text=True, check=False, env=env)
+    assert out.stdout.splitlines() == ["auto-qualified", "qualified"]
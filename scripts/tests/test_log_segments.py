@@ -0,0 +1,230 @@
+"""Unit tests for scripts/_log_segments.py and its readers (triage store, decisions log)."""
+from __future__ import annotations
+
+import fcntl
+import gzip
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _decisions_log as dl  # noqa: E402
+import _log_segments as ls  # noqa: E402
+import _triage_store as ts  # noqa: E402
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def _no_settle(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ls, "ROTATE_SETTLE_S", 0)
+
+
+def _append(path: Path, records: list[dict]) -> None:
+    with path.open("a") as fh:
+        for r in records:
+            fh.write(json.dumps(r) + "\n")
+
+
+def _triage(day: int, agent: str = "fd-a", **extra) -> dict:
+    ts_ = (NOW - timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"ts": ts_, "run_id": f"r{day}", "agent": agent, "selected": day % 2 == 0,
+            "final_score": day, **extra}
+
+
+def _results(slug: str, i: int) -> dict:
+    return {"model_slug": slug, "timestamp": f"2026-09-{i + 1:02d}T00:00:00Z", "n": i}
+
+
+def test_rotate_writes_segment_and_manifest(tmp_path: Path) -> None:
+    log = tmp_path / "triage.jsonl"
+    _append(log, [_triage(d) for d in (40, 35, 31)])
+    raw = log.read_bytes()
+    seg = ls.rotate(str(log), force=True)
+    assert seg is not None and not log.exists()
+    assert (seg.seq, seg.lines, seg.bytes, seg.base_offset) == (1, 3, len(raw), 0)
+    assert seg.min_ts == _triage(40)["ts"] and seg.max_ts == _triage(31)["ts"]
+    assert seg.keys is None
+    with gzip.open(tmp_path / "triage.jsonl.segments" / seg.file) as fh:
+        assert fh.read() == raw
+    _append(log, [_triage(1)])
+    seg2 = ls.rotate(str(log), force=True)
+    assert (seg2.seq, seg2.base_offset) == (2, len(raw))
+    assert [s.file for s in ls.load_manifest(str(log))] == ["000001.jsonl.gz", "000002.jsonl.gz"]
+
+
+def test_rotation_policy(tmp_path: Path) -> None:
+    log = tmp_path / "triage.jsonl"
+    now = NOW.timestamp()
+    assert ls.rotate(str(log), now=now) is None  # missing
+    _append(log, [_triage(3)])
+    assert ls.rotation_reason(str(log), ls.KINDS["triage"], 10**6, 30, now) is None
+    assert ls.rotation_reason(str(log), ls.KINDS["triage"], 10, 30, now) == "size"
+    assert ls.rotation_reason(str(log), ls.KINDS["triage"], None, 2, now) == "age"
+    assert ls.rotate(str(log), max_bytes=None, max_age_days=30, now=now) is None
+    assert ls.rotate(str(log), max_bytes=None, max_age_days=2, now=now) is not None
+
+
+def test_rotation_not_due_leaves_no_segments_dir(tmp_path: Path) -> None:
+    log = tmp_path / "triage.jsonl"
+    _append(log, [_triage(3)])
+    assert ls.rotate(str(log), max_bytes=None, max_age_days=30, now=NOW.timestamp()) is None
+    assert not (tmp_path / "triage.jsonl.segments").exists()
+
+
+def test_late_append_through_old_fd_is_rehomed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = tmp_path / "triage.jsonl"
+    _append(log, [_triage(5), _triage(4)])
+    stale = log.open("a")  # an unlocked appender that opened before the rename
+    real = ls._compress
+
+    def compress_then_late_write(pending: str, dest: str, kind: ls.LogKind) -> dict:
+        stats = real(pending, dest, kind)
+        _append(log, [_triage(2)])  # fresh live file
+        stale.write(json.dumps(_triage(3)) + "\n")  # lands in .rotating after sealing
+        stale.flush()
+        return stats
+
+    monkeypatch.setattr(ls, "_compress", compress_then_late_write)
+    seg = ls.rotate(str(log), force=True)
+    stale.close()
+    assert seg is not None and seg.lines == 2
+    assert not (tmp_path / "triage.jsonl.segments" / "000001.rotating").exists()
+    assert [r["run_id"] for r in ls.iter_records(str(log))] == ["r5", "r4", "r2", "r3"]
+
+
+def test_iter_lines_skips_segments_outside_window(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = tmp_path / "triage.jsonl"
+    _append(log, [_triage(60), _triage(50)])
+    ls.rotate(str(log), force=True)
+    _append(log, [_triage(10), _triage(5)])
+    ls.rotate(str(log), force=True)
+    _append(log, [_triage(1)])
+
+    opened = []
+    real = ls.iter_segment
+    monkeypatch.setattr(ls, "iter_segment", lambda p, s, *a: (opened.append(s.file), real(p, s, *a))[1])
+    since = NOW - timedelta(days=20)
+    recs = list(ls.iter_records(str(log), since=since))
+    assert opened == ["000002.jsonl.gz"]
+    assert [r["run_id"] for r in recs] == ["r10", "r5", "r1"]
+    assert [r["run_id"] for r in ls.iter_records(str(log))] == ["r60", "r50", "r10", "r5", "r1"]
+
+
+def test_latest_and_count_use_manifest_keys(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = tmp_path / "fluxbench-results.jsonl"
+    _append(log, [_results("a", i) for i in range(3)] + [_results("b", 3)])
+    ls.rotate(str(log), force=True)
+    _append(log, [_results("a", 4), _results("c", 5)])
+    ls.rotate(str(log), force=True)
+    _append(log, [_results("a", 6)])
+
+    assert ls.load_manifest(str(log))[0].keys == {"a": 3, "b": 1}
+    opened = []
+    real = ls.iter_segment
+    monkeypatch.setattr(ls, "iter_segment", lambda p, s, *a: (opened.append(s.seq), real(p, s, *a))[1])
+    assert ls.count(str(log), "a") == 5
+    assert opened == []
+    assert [r["n"] for r in ls.latest(str(log), "a", 2)] == [4, 6]
+    assert opened == [2]
+    assert [r["n"] for r in ls.latest(str(log), "b")] == [3]
+    assert [r["n"] for r in ls.latest(str(log), "a")] == [0, 1, 2, 4, 6]
+    assert ls.latest(str(log), "a", 0) == []
+
+
+def test_interrupted_rotation_is_finished(tmp_path: Path) -> None:
+    log = tmp_path / "decisions.log"
+    _append(log, [{"name": "x", "timestamp_ms": 1_700_000_000_000}])
+    sdir = tmp_path / "decisions.log.segments"
+    sdir.mkdir()
+    os.rename(log, sdir / "000001.rotating")
+    _append(log, [{"name": "y", "timestamp_ms": 1_700_000_100_000}])
+    assert ls.rotate(str(log), max_bytes=None, max_age_days=None) is None
+    (seg,) = ls.load_manifest(str(log))
+    assert seg.min_ts == "2023-11-14T22:13:20Z" and not (sdir / "000001.rotating").exists()
+    assert [r["name"] for r in dl.read_log(str(tmp_path))] == ["x", "y"]
+
+
+def test_lock_timeout(tmp_path: Path) -> None:
+    log = tmp_path / "triage.jsonl"
+    with open(f"{log}.lock", "a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        with pytest.raises(TimeoutError):
+            with ls.locked(str(log), timeout=0.1):
+                pass
+
+
+def _full_scan(log: Path, cutoff: datetime) -> ts.Summary:
+    return ts.summarize(e for e in ls.iter_records(str(log))
+                        if ts.parse_iso(e.get("ts", "")) >= cutoff)
+
+
+def _assert_same(got: ts.Summary, want: ts.Summary) -> None:
+    assert got.runs_seen == want.runs_seen
+    assert [a for a, _ in got.agents_in_order()] == [a for a, _ in want.agents_in_order()]
+    for agent, w in want.by_agent.items():
+        g = got.by_agent[agent]
+        assert (g.runs, g.selected, g.sum_final) == (w.runs, w.selected, w.sum_final)
+
+
+@pytest.mark.parametrize("with_hook", [True, False])
+def test_triage_store_survives_rotation(tmp_path: Path, with_hook: bool) -> None:
+    log = tmp_path / "triage.jsonl"
+    conn = ts.open_store(str(tmp_path / "triage.db"))
+    _append(log, [_triage(d, agent) for d in range(30, 10, -1) for agent in ("fd-b", "fd-a")])
+    ts.ingest(conn, str(log))
+    # Lines written after the last ingest but before the rotation.
+    _append(log, [_triage(10, "fd-c"), _triage(9)])
+
+    hook_result = []
+
+    def hook(seg, inode):
+        hook_result.append(ts.note_rotation(conn, str(log), seg, inode))
+
+    ls.rotate(str(log), force=True, on_rotate=hook if with_hook else None)
+    assert hook_result == ([True] if with_hook else [])
+    _append(log, [_triage(d, "fd-d") for d in (8, 5, 2)])
+    ts.ingest(conn, str(log))
+    # Boundary days land in the segment, in the live log, and across both.
+    for days in (29.5, 9.5, 8.5, 3):
+        cutoff = NOW - timedelta(days=days)
+        _assert_same(ts.query(conn, str(log), cutoff), _full_scan(log, cutoff))
+    rows = conn.execute("SELECT DISTINCT source FROM day_offsets ORDER BY source").fetchall()
+    assert rows == [("",), ("000001.jsonl.gz",)]
+
+
+def test_note_rotation_refuses_out_of_step_store(tmp_path: Path) -> None:
+    log = tmp_path / "triage.jsonl"
+    conn = ts.open_store(str(tmp_path / "triage.db"))
+    _append(log, [_triage(3)])
+    ts.ingest(conn, str(log))
+    seg = ls.rotate(str(log), force=True)
+    assert ts.note_rotation(conn, str(log), seg, inode=-1) is False
+    assert ts.ingest(conn, str(log)) == 1  # rebuilt from the segment
+
+
+def test_cli_rotate_then_triage_stats_paths_agree(tmp_path: Path) -> None:
+    log = tmp_path / ".clavain" / "interflux" / "triage.jsonl"
+    log.parent.mkdir(parents=True)
+    now = datetime.now(timezone.utc)
+    stamp = lambda d: (now - timedelta(days=d)).strftime("%Y-%m-%dT%H:%M:%SZ")  # noqa: E731
+    _append(log, [{"ts": stamp(d), "run_id": f"r{d}", "agent": a, "final_score": d}
+                  for d in range(20, 0, -1) for a in ("fd-a", "fd-b")])
+    stats = [sys.executable, str(ROOT / "scripts" / "triage-stats.py"), f"--repo-root={tmp_path}",
+             "--days=7", "--json"]
+    before = subprocess.run(stats, capture_output=True, text=True, check=True).stdout
+    rot = subprocess.run([sys.executable, str(ROOT / "scripts" / "_log_segments.py"), "rotate",
+                          str(log), "--force"], capture_output=True, text=True, check=True)
+    assert json.loads(rot.stdout)["rotated"] is True
+    indexed = subprocess.run(stats, capture_output=True, text=True, check=True).stdout
+    scanned = subprocess.run([*stats, "--no-index"], capture_output=True, text=True, check=True).stdout
+    assert before == indexed == scanned
+    conn = ts.open_store(str(log.parent / ts.DB_FILENAME))
+    assert ts._get_meta(conn, "seg_seq") == "1"  # carried over, not rebuilt
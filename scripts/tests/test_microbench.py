@@ -0,0 +1,86 @@
+"""Unit tests for scripts/_microbench.py."""
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _microbench as mb  # noqa: E402
+import verify_frontmatter  # noqa: E402
+
+
+def _result(decision: str, metrics: dict, ts: str, host: str = "h1") -> dict:
+    return {"type": "result", "decision": decision, "host": host, "description": "", "metric_value": 0,
+            "duration_ms": 0, "exit_code": 0, "secondary_metrics": metrics, "timestamp": ts}
+
+
+def test_every_case_runs_on_its_synthetic_input() -> None:
+    cases = mb.suite()
+    assert len({c.name for c in cases}) == len(cases) == 18
+    for case in cases:
+        assert mb.time_case(case, repeat=1, min_time=1e-6) > 0, case.name
+
+    root = mb._agents_dir(12)
+    try:
+        assert len(verify_frontmatter.scan(root, ["agents"], Path(mb.ROLES_YAML))) == 12
+    finally:
+        shutil.rmtree(root)
+
+
+def test_run_suite_emits_a_campaign_result_line() -> None:
+    doc = mb.run_suite("hungarian.n10$|sanitize.16kib|pareto_front.n50$", repeat=2, min_time=0.001)
+    metrics = doc["secondary_metrics"]
+    assert sorted(metrics) == ["hungarian.n10_ms", "pareto_front.n50_ms", "sanitize.16kib_mb_s", "sanitize.16kib_ms"]
+    assert doc["metric_value"] == pytest.approx(sum(v for k, v in metrics.items() if k.endswith("_ms")), abs=1e-3)
+    assert metrics["sanitize.16kib_mb_s"] == pytest.approx((16 << 10) / 1e6 / (metrics["sanitize.16kib_ms"] / 1000),
+                                                           rel=0.01)
+    assert doc["type"] == "result" and doc["exit_code"] == 0 and doc["host"] == mb.host_fingerprint()
+    assert f"{mb.os.cpu_count()} cpu" in doc["host"] and doc["host"] in doc["description"]
+    with pytest.raises(ValueError):
+        mb.run_suite("no-such-case")
+
+
+def test_compare_flags_slowdowns_in_either_direction() -> None:
+    results = [_result("keep", {"a_ms": 10.0, "b_ms": 4.0, "s_mb_s": 5.0}, "t1"),
+               _result("discard", {"a_ms": 99.0}, "t2"),  # discarded runs never become baselines
+               _result("keep", {"b_ms": 2.0}, "t3"),      # a filtered run tracks only what it measured
+               _result("keep", {"a_ms": 1.0}, "t5", host="h2")]  # other machines keep their own baselines
+    base = mb.baselines(results, "h1")
+    assert base == {"a_ms": (10.0, "t1"), "b_ms": (2.0, "t3"), "s_mb_s": (5.0, "t1")}
+    assert mb.baselines(results, "h2") == {"a_ms": (1.0, "t5")} and mb.baselines(results, "h3") == {}
+
+    current = _result(None, {"a_ms": 13.0, "b_ms": 1.0, "s_mb_s": 3.5, "new_ms": 1.0}, "t4")
+    verdict = mb.compare(current, base, tolerance=0.25)
+    assert [(s["metric"], s["slowdown"]) for s in verdict["slowdowns"]] == [("a_ms", 1.3), ("s_mb_s", 1.429)]
+    assert [s["metric"] for s in verdict["speedups"]] == ["b_ms"]
+    assert verdict["new_metrics"] == ["new_ms"] and verdict["compared"] == 3
+    assert mb.compare(current, base, tolerance=0.5)["slowdowns"] == []
+
+
+def test_record_and_compare_cli(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    path = tmp_path / "campaign" / "results.jsonl"
+    mb.record(str(path), _result(None, {"a_ms": 10.0}, "t1"), mb.compare({}, {}))
+    slow = _result(None, {"a_ms": 20.0}, "t2")
+    mb.record(str(path), slow, mb.compare(slow, mb.baselines(mb.load_results(str(path)), "h1")))
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[0]["type"] == "config" and lines[0]["metric_name"] == "composite_ms"
+    assert [r["decision"] for r in lines[1:]] == ["keep", "discard"]
+    assert "a_ms x2.0" in lines[2]["description"]
+
+    assert mb.main(["compare", "--results", str(path)]) == 1
+    assert json.loads(capsys.readouterr().out)["comparison"]["slowdowns"][0]["metric"] == "a_ms"
+    assert mb.main(["compare", "--results", str(path), "--tolerance", "1.5"]) == 0
+    elsewhere = _result(None, {"a_ms": 40.0}, "t3", host="h2")
+    mb.record(str(path), elsewhere, mb.compare(elsewhere, mb.baselines(mb.load_results(str(path)), "h2")))
+    assert mb.main(["compare", "--results", str(path)]) == 0  # no h2 baseline: nothing to flag
+    capsys.readouterr()
+    assert mb.main(["compare", "--results", str(tmp_path / "none.jsonl")]) == 0
+    (tmp_path / "bad.jsonl").write_text("{not json\n")
+    assert mb.main(["compare", "--results", str(tmp_path / "bad.jsonl")]) == 2
+    assert mb.main(["run", "--filter", "no-such-case", "--results", str(path)]) == 2
@@ -0,0 +1,128 @@
+"""Unit tests for scripts/_prompt_builder.py."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _prompt_builder as pb  # noqa: E402
+
+RUN = {"OUTPUT_DIR": "/tmp/out-1a2b", "RUN_UUID": "uuid-7", "FINDINGS_HELPER": "/p/findings-helper.sh"}
+PROJECT = "You are reviewing a plan for correctness.\n\n## Project Context\n\nProject root: /repo\n" + "ctx " * 600
+
+
+def _spec(**extra) -> dict:
+    spec = {
+        "run": dict(RUN),
+        "project": PROJECT,
+        "document": "### Diff Stats\n- Files changed: 3\n- Lines: +40 -2",
+        "review_file": "/tmp/flux-drive-x-1.diff",
+        "agents": [
+            {"name": "fd-safety", "subagent_type": "general-purpose", "focus": "auth paths",
+             "knowledge": "- **Finding**: tokens leaked in logs"},
+            {"name": "fd-quality", "subagent_type": "general-purpose", "focus": "naming"},
+            {"name": "fd-architecture", "focus": "module boundaries"},
+        ],
+    }
+    spec.update(extra)
+    return spec
+
+
+def test_static_segment_is_agent_invariant() -> None:
+    template = pb.load_template()
+    static = pb.static_segment(template, RUN)
+    assert static.startswith("## Output Format")
+    assert "/tmp/out-1a2b/{AGENT_NAME}.uuid-7.md.partial" in static and "<!-- run-uuid: uuid-7 -->" in static
+    assert "{agent-name}" not in static and "{RUN_UUID}" not in static and "{OUTPUT_DIR}" not in static
+    assert "bash /p/findings-helper.sh read" in static and "## Peer Findings Protocol\n" in static
+    assert [line for line in static.splitlines() if line.startswith("## ")] == [
+        "## Output Format", "## Research Escalation", "## Peer Findings Protocol"]
+    assert "Maximum 1 research escalation per review" in static
+    assert "## Review Task" not in static and "\n---" not in static
+    assert "Peer Findings" not in pb.static_segment(template, RUN, mode="research")
+    with pytest.raises(ValueError, match="Research Escalation"):
+        pb.static_segment({k: v for k, v in template.items() if k != "Research Escalation"}, RUN)
+    with pytest.raises(ValueError, match="RUN_UUID"):
+        pb.static_segment(template, {"OUTPUT_DIR": "/x", "FINDINGS_HELPER": "h"})
+
+
+def test_segments_ordered_most_shared_first() -> None:
+    prompts = pb.assemble(_spec(), pb.load_template())
+    safety, quality, arch = prompts
+    assert [s for s, _ in safety.segments] == ["static", "project", "document", "agent"]
+    shared = "".join(b for _, b in safety.segments[:3])
+    assert quality.text.startswith(shared) and arch.text.startswith(shared)
+    tail = safety.segments[-1][1]
+    assert tail.index("## Knowledge Context") < tail.index("## Review File") < tail.index("## Your Focus Area")
+    assert tail.rstrip().endswith("write your findings to `/tmp/out-1a2b/fd-safety.uuid-7.md.partial` and "
+                                  "rename it to `/tmp/out-1a2b/fd-safety.uuid-7.md` when done.")
+    assert "fd-safety" not in shared and "tokens leaked" not in shared
+    assert arch.family == "interflux:review:fd-architecture"
+
+
+def test_plan_expected_reads_follow_family_and_order(tmp_path: Path) -> None:
+    prompts = pb.assemble(_spec(), pb.load_template())
+    doc = pb.plan(prompts, model="sonnet", now=1000)
+    safety, quality, arch = (doc["agents"][n] for n in doc["launch_order"])
+    assert safety["expected_cache_read"] == 0  # first writer
+    deepest = [bp for bp in quality["breakpoints"] if bp["cacheable"]][-1]
+    assert deepest["after"] == "document" and quality["expected_cache_read"] == deepest["prefix_tokens"]
+    assert arch["expected_cache_read"] == 0  # different subagent_type: different cached prefix
+    assert doc["totals"]["expected_cache_read"] == quality["expected_cache_read"]
+    assert quality["expected_cache_write"] == quality["prompt_tokens"] - quality["expected_cache_read"]
+
+    haiku = pb.plan(prompts, model="claude-haiku-4", now=1000)["agents"]["fd-quality"]
+    assert not any(bp["cacheable"] for bp in haiku["breakpoints"])  # prefix < 2048 tokens
+    assert haiku["expected_cache_read"] == 0
+
+
+
+def test_sliced_agents_reference_their_slice(tmp_path: Path) -> None:
+    manifest = {"input_type": "diff", "shared_file": "/tmp/s.diff", "agents": {
+        "fd-safety": {"mode": "sliced", "file": "/tmp/s-fd-safety.diff", "priority": ["a", "b"],
+                      "context": ["c"], "priority_lines": 120},
+        "fd-quality": {"mode": "full (cross-cutting)", "file": "/tmp/s.diff"}}}
+    safety = pb.review_file_section("fd-safety", manifest, None)
+    assert "`/tmp/s-fd-safety.diff`" in safety and "Request full hunks: {filename}" in safety
+    assert "[Diff slicing active: 2 priority files (120 lines), 1 context files]" in safety
+    assert "full diff under review" in pb.review_file_section("fd-quality", manifest, None)
+
+    slices = tmp_path / "m.slices.json"
+    slices.write_text(json.dumps(manifest))
+    spec = _spec(slices=str(slices), review_file=None)
+    spec["agents"] = spec["agents"][:2]
+    doc = pb.build(spec, str(tmp_path / "p"), now=50)
+    text = Path(doc["agents"]["fd-safety"]["file"]).read_text()
+    assert "/tmp/s-fd-safety.diff" in text and text.startswith("## Output Format")
+    assert json.loads((tmp_path / "p" / pb.PLAN_NAME).read_text()) == doc
+
+
+def test_report_compares_first_turn_usage(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    spec_path = tmp_path / "spec.json"
+    spec_path.write_text(json.dumps(_spec()))
+    assert pb.main(["build", str(spec_path), "--out-dir", str(tmp_path), "--model", "sonnet"]) == 0
+    built = json.loads(capsys.readouterr().out)
+    expected = built["agents"]["fd-quality"]["expected_cache_read"]
+
+    def turn(read: int, create: int) -> str:
+        return json.dumps({"message": {"role": "assistant", "usage": {
+            "input_tokens": 10, "output_tokens": 5, "cache_read_input_tokens": read,
+            "cache_creation_input_tokens": create}}})
+    jsonl = tmp_path / "q.jsonl"
+    jsonl.write_text("\n".join([turn(expected + 3000, 200), "{broken", turn(9000, 0)]) + "\n")
+    assert pb.main(["report", "--plan", str(tmp_path / pb.PLAN_NAME),
+                    "--usage", f"fd-quality={jsonl}", "--usage", "fd-safety=/nonexistent"]) == 0
+    doc = json.loads(capsys.readouterr().out)
+    q = doc["agents"]["fd-quality"]
+    assert q["actual"]["first_cache_read"] == expected + 3000 and q["actual"]["cache_read"] == expected + 12000
+    assert q["delta"] == 3000 and doc["agents"]["fd-safety"]["actual"] is None
+    assert doc["totals"]["measured_agents"] == 1
+    assert doc["totals"]["hit_ratio"] == round((expected + 3000) / expected, 4)
+
+    spec_path.write_text(json.dumps({"run": {}, "agents": []}))
+    assert pb.main(["build", str(spec_path), "--out-dir", str(tmp_path)]) == 2
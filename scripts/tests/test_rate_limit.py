@@ -0,0 +1,235 @@
+"""Unit tests for scripts/_rate_limit.py."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _rate_limit as rl  # noqa: E402
+
+SCRIPT = str(ROOT / "scripts" / "_rate_limit.py")
+
+
+def _registry(tmp_path: Path, providers: str) -> str:
+    path = tmp_path / "model-registry.yaml"
+    path.write_text(f"providers:\n{providers}models: {{}}\n")
+    return str(path)
+
+
+# --- load_limits ----------------------------------------------------------
+
+
+def test_load_limits_from_registry(tmp_path: Path) -> None:
+    reg = _registry(tmp_path, "  openrouter:\n    rate_limit: 20\n    tokens_per_min: 90000\n")
+    limits = rl.load_limits("openrouter", reg, env={})
+    assert limits == rl.ProviderLimits(requests_per_min=20, tokens_per_min=90000)
+    assert limits.enabled
+
+
+def test_load_limits_env_overrides_registry(tmp_path: Path) -> None:
+    reg = _registry(tmp_path, "  openrouter:\n    rate_limit: 20\n")
+    limits = rl.load_limits("openrouter", reg, env={"OPENROUTER_RATE_LIMIT": "5",
+                                                    "OPENROUTER_TOKENS_PER_MIN": "1000"})
+    assert limits.requests_per_min == 5
+    assert limits.tokens_per_min == 1000
+
+
+def test_load_limits_unknown_provider_unlimited(tmp_path: Path) -> None:
+    reg = _registry(tmp_path, "  claude:\n    type: native\n")
+    assert not rl.load_limits("claude", reg, env={}).enabled
+    assert not rl.load_limits("nope", reg, env={}).enabled
+
+
+def test_load_limits_missing_registry_unlimited(tmp_path: Path) -> None:
+    assert not rl.load_limits("openrouter", str(tmp_path / "absent.yaml"), env={}).enabled
+
+
+def test_load_limits_ignores_non_positive(tmp_path: Path) -> None:
+    reg = _registry(tmp_path, "  openrouter:\n    rate_limit: 0\n    tokens_per_min: bogus\n")
+    assert not rl.load_limits("openrouter", reg, env={}).enabled
+
+
+def test_shipped_registry_declares_openrouter_rate_limit() -> None:
+    limits = rl.load_limits("openrouter", rl.DEFAULT_REGISTRY, env={})
+    assert limits.requests_per_min == 20
+
+
+# --- bucket arithmetic ----------------------------------------------------
+
+
+def test_try_take_fresh_state_starts_full() -> None:
+    state: dict = {}
+    limits = rl.ProviderLimits(requests_per_min=2, tokens_per_min=1000)
+    assert rl.try_take(state, limits, 400, 0) == 0.0
+    assert state["tokenBucket"] == 1
+    assert state["tpmBucket"] == 600
+
+
+def test_try_take_requests_exhausted_returns_wait_without_debit() -> None:
+    state: dict = {}
+    limits = rl.ProviderLimits(requests_per_min=1)
+    assert rl.try_take(state, limits, 0, 0) == 0.0
+    assert rl.try_take(state, limits, 0, 0) == pytest.approx(60.0)
+    assert state["tokenBucket"] == 0
+    # Continuous refill: half a minute buys half a request.
+    assert rl.try_take(state, limits, 0, 30_000) == pytest.approx(30.0)
+    assert rl.try_take(state, limits, 0, 60_000) == 0.0
+
+
+def test_try_take_tokens_bucket_gates_independently() -> None:
+    state: dict = {}
+    limits = rl.ProviderLimits(requests_per_min=100, tokens_per_min=1000)
+    assert rl.try_take(state, limits, 900, 0) == 0.0
+    assert rl.try_take(state, limits, 400, 0) == pytest.approx(18.0)
+    assert state["tpmBucket"] == 100
+    assert state["tokenBucket"] == 99
+
+
+def test_try_take_oversized_estimate_clamped_to_capacity() -> None:
+    state: dict = {}
+    limits = rl.ProviderLimits(tokens_per_min=1000)
+    assert rl.try_take(state, limits, 50_000, 0) == 0.0
+    assert state["tpmBucket"] == 0
+
+
+def test_refill_never_exceeds_capacity() -> None:
+    state = {"tokenBucket": 3, "lastRefill": 0}
+    rl.refill(state, rl.ProviderLimits(requests_per_min=5), 10 * 60_000)
+    assert state["tokenBucket"] == 5
+
+
+def test_refill_clamps_stale_bucket_above_new_capacity() -> None:
+    """A lowered rate_limit must take effect even if the persisted bucket is fuller."""
+    state = {"tokenBucket": 20, "lastRefill": 0}
+    rl.refill(state, rl.ProviderLimits(requests_per_min=5), 0)
+    assert state["tokenBucket"] == 5
+
+
+def test_settle_tokens_refund_and_debt() -> None:
+    limits = rl.ProviderLimits(tokens_per_min=1000)
+    state: dict = {}
+    rl.try_take(state, limits, 500, 0)
+    rl.settle_tokens(state, limits, 500, 200)
+    assert state["tpmBucket"] == 800
+    rl.settle_tokens(state, limits, 0, 5000)
+    assert state["tpmBucket"] == -1000
+
+
+def test_settle_refunds_only_the_clamped_debit() -> None:
+    # try_take debits min(estimate, capacity); settling the raw estimate would refund 70k never paid.
+    limits = rl.ProviderLimits(tokens_per_min=30_000)
+    state: dict = {}
+    assert rl.try_take(state, limits, 100_000, 0) == 0.0 and state["tpmBucket"] == 0
+    rl.settle_tokens(state, limits, 100_000, 20_000)
+    assert state["tpmBucket"] == 10_000
+
+
+# --- shared state file ----------------------------------------------------
+
+
+def test_acquire_unlimited_does_not_touch_state(tmp_path: Path) -> None:
+    ok, waited = rl.acquire("claude", limits=rl.ProviderLimits(), state_dir=str(tmp_path))
+    assert ok and waited == 0.0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_acquire_persists_and_preserves_foreign_keys(tmp_path: Path) -> None:
+    state_file = tmp_path / "openrouter-state.json"
+    state_file.write_text(json.dumps({"cumulativeSpendUsd": 0.42}))
+    limits = rl.ProviderLimits(requests_per_min=10, tokens_per_min=1000)
+    ok, _ = rl.acquire("openrouter", 100, limits=limits, state_dir=str(tmp_path))
+    assert ok
+    state = json.loads(state_file.read_text())
+    assert state["cumulativeSpendUsd"] == 0.42
+    assert state["tokenBucket"] == pytest.approx(9, abs=0.01)
+    assert state["tpmBucket"] == pytest.approx(900, abs=1)
+    assert not (tmp_path / "openrouter-state.json.lock").exists()
+    assert oct(state_file.stat().st_mode & 0o777) == "0o600"
+
+
+def test_acquire_times_out_when_bucket_empty(tmp_path: Path) -> None:
+    limits = rl.ProviderLimits(requests_per_min=1)
+    assert rl.acquire("p", limits=limits, state_dir=str(tmp_path))[0]
+    start = time.monotonic()
+    ok, _ = rl.acquire("p", limits=limits, timeout=0.2, state_dir=str(tmp_path))
+    assert ok is False
+    assert time.monotonic() - start < 2
+
+
+def test_acquire_waits_for_refill(tmp_path: Path) -> None:
+    limits = rl.ProviderLimits(requests_per_min=600)  # one request per 100ms
+    (tmp_path / "p-state.json").write_text(
+        json.dumps({"tokenBucket": 0, "lastRefill": time.time() * 1000})
+    )
+    ok, waited = rl.acquire("p", limits=limits, timeout=5, state_dir=str(tmp_path))
+    assert ok
+    assert 0.05 < waited < 2
+
+
+def test_acquire_breaks_stale_lock(tmp_path: Path) -> None:
+    lock = tmp_path / "p-state.json.lock"
+    lock.write_text("99999\n0\n")
+    old = time.time() - rl.LOCK_STALE_S - 5
+    os.utime(lock, (old, old))
+    ok, _ = rl.acquire("p", limits=rl.ProviderLimits(requests_per_min=5),
+                       state_dir=str(tmp_path))
+    assert ok
+    assert not lock.exists()
+
+
+def test_settle_updates_shared_state(tmp_path: Path) -> None:
+    limits = rl.ProviderLimits(tokens_per_min=1000)
+    rl.acquire("p", 600, limits=limits, state_dir=str(tmp_path))
+    rl.settle("p", 600, 100, limits=limits, state_dir=str(tmp_path))
+    state = json.loads((tmp_path / "p-state.json").read_text())
+    assert state["tpmBucket"] == pytest.approx(900, abs=1)
+
+
+# --- CLI ------------------------------------------------------------------
+
+
+def _run_cli(tmp_path: Path, *args: str, **env_extra: str) -> subprocess.CompletedProcess[str]:
+    env = dict(os.environ)
+    env["INTERFLUX_STATE_DIR"] = str(tmp_path)
+    env["MODEL_REGISTRY"] = _registry(tmp_path, "  openrouter:\n    rate_limit: 1\n")
+    env.update(env_extra)
+    return subprocess.run([sys.executable, SCRIPT, *args],
+                          capture_output=True, text=True, check=False, env=env)
+
+
+def test_cli_acquire_then_timeout(tmp_path: Path) -> None:
+    first = _run_cli(tmp_path, "acquire", "openrouter", "--timeout", "0")
+    assert first.returncode == 0
+    assert first.stdout.startswith("ok ")
+    second = _run_cli(tmp_path, "acquire", "openrouter", "--timeout", "0")
+    assert second.returncode == 1
+    assert "timeout" in second.stderr
+
+
+def test_cli_status_json(tmp_path: Path) -> None:
+    result = _run_cli(tmp_path, "status", "openrouter", OPENROUTER_TOKENS_PER_MIN="500")
+    assert result.returncode == 0
+    data = json.loads(result.stdout)
+    assert data["requests_per_min"] == 1
+    assert data["tokens_per_min"] == 500
+    assert data["tokens_available"] == 500
+
+
+def test_cli_invalid_tokens(tmp_path: Path) -> None:
+    result = _run_cli(tmp_path, "acquire", "openrouter", "--tokens", "-5")
+    assert result.returncode == 4
+
+
+def test_cli_unparseable_registry(tmp_path: Path) -> None:
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("providers: [unclosed\n")
+    result = _run_cli(tmp_path, "acquire", "openrouter", MODEL_REGISTRY=str(bad))
+    assert result.returncode == 2
@@ -0,0 +1,210 @@
+"""Unit tests for scripts/_slicer.py."""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _slicer as sl  # noqa: E402
+
+ALL_AGENTS = ["fd-architecture", "fd-quality", "fd-safety", "fd-correctness", "fd-performance",
+              "fd-user-product", "fd-game-design", "fd-systems", "fd-decisions", "fd-people",
+              "fd-resilience", "fd-perception"]
+
+
+def _file_diff(path: str, hunks: list[list[str]]) -> list[str]:
+    out = [f"diff --git a/{path} b/{path}", "index 1..2 100644", f"--- a/{path}", f"+++ b/{path}"]
+    for n, body in enumerate(hunks):
+        old = sum(1 for b in body if b[:1] in (" ", "-"))
+        new = sum(1 for b in body if b[:1] in (" ", "+"))
+        out.append(f"@@ -{n * 50 + 1},{old} +{n * 50 + 1},{new} @@")
+        out.extend(body)
+    return out
+
+
+def test_routing_parsed_from_slicing_md() -> None:
+    routing = sl.load_routing()
+    assert routing.cross_cutting == {"fd-architecture", "fd-quality"}
+    safety = routing.agents["fd-safety"]
+    assert "**/auth/**" in safety.file_patterns and "password" in safety.hunk_keywords
+    assert "security" in safety.heading_keywords
+    assert "for " in routing.agents["fd-performance"].hunk_keywords  # trailing space kept
+    assert "**/plugin.json" in routing.ship_class and "**/plugin.json" not in safety.file_patterns
+
+
+@pytest.mark.parametrize("glob,path,hit", [
+    ("**/auth/**", "auth/login.py", True),
+    ("**/auth/**", "src/auth/deep/x.go", True),
+    ("**/auth/**", "src/oauth2.py", False),
+    ("**/credential*", "pkg/credentials.py", True),
+    ("**/render*", "ui/renderer/canvas.ts", True),     # directory match covers contents
+    ("hooks/*.sh", "hooks/pre.sh", True),
+    ("hooks/*.sh", "x/hooks/pre.sh", False),
+    ("**/mcp-*.y?ml", "cfg/mcp-server.yaml", True),
+    ("**/mcp-*.y?ml", "cfg/mcp-server.yml", False),
+])
+def test_glob_semantics(glob: str, path: str, hit: bool) -> None:
+    assert bool(sl.compile_globs([glob]).fullmatch(path)) is hit
+
+
+def test_parse_diff_counts_dedupes_and_flags_binary() -> None:
+    hunk = [" ctx", "-old", "+new", "+more", "\\ No newline at end of file"]
+    text = "\n".join(_file_diff("a.py", [hunk]) + _file_diff("a.py", [hunk])
+                     + ["diff --git a/img.png b/img.png", "Binary files a/img.png and b/img.png differ"])
+    files = sl.parse_diff(text)
+    assert [f.path for f in files] == ["a.py", "img.png"]
+    assert len(files[0].hunks) == 1 and (files[0].added, files[0].removed) == (2, 1)
+    assert files[1].binary and not files[1].hunks
+
+    plain = "--- a/x.c\n+++ b/x.c\n@@ -1 +1 @@\n--- removed sql comment\n+new\n"
+    (f,) = sl.parse_diff(plain)
+    assert f.path == "x.c" and f.hunks[0].lines == ["--- removed sql comment", "+new"]
+
+
+def test_keyword_index_finds_each_hunk_once() -> None:
+    files = sl.parse_diff("\n".join(
+        _file_diff("a.py", [["+Token token", " x"], ["+nothing"]]) + _file_diff("b.py", [["-TOKEN"]])))
+    assert sl.keyword_index(files, ["token", "lock"]) == {"token": {0, 2}}
+
+
+def test_diff_slices_per_agent(tmp_path: Path) -> None:
+    filler = [[f"+line {i}" for i in range(30)] for _ in range(3)]
+    lines = (_file_diff("src/auth/login.py", [["+check(user)", " pass"]])
+             + _file_diff("pkg/util.py", [["+conn.execute('BEGIN')", "+x"], ["+plain"]])
+             + _file_diff(".claude-plugin/plugin.json", [['+"name": "x"']]))
+    for n in range(6):
+        lines += _file_diff(f"lib/mod{n}.py", filler)
+    diff = tmp_path / "change.diff"
+    diff.write_text("\n".join(lines) + "\n")
+
+    m = sl.run(str(diff), ["fd-architecture", "fd-safety", "fd-correctness", "fd-game-design", "fd-people"],
+               out_dir=str(tmp_path / "out"), ts="7", force=True)
+    agents = m["agents"]
+    assert m["ship_class"] == [".claude-plugin/plugin.json"]
+    assert agents["fd-architecture"]["mode"] == "full (cross-cutting)"
+    assert agents["fd-people"]["mode"] == "full (no routing patterns)"
+    assert agents["fd-game-design"]["mode"] == "full (zero-priority fallback)"
+    assert m["section_map"]["fd-game-design"] == {"mode": "full"}
+
+    safety = agents["fd-safety"]
+    assert safety["mode"] == "sliced" and safety["priority"] == ["src/auth/login.py"]
+    assert safety["reasons"]["src/auth/login.py"] == "glob:**/auth/**"
+    body = Path(safety["file"]).read_text()
+    assert "+check(user)" in body and "[context] lib/mod0.py: +90 -0" in body
+
+    corr = agents["fd-correctness"]
+    assert corr["priority"] == ["pkg/util.py"] and corr["reasons"]["pkg/util.py"] == "keyword:BEGIN"
+    body = Path(corr["file"]).read_text()
+    assert "+plain" not in body and "[context] pkg/util.py: +1 -0" in body  # second hunk summarized
+    assert 0 < corr["coverage"] < 0.1 and corr["lines_reviewed"] < m["total_lines"]
+
+    on_disk = json.loads((tmp_path / "out" / "flux-drive-change-7.slices.json").read_text())
+    assert on_disk == m and Path(m["shared_file"]).read_text() == diff.read_text()
+    again = sl.run(str(diff), ["fd-architecture", "fd-safety", "fd-correctness", "fd-game-design", "fd-people"],
+                   out_dir=str(tmp_path / "out"), ts="7", force=True)
+    assert again == m  # deterministic
+    assert not sl.run(str(diff), ["fd-safety"], out_dir=str(tmp_path / "o3"))["sliced"]  # < 1000 lines
+
+
+def test_document_slices_and_overlap_rule(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sections = {
+        "Security Model": "Tokens rotate hourly.",
+        "Data Migration": "Backfill runs in batches.",
+        "Rendering Pipeline": "Frames are composed lazily.",
+        "Operations": "The on-call rotation renews the TLS certificates.",
+    }
+    doc = ["# Plan", "Intro line."]
+    for title, text in sections.items():
+        doc += [f"## {title}", text] + [f"detail {i}" for i in range(60)]
+    path = tmp_path / "plan.md"
+    path.write_text("\n".join(doc) + "\n")
+
+    m = sl.run(str(path), ["fd-safety", "fd-correctness", "fd-performance", "fd-quality"],
+               out_dir=str(tmp_path), ts="1")
+    assert m["input_type"] == "document" and m["sliced"]
+    assert m["section_map"]["fd-safety"] == {"priority": ["Security Model", "Operations"],
+                                             "context": ["Data Migration", "Rendering Pipeline"]}
+    assert m["agents"]["fd-safety"]["reasons"]["Operations"] == "safety-override:certificate"
+    assert m["agents"]["fd-performance"]["priority"] == ["Rendering Pipeline"]
+    body = Path(m["agents"]["fd-correctness"]["file"]).read_text()
+    assert body.startswith("# Plan") and "- **Security Model**: Tokens rotate hourly. (62 lines)" in body
+
+    # Ship-class matching strips a leading "./" only: "../hooks/run.ts" is not hooks/*.ts.
+    (tmp_path / "hooks").mkdir()
+    (tmp_path / "hooks" / "run.ts").write_text("export {}\n")
+    monkeypatch.chdir(tmp_path / "hooks")
+    assert sl.run("../hooks/run.ts", ["fd-safety"], kind="document", out_dir=str(tmp_path), ts="3")[
+        "ship_class"] == []
+    monkeypatch.chdir(tmp_path)
+    assert sl.run("./hooks/run.ts", ["fd-safety"], kind="document", out_dir=str(tmp_path), ts="4")[
+        "ship_class"] == ["./hooks/run.ts"]
+
+    heavy = tmp_path / "heavy.md"
+    heavy.write_text("\n".join(["## Security", *["x"] * 300, "## Misc", "y"]) + "\n")
+    assert sl.run(str(heavy), ["fd-safety"], out_dir=str(tmp_path), ts="2")["agents"]["fd-safety"]["mode"] \
+        == "full (>= 80% priority)"
+
+
+def test_large_diff_is_fast(tmp_path: Path) -> None:
+    rng = random.Random(3)
+    dirs = ["src/auth", "pkg/db", "internal/cache", "cmd/cli", "lib/game", "pkg/core", "lib/net"]
+    common = ["x = y + 1", "return x", "pass", "value = compute()", "# note"]
+    rare = ["token", "lock()", "cache.get", "user", "SELECT a", "await x"]
+    lines: list[str] = []
+    n = 0
+    while len(lines) < 50000:
+        lines += _file_diff(f"{rng.choice(dirs)}/f{n}.py",
+                            [[rng.choice("+- ") + (rng.choice(rare) if rng.random() < 0.003 else rng.choice(common))
+                              for _ in range(rng.randint(10, 40))] for _ in range(rng.randint(1, 4))])
+        n += 1
+    diff = tmp_path / "big.diff"
+    diff.write_text("\n".join(lines) + "\n")
+    start = time.perf_counter()
+    m = sl.run(str(diff), ALL_AGENTS, out_dir=str(tmp_path / "out"), ts="1")
+    elapsed = time.perf_counter() - start
+    assert m["total_lines"] >= 50000 and m["agents"]["fd-safety"]["mode"] == "sliced"
+    assert elapsed < 1.0, f"slicing took {elapsed:.2f}s"
+
+
+def test_shared_chunks_form_a_stable_prefix(tmp_path: Path) -> None:
+    filler = [[f"+line {i}" for i in range(40)] for _ in range(4)]
+    lines = (_file_diff("lib/a.py", [["+only perf: cache.get(k)"]])
+             + _file_diff("src/auth/session.py", [["+token = cache.lock()"], ["+conn.rollback()"]])
+             + _file_diff("pkg/b.py", [["+password = hash(x)"]]))
+    for n in range(5):
+        lines += _file_diff(f"lib/mod{n}.py", filler)
+    diff = tmp_path / "d.diff"
+    diff.write_text("\n".join(lines) + "\n")
+    agents = ["fd-safety", "fd-correctness", "fd-performance", "fd-quality"]
+    m = sl.run(str(diff), agents, out_dir=str(tmp_path), ts="1", force=True)
+
+    safety, corr, perf = (m["agents"][a] for a in agents[:3])
+    assert all(a["mode"] == "sliced" for a in (safety, corr, perf))
+    # The hunk all three share leads every slice, byte-identical.
+    (shared,) = m["shared_prefix"]["chunks"]
+    assert safety["chunks"][0] == corr["chunks"][0] == perf["chunks"][0] == shared
+    store = m["hunk_store"]
+    head = sl.read_chunk(store["pack"], store["index"][shared])
+    assert hashlib.sha256(head.rstrip("\n").encode()).hexdigest()[:16] == shared
+    for a in (safety, corr, perf):
+        assert Path(a["file"]).read_text().startswith(head)
+        assert a["prefix_chunks"] == 1
+    assert "+token = cache.lock()" in head and head.startswith("diff --git a/src/auth/session.py")
+
+    # Store holds each hunk once; slices reference it repeatedly.
+    assert store["chunks"] == len(set(safety["chunks"]) | set(corr["chunks"]) | set(perf["chunks"]))
+    assert store["refs"] == len(safety["chunks"]) + len(corr["chunks"]) + len(perf["chunks"])
+    assert store["ref_lines"] > store["lines"]
+    assert sorted(store["index"]) == sorted(set(safety["chunks"]) | set(corr["chunks"]) | set(perf["chunks"]))
+    assert sum(length for _, length in store["index"].values()) == Path(store["pack"]).stat().st_size
+    # Context summaries trail the chunks.
+    assert Path(corr["file"]).read_text().rstrip().endswith("[context] lib/mod4.py: +160 -0")
+    assert "chunks" not in m["agents"]["fd-quality"]
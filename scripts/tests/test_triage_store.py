@@ -0,0 +1,136 @@
+"""Unit tests for scripts/_triage_store.py and triage-stats.py's indexed path."""
+from __future__ import annotations
+
+import json
+import random
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import _triage_store as ts  # noqa: E402
+
+STATS = str(ROOT / "scripts" / "triage-stats.py")
+AGENTS = ["fd-architecture", "fd-correctness", "fd-safety", "fd-perf"]
+REASONS = ["domain mismatch: no overlap", "budget: over cap", "low score 0.2", ""]
+
+
+def _entries(n: int, seed: int = 7, now: datetime | None = None) -> list[dict]:
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    out = []
+    for i in range(n):
+        when = now - timedelta(hours=rng.uniform(0, 24 * 40))
+        e = {
+            "ts": when.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "run_id": f"r{i // 4}",
+            "agent": rng.choice(AGENTS),
+            "input_stem": rng.choice(["auth", "cache"]),
+            "selected": rng.random() > 0.3,
+            "final_score": round(rng.uniform(0, 8), 2),
+            "quality_signal_adjust": round(rng.uniform(-1, 1), 2),
+        }
+        reason = rng.choice(REASONS)
+        if reason:
+            e["skip_reason"] = reason
+        out.append(e)
+    return out
+
+
+def _write_log(root: Path, entries: list[dict], mode: str = "w") -> Path:
+    log = root / ".clavain" / "interflux" / "triage.jsonl"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with log.open(mode) as fh:
+        for e in entries:
+            fh.write(json.dumps(e) + "\n")
+    return log
+
+
+def _stats(root: Path, *args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, STATS, f"--repo-root={root}", *args],
+                          capture_output=True, text=True, check=False)
+
+
+def test_ingest_is_incremental_and_skips_torn_tail(tmp_path: Path) -> None:
+    log = _write_log(tmp_path, _entries(10))
+    conn = ts.open_store(str(tmp_path / "t.db"))
+    assert ts.ingest(conn, str(log)) == 10
+    assert ts.ingest(conn, str(log)) == 0
+    with log.open("a") as fh:
+        fh.write(json.dumps(_entries(1, seed=9)[0]) + "\n" + '{"ts": "2026-')
+    assert ts.ingest(conn, str(log)) == 1
+    with log.open("a") as fh:
+        fh.write('01-01T00:00:00Z", "agent": "fd-x"}\n')
+    assert ts.ingest(conn, str(log)) == 1
+
+
+def test_truncated_log_triggers_rebuild(tmp_path: Path) -> None:
+    log = _write_log(tmp_path, _entries(20))
+    conn = ts.open_store(str(tmp_path / "t.db"))
+    ts.ingest(conn, str(log))
+    _write_log(tmp_path, _entries(3, seed=1))
+    ts.ingest(conn, str(log))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=365)
+    total = sum(s.runs for s in ts.query(conn, str(log), cutoff).by_agent.values())
+    assert total == 3
+
+
+@pytest.mark.parametrize("days", [1, 7, 30, 60])
+@pytest.mark.parametrize("stem", [None, "auth"])
+def test_query_matches_full_scan(tmp_path: Path, days: int, stem: str | None) -> None:
+    entries = _entries(400)
+    log = _write_log(tmp_path, entries)
+    conn = ts.open_store(str(tmp_path / "t.db"))
+    ts.ingest(conn, str(log))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    got = ts.query(conn, str(log), cutoff, stem)
+    want = ts.summarize(
+        e for e in entries
+        if ts.parse_iso(e["ts"]) >= cutoff and (not stem or e["input_stem"] == stem)
+    )
+    assert got.runs_seen == want.runs_seen
+    assert [a for a, _ in got.agents_in_order()] == [a for a, _ in want.agents_in_order()]
+    for agent, w in want.by_agent.items():
+        g = got.by_agent[agent]
+        assert (g.runs, g.selected, g.n_final) == (w.runs, w.selected, w.n_final)
+        assert g.avg_final == pytest.approx(w.avg_final)
+        assert g.sumsq_qsa == pytest.approx(w.sumsq_qsa)
+        assert g.top_skip_reasons() == w.top_skip_reasons()
+
+
+def test_top_skip_reasons_ties_keep_first_seen_order() -> None:
+    st = ts.AgentStats()
+    st.add({"skip_reason": "b: x"}, 5)
+    st.add({"skip_reason": "a: y"}, 9)
+    st.add({"skip_reason": "c"}, 1)
+    assert st.top_skip_reasons() == [("c", 1), ("b", 1), ("a", 1)]
+
+
+def test_cli_index_and_scan_outputs_identical(tmp_path: Path) -> None:
+    _write_log(tmp_path, _entries(300))
+    for args in (["--days=7"], ["--days=30", "--input-stem=cache"], ["--days=3", "--json"]):
+        indexed = _stats(tmp_path, *args)
+        scanned = _stats(tmp_path, *args, "--no-index")
+        assert indexed.returncode == scanned.returncode == 0
+        assert indexed.stdout == scanned.stdout
+    assert (tmp_path / ".clavain" / "interflux" / ts.DB_FILENAME).exists()
+
+
+def test_cli_picks_up_appended_lines(tmp_path: Path) -> None:
+    _write_log(tmp_path, _entries(50))
+    first = json.loads(_stats(tmp_path, "--json").stdout)
+    _write_log(tmp_path, _entries(50, seed=99), mode="a")
+    second = json.loads(_stats(tmp_path, "--json").stdout)
+    rebuilt = json.loads(_stats(tmp_path, "--json", "--rebuild-index").stdout)
+    assert sum(a["runs"] for a in second["agents"]) > sum(a["runs"] for a in first["agents"])
+    assert second == rebuilt
+
+
+def test_cli_missing_log(tmp_path: Path) -> None:
+    (tmp_path / ".clavain").mkdir()
+    assert _stats(tmp_path).returncode == 1
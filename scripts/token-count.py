@@ -2,7 +2,12 @@
 """Parse agent task output JSONL for actual token usage.
 
 Usage: token-count.py <subagent_jsonl_path>
-Output (JSON): {"input_tokens": N, "output_tokens": N, "cache_creation": N, "cache_read": N, "total": N}
+Output (JSON): {"input_tokens": N, "output_tokens": N, "cache_creation": N, "cache_read": N, "total": N,
+                "first_cache_creation": N, "first_cache_read": N}
+
+The first_* fields are the first assistant turn's cache usage — what the
+launch prompt itself hit or wrote (compared against the prompt builder's
+breakpoint plan by `_prompt_builder.py report`).
 
 Falls back to chars/4 estimate if JSONL unavailable or unparseable.
 Pass --fallback-file <path> to use a file for the chars/4 estimate.
@@ -19,6 +24,7 @@ def sum_usage(path: str) -> dict:
         "cache_creation": 0,
         "cache_read": 0,
     }
+    first = None
     valid_lines = 0
     with open(path) as f:
         for line in f:
@@ -40,8 +46,12 @@ def sum_usage(path: str) -> dict:
             totals["output_tokens"] += int(usage.get("output_tokens") or 0)
             totals["cache_creation"] += int(usage.get("cache_creation_input_tokens") or 0)
             totals["cache_read"] += int(usage.get("cache_read_input_tokens") or 0)
+            if first is None:
+                first = usage
             valid_lines += 1
     totals["total"] = totals["input_tokens"] + totals["output_tokens"]
+    totals["first_cache_creation"] = int((first or {}).get("cache_creation_input_tokens") or 0)
+    totals["first_cache_read"] = int((first or {}).get("cache_read_input_tokens") or 0)
     # Only treat as "successful parse" if at least one line was valid. A file of all-
     # malformed lines returns zeroes; caller can detect via total == 0 and input_tokens == 0.
     totals["_valid_lines"] = valid_lines
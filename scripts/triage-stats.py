@@ -13,9 +13,16 @@ The Skip% and Avg q_signal columns tell you whether interspect's
 quality_signal_adjust is causing meaningful skip decisions or is
 contributing 0 across the board (i.e. cold-start mode).
 
+Queries go through an indexed store (.clavain/interflux/triage.db, see
+_triage_store.py): new log lines are ingested incrementally into daily
+per-agent rollups, so a --days=N query reads N days of rollups instead of
+the whole log. --no-index forces a full scan of the JSONL (same output).
+Both paths read rotated segments (triage.jsonl.segments/, written by
+`_log_segments.py rotate`); the scan skips segments older than the window.
+
 Usage:
   triage-stats.py [--days=30] [--input-stem=...] [--repo-root=.]
-                  [--min-runs=5] [--json]
+                  [--min-runs=5] [--json] [--no-index] [--rebuild-index]
 
 Examples:
   # Default 30-day summary, human-readable
@@ -35,11 +42,17 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sqlite3
 import sys
-from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from statistics import mean
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _log_segments  # noqa: E402
+import _triage_store  # noqa: E402
+from _triage_store import Summary, parse_iso  # noqa: E402,F401  (parse_iso re-exported)
 
 
 def find_repo_root(start: Path) -> Path:
@@ -51,69 +64,41 @@ def find_repo_root(start: Path) -> Path:
     return start.resolve()
 
 
-def parse_iso(ts: str) -> datetime | None:
-    try:
-        return datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=timezone.utc)
-    except (ValueError, AttributeError):
-        return None
-
-
 def stream_entries(path: Path, cutoff: datetime, input_stem: str | None):
-    if not path.exists():
-        return
     try:
-        with path.open("r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    e = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                ts = parse_iso(e.get("ts", ""))
-                if not ts or ts < cutoff:
-                    continue
-                if input_stem and e.get("input_stem") != input_stem:
-                    continue
-                yield e
+        for e in _log_segments.iter_records(str(path), since=cutoff):
+            ts = parse_iso(e.get("ts", ""))
+            if not ts or ts < cutoff:
+                continue
+            if input_stem and e.get("input_stem") != input_stem:
+                continue
+            yield e
     except OSError:
         return
 
 
-def summarize(entries) -> dict[str, dict]:
-    """Aggregate per-agent stats."""
-    by_agent: dict[str, dict] = defaultdict(
-        lambda: {
-            "runs": 0,
-            "selected": 0,
-            "final_scores": [],
-            "quality_signal_adjusts": [],
-            "skip_reasons": defaultdict(int),
-        }
-    )
-    runs_seen: set[str] = set()
-    for e in entries:
-        agent = e.get("agent")
-        if not agent:
-            continue
-        run_id = e.get("run_id", "")
-        if run_id:
-            runs_seen.add(run_id)
-        stats = by_agent[agent]
-        stats["runs"] += 1
-        if e.get("selected"):
-            stats["selected"] += 1
-        if isinstance(e.get("final_score"), (int, float)):
-            stats["final_scores"].append(float(e["final_score"]))
-        if isinstance(e.get("quality_signal_adjust"), (int, float)):
-            stats["quality_signal_adjusts"].append(float(e["quality_signal_adjust"]))
-        reason = e.get("skip_reason") or ""
-        if reason:
-            # Coarse-grain the reason for histogram purposes.
-            key = reason.split(":")[0].split(" 0")[0].strip()[:60]
-            stats["skip_reasons"][key] += 1
-    return by_agent, runs_seen
+def summarize(entries) -> Summary:
+    """Aggregate per-agent stats (running sums — constant memory per agent)."""
+    return _triage_store.summarize(entries)
+
+
+def load_summary(log_path: Path, cutoff: datetime, input_stem: str | None,
+                 use_index: bool = True, rebuild: bool = False) -> Summary:
+    """Indexed query when possible; full scan if the store is unusable."""
+    if use_index:
+        db_path = log_path.parent / _triage_store.DB_FILENAME
+        try:
+            if rebuild and db_path.exists():
+                db_path.unlink()
+            conn = _triage_store.open_store(str(db_path))
+            try:
+                _triage_store.ingest(conn, str(log_path))
+                return _triage_store.query(conn, str(log_path), cutoff, input_stem)
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as exc:
+            print(f"triage-stats: index unavailable ({exc}); scanning log", file=sys.stderr)
+    return summarize(stream_entries(log_path, cutoff, input_stem))
 
 
 def main() -> int:
@@ -123,12 +108,16 @@ def main() -> int:
     ap.add_argument("--repo-root", default=".")
     ap.add_argument("--min-runs", type=int, default=1)
     ap.add_argument("--json", action="store_true")
+    ap.add_argument("--no-index", action="store_true",
+                    help="full scan of triage.jsonl instead of the rollup store")
+    ap.add_argument("--rebuild-index", action="store_true",
+                    help="discard and rebuild .clavain/interflux/triage.db")
     args = ap.parse_args()
 
     repo_root = find_repo_root(Path(args.repo_root))
     log_path = repo_root / ".clavain" / "interflux" / "triage.jsonl"
 
-    if not log_path.exists():
+    if not log_path.exists() and not _log_segments.has_segments(str(log_path)):
         print(
             f"triage-stats: no log at {log_path}. "
             "Run flux-engine at least once with the triage-log instructions "
@@ -138,8 +127,9 @@ def main() -> int:
         return 1
 
     cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
-    entries = list(stream_entries(log_path, cutoff, args.input_stem or None))
-    if not entries:
+    summary = load_summary(log_path, cutoff, args.input_stem or None,
+                           use_index=not args.no_index, rebuild=args.rebuild_index)
+    if not summary.by_agent:
         print(
             f"triage-stats: no entries in {log_path} within --days={args.days}"
             + (f" --input-stem={args.input_stem}" if args.input_stem else ""),
@@ -147,33 +137,24 @@ def main() -> int:
         )
         return 0
 
-    by_agent, runs_seen = summarize(entries)
-    total_runs = len(runs_seen)
+    total_runs = len(summary.runs_seen)
 
     rows = []
-    for agent, stats in by_agent.items():
-        if stats["runs"] < args.min_runs:
+    for agent, stats in summary.agents_in_order():
+        if stats.runs < args.min_runs:
             continue
-        selected = stats["selected"]
-        runs = stats["runs"]
+        selected = stats.selected
+        runs = stats.runs
         skip_rate = 1 - (selected / runs) if runs else 0
-        avg_final = mean(stats["final_scores"]) if stats["final_scores"] else 0
-        avg_qsa = (
-            mean(stats["quality_signal_adjusts"])
-            if stats["quality_signal_adjusts"]
-            else 0
-        )
         rows.append(
             {
                 "agent": agent,
                 "runs": runs,
                 "selected": selected,
                 "skip_rate": round(skip_rate, 3),
-                "avg_final_score": round(avg_final, 2),
-                "avg_quality_signal_adjust": round(avg_qsa, 3),
-                "top_skip_reasons": sorted(
-                    stats["skip_reasons"].items(), key=lambda kv: -kv[1]
-                )[:3],
+                "avg_final_score": round(stats.avg_final, 2),
+                "avg_quality_signal_adjust": round(stats.avg_qsa, 3),
+                "top_skip_reasons": stats.top_skip_reasons(3),
             }
         )
 
@@ -22,10 +22,14 @@ if [[ "$source_check" != "claude-baseline" ]]; then
 fi
 
 # Check 2: at least one model qualified_via: real
+# (lib_registry replays event-mode writes still pending in the event log)
 export _VE_REGISTRY="$MODEL_REGISTRY"
+export _VE_SCRIPTS="$SCRIPT_DIR"
 real_qualified=$(python3 -c "
-import yaml, os
-reg = yaml.safe_load(open(os.environ['_VE_REGISTRY'])) or {}
+import os, sys
+sys.path.insert(0, os.environ['_VE_SCRIPTS'])
+from lib_registry import load_registry_cached
+reg = load_registry_cached(os.environ['_VE_REGISTRY'])
 models = reg.get('models') or {}
 count = sum(1 for m in models.values()
             if isinstance(m, dict)
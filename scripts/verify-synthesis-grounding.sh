@@ -40,8 +40,16 @@
 # With --strict, ANY ungrounded finding (any severity) or any severity-mismatch fails (exit 3).
 #
 # Exit codes: 0 ok (or warn-only) | 2 invalid invocation / missing inputs | 3 grounding violation
+#
+# Implementation: scripts/_grounding.py does the same check in one pass (hash-set lookups per
+# finding instead of grep over a concatenated corpus) and is used whenever python3 is available.
+# The bash below is the fallback; FLUX_GROUNDING_LEGACY=1 forces it. Output and exit codes match.
 set -euo pipefail
 
+if [[ "${FLUX_GROUNDING_LEGACY:-0}" != "1" ]] && command -v python3 >/dev/null 2>&1; then
+  exec python3 "$(dirname "${BASH_SOURCE[0]}")/_grounding.py" "$@"
+fi
+
 usage() {
   echo "Usage: verify-synthesis-grounding.sh <OUTPUT_DIR> [--run-uuid <uuid>] [--strict] [--json]" >&2
   exit 2
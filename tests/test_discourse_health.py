@@ -0,0 +1,145 @@
+"""Unit tests for discourse_health.py.
+
+Run: python3 -m pytest interverse/interflux/tests/test_discourse_health.py -v
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Allow importing the script as a module
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import discourse_health as dh  # noqa: E402
+
+WRAPPER = SCRIPT_DIR / "discourse-health.sh"
+
+FINDINGS = [
+    {"id": "A", "agent": "fd-a", "convergence": 1, "evidence_sources": ["x.py:1"]},
+    {"id": "B", "agent": "fd-a", "convergence": 2, "evidence_sources": []},
+    {"id": "C", "agent": "fd-b", "convergence_corrected": 1, "convergence": 3, "evidence_sources": ["y"]},
+    {"id": "D", "agent": "fd-c"},
+    {"id": "E", "agent": "fd-a", "convergence": 1.0, "evidence_sources": ["z"]},
+    {"id": "F", "agent": "fd-b", "convergence": False},
+]
+
+# Captured from the previous jq implementation of discourse-health.sh on FINDINGS.
+EXPECTED = """{
+  "participation_gini": 0.222,
+  "novelty_rate": 0.833,
+  "response_relevance": 0.5,
+  "agent_finding_counts": {
+    "fd-a": 3,
+    "fd-b": 2,
+    "fd-c": 1
+  },
+  "total_findings": 6,
+  "metrics_source": "findings.json",
+  "flow_state": "degraded",
+  "warnings": [
+    "response_relevance (0.5) below threshold (0.7)"
+  ]
+}
+"""
+
+
+def _run_dir(d: Path, findings: list[dict], **extra) -> Path:
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "findings.json").write_text(json.dumps({"verdict": "risky", **extra, "findings": findings}))
+    return d
+
+
+def test_wrapper_output_matches_legacy_jq(tmp_path: Path) -> None:
+    _run_dir(tmp_path, FINDINGS)
+    r = subprocess.run(["bash", str(WRAPPER), str(tmp_path)], capture_output=True, text=True)
+    assert r.returncode == 0
+    assert r.stdout == EXPECTED
+    assert (tmp_path / "discourse-health.json").read_text() == EXPECTED
+
+
+def test_wrapper_missing_findings(tmp_path: Path) -> None:
+    r = subprocess.run(["bash", str(WRAPPER), str(tmp_path)], capture_output=True, text=True)
+    assert r.returncode == 1
+    assert json.loads(r.stdout) == {"error": "findings.json not found", "flow_state": "unknown"}
+    assert (tmp_path / "discourse-health.json").exists()
+
+
+def test_gini_edges() -> None:
+    assert dh.gini([]) == 0.0
+    assert dh.gini([5]) == 0.0
+    assert dh.gini([2, 2, 2]) == pytest.approx(0.0)
+    assert dh.gini([0, 0, 9]) == pytest.approx(2 / 3)
+
+
+def test_empty_findings_zeros() -> None:
+    m = dh.compute_metrics([])
+    assert (m["participation_gini"], m["novelty_rate"], m["response_relevance"]) == (0, 0, 0)
+    assert dh.classify(m, dh.Thresholds())[0] == "unhealthy"
+
+
+def test_round_half_up_like_jq() -> None:
+    assert dh._round3(0.0005) == 0.001
+    assert dh._round3(2 / 3) == 0.667
+
+
+def test_thresholds_from_config(tmp_path: Path) -> None:
+    shipped = dh.load_thresholds(dh.DEFAULT_CONFIG)
+    assert shipped == dh.Thresholds()
+    cfg = tmp_path / "s.yaml"
+    cfg.write_text("flow_envelope:\n  response_relevance_min: 0.4\n"
+                   "  states:\n    degraded:\n      gini_below: 0.9\n")
+    t = dh.load_thresholds(str(cfg))
+    assert t.relevance_min == 0.4 and t.degraded_gini == 0.9 and t.gini_max == 0.3
+    assert dh.classify(dh.compute_metrics(FINDINGS), t) == ("healthy", [])
+
+
+@pytest.mark.parametrize("chunk", [7, 64, 1 << 16])
+def test_stream_array_matches_json_load(monkeypatch: pytest.MonkeyPatch, chunk: int) -> None:
+    monkeypatch.setattr(dh, "_CHUNK", chunk)
+    doc = {"summary": {"findings": ["decoy"], "note": 'has "findings": [1] in a string'},
+           "findings": FINDINGS + [{"agent": "fd-é", "n": 12345678901234}],
+           "after": [1, 2]}
+    got = list(dh._stream_array(io.StringIO(json.dumps(doc)), "findings"))
+    assert got == doc["findings"]
+
+
+def test_stream_array_missing_key() -> None:
+    assert list(dh._stream_array(io.StringIO('{"other": [1]}'), "findings")) == []
+
+
+def test_iter_findings_streams_large_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _run_dir(tmp_path, FINDINGS)
+    monkeypatch.setattr(dh, "STREAM_THRESHOLD_BYTES", 0)
+    assert list(dh.iter_findings(str(tmp_path / "findings.json"))) == FINDINGS
+
+
+def test_trend_over_run_directory(tmp_path: Path) -> None:
+    healthy = [{"agent": a, "convergence": 1, "evidence_sources": ["e"]} for a in "abc"]
+    for i in range(4):
+        d = _run_dir(tmp_path / f"run-{i}", healthy if i < 2 else FINDINGS)
+        os.utime(d / "findings.json", (1_000_000 + i, 1_000_000 + i))
+    (tmp_path / "broken").mkdir()
+    (tmp_path / "broken" / "findings.json").write_text("{nope")
+    os.utime(tmp_path / "broken" / "findings.json", (999_000, 999_000))
+
+    report = dh.trend([str(tmp_path)], dh.Thresholds())
+    assert report["runs"] == 5 and report["errors"] == 1
+    assert report["flow_states"] == {"healthy": 2, "degraded": 2, "unhealthy": 0, "unknown": 1}
+    assert report["drift"]["response_relevance"] == {
+        "first_half_mean": 1, "second_half_mean": 0.5, "delta": -0.5}
+    assert report["metrics"]["participation_gini"]["p90"] == 0.222
+
+
+def test_trend_cli_jsonl(tmp_path: Path) -> None:
+    _run_dir(tmp_path / "r1", FINDINGS)
+    r = subprocess.run([sys.executable, str(SCRIPT_DIR / "discourse_health.py"), "trend",
+                        str(tmp_path), "--jsonl"], capture_output=True, text=True, check=True)
+    (rec,) = [json.loads(x) for x in r.stdout.splitlines()]
+    assert rec["run"].endswith("r1") and rec["flow_state"] == "degraded"
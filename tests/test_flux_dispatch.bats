@@ -81,6 +81,23 @@ teardown() {
     [[ "$output" == "0" ]]
 }
 
+@test "wait measures latency from the acquire stamp, not from its own start" {
+    bash "$SCRIPT" reset "$OUTPUT_DIR" 3
+    FLUX_DISPATCH_OUTPUT="$OUTPUT_DIR/fd-safety.md" bash "$SCRIPT" acquire "$OUTPUT_DIR" 3
+    [[ -f "$OUTPUT_DIR/.dispatch-started/fd-safety" ]]
+    # The agent finishes before wait is even called: the sample must still
+    # carry the ~1s since dispatch, not read as a 0s completion.
+    sleep 1
+    touch "$OUTPUT_DIR/fd-safety.md"
+    run bash "$SCRIPT" wait "$OUTPUT_DIR" "$OUTPUT_DIR/fd-safety.md" 3 5
+    [[ "$status" -eq 0 ]]
+    run python3 -c 'import json,sys; print(json.load(open(sys.argv[1]))["short_rtt"] >= 1.0)' \
+        "$OUTPUT_DIR/.dispatch-adaptive.json"
+    [[ "$output" == "True" ]]
+    # The stamp is consumed by the sample.
+    [[ ! -e "$OUTPUT_DIR/.dispatch-started/fd-safety" ]]
+}
+
 @test "concurrent acquires never exceed the cap" {
     bash "$SCRIPT" reset "$OUTPUT_DIR" 3
     # Fire 8 acquires in parallel against a cap of 3, each with a short timeout.
@@ -106,3 +123,18 @@ teardown() {
     # budget.yaml ships dispatch.max_concurrent_agents: 6
     [[ "$output" == "ok 0/6" ]]
 }
+
+@test "acquire paces through the provider rate limiter and releases the slot when it cannot admit" {
+    export INTERFLUX_STATE_DIR="$OUTPUT_DIR/state"
+    bash "$SCRIPT" reset "$OUTPUT_DIR" 3
+    run env FLUX_DISPATCH_PROVIDER=openrouter OPENROUTER_RATE_LIMIT=1 bash "$SCRIPT" acquire "$OUTPUT_DIR" 3 2
+    [[ "$status" -eq 0 ]]
+    [[ -f "$INTERFLUX_STATE_DIR/openrouter-state.json" ]]
+    # Requests bucket is now empty: the slot is claimed, the limiter times out,
+    # and the slot is handed back so the cap does not leak.
+    run env FLUX_DISPATCH_PROVIDER=openrouter OPENROUTER_RATE_LIMIT=1 bash "$SCRIPT" acquire "$OUTPUT_DIR" 3 1
+    [[ "$status" -eq 1 ]]
+    [[ "$output" == *"ratelimit"* ]]
+    run bash "$SCRIPT" count "$OUTPUT_DIR"
+    [[ "$output" == "1" ]]
+}